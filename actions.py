@@ -9,13 +9,12 @@ from __future__ import annotations
 from typing import Optional, Tuple, TYPE_CHECKING, List
 
 import color
-import tcod
 from entity import Actor, Chest, TableContainer, BookShelfContainer
+import entity_kinds
 import exceptions
 import random
 from settings import DEBUG_MODE
 import settings
-import numpy as np
 import tile_types
 from audio import (
     play_player_footstep,
@@ -178,10 +177,9 @@ class TunnelingStaffAction(Action):
         self.target_xy = target_xy
 
     def _is_wall_target(self, gamemap, x: int, y: int) -> bool:
-        tile = gamemap.tiles[x, y]
-        if np.array_equal(tile, tile_types.breakable_wall):
+        if gamemap.tiles.is_tile(x, y, tile_types.breakable_wall):
             return True
-        if np.array_equal(tile, tile_types.closed_door):
+        if gamemap.tiles.is_tile(x, y, tile_types.closed_door):
             return False
         return not gamemap.tiles["walkable"][x, y]
 
@@ -1194,20 +1192,9 @@ class ThrowItemAction(Action):
 
     def _line_of_fire_clear(self, x0: int, y0: int, x1: int, y1: int) -> bool:
         """Return True if nothing blocks the projectile between origin and target."""
-        gamemap = self.engine.game_map
-        try:
-            transparent = gamemap.get_transparency_map()
-        except AttributeError:
-            transparent = gamemap.tiles["transparent"]
-        line = tcod.los.bresenham((x0, y0), (x1, y1)).tolist()
-        for x, y in line[1:]:
-            if (x, y) == (x1, y1):
-                break
-            if not transparent[x, y]:
-                return False
-            if gamemap.get_actor_at_location(x, y):
-                return False
-        return True
+        from line_of_fire import line_of_fire_clear
+
+        return line_of_fire_clear(self.engine.game_map, (x0, y0), (x1, y1))
 
     def _animate_throw(self, path: List[Tuple[int, int]]) -> None:
         if not path:
@@ -1835,7 +1822,7 @@ class MovementAction(ActionWithDirection):
                 tag = "flutter" if is_flying else "footsteps"
                 self.engine.register_noise(self.entity, level=noise_level, duration=1, tag=tag)
         if player_moved and self.entity is self.engine.player:
-            play_player_footstep()
+            self.engine.play_sound_effect(play_player_footstep, source=self.entity, force=True)
             if getattr(self.engine.game_map, "register_player_room_entry", None):
                 self.engine.game_map.register_player_room_entry(self.entity)
             if (
@@ -2271,16 +2258,18 @@ class BumpAction(ActionWithDirection):
                 if self.entity is not self.engine.player:
                     self.entity.fighter.handle_post_action(False, self.__class__.__name__)
                 return
-            self_name = getattr(self.entity, "name", "").lower()
             target_name = getattr(target, "name", "").lower()
-            if self_name == "adventurer" and target_name == "adventurer":
+            if (
+                entity_kinds.kind_of(self.entity) == entity_kinds.ADVENTURER
+                and entity_kinds.kind_of(target) == entity_kinds.ADVENTURER
+            ):
                 return WaitAction(self.entity).perform()
             if target_name in ("el viejo", "the old man"):
                 ai = getattr(target, "ai", None)
                 if self.entity is self.engine.player and hasattr(ai, "on_player_bump"):
                     ai.on_player_bump()
                 return WaitAction(self.entity).perform()
-            if getattr(target, "name", "").lower() == "door":
+            if entity_kinds.kind_of(target) == entity_kinds.DOOR:
                 fighter = getattr(target, "fighter", None)
                 if fighter and hasattr(fighter, "set_open"):
                     if getattr(fighter, "is_open", False):
@@ -1,30 +1,75 @@
-"""Helpers to manage ambient audio playback."""
+"""Helpers to manage ambient audio playback.
+
+Los efectos se decodifican a `pygame.mixer.Sound` la primera vez que suenan.
+Para que eso no pase en mitad de un combate, `start_audio_warmup()` lanza al
+arrancar un hilo que decodifica en `_sound_cache` todos los efectos de
+`audio_settings` en el orden de `AUDIO_WARMUP_ORDER` (pasos y combate
+primero). Si el juego pide un efecto que el hilo está decodificando en ese
+momento, espera a que termine en vez de decodificarlo dos veces. Las pistas
+de ambiente no se decodifican: suenan en streaming con `pygame.mixer.music`,
+y del warm-up sólo se llevan su ruta ya resuelta.
+
+Los efectos no van directos a un canal libre: el motor los encola durante el
+frame con la pista, el volumen y la categoría ya elegidos
+(`capture_sound_effects`) y `Engine.flush_sound_effects` los mezcla juntos
+(`play_sound_effects`). Las pistas repetidas suenan una vez, cada categoría
+respeta su límite de voces de `SOUND_EFFECT_CATEGORIES` y, si no caben todas,
+ganan las de más prioridad.
+
+pygame no se importa al cargar este módulo (tarda más que todo el menú
+principal): se importa la primera vez que se inicializa el mixer, que
+normalmente es en el hilo de `start_audio_warmup()`.
+"""
 from __future__ import annotations
 
-import random
-import random
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional, Set, TYPE_CHECKING
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
 
+import seeding
 import settings
 import audio_settings as audio_cfg
 
+# Las pistas se eligen con el flujo cosmético de la partida (ver seeding).
+rng = seeding.cosmetic
+
 if TYPE_CHECKING:  # pragma: no cover - for type checkers only
     from entity import Item, Actor
 
-try:
+if TYPE_CHECKING:  # pragma: no cover
     import pygame
-except Exception as exc:  # pragma: no cover - optional dependency
-    pygame = None
-    _pygame_import_error = exc
-else:
-    _pygame_import_error = None
+
+# Se asigna en `_import_pygame` (None mientras no se haya importado o si falta).
+pygame = None  # type: ignore[assignment]
+_pygame_import_error: Optional[Exception] = None
+_pygame_import_attempted = False
 
 _mixer_initialized = False
 _mixer_attempted = False
+_mixer_lock = threading.RLock()
 _sound_cache: Dict[str, "pygame.mixer.Sound"] = {}
 _audio_silenced = False
+# Rutas ya resueltas por `_resolve_audio_path` (sólo las que existen).
+_resolved_paths: Dict[str, Path] = {}
+# Efectos que el hilo de warm-up está decodificando: {clave de caché: evento}.
+_pending_loads: Dict[str, threading.Event] = {}
+_pending_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def _import_pygame() -> None:
+    global pygame, _pygame_import_error, _pygame_import_attempted
+    if _pygame_import_attempted:
+        return
+    _pygame_import_attempted = True
+    try:
+        import pygame as pygame_module
+    except Exception as exc:  # pragma: no cover - optional dependency
+        _pygame_import_error = exc
+    else:
+        pygame = pygame_module
 
 
 def _ensure_mixer_initialized(*, allow_when_disabled: bool = False) -> bool:
@@ -37,6 +82,14 @@ def _ensure_mixer_initialized(*, allow_when_disabled: bool = False) -> bool:
         When True, this bypasses that restriction (used for sound effects that
         should work even though ambient music is off).
     """
+    if _mixer_initialized:
+        return True
+    # El hilo de warm-up y el principal pueden llegar aquí a la vez.
+    with _mixer_lock:
+        return _initialize_mixer(allow_when_disabled)
+
+
+def _initialize_mixer(allow_when_disabled: bool) -> bool:
     global _mixer_initialized, _mixer_attempted
 
     if _mixer_initialized:
@@ -49,6 +102,7 @@ def _ensure_mixer_initialized(*, allow_when_disabled: bool = False) -> bool:
     if _mixer_attempted and not allow_when_disabled:
         return False
 
+    _import_pygame()
     if pygame is None:
         if _pygame_import_error and settings.DEBUG_MODE:
             print(f"[audio] pygame is not available: {_pygame_import_error}")
@@ -111,6 +165,9 @@ def _resolve_audio_path(track: str) -> Optional[Path]:
     literal path first and then fall back to treating it as relative to the
     project root (settings' folder) and the current working directory.
     """
+    cached = _resolved_paths.get(track)
+    if cached is not None:
+        return cached
     settings_dir = Path(settings.__file__).resolve().parent
     raw_candidates = [track]
     stripped = track.lstrip("/\\")
@@ -135,6 +192,7 @@ def _resolve_audio_path(track: str) -> Optional[Path]:
             continue
         seen.add(key)
         if candidate.exists():
+            _resolved_paths[track] = candidate
             return candidate
 
     return None
@@ -278,7 +336,7 @@ class AmbientSoundController:
             candidates = [str(value).strip() for value in entry if isinstance(value, str) and value.strip()]
             if not candidates:
                 return None
-            return random.choice(candidates)
+            return rng.choice(candidates)
         if isinstance(entry, str) and entry.strip():
             return entry
         return None
@@ -408,7 +466,7 @@ def _pick_random_track(list_attr: str, single_attr: Optional[str] = None, *, max
             valid.append(single)
     if not valid:
         return None
-    return random.choice(valid[:max_entries])
+    return rng.choice(valid[:max_entries])
 
 
 def _load_sound(track: str) -> Optional["pygame.mixer.Sound"]:
@@ -422,37 +480,250 @@ def _load_sound(track: str) -> Optional["pygame.mixer.Sound"]:
     cache_key = str(resolved)
     sound = _sound_cache.get(cache_key)
     if sound is None:
-        try:
-            sound = pygame.mixer.Sound(str(resolved))
-        except Exception as exc:  # pragma: no cover
-            if settings.DEBUG_MODE and cache_key not in _missing_effects:
-                print(f"[audio] Unable to load '{resolved}': {exc}")
-            _missing_effects.add(cache_key)
-            return None
-        _sound_cache[cache_key] = sound
+        pending = _pending_loads.get(cache_key)
+        if pending is not None:
+            # El warm-up ya lo está decodificando: esperar cuesta menos que repetirlo.
+            pending.wait(timeout=5.0)
+            sound = _sound_cache.get(cache_key)
+            if sound is not None or cache_key in _missing_effects:
+                return sound
+        sound = _decode_sound(cache_key)
+    return sound
+
+
+def _decode_sound(cache_key: str) -> Optional["pygame.mixer.Sound"]:
+    try:
+        sound = pygame.mixer.Sound(cache_key)
+    except Exception as exc:  # pragma: no cover
+        if settings.DEBUG_MODE and cache_key not in _missing_effects:
+            print(f"[audio] Unable to load '{cache_key}': {exc}")
+        _missing_effects.add(cache_key)
+        return None
+    _sound_cache[cache_key] = sound
     return sound
 
 
-def _play_sound_effect(track: str, *, volume: float) -> None:
+# Grupos de AUDIO_WARMUP_ORDER cuyas pistas o interruptor tienen otro prefijo.
+_WARMUP_TRACK_PREFIXES: Dict[str, tuple] = {
+    "ITEM_PICKUP": ("POTION_PICKUP", "SCROLL_PICKUP", "GENERIC_PICKUP"),
+}
+_WARMUP_SWITCHES: Dict[str, str] = {
+    "MELEE_DUMMY": "MELEE_ATTACK",
+}
+# Se reproducen en streaming (pygame.mixer.music), no se decodifican.
+_STREAMED_GROUPS = ("AMBIENT", "MENU_AMBIENT")
+
+
+def _collect_tracks(value: object, found: List[str]) -> None:
+    """Append every track path inside a setting (string, list or nested event dicts)."""
+    if isinstance(value, str):
+        if value.strip():
+            found.append(value)
+    elif isinstance(value, dict):
+        for key, entry in value.items():
+            if key != "volume":
+                _collect_tracks(entry, found)
+    elif isinstance(value, (list, tuple, set)):
+        for entry in value:
+            _collect_tracks(entry, found)
+
+
+def _warmup_groups() -> List[str]:
+    order = [str(group) for group in getattr(audio_cfg, "AUDIO_WARMUP_ORDER", None) or ()]
+    for name in sorted(vars(audio_cfg)):
+        if name.endswith("_SOUND_ENABLED"):
+            group = name[: -len("_SOUND_ENABLED")]
+            if group not in order and group not in _STREAMED_GROUPS:
+                order.append(group)
+    return order
+
+
+def warmup_tracks() -> List[str]:
+    """Effect tracks of every enabled group, most likely to play first, without repeats."""
+    tracks: List[str] = []
+    seen: Set[str] = set()
+    for group in _warmup_groups():
+        switch = _WARMUP_SWITCHES.get(group, group)
+        if not getattr(audio_cfg, f"{switch}_SOUND_ENABLED", False):
+            continue
+        found: List[str] = []
+        for prefix in _WARMUP_TRACK_PREFIXES.get(group, (group,)):
+            _collect_tracks(getattr(audio_cfg, f"{prefix}_SOUNDS", None), found)
+            _collect_tracks(getattr(audio_cfg, f"{prefix}_SOUND", None), found)
+        for track in found:
+            if track not in seen:
+                seen.add(track)
+                tracks.append(track)
+    return tracks
+
+
+def _streamed_tracks() -> List[str]:
+    found: List[str] = []
+    _collect_tracks(getattr(audio_cfg, "AMBIENT_SOUND_TRACKS", None), found)
+    _collect_tracks(getattr(audio_cfg, "AMBIENT_SOUND_DEFAULT_TRACK", None), found)
+    _collect_tracks(getattr(audio_cfg, "MENU_AMBIENT_SOUND_TRACKS", None), found)
+    _collect_tracks(getattr(audio_cfg, "MENU_AMBIENT_SOUND_TRACK", None), found)
+    return found
+
+
+def _warm_up(tracks: Iterable[str]) -> None:
+    for track in tracks:
+        resolved = _resolve_audio_path(track)
+        if not resolved:
+            continue
+        cache_key = str(resolved)
+        with _pending_lock:
+            if cache_key in _sound_cache or cache_key in _pending_loads:
+                continue
+            done = _pending_loads[cache_key] = threading.Event()
+        try:
+            _decode_sound(cache_key)
+        finally:
+            with _pending_lock:
+                _pending_loads.pop(cache_key, None)
+            done.set()
+    for track in _streamed_tracks():
+        _resolve_audio_path(track)
+
+
+def _warm_up_mixer(tracks: List[str]) -> None:
+    if not _ensure_mixer_initialized(allow_when_disabled=True) or pygame is None:
+        return
+    _warm_up(tracks)
+
+
+def start_audio_warmup() -> Optional[threading.Thread]:
+    """Import pygame, start the mixer and decode every configured effect in a background thread.
+
+    Sólo la primera llamada lanza el hilo (de tipo daemon, no retrasa la
+    salida). Si el juego necesita el mixer antes, lo inicializa él y el hilo
+    lo encuentra ya listo.
+    """
+    global _warmup_thread
+    if _warmup_thread is not None:
+        return _warmup_thread
+    if not getattr(audio_cfg, "AUDIO_WARMUP_ENABLED", True):
+        return None
+    _warmup_thread = threading.Thread(
+        target=_warm_up_mixer, args=(warmup_tracks(),), name="audio-warmup", daemon=True
+    )
+    _warmup_thread.start()
+    return _warmup_thread
+
+
+def audio_warmup_done() -> bool:
+    thread = _warmup_thread
+    return thread is not None and not thread.is_alive()
+
+
+# (pista, volumen, categoría) anotados dentro de `capture_sound_effects`, o None.
+_frame_sounds: Optional[List[Tuple[str, float, str]]] = None
+# Canales que está usando cada categoría: {categoría: [(canal, sonido)]}.
+_category_voices: Dict[str, List[Tuple["pygame.mixer.Channel", "pygame.mixer.Sound"]]] = {}
+
+
+def _play_sound_effect(track: str, *, volume: float, category: str = "world") -> None:
     if _audio_silenced:
         return
-    if not _ensure_mixer_initialized(allow_when_disabled=True):
+    clamped = max(0.0, min(1.0, float(volume)))
+    if _frame_sounds is not None:
+        _frame_sounds.append((track, clamped, category))
         return
+    _mix_sound_effects([(track, clamped, category)])
 
-    if pygame is None:
+
+@contextmanager
+def capture_sound_effects() -> Iterator[List[Tuple[str, float, str]]]:
+    """Collect the (track, volume, category) the block would play, without playing them.
+
+    El motor lo usa al encolar un efecto: la pista y el volumen se eligen en
+    ese momento (con el nombre y el estado que tenga entonces la fuente) y al
+    acabar el frame sólo se decide si se oyen.
+    """
+    global _frame_sounds
+    outer, captured = _frame_sounds, []
+    _frame_sounds = captured
+    try:
+        yield captured
+    finally:
+        _frame_sounds = outer
+
+
+def play_sound_effects(requests: Iterable[Tuple[str, float, str]]) -> None:
+    """Mix effects picked earlier (see `capture_sound_effects`) together."""
+    if _audio_silenced:
         return
+    _mix_sound_effects(list(requests))
 
-    sound = _load_sound(track)
-    if sound is None:
+
+def _category_config(category: str) -> Tuple[int, int]:
+    categories = getattr(audio_cfg, "SOUND_EFFECT_CATEGORIES", None) or {}
+    config = categories.get(category) or categories.get("world") or {}
+    return max(0, int(config.get("voices", 2))), int(config.get("priority", 0))
+
+
+def _busy_voices(category: str) -> int:
+    voices = _category_voices.get(category)
+    if not voices:
+        return 0
+    alive = []
+    for channel, sound in voices:
+        try:
+            if channel.get_busy() and channel.get_sound() is sound:
+                alive.append((channel, sound))
+        except Exception:
+            pass
+    _category_voices[category] = alive
+    return len(alive)
+
+
+def _mix_sound_effects(requests: List[Tuple[str, float, str]]) -> None:
+    """Play a frame's effects: no repeated tracks, per-category voice caps, by priority."""
+    if _audio_silenced:
+        return
+    if not _ensure_mixer_initialized(allow_when_disabled=True):
+        return
+    if pygame is None:
         return
 
-    clamped = max(0.0, min(1.0, float(volume)))
-    try:
-        sound.set_volume(clamped)
-        sound.play()
-    except Exception as exc:  # pragma: no cover
-        if settings.DEBUG_MODE:
-            print(f"[audio] Unable to play effect '{track}': {exc}")
+    # Una pista repetida en el frame suena una vez, con el mayor volumen pedido.
+    merged: Dict[str, List] = {}
+    for track, volume, category in requests:
+        entry = merged.get(track)
+        if entry is None:
+            merged[track] = [track, volume, category]
+        elif volume > entry[1]:
+            entry[1] = volume
+    # Orden estable: a igual prioridad, en el orden en que se pidieron.
+    ordered = sorted(merged.values(), key=lambda entry: -_category_config(entry[2])[1])
+
+    budget = max(0, int(getattr(audio_cfg, "SOUND_EFFECT_MAX_VOICES", 6)))
+    used: Dict[str, int] = {}
+    for track, volume, category in ordered:
+        if budget <= 0:
+            break
+        voices, _ = _category_config(category)
+        if category not in used:
+            used[category] = _busy_voices(category)
+        if used[category] >= voices:
+            continue
+        sound = _load_sound(track)
+        if sound is None:
+            continue
+        try:
+            # Sin forzar: si no queda un canal libre no se corta ningún bucle.
+            channel = pygame.mixer.find_channel(False)
+            if channel is None:
+                break
+            sound.set_volume(volume)
+            channel.play(sound)
+        except Exception as exc:  # pragma: no cover
+            if settings.DEBUG_MODE:
+                print(f"[audio] Unable to play effect '{track}': {exc}")
+            continue
+        _category_voices.setdefault(category, []).append((channel, sound))
+        used[category] += 1
+        budget -= 1
 
 
 def preload_campfire_audio() -> None:
@@ -539,7 +810,7 @@ def play_item_pickup_sound(item: Optional["Item"]) -> None:
         return
 
     volume = _resolve_pickup_volume(category)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="player")
 
 
 def play_player_footstep() -> None:
@@ -554,7 +825,7 @@ def play_player_footstep() -> None:
         return
 
     volume = getattr(audio_cfg, "PLAYER_FOOTSTEP_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="footstep")
 
 
 def play_door_open_sound() -> None:
@@ -564,7 +835,7 @@ def play_door_open_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "DOOR_OPEN_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def play_door_close_sound() -> None:
@@ -574,7 +845,7 @@ def play_door_close_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "DOOR_CLOSE_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def _extract_melee_event_track(event_config: Optional[dict]) -> tuple[Optional[str], Optional[float]]:
@@ -589,7 +860,7 @@ def _extract_melee_event_track(event_config: Optional[dict]) -> tuple[Optional[s
         tracks.append(single)
     if not tracks:
         return None, None
-    return random.choice(tracks), event_config.get("volume")
+    return rng.choice(tracks), event_config.get("volume")
 
 
 def _resolve_melee_volume(value: Optional[float]) -> float:
@@ -668,7 +939,7 @@ def play_melee_attack_sound(attacker: Optional["Actor"], result: str, *, target_
     if not track:
         return
     resolved_volume = _resolve_melee_volume(volume)
-    _play_sound_effect(track, volume=resolved_volume)
+    _play_sound_effect(track, volume=resolved_volume, category="melee")
 
 
 def _select_pain_sound(entity: Optional["Actor"]) -> tuple[Optional[str], Optional[float]]:
@@ -690,7 +961,7 @@ def play_pain_sound(entity: Optional["Actor"]) -> None:
         return
     default_value = float(getattr(audio_cfg, "PAIN_SOUND_DEFAULT_VOLUME", 1.0))
     resolved_volume = _resolve_volume(volume, default_value)
-    _play_sound_effect(track, volume=resolved_volume)
+    _play_sound_effect(track, volume=resolved_volume, category="pain")
 
 
 def _select_death_sound(entity: Optional["Actor"]) -> tuple[Optional[str], Optional[float]]:
@@ -712,7 +983,7 @@ def play_death_sound(entity: Optional["Actor"]) -> None:
         return
     default_value = float(getattr(audio_cfg, "DEATH_SOUND_DEFAULT_VOLUME", 1.0))
     resolved_volume = _resolve_volume(volume, default_value)
-    _play_sound_effect(track, volume=resolved_volume)
+    _play_sound_effect(track, volume=resolved_volume, category="death")
 
 
 def play_chest_open_sound() -> None:
@@ -722,7 +993,7 @@ def play_chest_open_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "CHEST_OPEN_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def play_table_open_sound() -> None:
@@ -732,7 +1003,7 @@ def play_table_open_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "TABLE_OPEN_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 def play_bookshelf_open_sound() -> None:
     if not getattr(audio_cfg, "BOOKSHELF_OPEN_SOUND_ENABLED", False):
@@ -741,7 +1012,7 @@ def play_bookshelf_open_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "BOOKSHELF_OPEN_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 def play_stair_descend_sound() -> None:
     if not getattr(audio_cfg, "STAIR_DESCEND_SOUND_ENABLED", False):
@@ -750,7 +1021,7 @@ def play_stair_descend_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "STAIR_DESCEND_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def play_breakable_wall_destroy_sound() -> None:
@@ -760,7 +1031,7 @@ def play_breakable_wall_destroy_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "BREAKABLE_WALL_DESTROY_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def play_table_destroy_sound() -> None:
@@ -770,7 +1041,7 @@ def play_table_destroy_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "TABLE_DESTROY_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def play_player_stamina_depleted_sound() -> None:
@@ -783,7 +1054,7 @@ def play_player_stamina_depleted_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "PLAYER_STAMINA_DEPLETED_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="player")
 
 
 def play_tunneling_staff_sound() -> None:
@@ -796,7 +1067,7 @@ def play_tunneling_staff_sound() -> None:
     if not track:
         return
     volume = getattr(audio_cfg, "TUNNELING_STAFF_VOLUME", 1.0)
-    _play_sound_effect(track, volume=volume)
+    _play_sound_effect(track, volume=volume, category="world")
 
 
 def _start_campfire_loop(volume: float) -> None:
@@ -7,6 +7,50 @@ MIXER_SIZE = -16
 MIXER_CHANNELS = 2
 MIXER_BUFFER = 2048
 
+# Warm-up de efectos -----------------------------------------------------------
+# Al arrancar, un hilo en segundo plano decodifica todos los efectos de este
+# fichero para que la primera reproducción no se note en mitad de un combate.
+# Las pistas de ambiente (por planta y del menú) no se decodifican: se
+# reproducen en streaming con pygame.mixer.music.
+AUDIO_WARMUP_ENABLED = True
+# Orden de carga (lo más frecuente primero). Los grupos que no aparezcan aquí
+# se cargan al final; los desactivados (*_SOUND_ENABLED = False) se omiten.
+AUDIO_WARMUP_ORDER = [
+    "PLAYER_FOOTSTEP",
+    "MELEE_ATTACK",
+    "MELEE_DUMMY",
+    "PAIN",
+    "DEATH",
+    "DOOR_OPEN",
+    "DOOR_CLOSE",
+    "ITEM_PICKUP",
+    "PLAYER_STAMINA_DEPLETED",
+    "BREAKABLE_WALL_DESTROY",
+    "TABLE_DESTROY",
+    "CHEST_OPEN",
+    "TABLE_OPEN",
+    "BOOKSHELF_OPEN",
+    "STAIR_DESCEND",
+    "TUNNELING_STAFF",
+    "CAMPFIRE",
+    "WIND",
+]
+
+# Mezcla de efectos --------------------------------------------------------------
+# Los efectos de un mismo frame se mezclan juntos: una pista repetida suena una
+# sola vez y cada categoría tiene un máximo de voces simultáneas. Si no caben
+# todas, suenan primero las de prioridad más alta.
+SOUND_EFFECT_MAX_VOICES = 6  # Efectos nuevos por frame (deja canales a los bucles).
+SOUND_EFFECT_CATEGORIES = {
+    # categoría: voces simultáneas y prioridad (mayor = más importante)
+    "death": {"voices": 2, "priority": 5},
+    "pain": {"voices": 2, "priority": 4},
+    "melee": {"voices": 3, "priority": 3},
+    "player": {"voices": 2, "priority": 3},  # recoger objetos, agotamiento...
+    "world": {"voices": 2, "priority": 2},  # puertas, cofres, muros...
+    "footstep": {"voices": 1, "priority": 1},
+}
+
 # Ambient loops --------------------------------------------------------------
 AMBIENT_SOUND_ENABLED = True
 AMBIENT_SOUND_VOLUME = 1.0  # 0.0 - 1.0
@@ -0,0 +1,308 @@
+"""Background autosave that does not stall the turn loop.
+
+Sólo se guardaba al salir (o al fallar) desde `main.main`; un guardado
+síncrono a mitad de partida pararía el juego mientras se serializa y se
+comprime todo el mundo. El autoguardado salta cada
+`AUTOSAVE_INTERVAL_TURNS` turnos y al cambiar de planta, y divide el trabajo:
+
+- En sistemas con 'fork' se hace `os.fork()`: el hijo recibe una copia
+  (copy-on-write) del proceso con el grafo tal y como está al acabar el
+  turno, la serializa, comprime y escribe, y termina con `os._exit`. El
+  padre sólo paga el `fork` y sigue jugando; un hilo espera al hijo y
+  recoge los blobs escritos para que el siguiente guardado reutilice las
+  plantas que no han cambiado.
+- Sin 'fork' se toma en primer plano la instantánea (`save_archive.snapshot`,
+  sólo pickles en memoria) y la compresión y la escritura se hacen en un
+  hilo. Para que ningún turno pague más de un fotograma, el trabajo se
+  reparte: en el turno de la escalera no se hace nada; en los siguientes se
+  serializa por adelantado una planta sucia por turno (`save_archive.prepare`)
+  y, cuando sólo quedan la cabecera y la planta actual, se toma la
+  instantánea si su coste estimado cabe en `AUTOSAVE_FRAME_BUDGET`; si no,
+  se aplaza como mucho `AUTOSAVE_MAX_DEFERRED_TURNS` turnos.
+
+La escritura es atómica (fichero temporal + `os.replace`) y rota copias
+anteriores (`savegame.sav.1`, `.2`...). La pausa en primer plano de cada
+autoguardado se mide y se guarda en `pauses`. Guardar al salir espera al
+autoguardado en curso como mucho `AUTOSAVE_WAIT_TIMEOUT` segundos; si no ha
+terminado, lo abandona (mata el proceso hijo, o el hilo ya no sustituye el
+fichero) para que un hijo colgado no bloquee la salida.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Optional
+
+import color
+import save_archive
+import settings
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+
+@dataclass
+class AutosaveRecord:
+    turn: int
+    reason: str
+    mode: str
+    pause: float
+    ok: Optional[bool] = None
+
+
+def fork_available() -> bool:
+    return hasattr(os, "fork") and hasattr(os, "waitpid")
+
+
+def _frame_budget() -> float:
+    return float(getattr(settings, "AUTOSAVE_FRAME_BUDGET", 1 / 60))
+
+
+def _use_fork() -> bool:
+    return bool(getattr(settings, "AUTOSAVE_USE_FORK", True)) and fork_available()
+
+
+class Autosaver:
+    """Decides when to autosave and runs at most one background save at a time.
+
+    Vive en `engine.autosaver` y no se guarda con la partida.
+    """
+
+    def __init__(self, filename: Optional[str] = None) -> None:
+        self.filename = filename or getattr(settings, "AUTOSAVE_FILENAME", "savegame.sav")
+        self.pauses: Deque[AutosaveRecord] = deque(maxlen=50)
+        self._last_turn: Optional[int] = None
+        self._last_map: Optional[GameMap] = None
+        self._worker: Optional[threading.Thread] = None
+        # Proceso hijo del autoguardado en curso (modo 'fork').
+        self._child: Optional[int] = None
+        # Activado al abandonar un autoguardado en hilo: ya no sustituye el fichero.
+        self._cancel: Optional[threading.Event] = None
+        # Caché cuya instantánea está escribiendo el hilo.
+        self._cache: Optional[save_archive.SaveCache] = None
+        # Modo hilo: motivo del autoguardado pendiente y turnos que lleva aplazado.
+        self._due: Optional[str] = None
+        self._deferred = 0
+
+    @property
+    def busy(self) -> bool:
+        worker = self._worker
+        return worker is not None and worker.is_alive()
+
+    @property
+    def last_pause(self) -> Optional[float]:
+        return self.pauses[-1].pause if self.pauses else None
+
+    def tick(self, engine: Engine) -> Optional[AutosaveRecord]:
+        """Call once at the end of every player turn; autosave if it is due."""
+        if not getattr(settings, "AUTOSAVE_ENABLED", True):
+            return None
+        player = getattr(engine, "player", None)
+        if player is None or not getattr(player, "is_alive", True):
+            return None
+        turn = int(getattr(engine, "turn", 0))
+        game_map = getattr(engine, "game_map", None)
+        if self._last_turn is None:
+            # Primera llamada tras empezar o cargar: sólo se toma referencia.
+            self._last_turn = turn
+            self._last_map = game_map
+            return None
+
+        reason = None
+        changed_floor = game_map is not self._last_map
+        if changed_floor and getattr(settings, "AUTOSAVE_ON_STAIRS", True):
+            reason = "stairs"
+        else:
+            interval = int(getattr(settings, "AUTOSAVE_INTERVAL_TURNS", 0) or 0)
+            if interval > 0 and turn - self._last_turn >= interval:
+                reason = "interval"
+        self._last_map = game_map
+        if _use_fork():
+            if reason is None:
+                return None
+            record = self.start(engine, reason)
+        else:
+            self._due = self._due or reason
+            if self._due is None or changed_floor:
+                # El turno de la escalera ya carga con la planta nueva.
+                return None
+            record = self._step(engine)
+        if record is not None and record.mode != "prepare":
+            self._last_turn = turn
+            self._due = None
+            self._deferred = 0
+        return record
+
+    def _step(self, engine: Engine) -> Optional[AutosaveRecord]:
+        """Advance the pending thread-mode autosave by at most one frame of work.
+
+        Primero se serializan por adelantado (`save_archive.prepare`) las plantas
+        sucias que no son la actual, una por turno; luego se toma la instantánea
+        (cabecera y planta actual) si su coste estimado cabe en un fotograma. Si
+        no cabe se aplaza, como mucho `AUTOSAVE_MAX_DEFERRED_TURNS` turnos.
+        """
+        if self.busy:
+            return None
+        dirty = save_archive.dirty_floors(engine)
+        if dirty:
+            started = time.perf_counter()
+            save_archive.prepare(engine, dirty[0])
+            record = AutosaveRecord(
+                turn=int(getattr(engine, "turn", 0)),
+                reason=self._due or "manual",
+                mode="prepare",
+                pause=time.perf_counter() - started,
+                ok=True,
+            )
+            self._record(record)
+            return record
+        estimate = save_archive.estimate_snapshot(engine)
+        max_deferred = int(getattr(settings, "AUTOSAVE_MAX_DEFERRED_TURNS", 0) or 0)
+        if estimate is not None and estimate > _frame_budget() and self._deferred < max_deferred:
+            self._deferred += 1
+            return None
+        return self.start(engine, self._due or "manual")
+
+    def start(self, engine: Engine, reason: str = "manual") -> Optional[AutosaveRecord]:
+        """Begin a background save now (skipped if the previous one is still running)."""
+        if self.busy:
+            return None
+        self.wait()
+        use_fork = _use_fork()
+        record = AutosaveRecord(
+            turn=int(getattr(engine, "turn", 0)),
+            reason=reason,
+            mode="fork" if use_fork else "thread",
+            pause=0.0,
+        )
+        started = time.perf_counter()
+        if use_fork:
+            pid = os.fork()
+            if pid == 0:
+                self._run_child(engine)
+            self._child = pid
+            worker = threading.Thread(
+                target=self._reap_child, args=(engine, pid, record), name="autosave", daemon=True
+            )
+        else:
+            snapshot = save_archive.snapshot(engine)
+            self._cache = snapshot.cache
+            self._cancel = threading.Event()
+            worker = threading.Thread(
+                target=self._write_snapshot,
+                args=(snapshot, record, self._cancel),
+                name="autosave",
+                daemon=True,
+            )
+        record.pause = time.perf_counter() - started
+        self._worker = worker
+        self._record(record)
+        worker.start()
+        return record
+
+    def _record(self, record: AutosaveRecord) -> None:
+        self.pauses.append(record)
+        if settings.DEBUG_MODE and record.pause > _frame_budget():
+            print(
+                f"DEBUG: {color.bcolors.WARNING}Autosave ({record.mode}) paused the game "
+                f"{record.pause * 1000:.1f} ms{color.bcolors.ENDC}"
+            )
+
+    def _run_child(self, engine: Engine) -> None:
+        """Body of the forked child: write the save and exit without cleanup."""
+        code = 1
+        try:
+            save_archive.save(
+                engine, self.filename, backups=int(getattr(settings, "AUTOSAVE_BACKUPS", 0))
+            )
+            code = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            # Nada de atexit, SDL ni buffers heredados del padre.
+            os._exit(code)
+
+    def _reap_child(self, engine: Engine, pid: int, record: AutosaveRecord) -> None:
+        _, status = os.waitpid(pid, 0)
+        self._child = None
+        record.ok = os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        if record.ok:
+            try:
+                save_archive.adopt_blobs(engine, self.filename)
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def _write_snapshot(
+        self,
+        snapshot: save_archive.SaveSnapshot,
+        record: AutosaveRecord,
+        cancel: threading.Event,
+    ) -> None:
+        try:
+            save_archive.write(
+                snapshot,
+                self.filename,
+                backups=int(getattr(settings, "AUTOSAVE_BACKUPS", 0)),
+                cancel=cancel,
+            )
+            record.ok = True
+        except save_archive.SaveCancelled:
+            record.ok = False
+        except Exception:
+            record.ok = False
+            traceback.print_exc()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the running autosave (if any) has been written.
+
+        Devuelve False si tras `timeout` segundos sigue en curso.
+        """
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+            if worker.is_alive():
+                return False
+            self._worker = None
+        return True
+
+    def finish(self) -> None:
+        """Wait a bounded time for the running autosave, then abandon it.
+
+        Para guardar al salir o borrar la partida: un proceso hijo colgado
+        se mata y un hilo que no ha acabado ya no sustituye el fichero.
+        """
+        if self.wait(float(getattr(settings, "AUTOSAVE_WAIT_TIMEOUT", 10.0))):
+            return
+        print(
+            f"{color.bcolors.WARNING}Autosave still running; abandoning it{color.bcolors.ENDC}"
+        )
+        pid = self._child
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            # El hilo que lo espera lo recoge enseguida.
+            self.wait(1.0)
+        elif self._cancel is not None:
+            self._cancel.set()
+            # Lo que esa instantánea daba por guardado no llegará a la caché.
+            if self._cache is not None:
+                self._cache.clean = {}
+        self._worker = None
+
+    def discard(self) -> None:
+        """Finish any pending autosave and delete the save file and its backups."""
+        self.finish()
+        backups = int(getattr(settings, "AUTOSAVE_BACKUPS", 0))
+        names = [self.filename] + save_archive.backup_names(self.filename, backups)
+        for name in names + save_archive.temp_names(self.filename):
+            if os.path.exists(name):
+                os.remove(name)
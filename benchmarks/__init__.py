@@ -0,0 +1,51 @@
+"""Benchmark suite of the engine's hot paths.
+
+No había forma de medir si una optimización mejoraba algo ni de ver cuándo
+un cambio empeoraba el rendimiento. Esta suite mide, siempre con la misma
+semilla (`DEFAULT_SEED` o `--seed`) y los mismos ajustes (`SETTINGS_OVERRIDES`):
+
+- `fov`: `Engine.update_fov`, `_apply_campfire_effects` y
+  `get_transparency_map` en una planta de mazmorra con hogueras;
+- `monsters`: `get_path_to` por la rama del BFS y por la del A*, y
+  `ModularAI.perform` de cada preset de `MODULAR_AI_PRESETS`;
+- `rendering`: `GameMap.render` (en la planta de siempre y en una caverna de
+  200x200 a través de la cámara) y `MessageLog.render_messages`;
+- `generation`: cada generador de plantas y un `GameWorld` completo;
+- `persistence`: `Engine.save_as` (en frío y sin cambios) y `load_game`.
+
+Cada benchmark es un generador registrado con `@benchmark`: prepara el
+escenario sobre los fixtures compartidos (`fixtures.engine()`), hace `yield`
+de la función a medir y después deshace lo que haya cambiado. Cada ronda
+empieza con los flujos de `seeding` resembrados, así que el trabajo medido no
+depende de qué benchmarks se hayan ejecutado antes.
+
+    python -m benchmarks run -o before.json [fov path ...]
+    python -m benchmarks run -o after.json
+    python -m benchmarks compare before.json after.json --threshold 10
+
+Los resultados incluyen también `memory_report.measure()` de la partida de
+los fixtures al acabar (bytes por planta, contenedor, clase de entidad y
+componente). `compare` marca como regresión lo que sea más lento que el
+umbral (en mediana por llamada) o lo que ocupe más, y sale con código 1 si
+hay alguna.
+
+`python -m benchmarks stress` (ver `benchmarks.stress`) no forma parte de la
+suite: juega plantas sintéticas con miles de entidades a varias escalas y
+da los percentiles por fase de cada una, la curva de escalado del motor.
+"""
+
+from benchmarks.harness import DEFAULT_SEED, REGISTRY, SETTINGS_OVERRIDES, benchmark, measure, prepare, run
+
+# Módulos con benchmarks, en el orden en que se ejecutan.
+SUITES = ("fov", "monsters", "rendering", "generation", "persistence")
+
+__all__ = [
+    "DEFAULT_SEED",
+    "REGISTRY",
+    "SETTINGS_OVERRIDES",
+    "SUITES",
+    "benchmark",
+    "measure",
+    "prepare",
+    "run",
+]
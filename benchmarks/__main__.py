@@ -0,0 +1,127 @@
+"""Command line of the suite: `python -m benchmarks run|compare|list|stress`."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict
+
+from benchmarks import compare as comparison
+from benchmarks.harness import DEFAULT_SEED
+
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+STRESS_OUTPUT = os.path.join("benchmarks", "results", "stress.json")
+
+
+def _print_result(name: str, stats: Dict[str, Any]) -> None:
+    print(
+        f"  {name:32} {stats['median_ms']:10.3f} ms"
+        f"  (min {stats['min_ms']:.3f}, ±{stats['stdev_ms']:.3f}, {stats['rounds']}x{stats['number']})",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def _print_stress(result: Dict[str, Any]) -> None:
+    turn = result["phases"]["turn"]
+    print(
+        f"  scale {result['scale']:<6} {result['entities']:6d} entities"
+        f"  turn p50 {turn['p50']:.2f} ms, p99 {turn['p99']:.2f} ms  (built in {result['build_ms'] / 1e3:.1f} s)",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def _write(document: Dict[str, Any], filename: str) -> None:
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as output:
+        json.dump(document, output, indent=2, sort_keys=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write the results as JSON")
+    run_parser.add_argument("patterns", nargs="*", help="only benchmarks whose name contains one of these")
+    run_parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_parser.add_argument("--rounds", type=int, default=None, help="override the rounds of every benchmark")
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=comparison.DEFAULT_THRESHOLD * 100, help="percent (default: %(default)s)"
+    )
+    compare_parser.add_argument("--stat", default=comparison.DEFAULT_STAT, choices=("median_ms", "min_ms", "mean_ms"))
+    commands.add_parser("list", help="list the benchmarks")
+    stress_parser = commands.add_parser("stress", help="play synthetic worst-case floors at several scales")
+    stress_parser.add_argument("--generator", default="cavern", choices=("cavern", "dungeon_v3"))
+    stress_parser.add_argument("--width", type=int, default=160)
+    stress_parser.add_argument("--height", type=int, default=100)
+    stress_parser.add_argument("--monsters", type=int, default=500, help="monsters of each AI preset")
+    stress_parser.add_argument("--doors", type=int, default=200)
+    stress_parser.add_argument("--campfires", type=int, default=50)
+    stress_parser.add_argument("--items", type=int, default=1000)
+    stress_parser.add_argument("--noise", type=int, default=25, help="monsters making noise every turn")
+    stress_parser.add_argument("--fill", type=float, default=None, help="cavern fill probability (higher is more open)")
+    stress_parser.add_argument("--open", action="store_true", help="open cavern (same as --fill 0.75)")
+    stress_parser.add_argument("--rooms", type=int, default=None, help="rooms of a dungeon_v3 floor")
+    stress_parser.add_argument("--scale", type=float, nargs="+", default=[1.0], help="multipliers of every count")
+    stress_parser.add_argument("--turns", type=int, default=30)
+    stress_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    stress_parser.add_argument("-o", "--output", default=STRESS_OUTPUT)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        threshold = args.threshold / 100
+        baseline, current = comparison.load(args.baseline), comparison.load(args.current)
+        changes = comparison.compare(baseline, current, threshold=threshold, stat=args.stat)
+        memory = comparison.compare_memory(baseline, current, threshold=threshold)
+        print(comparison.report(changes, threshold=threshold, memory=memory))
+        return 1 if any(change.verdict == "regression" for change in changes + memory) else 0
+
+    if args.command == "list":
+        from benchmarks import SUITES
+        from benchmarks.harness import REGISTRY, prepare
+
+        prepare(DEFAULT_SEED)
+        for suite in SUITES:
+            __import__(f"benchmarks.{suite}")
+        for name, bench in REGISTRY.items():
+            print(f"{name:32} {bench.rounds} rounds x {bench.number}")
+        return 0
+
+    if args.command == "stress":
+        from benchmarks import stress
+
+        scenario = stress.Scenario(
+            generator=args.generator,
+            width=args.width,
+            height=args.height,
+            monsters=args.monsters,
+            doors=args.doors,
+            campfires=args.campfires,
+            items=args.items,
+            noise=args.noise,
+            fill_probability=stress.OPEN_CAVERN_FILL if args.open else args.fill,
+            rooms=args.rooms,
+        )
+        document = stress.run(scenario, scales=args.scale, turns=args.turns, seed=args.seed, progress=_print_stress)
+        _write(document, args.output)
+        print(stress.report(document))
+        return 0
+
+    from benchmarks.harness import run
+
+    results = run(args.patterns, seed=args.seed, rounds=args.rounds, progress=_print_result)
+    _write(results, args.output)
+    print(f"{len(results['benchmarks'])} benchmarks -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+"""Comparison of two results files of the suite: timings and memory."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_STAT = "median_ms"
+
+
+@dataclass
+class Change:
+    name: str
+    # Milisegundos en los tiempos, bytes en la memoria.
+    baseline: Optional[float]
+    current: Optional[float]
+    # "regression", "improvement", "same", "added" o "removed".
+    verdict: str
+
+    @property
+    def ratio(self) -> Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+
+def load(filename: str) -> Dict[str, Any]:
+    with open(filename, "r", encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    stat: str = DEFAULT_STAT,
+) -> List[Change]:
+    """Classify every benchmark of both documents; `threshold` is relative (0.10 = 10%)."""
+    before = baseline.get("benchmarks", {})
+    after = current.get("benchmarks", {})
+    return _classify(
+        {name: entry.get(stat) for name, entry in before.items()},
+        {name: entry.get(stat) for name, entry in after.items()},
+        threshold,
+    )
+
+
+def compare_memory(
+    baseline: Dict[str, Any], current: Dict[str, Any], *, threshold: float = DEFAULT_THRESHOLD
+) -> List[Change]:
+    """Same for the `memory` sections (total, floors, containers, entity classes, components)."""
+    if "memory" not in baseline or "memory" not in current:
+        return []
+    from memory_report import flatten
+
+    return _classify(flatten(baseline["memory"]), flatten(current["memory"]), threshold)
+
+
+def _classify(before: Dict[str, Optional[float]], after: Dict[str, Optional[float]], threshold: float) -> List[Change]:
+    changes = []
+    for name in list(before) + [name for name in after if name not in before]:
+        old = before.get(name)
+        new = after.get(name)
+        if new is None:
+            verdict = "removed"
+        elif old is None:
+            verdict = "added"
+        elif new > old * (1 + threshold):
+            verdict = "regression"
+        elif new < old * (1 - threshold):
+            verdict = "improvement"
+        else:
+            verdict = "same"
+        changes.append(Change(name, old, new, verdict))
+    return changes
+
+
+def report(
+    changes: List[Change], *, threshold: float = DEFAULT_THRESHOLD, memory: Optional[List[Change]] = None
+) -> str:
+    marks = {"regression": "SLOWER", "improvement": "faster", "same": "", "added": "new", "removed": "gone"}
+    lines = [f"  {'benchmark':32} {'baseline ms':>12} {'current ms':>12} {'change':>8}"]
+    lines.extend(_rows(changes, marks, 1.0, "12.3f"))
+    # Sólo lo que ha cambiado: el resto son decenas de líneas iguales.
+    memory = [change for change in memory or [] if change.verdict != "same"]
+    if memory:
+        marks = dict(marks, regression="BIGGER", improvement="smaller")
+        lines.append(f"  {'memory':32} {'baseline KiB':>12} {'current KiB':>12} {'change':>8}")
+        lines.extend(_rows(memory, marks, 1024.0, "12.1f"))
+    regressions = sum(change.verdict == "regression" for change in changes + memory)
+    lines.append(f"{regressions} regression(s) beyond {threshold * 100:.0f}%")
+    return "\n".join(lines)
+
+
+def _rows(changes: List[Change], marks: Dict[str, str], unit: float, spec: str) -> List[str]:
+    lines = []
+    for change in changes:
+        old = format(change.baseline / unit, spec) if change.baseline is not None else f"{'-':>12}"
+        new = format(change.current / unit, spec) if change.current is not None else f"{'-':>12}"
+        ratio = change.ratio
+        delta = f"{(ratio - 1) * 100:+7.1f}%" if ratio is not None else f"{'':>8}"
+        lines.append(f"  {change.name:32} {old} {new} {delta}  {marks[change.verdict]}")
+    return lines
@@ -0,0 +1,109 @@
+"""Shared scenarios of the benchmarks, built once per process from the suite seed."""
+
+from __future__ import annotations
+
+import atexit
+import shutil
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+    from game_map import GameMap
+
+# Planta de mazmorra en la que se miden FOV, rutas, IA y render.
+DUNGEON_FLOOR = 3
+# Hogueras que se colocan alrededor del jugador (la planta puede no tener).
+CAMPFIRES = 4
+CAMPFIRE_DISTANCE = 5
+
+_cache: Dict[str, Any] = {}
+
+
+def engine() -> Engine:
+    """A new run of the suite seed: the player on `DUNGEON_FLOOR`, lamp on, near some campfires."""
+    if "engine" not in _cache:
+        import actions
+        import entity_factories
+        import replay
+        import setup_game
+
+        game = setup_game.new_game()
+        # Que ningún escenario acabe con el jugador muerto o desmayado de hambre.
+        for name, value in replay.BOT_PLAYER.items():
+            setattr(game.player.fighter, name, value)
+        world = game.game_world
+        while world.current_floor < DUNGEON_FLOOR:
+            stairs = game.game_map.get_primary_downstairs()
+            if not world.advance_floor(stairs_location=stairs):
+                raise RuntimeError(f"no way down from floor {world.current_floor}")
+        if not game.player.fighter.lamp_on:
+            actions.ToogleLightAction(game.player).perform()
+        tiles: List[Tuple[int, int]] = []
+        for distance in range(CAMPFIRE_DISTANCE, CAMPFIRE_DISTANCE + 4):
+            tiles.extend(free_tiles_around(game.game_map, game.player.x, game.player.y, distance))
+        for x, y in tiles[:CAMPFIRES]:
+            entity_factories.campfire.spawn(game.game_map, x, y)
+        game.update_fov()
+        _cache["engine"] = game
+    return _cache["engine"]
+
+
+def free_tiles_around(gamemap: GameMap, x: int, y: int, distance: int) -> List[Tuple[int, int]]:
+    """Walkable, unoccupied tiles at Chebyshev `distance` from (x, y), in a fixed order."""
+    walkable = gamemap.tiles["walkable"]
+    tiles = []
+    for dx in range(-distance, distance + 1):
+        for dy in range(-distance, distance + 1):
+            if max(abs(dx), abs(dy)) != distance:
+                continue
+            tx, ty = x + dx, y + dy
+            if (
+                gamemap.in_bounds(tx, ty)
+                and walkable[tx, ty]
+                and gamemap.get_blocking_entity_at_location(tx, ty) is None
+            ):
+                tiles.append((tx, ty))
+    return tiles
+
+
+def spawn_near_player(prototype: Actor, distance: int) -> Actor:
+    """Spawn `prototype` on the first free tile at `distance` from the player."""
+    game = engine()
+    player = game.player
+    for radius in range(distance, distance + 8):
+        tiles = free_tiles_around(game.game_map, player.x, player.y, radius)
+        if tiles:
+            return prototype.spawn(game.game_map, *tiles[0])
+    raise RuntimeError(f"no free tile around the player for {prototype.name}")
+
+
+def despawn(actor: Actor) -> None:
+    gamemap = actor.gamemap
+    gamemap.entities.discard(actor)
+
+
+def scratch_dir() -> str:
+    """Temporary directory for the save files, removed at exit."""
+    if "scratch" not in _cache:
+        path = tempfile.mkdtemp(prefix="benchmarks-")
+        atexit.register(shutil.rmtree, path, ignore_errors=True)
+        _cache["scratch"] = path
+    return _cache["scratch"]
+
+
+def generation_state() -> Dict[str, Any]:
+    """Generation state (spawn counters, unique rooms, uniques) right after building `engine()`."""
+    if "generation_state" not in _cache:
+        from floor_generation import snapshot_generation_state
+
+        engine()
+        _cache["generation_state"] = snapshot_generation_state()
+    return _cache["generation_state"]
+
+
+def restore_generation_state(state: Optional[Dict[str, Any]] = None) -> None:
+    from floor_generation import restore_generation_state as restore
+
+    restore(state or generation_state())
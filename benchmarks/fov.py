@@ -0,0 +1,24 @@
+"""Field of view and lighting of the player's turn."""
+
+from __future__ import annotations
+
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+
+@benchmark("fov.update_fov", number=50)
+def update_fov():
+    yield fixtures.engine().update_fov
+
+
+@benchmark("fov.campfire_effects", number=50)
+def campfire_effects():
+    game = fixtures.engine()
+    if not game.game_map.campfires:
+        raise RuntimeError("the benchmark floor has no campfires")
+    yield game._apply_campfire_effects
+
+
+@benchmark("fov.transparency_map", number=200)
+def transparency_map():
+    yield fixtures.engine().game_map.get_transparency_map
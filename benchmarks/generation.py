@@ -0,0 +1,97 @@
+"""Floor generators one by one and the whole `GameWorld`."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Tuple
+
+import seeding
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+
+def _fixed_kwargs(template: Any, walls: str, walls_special: str) -> Dict[str, Any]:
+    import tile_types
+
+    return {
+        "map": template,
+        "walls": getattr(tile_types, walls),
+        "walls_special": getattr(tile_types, walls_special),
+    }
+
+
+def _generators() -> Dict[str, Tuple[int, Callable, Callable[[], Dict[str, Any]]]]:
+    """{name: (floor number, generator, kwargs factory)} as `GameWorld._select_generator` sets them up."""
+    import fixed_maps
+    import generators
+
+    return {
+        "town": (1, generators.generate_town, dict),
+        "dungeon_v3": (4, generators.generate_dungeon_v3, dict),
+        "cavern": (5, generators.generate_cavern, dict),
+        "fixed": (6, generators.generate_fixed_dungeon, lambda: _fixed_kwargs(fixed_maps.temple, "wall_v1", "wall_v2")),
+        "three_doors": (
+            8,
+            generators.generate_three_doors_map,
+            lambda: _fixed_kwargs(generators.THREE_DOORS_TEMPLATE, "wall_v2", "wall_v1"),
+        ),
+        "the_library": (
+            9,
+            generators.generate_the_library_map,
+            lambda: _fixed_kwargs(generators.THE_LIBRARY_TEMPLATE, "wall_v1", "wall_v2"),
+        ),
+    }
+
+
+GENERATORS = ("town", "dungeon_v3", "cavern", "fixed", "three_doors", "the_library")
+
+
+def _generator_benchmark(name: str) -> None:
+    @benchmark(f"generate.{name}", rounds=5)
+    def generate():
+        import settings
+        from floor_generation import FloorJob, floor_seed, generate_floor
+
+        game = fixtures.engine()
+        floor, generator, kwargs = _generators()[name]
+        label = f"M-{floor}"
+        job = FloorJob(
+            label=label,
+            floor_number=floor,
+            generator=generator,
+            kwargs=kwargs(),
+            seed=floor_seed(seeding.launch_seed, label),
+            map_width=settings.MAP_WIDTH,
+            map_height=settings.MAP_HEIGHT,
+        )
+        # Los contadores de spawn y los únicos vuelven a como estaban en cada ronda.
+        fixtures.restore_generation_state()
+        yield lambda: generate_floor(job, game)
+        fixtures.restore_generation_state()
+
+
+for _name in GENERATORS:
+    _generator_benchmark(_name)
+
+
+@benchmark("generate.world", rounds=3)
+def world():
+    import entity_factories
+    import procgen
+    import prototypes
+    import settings
+    from engine import Engine
+    from game_map import GameWorld
+
+    fixtures.engine()
+    # Un motor aparte: el mundo nuevo coloca a su jugador y cambia `game_map`.
+    game = Engine(player=prototypes.clone(entity_factories.player), debug=True)
+    procgen.reset_generation_stats()
+    yield lambda: GameWorld(
+        engine=game,
+        max_rooms=20,
+        room_min_size=4,
+        room_max_size=10,
+        map_width=settings.MAP_WIDTH,
+        map_height=settings.MAP_HEIGHT,
+    )
+    fixtures.restore_generation_state()
@@ -0,0 +1,170 @@
+"""Registry, timing loop and JSON results of the benchmark suite."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import seeding
+
+FORMAT_VERSION = 1
+DEFAULT_SEED = 20240611
+
+# Ajustes para medir sin efectos laterales ni ruido: nada de escribir
+# partidas, eco del log, intro, fundidos ni procesos de generación (con un
+# pool el tiempo dependería de los núcleos libres de la máquina).
+SETTINGS_OVERRIDES: Dict[str, Any] = {
+    "AUTOSAVE_ENABLED": False,
+    "LOG_ECHO_TO_STDOUT": False,
+    "REPLAY_RECORDING": False,
+    "INTRO_ENABLED": False,
+    "STAIR_TRANSITION_ENABLED": False,
+    "WORLD_LAZY_GENERATION": False,
+    "WORLD_GENERATION_PARALLEL": False,
+}
+
+# Un setup es un generador: prepara el escenario, hace `yield` de la función a
+# medir y, al reanudarse, deshace lo que haya cambiado en los fixtures.
+Setup = Callable[[], Iterator[Callable[[], Any]]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Setup
+    # Llamadas medidas por ronda (se promedian) y rondas independientes.
+    number: int = 1
+    rounds: int = 7
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, *, number: int = 1, rounds: int = 7) -> Callable[[Setup], Setup]:
+    """Register `setup` under `name`."""
+
+    def register(setup: Setup) -> Setup:
+        if name in REGISTRY:
+            raise ValueError(f"duplicate benchmark '{name}'")
+        REGISTRY[name] = Benchmark(name, setup, number, rounds)
+        return setup
+
+    return register
+
+
+def prepare(seed: int = DEFAULT_SEED) -> None:
+    """Fix the seeds and settings; must run before the game modules are imported."""
+    if "entity_factories" in sys.modules and seeding.launch_seed != seed:
+        raise RuntimeError("benchmarks.prepare must run before the game modules are imported")
+    seeding.set_launch_seed(seed)
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import settings
+
+    for name, value in SETTINGS_OVERRIDES.items():
+        setattr(settings, name, value)
+
+
+def _reseed(name: str, round_index: int) -> None:
+    # Cada ronda empieza con los mismos flujos sin importar qué se midió antes.
+    base = seeding.derive(seeding.launch_seed, f"bench:{name}:{round_index}")
+    random.seed(base)
+    seeding.ai.seed(seeding.derive(base, "ai"))
+    seeding.cosmetic.seed(seeding.derive(base, "cosmetic"))
+
+
+def measure(bench: Benchmark, *, rounds: Optional[int] = None, warmup: bool = True) -> Dict[str, Any]:
+    """Time `bench`; the statistics are milliseconds per call."""
+    total_rounds = rounds or bench.rounds
+    samples: List[float] = []
+    for round_index in range(-1 if warmup else 0, total_rounds):
+        _reseed(bench.name, round_index)
+        scenario = bench.setup()
+        run = next(scenario)
+        try:
+            start = time.perf_counter()
+            for _ in range(bench.number):
+                run()
+            elapsed = time.perf_counter() - start
+        finally:
+            next(scenario, None)
+        if round_index >= 0:
+            samples.append(elapsed * 1e3 / bench.number)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "mean_ms": statistics.fmean(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": len(samples),
+        "number": bench.number,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def select(patterns: Sequence[str] = ()) -> List[Benchmark]:
+    """Registered benchmarks whose name contains any of `patterns` (all if empty)."""
+    return [
+        bench
+        for name, bench in REGISTRY.items()
+        if not patterns or any(pattern in name for pattern in patterns)
+    ]
+
+
+def run(
+    patterns: Sequence[str] = (),
+    *,
+    seed: int = DEFAULT_SEED,
+    rounds: Optional[int] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the selected benchmarks and return the results document."""
+    prepare(seed)
+    from benchmarks import SUITES
+
+    for suite in SUITES:
+        __import__(f"benchmarks.{suite}")
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.time()
+    # El juego escribe mucho por stdout (acciones, generación); no se mide eso.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for bench in select(patterns):
+            results[bench.name] = measure(bench, rounds=rounds)
+            if progress:
+                progress(bench.name, results[bench.name])
+    document: Dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "seed": seed,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    from benchmarks import fixtures
+
+    if "engine" in fixtures._cache:
+        import memory_report
+
+        # Tamaños estructurales de la partida de la suite (deterministas; tracemalloc falsearía los tiempos).
+        document["memory"] = memory_report.measure(fixtures.engine())
+    return document
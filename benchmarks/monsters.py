@@ -0,0 +1,117 @@
+"""Monster turns: path finding and the `ModularAI` stack of each preset."""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+# Distancia al objetivo de las rutas cortas (dentro de AI_PATH_BFS_RADIUS).
+BFS_DISTANCE = 6
+# Distancia al jugador a la que aparece el monstruo de cada preset.
+AI_DISTANCE = 6
+AI_TURNS = 20
+
+
+def _pathfinder():
+    import entity_factories
+
+    monster = fixtures.spawn_near_player(entity_factories.orc_servant, 3)
+    fighter = monster.fighter
+    flags = {
+        "can_pass_closed_doors": getattr(fighter, "can_pass_closed_doors", False),
+        "can_open_doors": getattr(fighter, "can_open_doors", False),
+    }
+    return monster, flags
+
+
+def _timed_path(ai, destination: Tuple[int, int]):
+    def find_path():
+        # Sin la caché de rutas cada llamada recalcula, como al cambiar de destino.
+        ai._path_cache.clear()
+        return ai.get_path_to(*destination, ignore_senses=True)
+
+    return find_path
+
+
+@benchmark("path.bfs", number=100)
+def path_bfs():
+    import settings
+
+    monster, flags = _pathfinder()
+    radius = max(1, getattr(settings, "AI_PATH_BFS_RADIUS", 8))
+    origin = (monster.x, monster.y)
+    for destination in fixtures.free_tiles_around(monster.gamemap, *origin, min(BFS_DISTANCE, radius)):
+        if monster.ai._bfs_path_limited(origin, destination, max_radius=radius, **flags):
+            break
+    else:
+        raise RuntimeError("no destination reachable by the BFS branch")
+    yield _timed_path(monster.ai, destination)
+    fixtures.despawn(monster)
+
+
+@benchmark("path.astar", number=20)
+def path_astar():
+    import settings
+
+    monster, flags = _pathfinder()
+    radius = max(1, getattr(settings, "AI_PATH_BFS_RADIUS", 8))
+    gamemap = monster.gamemap
+    origin = (monster.x, monster.y)
+    # El destino más lejano con ruta, fuera del radio del BFS: fuerza el A*.
+    candidates = [gamemap.get_primary_downstairs()]
+    for distance in range(max(gamemap.width, gamemap.height), radius, -4):
+        candidates.extend(fixtures.free_tiles_around(gamemap, *origin, distance)[:1])
+    for destination in candidates:
+        if destination is None or max(abs(destination[0] - origin[0]), abs(destination[1] - origin[1])) <= radius:
+            continue
+        monster.ai._path_cache.clear()
+        if monster.ai.get_path_to(*destination, ignore_senses=True):
+            break
+    else:
+        raise RuntimeError("no destination reachable by the A* branch")
+    yield _timed_path(monster.ai, destination)
+    fixtures.despawn(monster)
+
+
+def _preset_benchmark(preset: str) -> None:
+    @benchmark(f"ai.{preset}", number=AI_TURNS)
+    def preset_turns():
+        import entity_factories
+        import exceptions
+        from components.ai import MODULAR_AI_PRESETS
+
+        game = fixtures.engine()
+        prototype = entity_factories.orc_archer if preset.startswith("ranged") else entity_factories.orc_servant
+        monster = fixtures.spawn_near_player(prototype, AI_DISTANCE)
+        monster.ai = MODULAR_AI_PRESETS[preset](monster)
+        fighter = monster.fighter
+        # Ya alertado: se mide la persecución y el combate, no la espera.
+        fighter.aggravated = True
+        player = game.player.fighter
+        turn = game.turn
+
+        def take_turn():
+            # Lo que hace `handle_enemy_turns` con un monstruo que tiene tiempo para actuar.
+            game.turn += 1
+            fighter.current_time_points = max(fighter.current_time_points, fighter.action_time_cost)
+            try:
+                monster.ai.perform()
+            except exceptions.Impossible:
+                pass
+
+        yield take_turn
+        fixtures.despawn(monster)
+        game.turn = turn
+        player.hp = player.max_hp
+
+
+def _register_presets() -> None:
+    from components.ai import MODULAR_AI_PRESETS
+
+    for preset in MODULAR_AI_PRESETS:
+        _preset_benchmark(preset)
+
+
+_register_presets()
@@ -0,0 +1,37 @@
+"""Saving and loading the benchmark run."""
+
+from __future__ import annotations
+
+import os
+
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+
+@benchmark("save.save_as", rounds=5)
+def save_as():
+    game = fixtures.engine()
+    filename = os.path.join(fixtures.scratch_dir(), "save_as.sav")
+    # Sin la caché de blobs se comprimen todas las plantas, como el primer guardado.
+    game._save_cache = None
+    yield lambda: game.save_as(filename)
+
+
+@benchmark("save.save_as_unchanged", rounds=5)
+def save_as_unchanged():
+    # Guardado repetido sin cambios: sólo se serializan la cabecera y la planta actual.
+    game = fixtures.engine()
+    filename = os.path.join(fixtures.scratch_dir(), "unchanged.sav")
+    game.save_as(filename)
+    yield lambda: game.save_as(filename)
+
+
+@benchmark("save.load_game", rounds=5)
+def load_game():
+    import setup_game
+
+    game = fixtures.engine()
+    filename = os.path.join(fixtures.scratch_dir(), "load_game.sav")
+    if not os.path.exists(filename):
+        game.save_as(filename)
+    yield lambda: setup_game.load_game(filename)
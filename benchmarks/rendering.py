@@ -0,0 +1,113 @@
+"""Drawing of the map and the message log."""
+
+from __future__ import annotations
+
+import random
+
+from benchmarks import fixtures
+from benchmarks.harness import benchmark
+
+# Mensajes del registro de prueba: cortos, largos (se parten en varias líneas)
+# y con nombres resaltados.
+LOG_MESSAGES = 200
+_LOG_TEXTS = (
+    "You hit the Goblin for 3 hit points.",
+    "The Orc servant attacks you but misses.",
+    "You hear footsteps in the distance.",
+    "The campfire crackles. Shadows dance on the walls while the smoke drifts slowly towards the ceiling.",
+    "You pick up the Health potion.",
+    "The Goblin is dead!",
+)
+
+
+def _console():
+    import settings
+    import tcod
+
+    return tcod.console.Console(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT, order="F")
+
+
+# Planta grande del benchmark de la cámara: sólo se compone el viewport.
+LARGE_MAP_SIZE = (200, 200)
+
+
+@benchmark("render.game_map", number=50)
+def game_map():
+    game = fixtures.engine()
+    console = _console()
+    player = game.player
+    game.camera.follow(game.game_map, player.x, player.y)
+    yield lambda: game.game_map.render(console, game.camera)
+
+
+@benchmark("render.game_map_200x200", number=50)
+def large_game_map():
+    import generators
+    import seeding
+    import settings
+    from camera import Camera
+    from floor_generation import FloorJob, floor_seed, generate_floor
+    from tcod.map import compute_fov
+
+    from benchmarks.stress import OPEN_CAVERN_FILL
+
+    game = fixtures.engine()
+    width, height = LARGE_MAP_SIZE
+    job = FloorJob(
+        label="M-large",
+        floor_number=5,
+        generator=generators.generate_cavern,
+        kwargs={"fill_probability": OPEN_CAVERN_FILL},
+        seed=floor_seed(seeding.launch_seed, "M-large"),
+        map_width=width,
+        map_height=height,
+    )
+    fixtures.restore_generation_state()
+    large = generate_floor(job, game)
+    # Vista y exploración de un jugador a mitad de partida: todo explorado.
+    x, y = large.upstairs_location
+    large.visible[:] = compute_fov(large.tiles["transparent"], (x, y), radius=game.player.fighter.fov)
+    large.explored[:] = large.tiles["walkable"]
+    camera = Camera(settings.VIEWPORT_WIDTH, settings.VIEWPORT_HEIGHT)
+    camera.follow(large, x, y)
+    console = _console()
+    yield lambda: large.render(console, camera)
+    fixtures.restore_generation_state()
+
+
+def _message_log():
+    import color
+    from message_log import MessageLog
+
+    log = MessageLog()
+    colors = (color.white, color.enemy_atk, color.player_atk, color.orange)
+    rng = random.Random(LOG_MESSAGES)
+    for index in range(LOG_MESSAGES):
+        if index % 7 == 0:
+            log.mark_turn_start()
+        log.add_message(rng.choice(_LOG_TEXTS), rng.choice(colors))
+    return log
+
+
+@benchmark("render.message_log", number=200)
+def message_log():
+    import settings
+
+    log = _message_log()
+    console = _console()
+    name_colors = fixtures.engine()._get_message_name_colors()
+    area = settings.HUD_LAYOUT["message_log"]
+    yield lambda: log.render_messages(
+        console, area["x"], area["y"], area["width"], area["height"], log.messages, name_colors=name_colors
+    )
+
+
+@benchmark("render.message_history", number=50)
+def message_history():
+    # El visor del historial dibuja el registro casi a pantalla completa.
+    log = _message_log()
+    console = _console()
+    name_colors = fixtures.engine()._get_message_name_colors()
+    yield lambda: log.render_messages(
+        console, 1, 1, console.width - 2, console.height - 2, log.messages, name_colors=name_colors
+    )
@@ -0,0 +1,318 @@
+"""Synthetic worst-case floors to find where the turn loop stops scaling.
+
+La generación normal nunca pone cientos de monstruos en una planta, así que
+la suite no dice nada de cómo crece el coste de un turno con el tamaño del
+mapa o el número de entidades. Un `Scenario` genera una planta con
+`generate_cavern` o `generate_dungeon_v3` (con la densidad que se pida:
+cavernas abiertas o cerradas, número de salas), la llena de monstruos de cada
+preset de `MODULAR_AI_PRESETS`, puertas, hogueras y objetos, y juega N turnos
+sin pantalla con un bot mientras una tormenta de ruido hace sonar monstruos al
+azar. Los tiempos de cada fase vienen del `TurnProfiler` del motor, más el
+del frame que se dibuja tras cada turno.
+
+    python -m benchmarks stress --turns 30 --scale 0.05 0.1 0.25 0.5 1
+
+Cada escala multiplica los recuentos del escenario y se juega en una partida
+nueva con la misma semilla; el resultado (percentiles por fase y escala) es la
+curva de escalado del motor.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+import seeding
+from benchmarks.harness import DEFAULT_SEED, _git_revision, prepare
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+FORMAT_VERSION = 1
+GENERATORS = ("cavern", "dungeon_v3")
+# Con `generate_cavern`, a más probabilidad de relleno más suelo: 0.75 deja ~80% abierto.
+OPEN_CAVERN_FILL = 0.75
+PERCENTILES = (0.50, 0.90, 0.99)
+# Planta con la que se generan el mapa y el equipo de los monstruos.
+STRESS_FLOOR = 5
+
+
+@dataclass
+class Scenario:
+    generator: str = "cavern"
+    width: int = 160
+    height: int = 100
+    # Monstruos de cada preset de MODULAR_AI_PRESETS.
+    monsters: int = 500
+    doors: int = 200
+    campfires: int = 50
+    items: int = 1000
+    # Monstruos que hacen ruido en cada turno (nivel 1-4).
+    noise: int = 25
+    # Densidad: relleno inicial de la caverna y salas de dungeon_v3 (None: los de settings).
+    fill_probability: Optional[float] = None
+    rooms: Optional[int] = None
+
+    def scaled(self, factor: float) -> Scenario:
+        """Same map, with every count multiplied by `factor`."""
+        return replace(
+            self,
+            monsters=round(self.monsters * factor),
+            doors=round(self.doors * factor),
+            campfires=round(self.campfires * factor),
+            items=round(self.items * factor),
+            noise=round(self.noise * factor),
+        )
+
+
+@contextlib.contextmanager
+def _settings(**overrides: Any) -> Iterator[None]:
+    import settings
+
+    saved = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def _generate(game: Engine, scenario: Scenario, seed: int) -> GameMap:
+    import generators
+    import settings
+    from floor_generation import FloorJob, floor_seed, generate_floor
+
+    overrides: Dict[str, Any] = {}
+    kwargs: Dict[str, Any] = {}
+    if scenario.generator == "cavern":
+        generator = generators.generate_cavern
+        kwargs["fill_probability"] = scenario.fill_probability
+    elif scenario.generator == "dungeon_v3":
+        generator = generators.generate_dungeon_v3
+        if scenario.rooms is not None:
+            overrides["DUNGEON_V3_MIN_ROOMS"] = overrides["DUNGEON_V3_MAX_ROOMS"] = scenario.rooms
+            overrides["DUNGEON_V3_MAX_PLACEMENT_ATTEMPTS"] = max(
+                settings.DUNGEON_V3_MAX_PLACEMENT_ATTEMPTS, scenario.rooms * 50
+            )
+    else:
+        raise ValueError(f"unknown generator '{scenario.generator}' (expected one of {GENERATORS})")
+    job = FloorJob(
+        label="stress",
+        floor_number=STRESS_FLOOR,
+        generator=generator,
+        kwargs=kwargs,
+        seed=floor_seed(seed, f"stress:{scenario.generator}"),
+        map_width=scenario.width,
+        map_height=scenario.height,
+        place_player=True,
+    )
+    with _settings(**overrides):
+        return generate_floor(job, game)
+
+
+def _free_tiles(game_map: GameMap, rng: random.Random) -> List[Tuple[int, int]]:
+    """Walkable tiles without a blocking entity or stairs, shuffled."""
+    walkable = game_map.tiles["walkable"].copy()
+    for entity in game_map.entities:
+        if entity.blocks_movement:
+            walkable[entity.x, entity.y] = False
+    for location in (game_map.upstairs_location, game_map.downstairs_location):
+        if location:
+            walkable[location] = False
+    tiles = [(int(x), int(y)) for x, y in zip(*np.nonzero(walkable))]
+    rng.shuffle(tiles)
+    return tiles
+
+
+def _door_tiles(game_map: GameMap, tiles: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """`tiles` with the chokepoints (wall on both sides) first, where a door blocks something."""
+    walkable = np.pad(game_map.tiles["walkable"], 1, constant_values=False)
+    chokepoint = (~walkable[:-2, 1:-1] & ~walkable[2:, 1:-1]) ^ (~walkable[1:-1, :-2] & ~walkable[1:-1, 2:])
+    return sorted(tiles, key=lambda tile: not chokepoint[tile])
+
+
+def build(scenario: Scenario, seed: int = DEFAULT_SEED) -> Tuple[Engine, Dict[str, int]]:
+    """A new run whose current floor is the scenario's, and how many of each thing fit on it.
+
+    El jugador es el bot de `replay` (no muere ni pasa hambre).
+    """
+    import entity_factories
+    import procgen
+    import replay
+    import setup_game
+    import tile_types
+    from components.ai import MODULAR_AI_PRESETS
+
+    # Sólo hace falta la primera planta del mundo: la de estrés la sustituye.
+    with _settings(WORLD_LAZY_GENERATION=True):
+        game = setup_game.new_game(seed=seed)
+    for name, value in replay.BOT_PLAYER.items():
+        setattr(game.player.fighter, name, value)
+    world = game.game_world
+    previous = game.game_map
+    game_map = _generate(game, scenario, seed)
+    game.game_map = game_map
+    previous.tiles.release_views()
+    world.levels[world.levels.index(previous)] = game_map
+    world._update_center_rooms(game_map)
+
+    rng = random.Random(seeding.derive(seed, "stress"))
+    tiles = _free_tiles(game_map, rng)
+    placed: Dict[str, int] = {}
+    for x, y in _door_tiles(game_map, tiles)[: scenario.doors]:
+        game_map.tiles[x, y] = tile_types.closed_door
+        procgen.spawn_door_entity(game_map, x, y)
+        tiles.remove((x, y))
+        placed["doors"] = placed.get("doors", 0) + 1
+    for preset, ai_class in MODULAR_AI_PRESETS.items():
+        prototype = entity_factories.orc_archer if preset.startswith("ranged") else entity_factories.orc_servant
+        for _ in range(scenario.monsters):
+            if not tiles:
+                break
+            monster = prototype.spawn(game_map, *tiles.pop())
+            monster.ai = ai_class(monster)
+            placed[preset] = placed.get(preset, 0) + 1
+    for _ in range(scenario.campfires):
+        if not tiles:
+            break
+        entity_factories.campfire.spawn(game_map, *tiles.pop())
+        placed["campfires"] = placed.get("campfires", 0) + 1
+    item_rules = [procgen.item_spawn_rules[name]["entity"] for name in sorted(procgen.item_spawn_rules)]
+    for _ in range(scenario.items):
+        if not tiles:
+            break
+        rng.choice(item_rules).spawn(game_map, *tiles.pop())
+        placed["items"] = placed.get("items", 0) + 1
+    game.update_fov()
+    return game, placed
+
+
+def _noise_storm(game: Engine, rng: random.Random, count: int) -> None:
+    if count <= 0:
+        return
+    actors = [actor for actor in game.game_map.actors if actor is not game.player and actor.ai]
+    for actor in rng.sample(actors, min(count, len(actors))):
+        game.register_noise(actor, level=rng.randint(1, 4), duration=2, tag="stress")
+
+
+def play(game: Engine, turns: int, *, noise: int, seed: int = DEFAULT_SEED) -> Dict[str, List[float]]:
+    """Play `turns` bot turns and return the seconds of every phase per turn.
+
+    "turn" es el turno entero y "render" el frame que se dibuja después
+    (a través de la cámara, así que el mapa puede ser mayor que la pantalla).
+    """
+    import actions
+    import input_handlers
+    import settings
+    import tcod
+    from engine import TurnProfiler
+
+    profiler = TurnProfiler(enabled=True, window=turns)
+    game.profiler = profiler
+    handler = input_handlers.MainGameEventHandler(game)
+    bot = random.Random(seeding.derive(seed, "stress:bot"))
+    storm = random.Random(seeding.derive(seed, "stress:noise"))
+    player = game.player
+    console = tcod.console.Console(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT, order="F")
+    totals: List[float] = []
+    renders: List[float] = []
+    # Los movimientos imposibles (contra un muro) no gastan turno; se reintenta.
+    attempts = turns * 20
+    while len(totals) < turns and attempts:
+        attempts -= 1
+        player.fighter.hp = player.fighter.max_hp
+        _noise_storm(game, storm, noise)
+        dx, dy = bot.choice(input_handlers.ADJACENT_DELTAS)
+        start = time.perf_counter()
+        if handler.handle_action(actions.BumpAction(player, dx, dy)):
+            totals.append(time.perf_counter() - start)
+            console.clear()
+            start = time.perf_counter()
+            game.render(console)
+            renders.append(time.perf_counter() - start)
+    samples = {name: list(history) for name, history in profiler.history.items()}
+    samples["turn"] = totals
+    samples["render"] = renders
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    from engine import TurnProfiler
+
+    summary = {f"p{round(fraction * 100)}": TurnProfiler._percentile(samples, fraction) * 1e3 for fraction in PERCENTILES}
+    summary["max"] = max(samples, default=0.0) * 1e3
+    summary["mean"] = sum(samples) / len(samples) * 1e3 if samples else 0.0
+    return summary
+
+
+def run(
+    scenario: Scenario,
+    *,
+    scales: Sequence[float] = (1.0,),
+    turns: int = 30,
+    seed: int = DEFAULT_SEED,
+    progress: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Build and play `scenario` at every scale; the results document (milliseconds)."""
+    prepare(seed)
+    import memory_report
+    from floor_generation import restore_generation_state, snapshot_generation_state
+
+    generation_state = snapshot_generation_state()
+    runs = []
+    for factor in scales:
+        scaled = scenario.scaled(factor)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # Cada escala parte del mismo estado de generación (únicos, contadores).
+            restore_generation_state(generation_state)
+            started = time.perf_counter()
+            game, placed = build(scaled, seed)
+            build_seconds = time.perf_counter() - started
+            samples = play(game, turns, noise=scaled.noise, seed=seed)
+        game_map = game.game_map
+        result = {
+            "scale": factor,
+            "placed": placed,
+            "entities": len(game_map.entities),
+            "floor_tiles": int(game_map.tiles["walkable"].sum()),
+            "build_ms": build_seconds * 1e3,
+            "turns": len(samples["turn"]),
+            "memory": memory_report.deep_size(game_map, {id(game), id(game.game_world)}),
+            "phases": {name: _summary(values) for name, values in samples.items()},
+        }
+        runs.append(result)
+        if progress:
+            progress(result)
+    return {
+        "format": FORMAT_VERSION,
+        "seed": seed,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "scenario": asdict(scenario),
+        "turns": turns,
+        "runs": runs,
+    }
+
+
+def report(document: Dict[str, Any]) -> str:
+    """The scaling curve: one row per scale, p50/p99 of each phase in ms."""
+    runs = document["runs"]
+    phases = ["turn"] + sorted({name for run in runs for name in run["phases"]} - {"turn"})
+    header = f"  {'scale':>6} {'entities':>8} {'MiB':>6}" + "".join(f" {name:>19}" for name in phases)
+    lines = [header, f"  {'':>6} {'':>8} {'':>6}" + f" {'p50 / p99 ms':>19}" * len(phases)]
+    for run in runs:
+        cells = "".join(
+            f" {run['phases'][name]['p50']:9.2f} /{run['phases'][name]['p99']:8.2f}" if name in run["phases"] else f" {'-':>19}"
+            for name in phases
+        )
+        lines.append(f"  {run['scale']:6.2f} {run['entities']:8d} {run['memory'] / 2**20:6.1f}{cells}")
+    return "\n".join(lines)
@@ -0,0 +1,74 @@
+"""Viewport of the map on the screen: which window of the map is drawn, and where.
+
+`GameMap.render` copiaba la planta entera en `console.rgb[0:width, 0:height]`,
+así que un mapa no podía ser mayor que la zona de mapa de la pantalla
+(`map_width`/`map_height` de `settings.SCREEN_CONFIG`) y cada frame componía
+todas sus casillas. Ahora el motor tiene una `Camera` del tamaño de esa zona
+(`settings.VIEWPORT_WIDTH`/`VIEWPORT_HEIGHT`) que sigue al jugador:
+
+- `follow` centra la ventana en el jugador sin salirse del mapa; con un mapa
+  que cabe en pantalla la ventana es el mapa entero y nada cambia.
+- `GameMap.render` compone sólo la ventana (`view_slices`) de tiles,
+  `visible` y `explored`, y sólo dibuja las entidades que caen dentro.
+- Todo lo que se dibuja en coordenadas de mapa (entidades, animaciones,
+  efectos ambientales, cursores de selección) pasa por `map_to_screen`, y el
+  ratón por `screen_to_map`: `Engine.mouse_location` sigue siendo una casilla
+  del mapa.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+
+class Camera:
+    __slots__ = ("width", "height", "x", "y", "_map_size")
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = max(1, int(width))
+        self.height = max(1, int(height))
+        # Casilla del mapa que se dibuja en la esquina superior izquierda.
+        self.x = 0
+        self.y = 0
+        # Tamaño del último mapa seguido (la ventana no pasa de él).
+        self._map_size: Optional[Tuple[int, int]] = None
+
+    def follow(self, game_map: GameMap, x: int, y: int) -> None:
+        """Center the window on (x, y), clamped to the map."""
+        self._map_size = (game_map.width, game_map.height)
+        self.x = max(0, min(x - self.width // 2, game_map.width - self.width))
+        self.y = max(0, min(y - self.height // 2, game_map.height - self.height))
+
+    def view_slices(self, game_map: GameMap) -> Tuple[slice, slice]:
+        """Slices of the map arrays inside the window."""
+        return (
+            slice(self.x, min(self.x + self.width, game_map.width)),
+            slice(self.y, min(self.y + self.height, game_map.height)),
+        )
+
+    def map_to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        return x - self.x, y - self.y
+
+    def screen_to_map(self, x: int, y: int) -> Tuple[int, int]:
+        return x + self.x, y + self.y
+
+    def in_view(self, x: int, y: int) -> bool:
+        """True if the map tile (x, y) is drawn on the screen."""
+        width, height = self._visible_size()
+        return 0 <= x - self.x < width and 0 <= y - self.y < height
+
+    def clamp(self, x: int, y: int) -> Tuple[int, int]:
+        """Nearest map tile to (x, y) that is drawn on the screen."""
+        width, height = self._visible_size()
+        return (
+            max(self.x, min(x, self.x + width - 1)),
+            max(self.y, min(y, self.y + height - 1)),
+        )
+
+    def _visible_size(self) -> Tuple[int, int]:
+        if self._map_size is None:
+            return self.width, self.height
+        return min(self.width, self._map_size[0]), min(self.height, self._map_size[1])
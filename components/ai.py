@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import random
 from dataclasses import dataclass, field
 from typing import Callable, List, Optional, Tuple, TYPE_CHECKING
 
@@ -16,12 +15,29 @@ import tile_types
 import exceptions
 import settings
 import dialog_settings
+import entity_kinds
+import perf_counters
+import seeding
 from audio import update_campfire_audio
 
+# Tiradas de la IA: flujo propio de la partida (ver seeding).
+rng = seeding.ai
+
 # Lazy cache to avoid circular import at module load time.
 _BREAKABLE_WALL_FIGHTER = None
 if TYPE_CHECKING:
     from entity import Actor, Item
+    from line_of_fire import LineOfFire
+
+
+def _adjacent_campfire(entity: Actor, gamemap) -> Optional[Actor]:
+    """Return a lit campfire next to `entity`, looked up in the map's campfire registry."""
+    for campfire in gamemap.campfires:
+        if campfire is entity or not campfire.is_alive:
+            continue
+        if max(abs(campfire.x - entity.x), abs(campfire.y - entity.y)) == 1:
+            return campfire
+    return None
 
 
 class BaseAI(Action):
@@ -46,8 +62,7 @@ class BaseAI(Action):
             fighter.aggravated = True
 
     def _is_adventurer(self, actor: "Actor") -> bool:
-        name = getattr(actor, "name", "")
-        return bool(name and name.lower() == "adventurer")
+        return entity_kinds.kind_of(actor) == entity_kinds.ADVENTURER
 
     def _potential_targets(self) -> List["Actor"]:
         engine = getattr(self, "engine", None)
@@ -122,7 +137,7 @@ class BaseAI(Action):
         sound_map = np.where(sound_map, sound_map, wall_opacity)
         try:
             closed_ch = tile_types.closed_door["dark"]["ch"]
-            door_mask = gamemap.tiles["dark"]["ch"] == closed_ch
+            door_mask = gamemap.tiles.glyph_mask(closed_ch)
             sound_map[door_mask] = 0.5  # Las puertas cierran menos el sonido que un muro. Menor valor, peor dejan pasar el sonido.
         except Exception:
             pass
@@ -164,7 +179,7 @@ class BaseAI(Action):
             return False
         if can_pass_closed_doors or can_open_doors:
             closed_ch = tile_types.closed_door["dark"]["ch"]
-            if gamemap.tiles["dark"]["ch"][x, y] == closed_ch:
+            if gamemap.tiles.glyph_mask(closed_ch)[x, y]:
                 # Trata puertas cerradas como transitables para criaturas que pueden abrirlas/atravesarlas.
                 return True
         if not gamemap.tiles["walkable"][x, y]:
@@ -173,7 +188,7 @@ class BaseAI(Action):
         if blocker and blocker is not self.entity:
             # Puertas cuentan como bloqueadores si no pueden abrirlas; el resto siempre bloquea.
             if can_pass_closed_doors or can_open_doors:
-                if getattr(getattr(blocker, "name", ""), "lower", lambda: "")() == "door":
+                if entity_kinds.kind_of(blocker) == entity_kinds.DOOR:
                     return True
             return False
         return True
@@ -257,6 +272,7 @@ class BaseAI(Action):
                         if self.entity.gamemap.tiles["walkable"][next_x, next_y]:
                             blocker = self.entity.gamemap.get_blocking_entity_at_location(next_x, next_y)
                             if not blocker or blocker is self.entity:
+                                perf_counters.path.hits += 1
                                 # Devolvemos copia para no mutar la cache al hacer pop() fuera.
                                 return list(cached_path)
                     except Exception:
@@ -291,6 +307,7 @@ class BaseAI(Action):
                 except Exception:
                     pass
 
+        perf_counters.path.misses += 1
         # Si está cerca, usa un algoritmo BFS barato en radio limitado; así evitamos A* para caminos cortos.
         bfs_radius = max(1, getattr(settings, "AI_PATH_BFS_RADIUS", 8))
         bfs_path = self._bfs_path_limited(
@@ -307,14 +324,13 @@ class BaseAI(Action):
         cost = np.array(gamemap.tiles["walkable"], dtype=np.int8)
         if can_pass_closed_doors or can_open_doors:
             closed_ch = tile_types.closed_door["dark"]["ch"]
-            door_mask = gamemap.tiles["dark"]["ch"] == closed_ch
+            door_mask = gamemap.tiles.glyph_mask(closed_ch)
             cost[door_mask] = 1
 
         for entity in self.entity.gamemap.entities:
             if not entity.blocks_movement or not cost[entity.x, entity.y]:
                 continue
-            name = getattr(getattr(entity, "name", ""), "lower", lambda: "")()
-            if name == "door":
+            if getattr(entity, "kind", None) == entity_kinds.DOOR:
                 if can_pass_closed_doors or can_open_doors:
                     continue
                 # Para criaturas que no pueden abrir/pasar, las puertas son muros.
@@ -385,6 +401,7 @@ class AIContext:
     noise_bonus: int = 0
     target_stealth: int = 0
     target_luck: int = 0
+    line_of_fire: Optional["LineOfFire"] = None
 
 
 class AIModule:
@@ -532,12 +549,12 @@ class ModularAI(BaseAI):
         if base_range is None:
             return None, 0, 0
         if self.entity.fighter.aggravated is False:
-            luck_roll = random.randint(0, target_luck)
-            engage_roll = random.randint(0, self.entity.fighter.perception)
+            luck_roll = rng.randint(0, target_luck)
+            engage_roll = rng.randint(0, self.entity.fighter.perception)
             engage_rng = engage_roll + base_range - target_stealth - luck_roll
             return engage_rng, engage_roll, luck_roll
         luck_roll = 0
-        engage_roll = random.randint(0, 3)
+        engage_roll = rng.randint(0, 3)
         engage_rng = engage_roll + base_range
         return engage_rng, engage_roll, luck_roll
 
@@ -664,8 +681,8 @@ class MeleeCombatModule(AIModule):
             return None
 
         if ctx.entity.fighter.aggravated is False:
-            stealth_roll = random.randint(1, 4) + ctx.target_stealth + random.randint(0, ctx.target_luck)
-            awareness = random.randint(0, 3) + max(
+            stealth_roll = rng.randint(1, 4) + ctx.target_stealth + rng.randint(0, ctx.target_luck)
+            awareness = rng.randint(0, 3) + max(
                 getattr(ctx.entity.fighter, "fov", 0),
                 getattr(ctx.entity.fighter, "foh", 0),
             )
@@ -733,8 +750,8 @@ class MeleeDefensiveModule(AIModule):
             return None
 
         if ctx.entity.fighter.aggravated is False:
-            stealth_roll = random.randint(1, 4) + ctx.target_stealth + random.randint(0, ctx.target_luck)
-            awareness = random.randint(0, 3) + max(
+            stealth_roll = rng.randint(1, 4) + ctx.target_stealth + rng.randint(0, ctx.target_luck)
+            awareness = rng.randint(0, 3) + max(
                 getattr(ctx.entity.fighter, "fov", 0),
                 getattr(ctx.entity.fighter, "foh", 0),
             )
@@ -753,7 +770,7 @@ class MeleeDefensiveModule(AIModule):
         if ctx.entity.fighter.stamina == 0:
             aggressivity = max(0, getattr(ctx.entity.fighter, "aggressivity", 0))
             retreat_chance = max(0, 50 - aggressivity)
-            if retreat_chance > 0 and random.randint(1, 100) <= retreat_chance:
+            if retreat_chance > 0 and rng.randint(1, 100) <= retreat_chance:
                 retreat_action = self._try_retreat(ctx)
                 if retreat_action:
                     return retreat_action
@@ -771,21 +788,16 @@ class RangedHarassModule(AIModule):
     def __init__(self, *, min_range: int = 2) -> None:
         self.min_range = max(1, min_range)
 
+    def _line_of_fire(self, ctx: AIContext) -> "LineOfFire":
+        """Build (once per turn) the blocking snapshot used for every shot this entity evaluates."""
+        if ctx.line_of_fire is None:
+            from line_of_fire import LineOfFire
+
+            ctx.line_of_fire = LineOfFire(ctx.ai.engine.game_map, ignore=(ctx.entity,))
+        return ctx.line_of_fire
+
     def _line_of_fire_clear(self, ctx: AIContext, x0: int, y0: int, x1: int, y1: int) -> bool:
-        gamemap = ctx.ai.engine.game_map
-        try:
-            transparent = gamemap.get_transparency_map()
-        except AttributeError:
-            transparent = gamemap.tiles["transparent"]
-        line = tcod.los.bresenham((x0, y0), (x1, y1)).tolist()
-        for x, y in line[1:]:
-            if (x, y) == (x1, y1):
-                break
-            if not transparent[x, y]:
-                return False
-            if gamemap.get_actor_at_location(x, y):
-                return False
-        return True
+        return self._line_of_fire(ctx).is_clear((x0, y0), (x1, y1))
 
     def _get_ranged_weapon(self, ctx: AIContext) -> Optional["Item"]:
         weapon = getattr(ctx.entity.equipment, "weapon", None)
@@ -897,10 +909,16 @@ class RangedHarassModule(AIModule):
             dist = max(abs(nx - ctx.target.x), abs(ny - ctx.target.y))
             if dist < self.min_range or dist > weapon_range:
                 continue
-            if not self._line_of_fire_clear(ctx, nx, ny, ctx.target.x, ctx.target.y):
-                continue
             candidates.append((dist, nx, ny))
 
+        if not candidates:
+            return None
+        # Todas las casillas candidatas se evalúan de una vez contra el mismo snapshot.
+        clear_tiles = self._line_of_fire(ctx).clear_tiles(
+            (ctx.target.x, ctx.target.y),
+            [(nx, ny) for _, nx, ny in candidates],
+        )
+        candidates = [entry for entry in candidates if (entry[1], entry[2]) in clear_tiles]
         if not candidates:
             return None
         candidates.sort(key=lambda entry: entry[0])
@@ -1098,7 +1116,7 @@ class PatrolModule(AIModule):
             sx, sy = spawn
             centers_list.sort(key=lambda c: abs(c[0] - sx) + abs(c[1] - sy))
         else:
-            random.shuffle(centers_list)
+            rng.shuffle(centers_list)
 
         ctx.state.room_centers = centers_list
 
@@ -1297,7 +1315,7 @@ class HostileEnemyV3(BaseAI):
         sound_map = np.where(sound_map, sound_map, wall_opacity)
         try:
             closed_ch = tile_types.closed_door["dark"]["ch"]
-            door_mask = gamemap.tiles["dark"]["ch"] == closed_ch
+            door_mask = gamemap.tiles.glyph_mask(closed_ch)
             sound_map[door_mask] = 0.5  # Closed doors are semi-transparent for sound; tweak here. Menor valor, peor dejan pasar el ruido.
         except Exception:
             pass
@@ -1347,13 +1365,13 @@ class HostileEnemyV3(BaseAI):
         if base_range is None:
             return None, 0, 0
         if self.entity.fighter.aggravated is False:
-            luck_roll = random.randint(0, target_luck)
-            engage_roll = random.randint(0, self.entity.fighter.perception)
+            luck_roll = rng.randint(0, target_luck)
+            engage_roll = rng.randint(0, self.entity.fighter.perception)
             engage_rng = engage_roll + base_range - target_stealth - luck_roll
             return engage_rng, engage_roll, luck_roll
         else:
             luck_roll = 0
-            engage_roll = random.randint(0, 3)
+            engage_roll = rng.randint(0, 3)
             engage_rng = engage_roll + base_range
             return engage_rng, engage_roll, luck_roll
 
@@ -1480,8 +1498,8 @@ class HostileEnemyV3(BaseAI):
         elif engage_rng >= 0 and distance <= 1:
             if self.entity.fighter.aggravated == False:
                 # Stealth check en contacto melee: el atacante intenta no agravar todavía.
-                stealth_roll = random.randint(1, 4) + target_stealth + random.randint(0, target_luck)
-                awareness = random.randint(0, 3) + max(getattr(self.entity.fighter, "fov", 0), getattr(self.entity.fighter, "foh", 0))
+                stealth_roll = rng.randint(1, 4) + target_stealth + rng.randint(0, target_luck)
+                awareness = rng.randint(0, 3) + max(getattr(self.entity.fighter, "fov", 0), getattr(self.entity.fighter, "foh", 0))
                 if settings.DEBUG_MODE:
                     dbg = f"[DEBUG] {self.entity.name} melee stealth check: roll={stealth_roll} vs dc={awareness}"
                     try:
@@ -1508,7 +1526,7 @@ class HostileEnemyV3(BaseAI):
             if not self.path2:
                 return WaitAction(self.entity).perform()
             else:
-                if self.entity.fighter.wait_counter <= random.randint(1, 4) + self.entity.fighter.aggressivity:
+                if self.entity.fighter.wait_counter <= rng.randint(1, 4) + self.entity.fighter.aggressivity:
                     self.entity.fighter.wait_counter += 1
                     return WaitAction(self.entity).perform()
                 else:
@@ -1542,7 +1560,7 @@ class ScoutV3(BaseAI):
             sx, sy = spawn
             centers_list.sort(key=lambda c: abs(c[0] - sx) + abs(c[1] - sy))
         else:
-            random.shuffle(centers_list)
+            rng.shuffle(centers_list)
 
         self.room_centers = centers_list
 
@@ -1646,7 +1664,7 @@ class ScoutV3(BaseAI):
         sound_map = np.where(sound_map, sound_map, wall_opacity)
         try:
             closed_ch = tile_types.closed_door["dark"]["ch"]
-            door_mask = gamemap.tiles["dark"]["ch"] == closed_ch
+            door_mask = gamemap.tiles.glyph_mask(closed_ch)
             sound_map[door_mask] = 0.5  # Closed doors are semi-transparent for sound; tweak here. Menor valor, peor dejan pasar el ruido.
         except Exception:
             pass
@@ -1696,13 +1714,13 @@ class ScoutV3(BaseAI):
         if base_range is None:
             return None, 0, 0
         if self.entity.fighter.aggravated is False:
-            luck_roll = random.randint(0, target_luck)
-            engage_roll = random.randint(0, self.entity.fighter.perception)
+            luck_roll = rng.randint(0, target_luck)
+            engage_roll = rng.randint(0, self.entity.fighter.perception)
             engage_rng = engage_roll + base_range - target_stealth - luck_roll
             return engage_rng, engage_roll, luck_roll
         else:
             luck_roll = 0
-            engage_roll = random.randint(0, 3)
+            engage_roll = rng.randint(0, 3)
             engage_rng = engage_roll + base_range
             return engage_rng, engage_roll, luck_roll
 
@@ -1811,8 +1829,8 @@ class ScoutV3(BaseAI):
         elif engage_rng >= 0 and distance <= 1:
             if self.entity.fighter.aggravated == False:
                 # Stealth check en contacto melee: el atacante intenta no agravar todavía.
-                stealth_roll = random.randint(1, 4) + target_stealth + random.randint(0, target_luck)
-                awareness = random.randint(0, 3) + max(getattr(self.entity.fighter, "fov", 0), getattr(self.entity.fighter, "foh", 0))
+                stealth_roll = rng.randint(1, 4) + target_stealth + rng.randint(0, target_luck)
+                awareness = rng.randint(0, 3) + max(getattr(self.entity.fighter, "fov", 0), getattr(self.entity.fighter, "foh", 0))
                 if settings.DEBUG_MODE:
                     dbg = f"[DEBUG] {self.entity.name} melee stealth check: roll={stealth_roll} vs dc={awareness}"
                     try:
@@ -2007,6 +2025,10 @@ class DemonicObjectRetrieverAI(BaseAI):
             _detach_from_parent()
             inventory.items.append(item)
             item.parent = inventory
+            # El contenedor puede estar en otra planta, ya guardada.
+            import save_archive
+
+            save_archive.mark_dirty(engine, getattr(container, "parent", None))
             if getattr(settings, "DEBUG_MODE", False):
                 name = getattr(item, "name", "") or getattr(item, "id_name", "item")
                 print(
@@ -2020,17 +2042,18 @@ class DemonicObjectRetrieverAI(BaseAI):
             if isinstance(layout, dict):
                 map_name = str(layout.get("map", "")).lower()
             if map_name in ("the_library", "the_library_template"):
-                if isinstance(floor, int) and 1 <= floor <= len(game_world.levels):
-                    library_maps.append((floor, game_world.levels[floor - 1]))
+                # En un mundo perezoso la biblioteca se genera aquí si aún no se ha visitado.
+                game_map = game_world.get_main_floor(floor) if isinstance(floor, int) else None
+                if game_map is not None:
+                    library_maps.append((floor, game_map))
 
         library_shelves = []
         for floor, game_map in library_maps:
-            for entity in getattr(game_map, "entities", []):
-                if getattr(entity, "id_name", "").lower() == "bookshelf":
-                    library_shelves.append((game_map, entity))
+            for entity in game_map.entities.of_kind(entity_kinds.BOOKSHELF):
+                library_shelves.append((game_map, entity))
 
         if library_shelves:
-            _, shelf = random.choice(library_shelves)
+            _, shelf = rng.choice(library_shelves)
             label = getattr(getattr(shelf, "gamemap", None), "branch_label", None) or "?"
             _place_in_container(shelf, label)
             return
@@ -2049,7 +2072,7 @@ class DemonicObjectRetrieverAI(BaseAI):
                 print(f"DEBUG: Demonic retrieval could not place {name}; no containers found.")
             return
 
-        _, container = random.choice(containers)
+        _, container = rng.choice(containers)
         label = getattr(getattr(container, "gamemap", None), "branch_label", None) or "?"
         _place_in_container(container, label)
 
@@ -2108,7 +2131,7 @@ class ConfusedEnemy(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = rng.choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -2147,7 +2170,7 @@ class SelfConfused(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = rng.choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -2282,7 +2305,7 @@ class SleepingEnemy(BaseAI):
             return PassAction(self.entity).perform()
 
         target_luck = getattr(target_fighter, "luck", 0)
-        sleeping_dice = random.randint(2,12) - target_luck
+        sleeping_dice = rng.randint(2,12) - target_luck
 
         if sleeping_dice > 10:
             woke_ai = self.entity.fighter.woke_ai_cls(self.entity)
@@ -2298,10 +2321,10 @@ class SleepingEnemy(BaseAI):
             # Si self.entity se encuentra entre las casillas visibles por el PJ... 
             if self.engine.game_map.visible[self.entity.x, self.entity.y]:
                 
-                sneak_dice = random.randint(1, 6)
+                sneak_dice = rng.randint(1, 6)
                 sneak_final = sneak_dice - getattr(target_fighter, "stealth", 0)
                 target_luck_bonus = (
-                    random.randint(0, target_luck) if target_luck > 0 else 0
+                    rng.randint(0, target_luck) if target_luck > 0 else 0
                 )
                 break_point = 3 + target_luck_bonus
                 
@@ -2508,7 +2531,7 @@ class SlimeAI(BaseAI):
             (0, 1),
             (1, 1),
         ]
-        random.shuffle(directions)
+        rng.shuffle(directions)
         room_tiles_set = set(room_tiles) if room_tiles else None
 
         candidates: List[Tuple[int, int]] = []
@@ -2527,7 +2550,7 @@ class SlimeAI(BaseAI):
             candidates.append((nx, ny))
 
         if candidates:
-            return random.choice(candidates)
+            return rng.choice(candidates)
 
         # If no candidates but room_tiles known and there are still tiles left, allow revisiting to keep moving.
         if room_tiles_set and not room_tiles_set.issubset(self._visited):
@@ -2676,7 +2699,7 @@ class AdventurerAI(BaseAI):
         if not options:
             self.target = None
             return
-        self.target = random.choice(options)
+        self.target = rng.choice(options)
         self.path = []
         self.stalled_turns = 0
 
@@ -2703,7 +2726,7 @@ class AdventurerAI(BaseAI):
             (0, 1),
             (1, 1),
         ]
-        random.shuffle(directions)
+        rng.shuffle(directions)
         for dx, dy in directions:
             nx = self.entity.x + dx
             ny = self.entity.y + dy
@@ -2792,15 +2815,7 @@ class AdventurerAI(BaseAI):
         return False
 
     def _adjacent_campfire(self):
-        gamemap = self.engine.game_map
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
-                if dx == 0 and dy == 0:
-                    continue
-                actor = gamemap.get_actor_at_location(self.entity.x + dx, self.entity.y + dy)
-                if actor and getattr(actor, "name", "").lower() == "campfire":
-                    return actor
-        return None
+        return _adjacent_campfire(self.entity, self.engine.game_map)
 
     def _is_adjacent_to(self, entity: Actor) -> bool:
         return max(abs(entity.x - self.entity.x), abs(entity.y - self.entity.y)) <= 1
@@ -2813,13 +2828,13 @@ class AdventurerAI(BaseAI):
 
         if self._relevant_greetings_remaining > 0 and relevant:
             self._relevant_greetings_remaining -= 1
-            return random.choice(relevant)
+            return rng.choice(relevant)
 
         if irrelevant:
-            return random.choice(irrelevant)
+            return rng.choice(irrelevant)
 
         if relevant:
-            return random.choice(relevant)
+            return rng.choice(relevant)
 
         return None
 
@@ -2859,17 +2874,7 @@ class AdventurerAI(BaseAI):
         return False
 
     def _adjacent_campfire(self):
-        gamemap = self.engine.game_map
-        for dx in (-1, 0, 1):
-            for dy in (-1, 0, 1):
-                if dx == 0 and dy == 0:
-                    continue
-                x = self.entity.x + dx
-                y = self.entity.y + dy
-                actor = gamemap.get_actor_at_location(x, y)
-                if actor and getattr(actor, "name", "").lower() == "campfire":
-                    return actor
-        return None
+        return _adjacent_campfire(self.entity, self.engine.game_map)
 
     def _is_adjacent_to(self, entity: Actor) -> bool:
         return (
@@ -2920,7 +2925,7 @@ class WardenAI(BaseAI):
 
     def _reset_search_turns(self) -> int:
         base = getattr(settings, "WARDEN_SEARCH_TURNS", 5)
-        return max(1, base + random.randint(0, 2))
+        return max(1, base + rng.randint(0, 2))
 
     def _ensure_patrol_points(self) -> None:
         if self._patrol_points:
@@ -2935,8 +2940,8 @@ class WardenAI(BaseAI):
         candidates: set[Tuple[int, int]] = set()
         attempts = 0
         while len(candidates) < 3 and attempts < 40:
-            dx = random.randint(-4, 4)
-            dy = random.randint(-4, 4)
+            dx = rng.randint(-4, 4)
+            dy = rng.randint(-4, 4)
             if dx == 0 and dy == 0:
                 attempts += 1
                 continue
@@ -3010,7 +3015,7 @@ class WardenAI(BaseAI):
         target = self._patrol_points[self._patrol_index % len(self._patrol_points)]
         if (self.entity.x, self.entity.y) == target:
             self._patrol_index = (self._patrol_index + 1) % len(self._patrol_points)
-            self._hold_turns = random.randint(0, 1)
+            self._hold_turns = rng.randint(0, 1)
             return WaitAction(self.entity).perform()
 
         return self._advance_to(target, ignore_senses=True)
@@ -3094,8 +3099,8 @@ class SneakeEnemy(BaseAI):
             if target_stealth < 0:
                 stealth_penalty = target_stealth
             else:
-                stealth_penalty = random.randint(0, target_stealth)
-            engage_rng = random.randint(0, 1) + self.entity.fighter.fov - stealth_penalty
+                stealth_penalty = rng.randint(0, target_stealth)
+            engage_rng = rng.randint(0, 1) + self.entity.fighter.fov - stealth_penalty
         else:
             #print(f"{self.entity.name} aggravated: {self.entity.fighter.aggravated}")
             engage_rng = 1 + self.entity.fighter.fov
@@ -3132,7 +3137,7 @@ class SneakeEnemy(BaseAI):
             else:
                 # Esto hace que el monstruo, al de x turnos, vuelva a la casilla en la que fue spawmeada
 
-                if self.entity.fighter.wait_counter <= random.randint(1, 4) + self.entity.fighter.aggressivity:
+                if self.entity.fighter.wait_counter <= rng.randint(1, 4) + self.entity.fighter.aggressivity:
                     self.entity.fighter.wait_counter += 1
                     return WaitAction(self.entity).perform()
                 else:
@@ -3176,7 +3181,7 @@ class Dummy(BaseAI):
 
     def perform(self) -> None:
         
-        if self.entity.name == "Campfire":
+        if entity_kinds.kind_of(self.entity) == entity_kinds.CAMPFIRE:
 
             player = self.engine.player
             campfire = self.entity
@@ -3261,7 +3266,7 @@ class OldManAI(BaseAI):
             return self._repeat_message
 
         self._messages_delivered += 1
-        return random.choice(messages)
+        return rng.choice(messages)
 
     def on_player_bump(self) -> None:
         self._speak()
@@ -3332,10 +3337,10 @@ class OldManAI(BaseAI):
 #         target_stealth = getattr(target.fighter, "stealth", 0)
 #         target_luck = getattr(target.fighter, "luck", 0)
 #         if self.entity.fighter.aggravated == False:
-#             engage_rng = random.randint(0, 3) + self.entity.fighter.fov - target_stealth - random.randint(0, target_luck)
+#             engage_rng = rng.randint(0, 3) + self.entity.fighter.fov - target_stealth - rng.randint(0, target_luck)
 
 #         else:
-#             engage_rng = random.randint(0, 3) + self.entity.fighter.fov
+#             engage_rng = rng.randint(0, 3) + self.entity.fighter.fov
         
 #         # Debug
 #         #self.engine.message_log.add_message(f"{self.spawn_point} ---> (0, 0)")
@@ -3403,7 +3408,7 @@ class OldManAI(BaseAI):
 #             else:
 #                 # Esto hace que el monstruo, al de x turnos, vuelva a la casilla en la que fue spawmeada
 
-#                 if self.entity.fighter.wait_counter <= random.randint(1, 4) + self.entity.fighter.aggressivity:
+#                 if self.entity.fighter.wait_counter <= rng.randint(1, 4) + self.entity.fighter.aggressivity:
 #                     self.entity.fighter.wait_counter += 1
 #                     return WaitAction(self.entity).perform()
 #                 else:
@@ -3470,9 +3475,9 @@ class OldManAI(BaseAI):
 #         if self.entity.fighter.aggravated == False:
 
 #             target_stealth = getattr(target.fighter, "stealth", 0)
-#             engage_rng = random.randint(0, 3) + self.entity.fighter.fov - target_stealth - random.randint(0, self.entity.fighter.luck)
+#             engage_rng = rng.randint(0, 3) + self.entity.fighter.fov - target_stealth - rng.randint(0, self.entity.fighter.luck)
 #         else:
-#             engage_rng = random.randint(0, 3) + self.entity.fighter.fov - random.randint(0, self.entity.fighter.luck)
+#             engage_rng = rng.randint(0, 3) + self.entity.fighter.fov - rng.randint(0, self.entity.fighter.luck)
 
 
 #         if distance > 1 and distance <= engage_rng:
@@ -3524,7 +3529,7 @@ class OldManAI(BaseAI):
 
 #             if self.entity.fighter.stamina >= 1:
 
-#                 if random.randint(1,6) <= 3:
+#                 if rng.randint(1,6) <= 3:
 
 #                     self.path_to_origin = self.get_path_to(self.entity.spawn_coord[0], self.entity.spawn_coord[1])
 
@@ -3544,7 +3549,7 @@ class OldManAI(BaseAI):
 
 #                 if self.entity.fighter.stamina == 2:
 
-#                     if random.randint(1,6) <= 3:
+#                     if rng.randint(1,6) <= 3:
 
 #                         self.path_to_origin = self.get_path_to(self.entity.spawn_coord[0], self.entity.spawn_coord[1])
 #                         dest_x, dest_y = self.path_to_origin.pop(0)
@@ -3568,7 +3573,7 @@ class OldManAI(BaseAI):
 #             else:
 #                 # Esto hace que el monstruo, al de x turnos, vuelva a la casilla en la que fue spawmeada
 
-#                 if self.entity.fighter.wait_counter <= random.randint(1, 4) + self.entity.fighter.aggressivity:
+#                 if self.entity.fighter.wait_counter <= rng.randint(1, 4) + self.entity.fighter.aggressivity:
 #                     self.entity.fighter.wait_counter += 1
 #                     return WaitAction(self.entity).perform()
 #                 else:
@@ -3615,7 +3620,7 @@ class OldManAI(BaseAI):
 
 #         gamemap = self.engine.game_map
 #         directions = list(self._NEIGHBOR_DELTAS)
-#         random.shuffle(directions)
+#         rng.shuffle(directions)
 #         for dx, dy in directions:
 #             nx = self.entity.x + dx
 #             ny = self.entity.y + dy
@@ -3636,7 +3641,7 @@ class OldManAI(BaseAI):
 #         WaitAction(self.entity).perform()
 
 #     def _roll_wander_delay(self) -> int:
-#         return random.randint(1, 6)
+#         return rng.randint(1, 6)
 
 #     def _is_valid_aggressor(self, actor: Optional[Actor]) -> bool:
 #         if not actor:
@@ -3749,13 +3754,13 @@ class OldManAI(BaseAI):
 #             # if target_stealth < 0:
 #             #     stealth_penalty = target_stealth
 #             # else:
-#             #     stealth_penalty = random.randint(0, target_stealth)
-#             # engage_rng = random.randint(1, 3) + self.entity.fighter.fov - stealth_penalty
-#             engage_rng = random.randint(0, 3) + self.entity.fighter.fov - target_stealth - random.randint(0, target_luck)
+#             #     stealth_penalty = rng.randint(0, target_stealth)
+#             # engage_rng = rng.randint(1, 3) + self.entity.fighter.fov - stealth_penalty
+#             engage_rng = rng.randint(0, 3) + self.entity.fighter.fov - target_stealth - rng.randint(0, target_luck)
 
 #         else:
 #             #print(f"{self.entity.name} aggravated: {self.entity.fighter.aggravated}") # Debug
-#             engage_rng = random.randint(0, 3) + self.entity.fighter.fov
+#             engage_rng = rng.randint(0, 3) + self.entity.fighter.fov
         
 #         # Debug
 #         #self.engine.message_log.add_message(f"{self.spawn_point} ---> (0, 0)")
@@ -3819,7 +3824,7 @@ class OldManAI(BaseAI):
 #             else:
 #                 # Esto hace que el monstruo, al de x turnos, vuelva a la casilla en la que fue spawmeada
 
-#                 if self.entity.fighter.wait_counter <= random.randint(1, 4) + self.entity.fighter.aggressivity:
+#                 if self.entity.fighter.wait_counter <= rng.randint(1, 4) + self.entity.fighter.aggressivity:
 #                     self.entity.fighter.wait_counter += 1
 #                     return WaitAction(self.entity).perform()
 #                 else:
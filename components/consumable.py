@@ -7,6 +7,7 @@ import random
 
 import actions
 import color
+import entity_kinds
 import components.ai
 import components.inventory
 from components.base_component import BaseComponent
@@ -982,8 +983,7 @@ class FireballDamageConsumable(AreaTargetScrollConsumable):
         return random.choice(candidates)
 
     def _resolve_ignite_chance(self, target) -> Optional[float]:
-        name = getattr(target, "name", "").lower()
-        if name == "door":
+        if entity_kinds.kind_of(target) == entity_kinds.DOOR:
             return 1.0
         return None
 
@@ -2,19 +2,111 @@
 
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import Iterable, Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
 import color
 
 if TYPE_CHECKING:
+    from components.equippable import Equippable
     from entity import Actor, Item
 
+# Ranuras de equipo, en el orden en que se suman sus bonificaciones.
+ITEM_SLOTS = (
+    "weapon",
+    "offhand",
+    "armor",
+    "head_armor",
+    "cloak",
+    "artifact",
+    "ring_left",
+    "ring_right",
+)
+_ITEM_SLOT_NAMES = frozenset(ITEM_SLOTS)
+
+
+def _total(equippables: Iterable[Equippable], attribute: str) -> int:
+    return sum(getattr(eq, attribute, 0) for eq in equippables)
+
+
+class EquipmentStats:
+    """Bonuses of everything an actor has equipped, summed once.
+
+    `Equipment.stats` lo construye la primera vez que se pide y lo descarta
+    cuando cambia cualquier ranura; los `Equippable` no cambian después de
+    crearse, así que el bloque sigue siendo válido hasta entonces.
+    """
+
+    __slots__ = (
+        "defense_bonus",
+        "total_equipment_dmg_bonus",
+        "non_weapon_dmg_bonus",
+        "stealth_bonus",
+        "stealth_penalty",
+        "noise_penalty",
+        "to_hit_bonus",
+        "to_hit_penalty",
+        "armor_value_bonus",
+        "strength_bonus",
+        "fov_bonus",
+        "max_stamina_bonus",
+        "poison_resistance_bonus",
+        "super_memory_bonus",
+        "recover_rate_bonus",
+        "base_defense_bonus",
+        "luck_bonus",
+    )
+
+    def __init__(self, weapon: Optional[Equippable], others: Iterable[Equippable]) -> None:
+        others = list(others)
+        every = [weapon] + others if weapon is not None else others
+        self.defense_bonus = _total(every, "defense_bonus")
+        self.total_equipment_dmg_bonus = _total(every, "dmg_bonus")
+        # El arma no cuenta para el daño sin arma ni para el valor de armadura.
+        self.non_weapon_dmg_bonus = _total(others, "dmg_bonus")
+        self.armor_value_bonus = _total(others, "armor_value_bonus")
+        self.stealth_bonus = _total(every, "stealth_bonus")
+        # La penalización de sigilo la da el peso de la armadura (armor_value_bonus) de todo lo equipado.
+        self.stealth_penalty = _total(every, "armor_value_bonus")
+        self.noise_penalty = _total(every, "noise_penalty")
+        self.to_hit_bonus = _total(every, "to_hit_bonus")
+        self.to_hit_penalty = _total(every, "to_hit_penalty")
+        self.strength_bonus = _total(every, "strength_bonus")
+        self.fov_bonus = _total(every, "fov_bonus")
+        self.max_stamina_bonus = _total(every, "max_stamina_bonus")
+        self.poison_resistance_bonus = _total(every, "poison_resistance_bonus")
+        self.super_memory_bonus = any(getattr(eq, "super_memory_bonus", False) for eq in every)
+        self.recover_rate_bonus = _total(every, "recover_rate_bonus")
+        self.base_defense_bonus = _total(every, "base_defense_bonus")
+        self.luck_bonus = _total(every, "luck_bonus")
+
+
+# Bloque de un actor sin equipo (o sin componente Equipment).
+NO_EQUIPMENT_STATS = EquipmentStats(None, ())
+
 # CUIDADO! No es lo mismo la clase Equippable que la clase Equipment.
 # Equippable es un componente que tienen los ítems que pueden ser equipados.
 # Equipment es un componente que tienen los actores (jugador, NPCs) que pueden equipar ítems.
 class Equipment(BaseComponent):
+    __slots__ = (
+        "weapon",
+        "offhand",
+        "armor",
+        "artifact",
+        "ring_left",
+        "ring_right",
+        "has_head_slot",
+        "head_armor",
+        "has_cloak_slot",
+        "cloak",
+        "_stats",
+    )
+
+    # Ranuras añadidas después de que ya hubiera partidas guardadas.
+    state_defaults = {"offhand": None, "has_cloak_slot": False, "cloak": None}
+    transient = frozenset({"_stats"})
+
     parent: Actor
 
     def __init__(
@@ -41,31 +133,43 @@ class Equipment(BaseComponent):
         self.has_cloak_slot = has_cloak_slot
         self.cloak = cloak if has_cloak_slot else None
 
-    def __setstate__(self, state):
-        """Ensure new slots exist when loading older save files."""
-        self.__dict__.update(state)
-        self.__dict__.setdefault("offhand", None)
-        self.__dict__.setdefault("has_cloak_slot", False)
-        self.__dict__.setdefault("cloak", None)
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        if name in _ITEM_SLOT_NAMES:
+            # Cualquier cambio de ranura (también los `setattr` directos de las acciones).
+            super().__setattr__("_stats", None)
 
-    def _equipped_equippables(self):
-        return [
-            item.equippable
-            for item in (
-                self.weapon,
-                self.offhand,
-                self.armor,
-                self.head_armor,
-                self.cloak,
-                self.artifact,
-                self.ring_left,
-                self.ring_right,
+    @property
+    def stats(self) -> EquipmentStats:
+        """Cached bonus totals of the equipped items."""
+        try:
+            stats = self._stats
+        except AttributeError:  # Recién clonado o cargado: `_stats` no se guarda.
+            stats = None
+        if stats is None:
+            weapon = self.weapon
+            stats = EquipmentStats(
+                weapon.equippable if weapon is not None else None,
+                (
+                    item.equippable
+                    for item in (
+                        self.offhand,
+                        self.armor,
+                        self.head_armor,
+                        self.cloak,
+                        self.artifact,
+                        self.ring_left,
+                        self.ring_right,
+                    )
+                    if item is not None and item.equippable is not None
+                ),
             )
-            if item is not None and item.equippable is not None
-        ]
+            self._stats = stats
+        return stats
 
-    def _sum_bonus(self, attribute: str) -> int:
-        return sum(getattr(eq, attribute, 0) for eq in self._equipped_equippables())
+    def invalidate_stats(self) -> None:
+        """Forget the cached totals (they are rebuilt on the next read)."""
+        self._stats = None
 
     def equipped_items(self):
         """Return a list of all currently equipped item instances."""
@@ -98,285 +202,76 @@ class Equipment(BaseComponent):
             )
         return True
 
+    # Los totales salen del bloque `stats`, calculado una vez por cambio de equipo.
     @property
     def defense_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.defense_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.defense_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.defense_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.defense_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.defense_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.defense_bonus
-
-        return bonus
+        return self.stats.defense_bonus
 
     # La propiedad total_equipment_dmg_bonus suma el bonus al daño de todas las piezas equipadas 
     # que hagan daño o aporten un bonus al daño.
     @property
     def total_equipment_dmg_bonus(self) -> int:
-        total = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            #total += self.weapon.equippable.weapon_dmg
-            total += self.weapon.equippable.dmg_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            total += self.offhand.equippable.dmg_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            # total += self.armor.equippable.weapon_dmg
-            total += self.armor.equippable.dmg_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            total += self.head_armor.equippable.dmg_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            total += self.cloak.equippable.dmg_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            #total += self.artifact.equippable.weapon_dmg
-            total += self.artifact.equippable.dmg_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            total += self.ring_left.equippable.dmg_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            total += self.ring_right.equippable.dmg_bonus
-
-        return total
+        return self.stats.total_equipment_dmg_bonus
     
     @property
     def non_weapon_dmg_bonus(self) -> int:
-        bonus = 0
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.dmg_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.dmg_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.dmg_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.dmg_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.dmg_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.dmg_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.dmg_bonus
-
-        return bonus
+        return self.stats.non_weapon_dmg_bonus
 
     @property
     def stealth_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.stealth_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.stealth_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.stealth_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.stealth_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.stealth_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.stealth_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.stealth_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.stealth_bonus
-
-        return bonus
+        return self.stats.stealth_bonus
     
     @property
     def stealth_penalty(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            #bonus += self.weapon.equippable.stealth_penalty
-            bonus += self.weapon.equippable.armor_value_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.armor_value_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            #bonus += self.armor.equippable.stealth_penalty
-            bonus += self.armor.equippable.armor_value_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.armor_value_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.armor_value_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.armor_value_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.armor_value_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.armor_value_bonus
-
-        return bonus
+        return self.stats.stealth_penalty
 
     @property
     def noise_penalty(self) -> int:
-        return self._sum_bonus("noise_penalty")
+        return self.stats.noise_penalty
     
     @property
     def to_hit_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.to_hit_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.to_hit_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.to_hit_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.to_hit_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.to_hit_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.to_hit_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.to_hit_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.to_hit_bonus
-
-        return bonus
+        return self.stats.to_hit_bonus
     
     @property
     def to_hit_penalty(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.to_hit_penalty
-            #bonus += 1
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.to_hit_penalty
-
-        if self.armor is not None and self.armor.equippable is not None:
-            #bonus += self.weapon.equippable.to_hit_penalty
-            bonus += self.armor.equippable.to_hit_penalty
-            #bonus += 1 
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.to_hit_penalty
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.to_hit_penalty
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.to_hit_penalty
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.to_hit_penalty
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.to_hit_penalty
-
-        return bonus
+        return self.stats.to_hit_penalty
     
     @property
     def armor_value_bonus(self) -> int:
-        bonus = 0
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.armor_value_bonus
-
-        if self.offhand is not None and self.offhand.equippable is not None:
-            bonus += self.offhand.equippable.armor_value_bonus
-
-        if self.head_armor is not None and self.head_armor.equippable is not None:
-            bonus += self.head_armor.equippable.armor_value_bonus
-
-        if self.cloak is not None and self.cloak.equippable is not None:
-            bonus += self.cloak.equippable.armor_value_bonus
-
-        if self.artifact is not None and self.artifact.equippable is not None:
-            bonus += self.artifact.equippable.armor_value_bonus
-
-        if self.ring_left is not None and self.ring_left.equippable is not None:
-            bonus += self.ring_left.equippable.armor_value_bonus
-
-        if self.ring_right is not None and self.ring_right.equippable is not None:
-            bonus += self.ring_right.equippable.armor_value_bonus
-
-        return bonus
+        return self.stats.armor_value_bonus
 
     @property
     def strength_bonus(self) -> int:
-        return self._sum_bonus("strength_bonus")
+        return self.stats.strength_bonus
 
     @property
     def fov_bonus(self) -> int:
-        return self._sum_bonus("fov_bonus")
+        return self.stats.fov_bonus
 
     @property
     def max_stamina_bonus(self) -> int:
-        return self._sum_bonus("max_stamina_bonus")
+        return self.stats.max_stamina_bonus
 
     @property
     def poison_resistance_bonus(self) -> int:
-        return self._sum_bonus("poison_resistance_bonus")
+        return self.stats.poison_resistance_bonus
 
     @property
     def super_memory_bonus(self) -> bool:
-        return any(getattr(eq, "super_memory_bonus", False) for eq in self._equipped_equippables())
+        return self.stats.super_memory_bonus
 
     @property
     def recover_rate_bonus(self) -> int:
-        return self._sum_bonus("recover_rate_bonus")
+        return self.stats.recover_rate_bonus
 
     @property
     def base_defense_bonus(self) -> int:
-        return self._sum_bonus("base_defense_bonus")
+        return self.stats.base_defense_bonus
 
     @property
     def luck_bonus(self) -> int:
-        return self._sum_bonus("luck_bonus")
+        return self.stats.luck_bonus
 
     def item_is_equipped(self, item: Item) -> bool:
         return (
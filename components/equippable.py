@@ -13,6 +13,34 @@ import random
 
 
 class Equippable(BaseComponent):
+    __slots__ = (
+        "equipment_type",
+        "min_dmg",
+        "max_dmg",
+        "dmg_bonus",
+        "defense_bonus",
+        "stealth_bonus",
+        "stealth_penalty",
+        "to_hit_bonus",
+        "to_hit_penalty",
+        "armor_value_bonus",
+        "strength_bonus",
+        "fov_bonus",
+        "max_stamina_bonus",
+        "poison_resistance_bonus",
+        "super_memory_bonus",
+        "recover_rate_bonus",
+        "base_defense_bonus",
+        "luck_bonus",
+        "noise_penalty",
+        "cursed",
+        "ranged_range",
+        "ranged_strength_bonus",
+        "ranged_to_hit_bonus",
+        "reach",
+        "critical_multiplier",
+    )
+
     parent: Item
 
     def __init__(
@@ -3,13 +3,15 @@ from __future__ import annotations
 from typing import Optional, Tuple, TYPE_CHECKING
 import copy
 import random
-import numpy as np
 from i18n import _
 from tcod import constants
 from tcod.map import compute_fov
 
 import color
+import entity_kinds
+import status_effects
 from components.base_component import BaseComponent
+from components.equipment import NO_EQUIPMENT_STATS, EquipmentStats
 from render_order import RenderOrder
 import tile_types
 import loot_tables
@@ -59,9 +61,27 @@ turns = 0
 gainance = 0
 
 
+_PARALIZE_ENEMY_CLS = None
+
+
+def _paralize_enemy_cls():
+    """`components.ai.ParalizeEnemy`, imported once (ai imports this module)."""
+    global _PARALIZE_ENEMY_CLS
+    if _PARALIZE_ENEMY_CLS is None:
+        try:
+            from components.ai import ParalizeEnemy
+        except Exception:
+            return None
+        _PARALIZE_ENEMY_CLS = ParalizeEnemy
+    return _PARALIZE_ENEMY_CLS
+
+
 class NaturalWeapon:
     """Simple helper that describes a creature's natural attack."""
 
+    # Nunca se modifica tras crearse: los clones comparten la instancia.
+    clone_immutable = True
+
     def __init__(
         self,
         name: str,
@@ -93,9 +113,62 @@ class NaturalWeapon:
         return self.dmg_bonus
 
 
-class FireStatusMixin:
+class StatusTrackingMixin:
+    """`is_burning` / `is_poisoned` flags that keep `engine.status_effects` up to date.
+
+    Los valores se guardan en los slots `_is_burning` / `_is_poisoned`; al
+    cambiar, la entidad entra o sale del registro de efectos activos para que
+    el mantenimiento de cada turno sólo visite a las afectadas.
+    """
+
+    __slots__ = ()
+
+    # Partidas anteriores guardaban los flags con su nombre público.
+    state_renames = {"is_burning": "_is_burning", "is_poisoned": "_is_poisoned"}
+
+    @property
+    def is_burning(self) -> bool:
+        return self._is_burning
+
+    @is_burning.setter
+    def is_burning(self, value: bool) -> None:
+        previous = getattr(self, "_is_burning", value)
+        self._is_burning = value
+        if bool(previous) != bool(value):
+            status_effects.notify(self, status_effects.BURNING, bool(value))
+
+    @property
+    def is_poisoned(self) -> bool:
+        return self._is_poisoned
+
+    @is_poisoned.setter
+    def is_poisoned(self, value: bool) -> None:
+        previous = getattr(self, "_is_poisoned", value)
+        self._is_poisoned = value
+        if bool(previous) != bool(value):
+            status_effects.notify(self, status_effects.POISONED, bool(value))
+
+    def _forget_status_effects(self) -> None:
+        # Un cadáver no sigue ardiendo: antes se apagaba en el siguiente turno de fuego.
+        if getattr(self, "_is_burning", False):
+            self._extinguish_fire(silent=True)
+        engine = getattr(self, "engine", None)
+        registry = getattr(engine, "status_effects", None)
+        if registry is not None:
+            registry.forget(self.parent)
+
+    def _track_recovery(self) -> None:
+        # El registro suelta a la entidad cuando vuelve a tener la vida al máximo.
+        if self._hp < self.max_hp:
+            status_effects.notify(self, status_effects.RECOVERING, True)
+
+
+class FireStatusMixin(StatusTrackingMixin):
     """Shared fire-damage logic for any component that can burn."""
 
+    # Sin slots propios: cada componente declara fire_resistance, is_burning...
+    __slots__ = ()
+
     def _init_fire_status(self, fire_resistance: int = 1):
         self.fire_resistance = fire_resistance
         self.is_burning = False
@@ -253,6 +326,77 @@ class FireStatusMixin:
 from components.ai import HostileEnemyV3
 class Fighter(FireStatusMixin, BaseComponent):
 
+    __slots__ = (
+        "_hp",
+        "_stamina",
+        "_recover_counter",
+        "_recover_interval",
+        "_base_strength",
+        "_base_fov",
+        "_base_foh",
+        "_listen_foh_bonus",
+        "_base_max_stamina",
+        "_base_poison_resistance",
+        "_base_super_memory",
+        "_base_luck",
+        "_base_critical_chance",
+        "_base_recover_amount",
+        "_hidden_wait_turns",
+        "max_hp",
+        "base_defense",
+        "base_to_hit",
+        "base_stealth",
+        "base_armor_value",
+        "perception",
+        "weapon_proficiency",
+        "aggressivity",
+        "wait_counter",
+        "action_time_cost",
+        "current_time_points",
+        "temporal_effects",
+        "satiety",
+        "max_satiety",
+        "is_in_melee",
+        "defending",
+        "to_hit_counter",
+        "to_power_counter",
+        "to_defense_counter",
+        "missed_by_enemy_counter",
+        "aggravated",
+        "escape_threshold",
+        "fortified",
+        "can_fortify",
+        "can_open_doors",
+        "can_pass_closed_doors",
+        "location",
+        "_is_poisoned",
+        "poisoned_counter",
+        "poison_dmg",
+        "poisonous",
+        "poisons_on_hit",
+        "is_blind",
+        "is_hidden",
+        "lamp_on",
+        "is_slime",
+        "can_split",
+        "slime_generation",
+        "is_player_confused",
+        "player_confusion_turns",
+        "is_player_paralyzed",
+        "player_paralysis_turns",
+        "is_player_petrifying",
+        "player_petrify_stage",
+        "player_petrify_turns",
+        "natural_weapon",
+        "embedded_projectiles",
+        "woke_ai_cls",
+        "fire_resistance",
+        "_is_burning",
+        "burning_damage",
+        "never_extinguish",
+        "is_flying",
+    )
+
     parent: Actor
     _PLAYER_PETRIFY_MESSAGES = [
         "Tu piel se enfria y pierde color.",
@@ -411,6 +555,7 @@ class Fighter(FireStatusMixin, BaseComponent):
         took_damage = clamped < old_hp
         self._hp = clamped
         if took_damage:
+            self._track_recovery()
             parent_entity = getattr(self, "parent", None)
             engine = None
             try:
@@ -430,48 +575,45 @@ class Fighter(FireStatusMixin, BaseComponent):
         if self._hp == 0 and getattr(self.parent, "ai", None):
             self.die()
 
-    def _equipment_bonus(self, attribute: str, default: int = 0):
-        parent = getattr(self, "parent", None)
-        if parent:
-            equipment = getattr(parent, "equipment", None)
-            if equipment:
-                return getattr(equipment, attribute, default)
-        return default
+    @property
+    def equipment_stats(self) -> EquipmentStats:
+        """Bonus totals of everything equipped, summed once per equipment change."""
+        try:
+            return self.parent.equipment.stats
+        except AttributeError:  # Sin parent o sin componente Equipment.
+            return NO_EQUIPMENT_STATS
 
     @property
     def strength_bonus(self) -> int:
-        return self._equipment_bonus("strength_bonus")
+        return self.equipment_stats.strength_bonus
 
     @property
     def fov_bonus(self) -> int:
-        return self._equipment_bonus("fov_bonus")
+        return self.equipment_stats.fov_bonus
 
     @property
     def max_stamina_bonus(self) -> int:
-        return self._equipment_bonus("max_stamina_bonus")
+        return self.equipment_stats.max_stamina_bonus
 
     @property
     def poison_resistance_bonus(self) -> int:
-        return self._equipment_bonus("poison_resistance_bonus")
+        return self.equipment_stats.poison_resistance_bonus
 
     @property
     def super_memory_bonus(self) -> bool:
-        equipment = getattr(self.parent, "equipment", None)
-        if equipment:
-            return getattr(equipment, "super_memory_bonus", False)
-        return False
+        return self.equipment_stats.super_memory_bonus
 
     @property
     def recover_rate_bonus(self) -> int:
-        return self._equipment_bonus("recover_rate_bonus")
+        return self.equipment_stats.recover_rate_bonus
 
     @property
     def base_defense_bonus(self) -> int:
-        return self._equipment_bonus("base_defense_bonus")
+        return self.equipment_stats.base_defense_bonus
 
     @property
     def luck_bonus(self) -> int:
-        return self._equipment_bonus("luck_bonus")
+        return self.equipment_stats.luck_bonus
 
     @property
     def strength(self) -> int:
@@ -677,25 +819,17 @@ class Fighter(FireStatusMixin, BaseComponent):
         
     @property
     def non_weapon_dmg_bonus(self) -> str:
-        bonus = 0
-        if self.parent.equipment:
-            bonus += self.parent.equipment.non_weapon_dmg_bonus
-            return bonus
-        else:
-            return bonus
+        return self.equipment_stats.non_weapon_dmg_bonus
 
     # Total de bonus al daño de todo lo EQUIPADO
     @property
     def total_equipment_dmg_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.total_equipment_dmg_bonus
-        else:
-            return 0
+        return self.equipment_stats.total_equipment_dmg_bonus
 
     @property
     def total_fighter_dmg(self) -> int:
         if self.parent.equipment:
-            return (self.strength + self.weapon_dmg_dice + self.parent.equipment.total_equipment_dmg_bonus) * self.weapon_proficiency
+            return (self.strength + self.weapon_dmg_dice + self.equipment_stats.total_equipment_dmg_bonus) * self.weapon_proficiency
         else:
             return (self.strength + self.non_weapon_dmg_bonus) * self.weapon_proficiency
 
@@ -721,24 +855,15 @@ class Fighter(FireStatusMixin, BaseComponent):
 
     @property
     def defense_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.defense_bonus
-        else:
-            return 0
+        return self.equipment_stats.defense_bonus
         
     @property
     def stealth_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.stealth_bonus
-        else:
-            return 0
+        return self.equipment_stats.stealth_bonus
         
     @property
     def stealth_penalty(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.stealth_penalty
-        else:
-            return 0
+        return self.equipment_stats.stealth_penalty
 
     def has_cloak_equipped(self) -> bool:
         equipment = getattr(self.parent, "equipment", None)
@@ -930,25 +1055,15 @@ class Fighter(FireStatusMixin, BaseComponent):
         
     @property
     def to_hit_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.to_hit_bonus
-        else:
-            return 0
+        return self.equipment_stats.to_hit_bonus
         
     @property
     def to_hit_penalty(self) -> int:
-        penalty = 0
-        if self.parent.equipment:
-            # Por algún motivo esto está retornando 0
-            penalty += self.parent.equipment.to_hit_penalty
-        return penalty
+        return self.equipment_stats.to_hit_penalty
 
     def _is_paralyzed(self) -> bool:
         """Return True when paralysis should nullify defense."""
-        try:
-            from components.ai import ParalizeEnemy
-        except Exception:
-            ParalizeEnemy = None
+        ParalizeEnemy = _paralize_enemy_cls()
         ai = getattr(self.parent, "ai", None)
         if ParalizeEnemy and isinstance(ai, ParalizeEnemy):
             return True
@@ -956,12 +1071,12 @@ class Fighter(FireStatusMixin, BaseComponent):
         
     @property
     def armor_value_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.armor_value_bonus
-        else:
-            return 0
+        return self.equipment_stats.armor_value_bonus
 
     def on_equipment_changed(self) -> None:
+        equipment = getattr(self.parent, "equipment", None)
+        if equipment is not None:
+            equipment.invalidate_stats()
         # Keep mutable resources within the new limits after equipping/unequipping.
         self.stamina = self.stamina
     
@@ -1081,7 +1196,7 @@ class Fighter(FireStatusMixin, BaseComponent):
 
         original_name = getattr(self.parent, "name", "")
         lowered_name = original_name.lower() if isinstance(original_name, str) else ""
-        is_campfire = lowered_name == "campfire"
+        is_campfire = entity_kinds.kind_of(self.parent) == entity_kinds.CAMPFIRE
         is_table = lowered_name == "table"
 
         if self.engine.player is self.parent:
@@ -1120,6 +1235,9 @@ class Fighter(FireStatusMixin, BaseComponent):
         self.parent.ai = None
         self.parent.name = f"remains of {original_name}"
         self.parent.render_order = RenderOrder.CORPSE
+        # Los restos ya no son hoguera, aventurero ni puerta para los registros del mapa.
+        entity_kinds.retag(self.parent, None)
+        self._forget_status_effects()
 
         if self.engine.game_map.visible[self.parent.x, self.parent.y]:
             print(death_message)
@@ -1158,8 +1276,7 @@ class Fighter(FireStatusMixin, BaseComponent):
 
         #self.engine.player.fighter.is_in_melee = False
 
-        name = getattr(self.parent, "name", "")
-        is_adventurer = bool(name and name.lower() == "adventurer")
+        is_adventurer = entity_kinds.kind_of(self.parent) == entity_kinds.ADVENTURER
         adventurer_loot = []
         if is_adventurer:
             adventurer_loot = [copy.deepcopy(item) for item in self.parent.inventory.items]
@@ -1178,6 +1295,8 @@ class Fighter(FireStatusMixin, BaseComponent):
         self.parent.blocks_movement = False
         self.parent.ai = None
         self.parent.name = None
+        entity_kinds.retag(self.parent, None)
+        self._forget_status_effects()
 
         print(death_message)
         self.engine.message_log.add_message(death_message, death_message_color)
@@ -1536,6 +1655,45 @@ class Fighter(FireStatusMixin, BaseComponent):
         
 class Door(FireStatusMixin, BaseComponent):
 
+    __slots__ = (
+        "_hp",
+        "_recover_counter",
+        "max_hp",
+        "base_defense",
+        "base_to_hit",
+        "base_stealth",
+        "base_armor_value",
+        "strength",
+        "recover_rate",
+        "recover_amount",
+        "fov",
+        "stamina",
+        "max_stamina",
+        "weapon_proficiency",
+        "aggressivity",
+        "wait_counter",
+        "action_time_cost",
+        "current_time_points",
+        "temporal_effects",
+        "is_in_melee",
+        "to_hit_counter",
+        "to_power_counter",
+        "aggravated",
+        "fortified",
+        "can_fortity",
+        "location",
+        "_is_poisoned",
+        "is_open",
+        "open_char",
+        "closed_char",
+        "open_color",
+        "closed_color",
+        "lock_color",
+        "fire_resistance",
+        "_is_burning",
+        "burning_damage",
+    )
+
     parent: Obstacle
 
     def __init__(
@@ -1721,8 +1879,9 @@ class Door(FireStatusMixin, BaseComponent):
             return 0
 
     def sync_with_tile(self) -> None:
-        tile = self.engine.game_map.tiles[self.parent.x, self.parent.y]
-        self.is_open = bool(np.array_equal(tile, tile_types.open_door))
+        self.is_open = self.engine.game_map.tiles.is_tile(
+            self.parent.x, self.parent.y, tile_types.open_door
+        )
         self._apply_state(update_tile=False)
 
     def set_open(self, open_state: bool) -> None:
@@ -1800,6 +1959,31 @@ class Door(FireStatusMixin, BaseComponent):
 
 
 class BreakableWallFighter(FireStatusMixin, BaseComponent):
+    __slots__ = (
+        "_hp",
+        "_recover_counter",
+        "_last_attacker",
+        "_last_attacker_is_player",
+        "max_hp",
+        "base_defense",
+        "base_armor_value",
+        "strength",
+        "recover_rate",
+        "recover_amount",
+        "stamina",
+        "weapon_proficiency",
+        "action_time_cost",
+        "current_time_points",
+        "aggravated",
+        "_is_poisoned",
+        "poisoned_counter",
+        "poison_dmg",
+        "loot_drop_chance",
+        "fire_resistance",
+        "_is_burning",
+        "burning_damage",
+    )
+
     parent: Obstacle
 
     def __init__(
@@ -1843,6 +2027,7 @@ class BreakableWallFighter(FireStatusMixin, BaseComponent):
     @hp.setter
     def hp(self, value: int) -> None:
         self._hp = max(0, min(value, self.max_hp))
+        self._track_recovery()
         if self._hp == 0:
             self.die()
 
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import copy
 from collections import defaultdict
 from typing import Callable, List, Optional, TYPE_CHECKING, Tuple
 
 import loot_tables
+import prototypes
 
 from components.base_component import BaseComponent
 
@@ -14,6 +14,8 @@ if TYPE_CHECKING:
 
 
 class Inventory(BaseComponent):
+    __slots__ = ("capacity", "items", "loot_table_key", "loot_amount")
+
     parent: Actor
     """
     def __init__(self, capacity: int):
@@ -44,13 +46,14 @@ class Inventory(BaseComponent):
                     item, count = entry
                     if count <= 0:
                         continue
-                    expanded_items.extend(copy.deepcopy(item) for _ in range(count))
+                    expanded_items.extend(prototypes.clone(item) for _ in range(count))
                 else:
                     expanded_items.append(entry)
             self.items = expanded_items
-        elif self.loot_table_key:
-            # Pre-roll loot for blueprints; actual instances re-roll on spawn.
-            self.reroll_loot()
+            for item in expanded_items:
+                item.parent = self
+        # Inventories with `loot_table_key` (blueprints) stay empty: `Entity.spawn`
+        # rolls the loot of each instance, so rolling it here too was wasted work.
 
     def drop(self, item: Item) -> None:
         """
@@ -89,8 +92,11 @@ class Inventory(BaseComponent):
         rolled_items = loot_tables.build_monster_inventory(
             self.loot_table_key, self.loot_amount
         )
-        # Deep copy to ensure each entity gets independent item instances.
-        self.items = [copy.deepcopy(item) for item in rolled_items]
+        # Clone to ensure each entity gets independent item instances.
+        self.items = [prototypes.clone(item) for item in rolled_items]
+        # Con su `parent` el guardado sabe a qué planta pertenecen (ver save_archive).
+        for item in self.items:
+            item.parent = self
 
     def _display_name(self, item: Item) -> str:
         base_name = item.name
@@ -10,6 +10,8 @@ if TYPE_CHECKING:
 
 
 class Level(BaseComponent):
+    __slots__ = ("current_level", "current_xp", "level_up_base", "level_up_factor", "xp_given")
+
     parent: Actor
 
     # Con un valor level_up_factor de '10', el primer nivel cuesta 30pt (level_up_base + 10), 
@@ -3,13 +3,13 @@ the map and entities, as well as handling the player’s input."""
 
 from __future__ import annotations
 
+import os
 import random
+import sys
 import time
 
-import lzma
-import pickle
 from collections import deque
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import tcod
 import tcod.event
@@ -20,9 +20,13 @@ from tcod import constants
 import numpy as np
 import settings
 
+import autosave
+from camera import Camera
 import components.ai
 import components.base_component
 import exceptions
+import lighting
+import perf_counters
 from message_log import MessageLog
 import color
 import render_functions
@@ -31,10 +35,13 @@ from render_order import RenderOrder
 from audio import (
     preload_campfire_audio,
     preload_wind_audio,
+    start_audio_warmup,
     update_campfire_audio,
     update_wind_audio,
     set_audio_silence,
     ambient_sound,
+    capture_sound_effects,
+    play_sound_effects,
 )
 from visual_effects import WindEffect
 
@@ -46,6 +53,8 @@ if TYPE_CHECKING:
 import components.fighter
 import tile_types
 import entity_factories
+import entity_kinds
+import status_effects
 from components.ai import Dummy
 
 AnimationGlyph = Tuple[int, int, str, Tuple[int, int, int]]
@@ -53,8 +62,37 @@ AnimationFrame = Tuple[List[AnimationGlyph], float]
 TileInfoContext = Tuple[str, Tuple[int, int], str]
 
 
+def _resident_bytes() -> Optional[int]:
+    """Resident set size of this process, if the platform exposes it."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
 class TurnProfiler:
-    """Pequeño profiler por fases de turno para detectar bajones en caliente."""
+    """Pequeño profiler por fases de turno para detectar bajones en caliente.
+
+    Con `PERF_PROFILER_ENABLED` escribe cada `report_interval` turnos un
+    resumen en el log. El overlay de rendimiento (F3, `set_overlay`) lo activa
+    mientras se ve, calla ese resumen y guarda además los tiempos de frame y
+    de render, el desglose del último turno, los aciertos de las cachés
+    (`perf_counters`) y la memoria. Apagado, cada fase cuesta un `if`.
+    """
+
+    # Datos del overlay: sólo de esta sesión, no se guardan con la partida.
+    _OVERLAY_FIELDS = (
+        "frame_times",
+        "render_times",
+        "turn_times",
+        "last_turn",
+        "last_turn_number",
+        "cache_history",
+        "heap_blocks",
+        "rss_bytes",
+        "_last_frame",
+    )
 
     def __init__(
         self,
@@ -71,6 +109,34 @@ class TurnProfiler:
         self._current: Dict[str, float] = {}
         self._emit = emitter
         self._window = window
+        self.overlay = False
+        self._reset_overlay_data()
+
+    def _reset_overlay_data(self) -> None:
+        length = max(1, int(getattr(settings, "PERF_OVERLAY_HISTORY", 120)))
+        self.frame_times: deque[float] = deque(maxlen=length)
+        self.render_times: deque[float] = deque(maxlen=length)
+        # Duración total de cada turno (suma de sus fases), para la gráfica.
+        self.turn_times: deque[float] = deque(maxlen=length)
+        self.last_turn: Dict[str, float] = {}
+        self.last_turn_number = 0
+        # {caché: deque de (aciertos, fallos) por turno}
+        self.cache_history: Dict[str, deque[Tuple[int, int]]] = {
+            name: deque(maxlen=length) for name in perf_counters.CACHES
+        }
+        self.heap_blocks = 0
+        self.rss_bytes: Optional[int] = None
+        self._last_frame: Optional[float] = None
+
+    def set_overlay(self, visible: bool) -> None:
+        """Show or hide the overlay; measuring is on while it is visible."""
+        self.overlay = visible
+        self.enabled = visible or bool(getattr(settings, "PERF_PROFILER_ENABLED", False))
+        self._reset_overlay_data()
+        # Lo contado con el overlay apagado no es de los turnos que se van a mostrar.
+        for counter in perf_counters.CACHES.values():
+            counter.take()
+        self._sample_memory()
 
     def start_phase(self, name: str) -> None:
         if not self.enabled:
@@ -95,11 +161,37 @@ class TurnProfiler:
                 buffer = deque(maxlen=self._window)
                 self.history[name] = buffer
             buffer.append(duration)
+        if self.overlay:
+            self.last_turn = dict(self._current)
+            self.last_turn_number = turn_number
+            self.turn_times.append(sum(self._current.values()))
+            for name, counter in perf_counters.CACHES.items():
+                self.cache_history[name].append(counter.take())
+            self._sample_memory()
         self._current.clear()
         self._starts.clear()
-        if self.report_interval and turn_number % self.report_interval == 0:
+        if self.report_interval and not self.overlay and turn_number % self.report_interval == 0:
             self._emit_report(turn_number)
 
+    def record_frame(self, render_seconds: float) -> None:
+        """Record a drawn frame: time since the previous one and how long drawing it took."""
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self.frame_times.append(now - self._last_frame)
+        self._last_frame = now
+        self.render_times.append(render_seconds)
+
+    def _sample_memory(self) -> None:
+        self.heap_blocks = sys.getallocatedblocks()
+        self.rss_bytes = _resident_bytes()
+
+    def cache_hit_rate(self, name: str) -> Optional[float]:
+        """Hit rate of the `perf_counters` cache `name` over the overlay history."""
+        samples = self.cache_history.get(name, ())
+        hits = sum(hits for hits, _ in samples)
+        total = hits + sum(misses for _, misses in samples)
+        return hits / total if total else None
+
     @staticmethod
     def _percentile(values: List[float], fraction: float) -> float:
         if not values:
@@ -127,11 +219,16 @@ class TurnProfiler:
         state = self.__dict__.copy()
         # Los callables locales no son picklables; se reconfigura al restaurar.
         state["_emit"] = None
+        state["overlay"] = False
+        for name in self._OVERLAY_FIELDS:
+            state.pop(name, None)
         return state
 
     def __setstate__(self, state):
         self.__dict__.update(state)
         self._emit = None
+        self.overlay = False
+        self._reset_overlay_data()
 
 
 class Engine:
@@ -158,7 +255,9 @@ class Engine:
 
     def __init__(self, player: Actor, debug: bool = False):
         self.message_log = MessageLog()
+        # Casilla del mapa bajo el ratón o el cursor (no de la pantalla; ver camera).
         self.mouse_location = (0, 0)
+        self.camera = Camera(settings.VIEWPORT_WIDTH, settings.VIEWPORT_HEIGHT)
         self.player = player
         if settings.GOD_MODE:
             self.player.fighter.fov = 90
@@ -166,7 +265,13 @@ class Engine:
         self.satiety_counter = 0
         self.spawn_monsters_counter = 0
         self.spawn_monsters_generated = 0
-        self.temporal_effects = []
+        # Efectos temporales por turno de caducidad; el registro de efectos
+        # activos (ardiendo, envenenado, regenerando) se rehace por planta.
+        self.temporal_effects = status_effects.TimerWheel()
+        self.status_effects = status_effects.StatusRegistry()
+        # Sonidos pendientes del frame y mapa de oído del jugador (ver flush_sound_effects).
+        self._sound_events: List[Tuple[str, float, str, Any]] = []
+        self._hearing_cache: Optional[Tuple[Tuple, np.ndarray]] = None
         self.silence_turns = 0
         self._silence_end_message: Optional[str] = None
         self.lamp_hint_shown = False
@@ -189,6 +294,9 @@ class Engine:
         preload_campfire_audio()
         # Prepara también el bucle de viento del primer nivel para evitar cortes.
         preload_wind_audio()
+        # Y el resto de efectos, en segundo plano (no hace nada si ya se
+        # lanzó desde el menú principal).
+        start_audio_warmup()
         self._animation_queue: List[List[AnimationFrame]] = []
         self._active_context: Optional[Context] = None
         self._root_console: Optional[Console] = None
@@ -213,6 +321,9 @@ class Engine:
         )
         self._configure_profiler()
         self._last_frame_time = time.monotonic()
+        self.autosaver = autosave.Autosaver()
+        # Grabación de las acciones del jugador (ver replay); la pone new_game.
+        self.recorder = None
 
     def reset_listen_state(self) -> None:
         """Limpia el estado del contador de escuchar puertas."""
@@ -621,12 +732,39 @@ class Engine:
         sound_map = np.where(sound_map, sound_map, wall_opacity)
         try:
             closed_ch = tile_types.closed_door["dark"]["ch"]
-            door_mask = gamemap.tiles["dark"]["ch"] == closed_ch
+            door_mask = gamemap.tiles.glyph_mask(closed_ch)
             sound_map[door_mask] = 0.5
         except Exception:
             pass
         return sound_map
 
+    def _hearing_map(self, radius: int) -> np.ndarray:
+        """Tiles the player can hear from, cached until they move or the map changes.
+
+        Antes cada sonido y cada aviso de ruido lanzaba su propio
+        `compute_fov`; ahora todos los de un mismo frame comparten este mapa.
+        """
+        gamemap = self.game_map
+        key = (
+            gamemap,
+            lighting.geometry_key(gamemap),
+            (self.player.x, self.player.y),
+            radius,
+        )
+        cached = getattr(self, "_hearing_cache", None)
+        if cached is not None and cached[0] == key:
+            perf_counters.fov.hits += 1
+            return cached[1]
+        perf_counters.fov.misses += 1
+        audible = compute_fov(
+            self._sound_transparency_map(),
+            (self.player.x, self.player.y),
+            radius,
+            algorithm=constants.FOV_SHADOW,
+        )
+        self._hearing_cache = (key, audible)
+        return audible
+
     def _player_can_hear(
         self,
         source: Optional[Any] = None,
@@ -634,42 +772,50 @@ class Engine:
         position: Optional[Tuple[int, int]] = None,
     ) -> bool:
         """Return True if the player can hear `source` (or `position`) based on FOH and noise level."""
-        if level <= 0:
+        spot = self._hearing_spot(source, level, position)
+        if spot is None:
             return False
+        x, y, radius = spot
+        return bool(self._hearing_map(radius)[x, y])
+
+    def _hearing_spot(
+        self,
+        source: Optional[Any] = None,
+        level: int = 1,
+        position: Optional[Tuple[int, int]] = None,
+    ) -> Optional[Tuple[int, int, int]]:
+        """(x, y, hearing radius) to test against the hearing map, or None if inaudible."""
+        if level <= 0:
+            return None
         fighter = getattr(self.player, "fighter", None)
         if not fighter:
-            return False
+            return None
         radius = getattr(fighter, "foh", 0)
         if radius <= 0:
-            return False
+            return None
         gamemap = self.game_map
         if position is not None:
             x, y = position
         elif source is not None:
             if getattr(source, "gamemap", None) is not gamemap:
-                return False
+                return None
             x, y = getattr(source, "x", None), getattr(source, "y", None)
             if x is None or y is None:
-                return False
+                return None
         else:
-            return False
+            return None
         if not gamemap.in_bounds(x, y):
-            return False
-        audible = compute_fov(
-            self._sound_transparency_map(),
-            (self.player.x, self.player.y),
-            radius,
-            algorithm=constants.FOV_SHADOW,
-        )
-        return bool(audible[x, y])
+            return None
+        return x, y, radius
 
-    def can_player_hear_sound(
+    def _sound_audibility(
         self,
         source: Optional[Any] = None,
         *,
         level: int = 1,
         position: Optional[Tuple[int, int]] = None,
-    ) -> bool:
+    ) -> Union[bool, Tuple[int, int, int]]:
+        """True/False when it is known without hearing map, otherwise the spot to test."""
         player = getattr(self, "player", None)
         if player is None:
             return False
@@ -688,7 +834,20 @@ class Engine:
                 return False
         elif position is not None and not self.game_map.in_bounds(*position):
             return False
-        return self._player_can_hear(source=source, level=level, position=position)
+        return self._hearing_spot(source, level, position) or False
+
+    def can_player_hear_sound(
+        self,
+        source: Optional[Any] = None,
+        *,
+        level: int = 1,
+        position: Optional[Tuple[int, int]] = None,
+    ) -> bool:
+        audibility = self._sound_audibility(source, level=level, position=position)
+        if isinstance(audibility, bool):
+            return audibility
+        x, y, radius = audibility
+        return bool(self._hearing_map(radius)[x, y])
 
     def play_sound_effect(
         self,
@@ -700,10 +859,44 @@ class Engine:
         force: bool = False,
         **kwargs,
     ) -> None:
+        """Queue a sound for this frame; `flush_sound_effects` decides what is heard.
+
+        La posición, la pista y el volumen se toman ahora: la fuente puede
+        moverse o morir antes de que acabe el frame (`Fighter.die` la renombra
+        a "remains of ..." y su sonido de muerte ya no se encontraría). La
+        audibilidad se resuelve al vaciar la cola.
+        """
         if callback is None:
             return
-        if force or self.can_player_hear_sound(source=source, level=level, position=position):
+        audibility = True if force else self._sound_audibility(source, level=level, position=position)
+        if audibility is False:
+            return
+        with capture_sound_effects() as requests:
             callback(*args, **kwargs)
+        if not requests:
+            return
+        queue = getattr(self, "_sound_events", None)
+        if queue is None:
+            queue = self._sound_events = []
+        for track, volume, category in requests:
+            queue.append((track, volume, category, audibility))
+
+    def flush_sound_effects(self) -> None:
+        """Play the audible sounds queued this frame as one mixed batch."""
+        queue = getattr(self, "_sound_events", None)
+        if not queue:
+            return
+        self._sound_events = []
+        heard = []
+        for track, volume, category, audibility in queue:
+            if audibility is not True:
+                x, y, radius = audibility
+                # Todos los sonidos del frame comparten el mismo mapa de oído.
+                if not self._hearing_map(radius)[x, y]:
+                    continue
+            heard.append((track, volume, category))
+        if heard:
+            play_sound_effects(heard)
 
     def _describe_noise_direction(self, source: Actor) -> str:
         dx = source.x - self.player.x
@@ -938,35 +1131,21 @@ class Engine:
         #)
 
     def _apply_campfire_effects(self) -> None:
-        """Make campfires flicker and illuminate nearby tiles if the player has line of sight."""
+        """Make campfires flicker and illuminate nearby tiles if the player has line of sight.
+
+        Las máscaras de luz y la línea de visión del jugador salen de la caché
+        de `lighting`, así que una hoguera quieta no cuesta un FOV por turno.
+        """
         gamemap = getattr(self, "game_map", None)
         if not gamemap or not getattr(gamemap, "entities", None):
             return
 
-        campfires = []
-        adventurers = []
-        for entity in gamemap.entities:
-            if not entity:
-                continue
-            name = getattr(entity, "name", None)
-            if not name:
-                continue
-            if name.lower() == "campfire":
-                campfires.append(entity)
-            elif name.lower() == "adventurer":
-                adventurers.append(entity)
+        campfires = gamemap.campfires
+        adventurers = gamemap.adventurers
         if not campfires and not adventurers:
             return
 
-        transparent = gamemap.get_transparency_map()
-        los_radius = max(gamemap.width, gamemap.height)
-        player_los = compute_fov(
-            transparent,
-            (self.player.x, self.player.y),
-            los_radius,
-            algorithm=settings.FOV_ALGORITHM,
-        )
-
+        lights = []
         for campfire in campfires:
             fighter = getattr(campfire, "fighter", None)
             base_radius = getattr(fighter, "fov", 3) if fighter else 3
@@ -976,14 +1155,7 @@ class Engine:
 
             campfire.color = random.choice(self._CAMPFIRE_FLICKER_COLORS)
             campfire.char = self._CAMPFIRE_CHAR
-
-            light_mask = compute_fov(
-                transparent,
-                (campfire.x, campfire.y),
-                radius,
-                algorithm=settings.FOV_ALGORITHM,
-            )
-            gamemap.visible |= (light_mask & player_los)
+            lights.append((campfire, radius))
 
         for adventurer in adventurers:
             fighter = getattr(adventurer, "fighter", None)
@@ -993,13 +1165,9 @@ class Engine:
             flicker_offset = random.randint(-1, 1)
             radius = max(1, base_radius + flicker_offset)
             adventurer.color = random.choice(self._ADVENTURER_FLICKER_COLORS)
-            light_mask = compute_fov(
-                transparent,
-                (adventurer.x, adventurer.y),
-                radius,
-                algorithm=settings.FOV_ALGORITHM,
-            )
-            gamemap.visible |= (light_mask & player_los)
+            lights.append((adventurer, radius))
+
+        lighting.illuminate(gamemap, (self.player.x, self.player.y), lights)
 
     def _tick_campfire(self, campfire: Actor, fighter: components.fighter.Fighter) -> None:
         if getattr(fighter, "never_extinguish", False):
@@ -1017,16 +1185,35 @@ class Engine:
         campfire.char = "%"
         campfire.color = (90, 90, 90)
         campfire.name = "Remains of campfire"
+        entity_kinds.retag(campfire, None)
         campfire.blocks_movement = False
         campfire.ai = None
         campfire.render_order = RenderOrder.CORPSE
 
 
+    def _affected_actors(self, effect: str) -> List[Actor]:
+        """Living actors of the current floor with `effect` active (drops the rest)."""
+        game_map = self.game_map
+        registry = self.status_effects
+        affected = []
+        for actor in registry.affected(effect, game_map):
+            if (
+                actor.parent is game_map
+                and actor in game_map.entities
+                and status_effects.is_active_actor(actor)
+                and getattr(actor, "fighter", None)
+            ):
+                affected.append(actor)
+            else:
+                registry.discard(effect, actor)
+        return affected
+
     def autohealmonsters(self):
-        for actor in set(self.game_map.actors):
-            fighter = getattr(actor, "fighter", None)
-            if fighter:
-                fighter.tick_recovery()
+        for actor in self._affected_actors(status_effects.RECOVERING):
+            fighter = actor.fighter
+            fighter.tick_recovery()
+            if not status_effects.needs_recovery(fighter):
+                self.status_effects.discard(status_effects.RECOVERING, actor)
 
 
     #def where_the_hell_the_stairs_are(self):
@@ -1068,7 +1255,7 @@ class Engine:
                 stairs.spawn(self.game_map, stairs.x, stairs.y)
 
             # Make sure the tile itself remains a stairs tile (can be overwritten when carving paths).
-            if not np.array_equal(self.game_map.tiles[x, y], tile_types.down_stairs):
+            if not self.game_map.tiles.is_tile(x, y, tile_types.down_stairs):
                 self.game_map.tiles[x, y] = tile_types.down_stairs
 
     def bugfix_upstairs(self):
@@ -1077,7 +1264,7 @@ class Engine:
             return
 
         x, y = self.game_map.upstairs_location
-        if not np.array_equal(self.game_map.tiles[x, y], tile_types.up_stairs):
+        if not self.game_map.tiles.is_tile(x, y, tile_types.up_stairs):
             self.game_map.tiles[x, y] = tile_types.up_stairs
 
 
@@ -1186,25 +1373,30 @@ class Engine:
 
 
     def update_poison(self):
-        for actor in set(self.game_map.actors):
-            fighter = getattr(actor, "fighter", None)
-            if not fighter:
-                continue
-            if hasattr(actor, "is_alive") and not actor.is_alive:
-                continue
+        for actor in self._affected_actors(status_effects.POISONED):
+            fighter = actor.fighter
             if fighter.is_poisoned:
                 fighter.poisoned()
+            else:
+                self.status_effects.discard(status_effects.POISONED, actor)
 
     def update_fire(self):
-        for entity in set(self.game_map.entities):
+        game_map = self.game_map
+        registry = self.status_effects
+        for entity in registry.affected(status_effects.BURNING, game_map):
             fighter = getattr(entity, "fighter", None)
-            if fighter and getattr(fighter, "is_burning", False):
+            if entity.parent is not game_map or entity not in game_map.entities:
+                registry.discard(status_effects.BURNING, entity)
+            elif fighter and getattr(fighter, "is_burning", False):
                 fighter.update_fire()
-            name = getattr(entity, "name", "")
-            if name and name.lower() == "campfire" and fighter:
-                if getattr(fighter, "never_extinguish", False):
-                    continue
-                self._tick_campfire(entity, fighter)
+            else:
+                registry.discard(status_effects.BURNING, entity)
+        # Las hogueras salen de su registro: no hace falta mirar el nombre de cada entidad.
+        for campfire in self.game_map.campfires:
+            fighter = getattr(campfire, "fighter", None)
+            if not fighter or getattr(fighter, "never_extinguish", False):
+                continue
+            self._tick_campfire(campfire, fighter)
 
 
     def update_center_rooms_array(self, room_list):
@@ -1215,17 +1407,22 @@ class Engine:
         self.player.fighter.is_in_melee = False
         self.player.fighter.aggravated = False # Para la gestión del stealth attack de los enemigos
 
-        for obj in set(self.game_map.actors) - {self.player}:
+        # Se recorre `entities` directamente (sin copiar `actors` a un set) y se
+        # descartan primero los objetos rompibles, que son la mayoría.
+        dummy_cls = components.ai.Dummy
+        old_man_cls = components.ai.OldManAI
+        visible = self.game_map.visible
+        for obj in self.game_map.entities:
             # Lo que tienen en común todos los objetos rompibles
             # que no son enemigos es que tienen la ia_cls "Dummy".
             #if obj.is_alive and obj.name != "Door" and obj.name != "Suspicious wall" and obj.name != "Table" and obj.name != "Campfire":
             #if obj.is_alive and self.is_dummy_object(obj):
             
-            if isinstance(obj, Actor) and obj.is_alive and obj.ai_cls != components.ai.Dummy:
+            if obj is not self.player and isinstance(obj, Actor) and obj.ai and obj.ai_cls is not dummy_cls:
                 
-                if obj.ai_cls != components.ai.OldManAI:
+                if obj.ai_cls is not old_man_cls:
 
-                    if self.game_map.visible[obj.x, obj.y]:
+                    if visible[obj.x, obj.y]:
                         distance = int(obj.distance(self.player.x, self.player.y))
                         self.player.fighter.aggravated = True # Para la gestión del stealth attack de los enemigos
                         #print(distance)
@@ -1248,39 +1445,18 @@ class Engine:
             "attribute": attribute,
             "message_down": message_down,
         }
-        self.temporal_effects.append(effect)
+        self.temporal_effects.schedule(effect, turns)
 
         if settings.DEBUG_MODE:
             print(f"Active effects: {self.temporal_effects}")
         
 
     def update_temporal_effects(self):
-        effects_to_remove = []
-        if self.temporal_effects:
-
-            for i in range(len(self.temporal_effects)):
-                effect = self.temporal_effects[i]
-                turns = effect.get("turns", 0)
-                amount = effect.get("amount", 0)
-                attribute = effect.get("attribute")
-                message_down = effect.get("message_down")
-                if settings.DEBUG_MODE:
-                    print("[DEBUG]: ", effect)
-                    print("[DEBUG]: ", turns)
-                    print("[DEBUG]: ", amount)
-                    print("[DEBUG]: ", attribute)
-                    print("[DEBUG]: ", message_down)
-                if turns <= 0:
-                    self._clear_temporal_effect(effect)
-                    effects_to_remove.append(effect)
-
-                else: 
-                    effect["turns"] = turns - 1
-
-            # Eliminar los efectos marcados para remover
-            for effect in effects_to_remove:
-                if effect in self.temporal_effects:
-                    self.temporal_effects.remove(effect)
+        # Sólo se tocan los efectos que caducan en este turno.
+        for effect in self.temporal_effects.advance():
+            if settings.DEBUG_MODE:
+                print("[DEBUG]: ", effect)
+            self._clear_temporal_effect(effect)
 
     def _clear_temporal_effect(self, effect: dict) -> None:
         actor = effect.get("actor")
@@ -1386,7 +1562,7 @@ class Engine:
             render = getattr(effect, "render", None)
             if not render:
                 continue
-            render(console, self.game_map)
+            render(console, self.game_map, self.camera)
 
 
     def render(self, console: Console) -> None:
@@ -1398,8 +1574,10 @@ class Engine:
             for effect in getattr(self.game_map, "ambient_effects", ())
         )
         update_wind_audio(has_wind)
+        self.flush_sound_effects()
         self._update_ambient_effects(dt)
-        self.game_map.render(console)
+        self.camera.follow(self.game_map, self.player.x, self.player.y)
+        self.game_map.render(console, self.camera)
         self._render_ambient_effects(console)
 
         # La Barra de vida
@@ -1481,12 +1659,28 @@ class Engine:
             #render_functions.render_fortify_indicator(console, layout=hud)
             pass
 
+        profiler = getattr(self, "profiler", None)
+        if profiler and profiler.overlay:
+            render_functions.render_perf_overlay(console=console, engine=self)
+
 
     def save_as(self, filename: str) -> None:
-        """Save this Engine instance as a compressed file."""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        """Save this Engine instance as a chunked archive (see save_archive)."""
+        import save_archive
+
+        # Que un autoguardado en curso no escriba a la vez el mismo fichero (ni,
+        # si se ha colgado, bloquee la salida: ver Autosaver.finish).
+        autosaver = getattr(self, "autosaver", None)
+        if autosaver:
+            autosaver.finish()
+        save_archive.save(self, filename)
+
+    def maybe_autosave(self) -> None:
+        """Autosave in the background if it is due (see autosave.Autosaver.tick)."""
+        autosaver = getattr(self, "autosaver", None)
+        if autosaver is None:
+            autosaver = self.autosaver = autosave.Autosaver()
+        autosaver.tick(self)
 
     def bind_display(self, context: Context, console: Console) -> None:
         """Mantiene una referencia a la superficie activa para efectos especiales."""
@@ -1541,6 +1735,19 @@ class Engine:
         state = self.__dict__.copy()
         state["_active_context"] = None
         state["_root_console"] = None
+        # La caché de blobs del último guardado sólo tiene sentido en memoria.
+        state.pop("_save_cache", None)
+        # El autoguardado lleva hilos/procesos en curso; se recrea al restaurar.
+        state.pop("autosaver", None)
+        # El registro de efectos activos se reconstruye desde la planta actual.
+        state.pop("status_effects", None)
+        # Los sonidos pendientes y la caché de oído son sólo del frame actual.
+        state.pop("_sound_events", None)
+        state.pop("_hearing_cache", None)
+        # Una partida cargada no se graba (ver replay).
+        state.pop("recorder", None)
+        # La cámara depende de la pantalla de quien juega, no de la partida.
+        state.pop("camera", None)
         # El profiler lleva un callable no picklable; se reconfigura al restaurar.
         profiler = state.get("profiler")
         if profiler:
@@ -1551,9 +1758,19 @@ class Engine:
         return state
 
     def __setstate__(self, state):
+        effects = state.get("temporal_effects")
+        if not isinstance(effects, status_effects.TimerWheel):
+            # Partidas anteriores: lista de efectos con los turnos que les quedan.
+            state["temporal_effects"] = status_effects.TimerWheel(effects or ())
         self.__dict__.update(state)
         self._active_context = None
         self._root_console = None
+        self.autosaver = autosave.Autosaver()
+        self.status_effects = status_effects.StatusRegistry()
+        self._sound_events = []
+        self._hearing_cache = None
+        self.recorder = None
+        self.camera = Camera(settings.VIEWPORT_WIDTH, settings.VIEWPORT_HEIGHT)
         self._configure_profiler()
 
     def _configure_profiler(self) -> None:
@@ -1561,10 +1778,16 @@ class Engine:
         if not profiler:
             return
         enabled = getattr(settings, "PERF_PROFILER_ENABLED", False)
-        profiler.enabled = enabled
+        profiler.enabled = enabled or getattr(profiler, "overlay", False)
         profiler.report_interval = max(1, int(getattr(settings, "PERF_PROFILER_REPORT_INTERVAL", 50))) if enabled else 0
         profiler._emit = lambda msg: self.message_log.add_message(msg, color.white)
 
+    def toggle_perf_overlay(self) -> None:
+        """Show or hide the performance overlay (see TurnProfiler)."""
+        profiler = getattr(self, "profiler", None)
+        if profiler:
+            profiler.set_overlay(not profiler.overlay)
+
     def schedule_intro(self, slides: Sequence[dict]) -> None:
         """Configura las pantallas de introducción que se reproducirán al iniciar partida."""
         if not slides:
@@ -1694,9 +1917,11 @@ class Engine:
 
     def _draw_animation_glyphs(self, console: Console, glyphs: Sequence[AnimationGlyph]) -> None:
         game_map = self.game_map
+        camera = self.camera
         for x, y, char, fg in glyphs:
-            if not game_map.in_bounds(x, y):
+            if not game_map.in_bounds(x, y) or not camera.in_view(x, y):
                 continue
             if not game_map.visible[x, y]:
                 continue
-            console.print(x=x, y=y, string=char, fg=fg)
+            screen_x, screen_y = camera.map_to_screen(x, y)
+            console.print(x=screen_x, y=screen_y, string=char, fg=fg)
@@ -1,8 +1,11 @@
 from __future__ import annotations
-import copy
 import math
 from typing import Callable, Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
+import entity_kinds
+import prototypes
+import seeding
+from slotted import Slotted
 from render_order import RenderOrder
 from components import equippable as equippable_component
 
@@ -19,12 +22,43 @@ if TYPE_CHECKING:
 T = TypeVar("T", bound="Entity")
 
 
-class Entity:
+class Entity(Slotted):
 
     """A generic object to represent players, enemies, items, etc.
     EveryTHING in our world"""
 
+    __slots__ = (
+        "x",
+        "y",
+        "char",
+        "color",
+        "name",
+        "blocks_movement",
+        "render_order",
+        "spawn_coord",
+        "generated_item_list",
+        "parent",
+        "id_name",
+        "_spawn_key",
+        "kind",
+        "_serial",
+    )
+
     parent: Union[GameMap, Inventory]
+    # Partidas guardadas antes de que existiera `kind`.
+    state_factories = {"kind": entity_kinds.legacy_kind}
+    # Cada objeto (también los clones y los cargados) recibe el suyo en `__new__`.
+    transient = frozenset({"_serial"})
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls)
+        # Número de creación que sirve de hash: los `set` de entidades se
+        # recorren igual en cada ejecución con la misma semilla (ver seeding).
+        self._serial = seeding.next_serial()
+        return self
+
+    def __hash__(self) -> int:
+        return self._serial
 
     def __init__(
         self,
@@ -51,6 +85,8 @@ class Entity:
         self.name = name
         self.blocks_movement = blocks_movement
         self.render_order = render_order
+        # Etiqueta internada (ver entity_kinds) que fijan los prototipos de entity_factories.
+        self.kind: Optional[str] = None
         #self.transparent = transparent
         #self.blocks_vision = blocks_vision
         if parent:
@@ -66,7 +102,7 @@ class Entity:
 
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = prototypes.clone(self)
         # Refresh any inventory loot that should be generated per-instance.
         inventory = getattr(clone, "inventory", None)
         reroll_loot = getattr(inventory, "reroll_loot", None)
@@ -110,6 +146,21 @@ class Entity:
 
 #from actions import PassAction
 class Actor(Entity):
+    __slots__ = (
+        "ai",
+        "ai_cls",
+        "faction",
+        "player_attitude",
+        "equipment",
+        "fighter",
+        "inventory",
+        "level",
+        "to_eat_drop",
+        "on_spawn",
+        "is_flying",
+        "mimic_awake",
+    )
+
     def __init__(
         self,
         *,
@@ -171,6 +222,25 @@ class Actor(Entity):
     
 
 class Item(Entity):
+    __slots__ = (
+        "consumable",
+        "equippable",
+        "throwable",
+        "identified",
+        "uses",
+        "max_uses",
+        "stackable",
+        "id_info",
+        "info",
+        "_dynamic_info_factory",
+        "_dynamic_info_assigned",
+        "projectile_dice",
+        "projectile_bonus",
+        "projectile_type",
+        "projectile_destroy_chance_on_hit",
+        "bundle_range",
+    )
+
     def __init__(
         self,
         *,
@@ -300,6 +370,8 @@ class Item(Entity):
 class Book(Item):
     """Consumables or notes that simply reveal their info text when read."""
 
+    __slots__ = ("can_summon_demon", "_demon_spawn_pending")
+
     def __init__(
         self,
         *,
@@ -329,6 +401,8 @@ class Book(Item):
 class GeneratedBook(Book):
     """Book that rolls a fresh title and content each time it is copied."""
 
+    __slots__ = ("_title_fn", "_content_fn")
+
     def __init__(
         self,
         *,
@@ -361,6 +435,8 @@ class GeneratedBook(Book):
 class ApothecaryBook(Book):
     """Book that reveals the identities of all potions when read aloud."""
 
+    __slots__ = ()
+
     def read_aloud(self, reader: "Actor") -> str:
         from entity_factories import identify_all_potions
 
@@ -372,6 +448,8 @@ class ApothecaryBook(Book):
 class SilenceBook(Book):
     """Book that suppresses all noise for a short time when read aloud."""
 
+    __slots__ = ()
+
     def read_aloud(self, reader: "Actor") -> str:
         engine = getattr(getattr(reader, "gamemap", None), "engine", None)
         if engine and getattr(engine, "silence_turns", 0) > 0:
@@ -387,6 +465,8 @@ class SilenceBook(Book):
 
 
 class Decoration(Entity):
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -408,6 +488,8 @@ class Decoration(Entity):
 
 
 class Obstacle(Entity):
+    __slots__ = ("ai", "fighter", "level", "equipment", "inventory", "room_center")
+
     def __init__(
         self,
         *,
@@ -457,6 +539,8 @@ class Obstacle(Entity):
 
 
 class Chest(Entity):
+    __slots__ = ("closed_char", "open_char", "is_open", "inventory", "is_unique_room_chest")
+
     def __init__(
         self,
         *,
@@ -514,6 +598,8 @@ class Chest(Entity):
 class TableContainer(Chest):
     """Container that looks like a table and can hold items."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -550,6 +636,8 @@ class TableContainer(Chest):
 class BookShelfContainer(Chest):
     """Container that represents a bookshelf and can hold items."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         *,
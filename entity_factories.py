@@ -44,10 +44,11 @@ from entity import (
 )
 from render_order import RenderOrder
 import random
-import numpy as np
 import tile_types
+import entity_kinds
 import loot_tables
 import bookgen
+import seeding
 from equipment_types import EquipmentType
 from settings import (
     GOD_MODE,
@@ -67,6 +68,10 @@ from settings import (
     MIMIC_CHEST_CHANCE,
 )
 
+# Los nombres de pociones y pergaminos, los colores y los hp que se sortean
+# aquí salen de la semilla del proceso (ver seeding).
+seeding.seed_module(__name__)
+
 KEY_COLORS = ("black", "red", "white", "gray")
 
 # OBSTACLES:
@@ -92,6 +97,7 @@ door = Obstacle(
     equipment=Equipment(),
     render_order=RenderOrder.DOOR,
 )
+door.kind = entity_kinds.DOOR
 
 # Keys
 black_key = Item(
@@ -192,7 +198,8 @@ def fill_table_with_items(table_entity: TableContainer, items: List[Item]) -> No
 
 
 def color_roulette():
-    winner = list(np.random.choice(range(256), size=3))
+    # `random` en vez de `np.random`: evita importar numpy.random al arrancar.
+    winner = [random.randrange(256) for _ in range(3)]
     return winner
 
 
@@ -844,6 +851,7 @@ bookshelf = BookShelfContainer(
     name="Bookshelf",
     inventory=Inventory(capacity=6, items=[]),
 )
+bookshelf.kind = entity_kinds.BOOKSHELF
 
 
 def _build_campfire_actor(*, eternal: bool = False) -> Actor:
@@ -857,7 +865,7 @@ def _build_campfire_actor(*, eternal: bool = False) -> Actor:
     )
     if eternal:
         fighter.never_extinguish = True
-    return Actor(
+    campfire_actor = Actor(
         char="x",
         color=(255,170,0),
         name="Campfire",
@@ -867,6 +875,8 @@ def _build_campfire_actor(*, eternal: bool = False) -> Actor:
         inventory=Inventory(capacity=0),
         level=Level(xp_given=5),
     )
+    campfire_actor.kind = entity_kinds.CAMPFIRE
+    return campfire_actor
 
 
 campfire = _build_campfire_actor()
@@ -1731,6 +1741,7 @@ adventurer = Actor(
 )
 
 adventurer.on_spawn = _setup_adventurer_equipment
+adventurer.kind = entity_kinds.ADVENTURER
 
 old_man = Actor(
     char="@",
@@ -0,0 +1,221 @@
+"""Interned entity kinds and the per-kind registries of `GameMap.entities`.
+
+Los bucles de cada turno buscaban hogueras, puertas, estanterías y
+aventureros comparando `name.lower()` (o `id_name.lower()`) de todas las
+entidades del mapa en cada llamada. Ahora los prototipos de
+`entity_factories` llevan una etiqueta `kind` (una cadena internada, copiada
+por `prototypes.clone` al hacer `spawn`) y `GameMap.entities` es un
+`EntitySet`: un `set` normal que además agrupa a sus miembros por `kind`.
+
+- Los registros se construyen la primera vez que se consultan y después se
+  mantienen al añadir o quitar entidades (spawn, `place`, recoger, morir...).
+- Cuando una entidad deja de ser lo que era sin salir del mapa (una hoguera
+  que se apaga, un aventurero muerto) se llama a `retag`, que cambia su
+  `kind` y la mueve de registro.
+- `version_of(kind)` cambia cada vez que entra o sale una entidad de ese
+  kind; sirve de clave para cachés que dependen de ellas (las estanterías
+  tapan la vista, así que forman parte de la geometría de los mapas de luz).
+- Los registros no se guardan: al cargar la partida se rehacen. Las
+  entidades guardadas antes de que existiera `kind` lo obtienen de su
+  nombre al cargarse (`legacy_kind`).
+"""
+
+from __future__ import annotations
+
+import sys
+from itertools import count
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+CAMPFIRE = sys.intern("campfire")
+DOOR = sys.intern("door")
+BOOKSHELF = sys.intern("bookshelf")
+ADVENTURER = sys.intern("adventurer")
+
+# Grupos de kinds que consultan los bucles por turno.
+LIGHT_SOURCES: Tuple[str, ...] = (CAMPFIRE, ADVENTURER)
+VISION_BLOCKERS: Tuple[str, ...] = (BOOKSHELF,)
+
+# Sellos de versión únicos en todo el proceso.
+_stamps = count(1)
+
+# Nombres (en minúsculas) con los que se reconocían antes de tener `kind`.
+_LEGACY_NAMES: Dict[str, str] = {
+    "campfire": CAMPFIRE,
+    "door": DOOR,
+    "adventurer": ADVENTURER,
+}
+
+
+def intern_kind(kind: Optional[str]) -> Optional[str]:
+    return sys.intern(kind.lower()) if kind else None
+
+
+def legacy_kind(entity: Entity) -> Optional[str]:
+    """Kind of an entity saved before kinds existed, derived from its names."""
+    id_name = getattr(entity, "id_name", None)
+    if isinstance(id_name, str) and id_name.lower() == BOOKSHELF:
+        return BOOKSHELF
+    name = getattr(entity, "name", None)
+    if isinstance(name, str):
+        return _LEGACY_NAMES.get(name.lower())
+    return None
+
+
+def kind_of(entity: Entity) -> Optional[str]:
+    return getattr(entity, "kind", None)
+
+
+class EntitySet(set):
+    """`GameMap.entities`: a set that also indexes its members by `kind`.
+
+    Sólo se sobrescriben los métodos que modifican el conjunto en el sitio;
+    las operaciones que crean conjuntos nuevos (`|`, `-`, `copy`...) devuelven
+    un `set` normal. Se serializa como un `set` (sin los registros).
+    """
+
+    __slots__ = ("_by_kind", "_versions", "_epoch")
+
+    def __init__(self, entities: Iterable[Entity] = ()) -> None:
+        super().__init__(entities)
+        # {kind: {entidad: None}}; None hasta la primera consulta.
+        self._by_kind: Optional[Dict[str, Dict[Entity, None]]] = None
+        # {kind: sello del último cambio}; `_epoch` cubre los kinds sin cambios
+        # desde la última reconstrucción de los registros.
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+    def _registries(self) -> Dict[str, Dict[Entity, None]]:
+        by_kind = self._by_kind
+        if by_kind is None:
+            by_kind = {}
+            for entity in self:
+                kind = getattr(entity, "kind", None)
+                if kind is not None:
+                    by_kind.setdefault(kind, {})[entity] = None
+            self._by_kind = by_kind
+            self._versions = {}
+            self._epoch = next(_stamps)
+        return by_kind
+
+    def _index(self, entity: Entity) -> None:
+        kind = getattr(entity, "kind", None)
+        if kind is not None:
+            registry = self._by_kind.setdefault(kind, {})
+            if entity not in registry:
+                registry[entity] = None
+                self._versions[kind] = next(_stamps)
+
+    def _unindex(self, entity: Entity, kind: Optional[str]) -> None:
+        if kind is not None:
+            registry = self._by_kind.get(kind)
+            if registry and registry.pop(entity, True) is None:
+                self._versions[kind] = next(_stamps)
+
+    def of_kind(self, *kinds: str) -> Tuple[Entity, ...]:
+        """Members whose `kind` is any of `kinds` (a snapshot, safe to mutate the set)."""
+        by_kind = self._registries()
+        if len(kinds) == 1:
+            registry = by_kind.get(kinds[0])
+            return tuple(registry) if registry else ()
+        found: Tuple[Entity, ...] = ()
+        for kind in kinds:
+            registry = by_kind.get(kind)
+            if registry:
+                found += tuple(registry)
+        return found
+
+    def count_of(self, kind: str) -> int:
+        return len(self._registries().get(kind, ()))
+
+    def version_of(self, *kinds: str) -> Tuple[int, ...]:
+        """Stamps that change whenever an entity of any of `kinds` enters or leaves."""
+        self._registries()
+        versions = self._versions
+        epoch = self._epoch
+        return tuple(versions.get(kind, epoch) for kind in kinds)
+
+    def retag(self, entity: Entity, kind: Optional[str]) -> None:
+        """Change `entity.kind` and move it to its new registry."""
+        kind = intern_kind(kind)
+        old = getattr(entity, "kind", None)
+        entity.kind = kind
+        if self._by_kind is not None and old != kind and set.__contains__(self, entity):
+            self._unindex(entity, old)
+            self._index(entity)
+
+    # --- Mutaciones en el sitio -------------------------------------------
+
+    def add(self, entity: Entity) -> None:
+        set.add(self, entity)
+        if self._by_kind is not None:
+            self._index(entity)
+
+    def remove(self, entity: Entity) -> None:
+        set.remove(self, entity)
+        if self._by_kind is not None:
+            self._unindex(entity, getattr(entity, "kind", None))
+
+    def discard(self, entity: Entity) -> None:
+        if self._by_kind is not None and set.__contains__(self, entity):
+            self._unindex(entity, getattr(entity, "kind", None))
+        set.discard(self, entity)
+
+    def pop(self) -> Entity:
+        entity = set.pop(self)
+        if self._by_kind is not None:
+            self._unindex(entity, getattr(entity, "kind", None))
+        return entity
+
+    def clear(self) -> None:
+        set.clear(self)
+        self._by_kind = None
+
+    # Mutaciones en bloque (no se usan en los bucles de juego): basta con
+    # olvidar los registros para que se reconstruyan en la siguiente consulta.
+    def update(self, *others: Iterable[Entity]) -> None:
+        set.update(self, *others)
+        self._by_kind = None
+
+    def difference_update(self, *others: Iterable[Entity]) -> None:
+        set.difference_update(self, *others)
+        self._by_kind = None
+
+    def intersection_update(self, *others: Iterable[Entity]) -> None:
+        set.intersection_update(self, *others)
+        self._by_kind = None
+
+    def symmetric_difference_update(self, other: Iterable[Entity]) -> None:
+        set.symmetric_difference_update(self, other)
+        self._by_kind = None
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+
+def retag(entity: Entity, kind: Optional[str]) -> None:
+    """Change the kind of an entity, keeping its map's registries in sync."""
+    parent = getattr(entity, "parent", None)
+    entities = getattr(parent, "entities", None) if parent is not None else None
+    if isinstance(entities, EntitySet):
+        entities.retag(entity, kind)
+    else:
+        entity.kind = intern_kind(kind)
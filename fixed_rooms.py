@@ -241,7 +241,7 @@ class BlueChestRoom(UniqueRoomBase):
             return
         x, y = positions[0]
         import entity_factories
-        import copy
+        import prototypes
 
         chest_entity = entity_factories.chest.spawn(dungeon, x, y)
         chest_entity.name = self.chest_name
@@ -253,7 +253,7 @@ class BlueChestRoom(UniqueRoomBase):
             item_proto = getattr(entity_factories, str(item_id), None)
             if not item_proto:
                 continue
-            items.append(copy.deepcopy(item_proto))
+            items.append(prototypes.clone(item_proto))
         if items:
             entity_factories.fill_container_with_items(chest_entity, items)
         entity_factories.maybe_turn_chest_into_mimic(chest_entity)
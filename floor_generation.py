@@ -0,0 +1,447 @@
+"""Per-floor stage of the world generation, runnable in worker processes.
+
+Cada planta se describe con un `FloorJob` autocontenido (generador, parámetros
+y una semilla propia derivada de la semilla del mundo), así que las plantas
+independientes pueden repartirse entre varios procesos con
+`ProcessPoolExecutor`. Lo que cruza plantas (enlazar escaleras, llaves,
+mínimos de spawn) se queda en `GameWorld`, en el proceso padre.
+
+Los procesos hijos no ven el estado global del padre mientras generan, así que
+antes de repartir el trabajo se planifica:
+- los cupos de `max_instances` se reparten entre plantas (una unidad por
+  planta elegible, por orden de planta) y cada hijo arranca su
+  `generation_tracker` con el contador en `tope - cupo`;
+- las salas únicas se tiran de antemano en el padre, en el mismo orden en que
+  se generarían en serie;
+- los únicos de `uniques` (Sauron, Grial, The Artifact) solo pueden salir en
+  la primera planta con ese número (la del tronco principal).
+Al terminar, el padre fusiona contadores, salas únicas usadas y flags.
+
+Se necesita el método de arranque 'fork': entity_factories sortea al importarse
+los nombres de pociones, pergaminos y anillos, y un proceso nuevo los sortearía
+distintos. Sin 'fork' (o con un solo núcleo) todo se genera en serie.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import settings
+import uniques
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+
+UNIQUE_FLAGS = ("sauron_exists", "grial_exists", "artifact_exists")
+
+
+@dataclass
+class FloorJob:
+    """Everything needed to generate one floor on its own."""
+
+    label: str
+    floor_number: int
+    generator: Callable
+    kwargs: Dict[str, Any]
+    seed: int
+    map_width: int
+    map_height: int
+    place_player: bool = False
+    place_downstairs: bool = True
+    lock_chance_override: Optional[float] = None
+    # Solo para la generación aislada (procesos hijos); ver plan_isolated_jobs.
+    spawn_preload: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    unique_rooms: Set[str] = field(default_factory=set)
+    allow_uniques: bool = False
+    uniques_state: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FloorResult:
+    """A floor generated in a worker plus the global state it touched."""
+
+    label: str
+    game_map: GameMap
+    spawn_counts: Dict[str, Any]
+    unique_rooms_used: Set[str]
+    uniques_state: Dict[str, Any]
+
+
+@dataclass
+class WorldPlan:
+    """Cross-floor decisions taken up front for a lazily generated world.
+
+    En un mundo perezoso las plantas se generan al bajar por primera vez, así
+    que lo que en el mundo completo se decide mirando todas las plantas (dónde
+    van las llaves, qué salas únicas salen, dónde se fuerzan los min_instances)
+    se decide aquí al empezar y se aplica al materializar cada planta.
+    """
+
+    jobs: Dict[str, FloorJob]
+    branch_plan: List[Dict[str, int]]
+    # label -> [(color, sala única que abre o None si es de puerta cerrada)]
+    keys_by_label: Dict[str, List[Tuple[str, Optional[str]]]] = field(default_factory=dict)
+    min_spawns_by_floor: Dict[int, Dict[Tuple[str, str], int]] = field(default_factory=dict)
+    pending_loot_by_floor: Dict[int, List[List[Any]]] = field(default_factory=dict)
+
+
+def snapshot_generation_state() -> Dict[str, Any]:
+    """Return the module-level generation state a lazy world needs after loading."""
+    import procgen
+
+    return {
+        "spawn_counts": procgen.generation_tracker.export_floor_counts(),
+        "unique_rooms_used": procgen.get_used_unique_rooms(),
+        "uniques": {name: getattr(uniques, name) for name in UNIQUE_FLAGS + ("artifact_location",)},
+    }
+
+
+def restore_generation_state(state: Dict[str, Any]) -> None:
+    import procgen
+
+    procgen.generation_tracker.reset()
+    procgen.generation_tracker.merge_floor_counts(state.get("spawn_counts", {}))
+    procgen.reset_unique_room_registry()
+    for name in state.get("unique_rooms_used", ()):
+        procgen.mark_unique_room_used(name)
+    for name, value in state.get("uniques", {}).items():
+        setattr(uniques, name, value)
+
+
+def floor_seed(world_seed: int, label: str) -> int:
+    """Derive the seed of a floor from the world seed and the floor label."""
+    return random.Random(f"{world_seed}:{label}").getrandbits(64)
+
+
+def _run_generator(job: FloorJob, engine: Engine) -> GameMap:
+    from procgen import set_generation_floor_context
+
+    set_generation_floor_context(job.label)
+    prev_lock_chance = None
+    if job.lock_chance_override is not None:
+        prev_lock_chance = settings.DUNGEON_V3_LOCKED_DOOR_CHANCE
+        settings.DUNGEON_V3_LOCKED_DOOR_CHANCE = job.lock_chance_override
+    try:
+        return job.generator(
+            **job.kwargs,
+            map_width=job.map_width,
+            map_height=job.map_height,
+            engine=engine,
+            floor_number=job.floor_number,
+            place_player=job.place_player,
+            place_downstairs=job.place_downstairs,
+            upstairs_location=None,
+        )
+    finally:
+        if prev_lock_chance is not None:
+            settings.DUNGEON_V3_LOCKED_DOOR_CHANCE = prev_lock_chance
+        set_generation_floor_context(None)
+
+
+def generate_floor(job: FloorJob, engine: Engine) -> GameMap:
+    """Generate a floor in this process, against the shared generation state."""
+    state = random.getstate()
+    random.seed(job.seed)
+    try:
+        return _run_generator(job, engine)
+    finally:
+        random.setstate(state)
+
+
+def generate_planned_floor(job: FloorJob, engine: Engine) -> GameMap:
+    """Generate a floor in this process honouring its planned unique room and uniques."""
+    import procgen
+
+    saved_flags = {name: getattr(uniques, name) for name in UNIQUE_FLAGS}
+    if not job.allow_uniques:
+        for name in UNIQUE_FLAGS:
+            setattr(uniques, name, True)
+    procgen.set_unique_room_plan(job.unique_rooms)
+    try:
+        return generate_floor(job, engine)
+    finally:
+        procgen.set_unique_room_plan(None)
+        if not job.allow_uniques:
+            for name, value in saved_flags.items():
+                setattr(uniques, name, value)
+
+
+# Motor heredado por los procesos hijos (vía 'fork', nunca se serializa).
+_worker_engine: Optional[Engine] = None
+
+
+def _init_worker(engine: Engine) -> None:
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _generate_isolated_floor(job: FloorJob) -> FloorResult:
+    import procgen
+
+    random.seed(job.seed)
+    procgen.generation_tracker.reset()
+    for category, preloads in job.spawn_preload.items():
+        for key, count in preloads.items():
+            procgen.generation_tracker.preload_procedural_total(category, key, count)
+    procgen.reset_unique_room_registry()
+    procgen.set_unique_room_plan(job.unique_rooms)
+    for name, value in job.uniques_state.items():
+        setattr(uniques, name, value)
+
+    game_map = _run_generator(job, _worker_engine)
+    # El motor se vuelve a enganchar en el padre; así no viaja entero con el mapa.
+    game_map.engine = None
+
+    return FloorResult(
+        label=job.label,
+        game_map=game_map,
+        spawn_counts=procgen.generation_tracker.export_floor_counts(),
+        unique_rooms_used=procgen.get_used_unique_rooms(),
+        uniques_state={
+            name: getattr(uniques, name) for name in UNIQUE_FLAGS + ("artifact_location",)
+        },
+    )
+
+
+def fork_available() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def resolve_worker_count(job_count: int) -> int:
+    """Return how many worker processes to use (<= 1 means generate serially)."""
+    if not getattr(settings, "WORLD_GENERATION_PARALLEL", False):
+        return 1
+    if not fork_available():
+        return 1
+    workers = getattr(settings, "WORLD_GENERATION_WORKERS", None) or os.cpu_count() or 1
+    return max(1, min(int(workers), job_count))
+
+
+def plan_spawn_quotas(jobs: Sequence[FloorJob]) -> None:
+    """Split what is left of every max_instances cap between the jobs."""
+    import procgen
+
+    tracker = procgen.generation_tracker
+    for (category, key), (cap, min_floor) in procgen.procedural_spawn_caps().items():
+        remaining = cap - tracker.get_total(category, key, procedural_only=True)
+        eligible = [job for job in jobs if job.floor_number >= min_floor]
+        quotas: Counter = Counter()
+        index = 0
+        while remaining > 0 and eligible:
+            quotas[eligible[index % len(eligible)].label] += 1
+            remaining -= 1
+            index += 1
+        for job in jobs:
+            job.spawn_preload.setdefault(category, {})[key] = cap - quotas[job.label]
+
+
+def plan_unique_rooms(jobs: Sequence[FloorJob]) -> None:
+    """Roll the unique rooms of every dungeon_v3 job, in generation order."""
+    import procgen
+    from generators import generate_dungeon_v3
+
+    planned: Set[str] = set()
+    plan_rooms = getattr(settings, "DUNGEON_V3_FIXED_ROOMS_ENABLED", False)
+    for job in jobs:
+        job.unique_rooms = set()
+        if plan_rooms and job.generator is generate_dungeon_v3:
+            name = procgen.plan_unique_room(job.floor_number, planned)
+            if name:
+                planned.add(name)
+                job.unique_rooms.add(name)
+
+
+def plan_uniques(jobs: Sequence[FloorJob]) -> None:
+    """Only the first job with a given floor number may place the uniques."""
+    seen_floors: Set[int] = set()
+    for job in jobs:
+        job.allow_uniques = job.floor_number not in seen_floors
+        seen_floors.add(job.floor_number)
+
+
+def _capture_uniques_state(job: FloorJob) -> None:
+    if job.allow_uniques:
+        job.uniques_state = {name: getattr(uniques, name) for name in UNIQUE_FLAGS}
+    else:
+        job.uniques_state = {name: True for name in UNIQUE_FLAGS}
+
+
+def plan_isolated_jobs(jobs: Sequence[FloorJob]) -> None:
+    """Hand out spawn quotas, unique rooms and uniques before generating in workers."""
+    plan_spawn_quotas(jobs)
+    plan_unique_rooms(jobs)
+    plan_uniques(jobs)
+    for job in jobs:
+        _capture_uniques_state(job)
+
+
+def _merge_result(job: FloorJob, result: FloorResult, engine: Engine) -> GameMap:
+    import procgen
+
+    game_map = result.game_map
+    game_map.engine = engine
+    procgen.generation_tracker.merge_floor_counts(result.spawn_counts)
+    for name in result.unique_rooms_used & job.unique_rooms:
+        procgen.mark_unique_room_used(name)
+    if job.allow_uniques:
+        for name in UNIQUE_FLAGS:
+            if result.uniques_state.get(name):
+                setattr(uniques, name, True)
+        if result.uniques_state.get("artifact_location"):
+            uniques.artifact_location = result.uniques_state["artifact_location"]
+    return game_map
+
+
+def _worker_timeout() -> float:
+    return float(getattr(settings, "WORLD_GENERATION_TIMEOUT", 30.0))
+
+
+def _worker_pids() -> Set[int]:
+    return {process.pid for process in multiprocessing.active_children()}
+
+
+def _abandon_pool(pool: ProcessPoolExecutor, previous_pids: Set[int]) -> None:
+    """Cancel what is still queued and kill the pool's workers without waiting.
+
+    `previous_pids` son los hijos que ya existían antes de crear el pool: un
+    proceso colgado no termina con `shutdown`, así que se matan los nuevos.
+    """
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in multiprocessing.active_children():
+        if process.pid not in previous_pids:
+            process.kill()
+
+
+def _generate_in_workers(
+    jobs: Sequence[FloorJob], engine: Engine, workers: int
+) -> Dict[str, GameMap]:
+    plan_isolated_jobs(jobs)
+    previous_pids = _worker_pids()
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_worker,
+        initargs=(engine,),
+    )
+    try:
+        futures = [pool.submit(_generate_isolated_floor, job) for job in jobs]
+        # Las plantas se generan a la vez: cada espera acota lo que tarda la suya.
+        results = [future.result(timeout=_worker_timeout()) for future in futures]
+    except BaseException:
+        _abandon_pool(pool, previous_pids)
+        raise
+    pool.shutdown()
+    return {
+        job.label: _merge_result(job, result, engine)
+        for job, result in zip(jobs, results)
+    }
+
+
+def generate_floors(jobs: Sequence[FloorJob], engine: Engine) -> Dict[str, GameMap]:
+    """Generate every job and return the maps by label.
+
+    Las plantas que colocan al jugador se generan siempre en este proceso y
+    antes que el resto. Si el pool falla por cualquier motivo (o una planta
+    tarda más de `WORLD_GENERATION_TIMEOUT`) se vuelve a la generación en
+    serie (el estado global del padre no se toca hasta fusionar).
+    """
+    maps: Dict[str, GameMap] = {}
+    for job in jobs:
+        if job.place_player:
+            maps[job.label] = generate_floor(job, engine)
+    pending: List[FloorJob] = [job for job in jobs if not job.place_player]
+
+    workers = resolve_worker_count(len(pending))
+    if workers > 1:
+        try:
+            maps.update(_generate_in_workers(pending, engine, workers))
+            return maps
+        except Exception as exc:
+            print(f"[floor_generation] Parallel generation failed ({exc!r}); generating serially.")
+
+    for job in pending:
+        maps[job.label] = generate_floor(job, engine)
+    return maps
+
+
+class FloorPrefetcher:
+    """Generates planned floors ahead of time in one background process.
+
+    Se usa en los mundos perezosos: mientras el jugador explora una planta, la
+    siguiente (y la entrada de rama, si la hay) se genera en otro proceso. El
+    proceso hijo arranca su `generation_tracker` con los totales actuales del
+    padre, así que los topes de max_instances se respetan salvo por lo que se
+    genere entre el encargo y la recogida. Si el proceso se cuelga o muere, se
+    mata, las plantas se generan en serie y no se vuelve a pregenerar.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Hijos que ya existían al crear el proceso de pregeneración.
+        self._previous_pids: Set[int] = set()
+        self._pending: Dict[str, Tuple[FloorJob, Future]] = {}
+        self._broken = False
+
+    @staticmethod
+    def available() -> bool:
+        return bool(getattr(settings, "WORLD_GENERATION_PARALLEL", False)) and fork_available()
+
+    def is_pending(self, label: str) -> bool:
+        return label in self._pending
+
+    def submit(self, job: FloorJob) -> None:
+        import procgen
+
+        if job.label in self._pending or self._broken:
+            return
+        tracker = procgen.generation_tracker
+        job.spawn_preload = {}
+        for category, key in procgen.procedural_spawn_caps():
+            job.spawn_preload.setdefault(category, {})[key] = tracker.get_total(
+                category, key, procedural_only=True
+            )
+        _capture_uniques_state(job)
+        if self._executor is None:
+            self._previous_pids = _worker_pids()
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker,
+                initargs=(self.engine,),
+            )
+        self._pending[job.label] = (job, self._executor.submit(_generate_isolated_floor, job))
+
+    def take(self, label: str) -> Optional[GameMap]:
+        """Return the prefetched floor (waiting for it if needed), or None."""
+        entry = self._pending.pop(label, None)
+        if entry is None:
+            return None
+        job, future = entry
+        try:
+            result = future.result(timeout=_worker_timeout())
+        except (TimeoutError, BrokenProcessPool) as exc:
+            print(f"[floor_generation] Prefetch process lost ({exc!r}); generating floors serially.")
+            self._broken = True
+            self.shutdown()
+            return None
+        except Exception as exc:
+            print(f"[floor_generation] Prefetching {label} failed ({exc!r}); generating it now.")
+            return None
+        return _merge_result(job, result, self.engine)
+
+    def shutdown(self) -> None:
+        self._pending.clear()
+        if self._executor is not None:
+            _abandon_pool(self._executor, self._previous_pids)
+            self._executor = None
+
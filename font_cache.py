@@ -0,0 +1,214 @@
+"""On-disk cache of the tilesets rasterized from TrueType fonts.
+
+`settings` cargaba la fuente con `tcod.tileset.load_truetype_font` en cada
+arranque: libtcod rasterizaba los ~780 glifos de la fuente a 128x128 antes
+de poder dibujar el menú (unos 150 ms, la mitad del import de `settings`), y
+siempre salía exactamente lo mismo.
+
+- La primera vez se rasteriza como antes y se guarda el canal alfa de cada
+  glifo (los TTF de libtcod son blancos; sólo cambia el alfa) en
+  `data/cache/` junto con la lista de codepoints, que se lee de la tabla
+  `cmap` de la fuente (tcod no la expone). Si el alfa es binario
+  (fuentes pixeladas sin antialiasing) se guarda empaquetado en bits.
+- Las siguientes veces se sube ese alfa con `Tileset.set_tile`, sin pasar por
+  libtcod.
+- La clave es un hash del fichero de la fuente, del tamaño de tile, de la
+  versión de tcod y de `CACHE_VERSION`: cambiar la fuente o el tamaño genera
+  otra entrada, y al escribirla se borran las antiguas de la misma fuente.
+- Si no se puede leer ni escribir la caché (instalación de sólo lectura,
+  fichero corrupto) se rasteriza la fuente como siempre.
+
+`python font_cache.py` reconstruye la caché de la fuente de `settings` y
+compara el tiempo de carga con y sin ella.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+from typing import Optional
+
+import numpy as np  # type: ignore
+import tcod
+
+# Súbelo si cambia el formato de los ficheros de caché.
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join("data", "cache")
+
+
+def cache_path(path: str, tile_width: int, tile_height: int, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Cache file for `path` rasterized at `tile_width` x `tile_height`."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as font_file:
+        digest.update(font_file.read())
+    digest.update(f"{tile_width}x{tile_height}|{tcod.__version__}|{CACHE_VERSION}".encode())
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"font-{stem}-{digest.hexdigest()[:16]}.npz")
+
+
+def _charmap(path: str) -> np.ndarray:
+    """Codepoints that the font's `cmap` table maps to a glyph, in order.
+
+    Son los que rasteriza libtcod (stb_truetype recorre la misma tabla) y tcod
+    no expone la lista del tileset, así que se leen de la propia fuente.
+    """
+    with open(path, "rb") as font_file:
+        data = font_file.read()
+    (num_tables,) = struct.unpack_from(">H", data, 4)
+    for index in range(num_tables):
+        tag, _, cmap, _ = struct.unpack_from(">4sIII", data, 12 + 16 * index)
+        if tag == b"cmap":
+            break
+    else:
+        raise ValueError(f"{path}: no cmap table")
+    # Como stb_truetype: gana la última subtabla Unicode (plataforma 0, o la 3
+    # con codificación 1 o 10).
+    subtable = None
+    (count,) = struct.unpack_from(">H", data, cmap + 2)
+    for index in range(count):
+        platform, encoding, offset = struct.unpack_from(">HHI", data, cmap + 4 + 8 * index)
+        if platform == 0 or (platform == 3 and encoding in (1, 10)):
+            subtable = cmap + offset
+    if subtable is None:
+        raise ValueError(f"{path}: no Unicode cmap subtable")
+
+    (format_,) = struct.unpack_from(">H", data, subtable)
+    codepoints = []
+    if format_ == 0:
+        glyphs = data[subtable + 6 : subtable + 6 + 256]
+        codepoints = [code for code, glyph in enumerate(glyphs) if glyph]
+    elif format_ == 6:
+        first, entries = struct.unpack_from(">HH", data, subtable + 6)
+        glyphs = struct.unpack_from(f">{entries}H", data, subtable + 10)
+        codepoints = [first + index for index, glyph in enumerate(glyphs) if glyph]
+    elif format_ == 4:
+        (segments,) = struct.unpack_from(">H", data, subtable + 6)
+        segments //= 2
+        ends_at = subtable + 14
+        starts_at = ends_at + 2 * segments + 2
+        deltas_at = starts_at + 2 * segments
+        range_offsets_at = deltas_at + 2 * segments
+        ends = struct.unpack_from(f">{segments}H", data, ends_at)
+        starts = struct.unpack_from(f">{segments}H", data, starts_at)
+        deltas = struct.unpack_from(f">{segments}H", data, deltas_at)
+        range_offsets = struct.unpack_from(f">{segments}H", data, range_offsets_at)
+        for index, (start, end) in enumerate(zip(starts, ends)):
+            delta, range_offset = deltas[index], range_offsets[index]
+            for code in range(start, min(end, 0xFFFE) + 1):
+                if range_offset == 0:
+                    glyph = (code + delta) & 0xFFFF
+                else:
+                    at = range_offsets_at + 2 * index + range_offset + 2 * (code - start)
+                    (glyph,) = struct.unpack_from(">H", data, at)
+                    if glyph:
+                        glyph = (glyph + delta) & 0xFFFF
+                if glyph:
+                    codepoints.append(code)
+    elif format_ in (12, 13):
+        (groups,) = struct.unpack_from(">I", data, subtable + 12)
+        for index in range(groups):
+            start, end, glyph = struct.unpack_from(">III", data, subtable + 16 + 12 * index)
+            for code in range(start, end + 1):
+                # Formato 12: glifos consecutivos; 13: el mismo para todo el grupo.
+                if glyph + (code - start if format_ == 12 else 0):
+                    codepoints.append(code)
+    else:
+        raise ValueError(f"{path}: unsupported cmap format {format_}")
+    # libtcod no rasteriza el codepoint 0.
+    codepoints = np.unique(np.array(codepoints, dtype=np.int32))
+    return codepoints[codepoints > 0]
+
+
+def _write(tileset: tcod.tileset.Tileset, codepoints: np.ndarray, filename: str) -> None:
+    alpha = np.empty((len(codepoints), *tileset.tile_shape), dtype=np.uint8)
+    for index, codepoint in enumerate(codepoints.tolist()):
+        alpha[index] = tileset.get_tile(codepoint)[..., 3]
+    if np.isin(alpha, (0, 255)).all():
+        arrays = {"bits": np.packbits(alpha > 127, axis=-1)}
+    else:
+        arrays = {"alpha": alpha}
+    directory = os.path.dirname(filename)
+    os.makedirs(directory, exist_ok=True)
+    temp_name = f"{filename}.tmp.npz"
+    np.savez(temp_name, codepoints=codepoints, **arrays)
+    os.replace(temp_name, filename)
+    # Entradas de la misma fuente con otro tamaño, versión o contenido.
+    prefix = os.path.basename(filename).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(directory):
+        stale = name.startswith(prefix) and "-" not in name[len(prefix):]
+        if stale and name != os.path.basename(filename):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _read(filename: str, tile_width: int, tile_height: int) -> tcod.tileset.Tileset:
+    with np.load(filename) as data:
+        codepoints = data["codepoints"]
+        if "bits" in data:
+            alpha = np.unpackbits(data["bits"], axis=-1, count=tile_width) * np.uint8(255)
+        else:
+            alpha = data["alpha"]
+    if alpha.shape[1:] != (tile_height, tile_width) or len(alpha) != len(codepoints):
+        raise ValueError(f"{filename}: unexpected tile shape {alpha.shape}")
+    tileset = tcod.tileset.Tileset(tile_width, tile_height)
+    # `set_tile` copia el tile; se reutiliza un único buffer RGBA blanco.
+    tile = np.full((tile_height, tile_width, 4), 255, dtype=np.uint8)
+    for codepoint, glyph in zip(codepoints.tolist(), alpha):
+        tile[..., 3] = glyph
+        tileset.set_tile(codepoint, tile)
+    return tileset
+
+
+def load_truetype_font(
+    path: str, tile_width: int, tile_height: int, *, cache_dir: Optional[str] = DEFAULT_CACHE_DIR
+) -> tcod.tileset.Tileset:
+    """Drop-in for `tcod.tileset.load_truetype_font` that reuses the cached glyphs.
+
+    Con `cache_dir=None` no se usa la caché.
+    """
+    if cache_dir is None:
+        return tcod.tileset.load_truetype_font(path, tile_width, tile_height)
+    filename = cache_path(path, tile_width, tile_height, cache_dir)
+    if os.path.exists(filename):
+        try:
+            return _read(filename, tile_width, tile_height)
+        except Exception as exc:
+            print(f"[font_cache] Ignoring unreadable cache '{filename}': {exc}")
+    tileset = tcod.tileset.load_truetype_font(path, tile_width, tile_height)
+    try:
+        _write(tileset, _charmap(path), filename)
+    except (OSError, ValueError, struct.error) as exc:
+        print(f"[font_cache] Unable to write '{filename}': {exc}")
+    return tileset
+
+
+if __name__ == "__main__":
+    import time
+
+    import settings
+
+    font = getattr(settings, "FONT_PATH", None)
+    if font is None:
+        raise SystemExit(f"GRAPHIC_MODE '{settings.GRAPHIC_MODE}' does not use a TrueType font")
+    width, height = settings.FONT_TILE_SIZE
+    cached = cache_path(font, width, height)
+    if os.path.exists(cached):
+        os.remove(cached)
+    start = time.perf_counter()
+    load_truetype_font(font, width, height)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    fresh = load_truetype_font(font, width, height, cache_dir=None)
+    rasterized = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = load_truetype_font(font, width, height)
+    from_cache = time.perf_counter() - start
+    codepoints = _charmap(font)
+    same = all(np.array_equal(fresh.get_tile(cp), loaded.get_tile(cp)) for cp in codepoints.tolist())
+    print(f"{cached}: {len(codepoints)} glyphs, {os.path.getsize(cached) / 1024:.0f} KiB")
+    print(f"  rasterize {rasterized * 1e3:7.1f} ms")
+    print(f"  build     {built * 1e3:7.1f} ms (rasterize + write)")
+    print(f"  cached    {from_cache * 1e3:7.1f} ms   identical: {same}")
@@ -1,22 +1,29 @@
 from __future__ import annotations
 
 from typing import Iterable, Iterator, Optional, TYPE_CHECKING, List, Tuple, Set, Callable, Union, Dict
+import weakref
 
 import numpy as np  # type: ignore
 from tcod.console import Console
 from entity import Actor, Item, Obstacle, Chest, TableContainer, BookShelfContainer
 from render_order import RenderOrder
 import tile_types
+from camera import Camera
+from tile_grid import TileGrid
+import entity_kinds
+from entity_kinds import EntitySet
 import entity_factories
 import settings
 from audio import ambient_sound, play_door_open_sound
 import exceptions
 import color
-import copy
+import prototypes
+import save_archive
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from floor_generation import FloorJob, FloorPrefetcher, WorldPlan
     
 import random
 import fixed_maps
@@ -27,6 +34,11 @@ OPEN_DOOR_CHAR = tile_types.open_door["dark"]["ch"]
 
 KeyLocation = Union[Tuple[int, int], str]
 
+# Fuera del mapa para que no se guarde: su clave sale de contadores del proceso.
+_vision_blockers: "weakref.WeakKeyDictionary[object, Tuple[Tuple, List[Tuple[int, int]]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def _maybe_play_door_open_sound(
     game_map: Union["GameMapTown", "GameMap"],
@@ -49,6 +61,41 @@ def _maybe_play_door_open_sound(
     )
 
 
+def _vision_blocker_positions(
+    game_map: Union["GameMapTown", "GameMap"],
+) -> List[Tuple[int, int]]:
+    """Return the tiles covered by vision-blocking entities (bookshelves).
+
+    Las estanterías no se mueven, así que sus posiciones se cachean hasta que
+    entra o sale alguna (`EntitySet.version_of`): el mapa de transparencia se
+    pide muchas veces por turno (FOV, oído, línea de tiro) y así ni siquiera se
+    recorre su registro cada vez.
+    """
+    key = game_map.entities.version_of(*entity_kinds.VISION_BLOCKERS)
+    cached = _vision_blockers.get(game_map)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    positions = [(entity.x, entity.y) for entity in game_map.vision_blockers]
+    _vision_blockers[game_map] = (key, positions)
+    return positions
+
+
+def _upgrade_tiles_state(state: Dict) -> None:
+    # Partidas guardadas antes de TileGrid: `tiles` era un array de registros tile_dt.
+    tiles = state.get("tiles")
+    if isinstance(tiles, np.ndarray):
+        state["tiles"] = TileGrid.from_array(tiles)
+
+
+def _upgrade_entities_state(state: Dict) -> None:
+    # Partidas guardadas antes de EntitySet: `entities` era un set normal.
+    entities = state.get("entities")
+    if entities is not None and not isinstance(entities, EntitySet):
+        state["entities"] = EntitySet(entities)
+    # Partidas que aún guardaban la caché de estanterías dentro del mapa.
+    state.pop("_vision_blockers_cache", None)
+
+
 class GameMapTown:
 
     def __init__(
@@ -56,10 +103,10 @@ class GameMapTown:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        self.entities = EntitySet(entities)
         self.ambient_effects: List[object] = []
         #self.tiles = np.full((width, height), fill_value=tile_types.town_wall, order="F")
-        self.tiles = np.full((width, height), fill_value=tile_types.sand_floor, order="F")
+        self.tiles = TileGrid((width, height), tile_types.sand_floor)
         self.is_town = True
         self.visible = np.full(
             (width, height), fill_value=False, order="F"
@@ -108,7 +155,7 @@ class GameMapTown:
                     isinstance(entity, Obstacle)
                     and entity.is_alive
                     and entity.blocks_movement
-                    and getattr(entity, "name", "").lower() != "door"
+                    and getattr(entity, "kind", None) != entity_kinds.DOOR
                 )
             )
         )
@@ -116,6 +163,26 @@ class GameMapTown:
     @property
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
+
+    @property
+    def campfires(self) -> Tuple[Actor, ...]:
+        return self.entities.of_kind(entity_kinds.CAMPFIRE)
+
+    @property
+    def doors(self) -> Tuple[Obstacle, ...]:
+        return self.entities.of_kind(entity_kinds.DOOR)
+
+    @property
+    def adventurers(self) -> Tuple[Actor, ...]:
+        return self.entities.of_kind(entity_kinds.ADVENTURER)
+
+    @property
+    def light_sources(self) -> Tuple[Entity, ...]:
+        return self.entities.of_kind(*entity_kinds.LIGHT_SOURCES)
+
+    @property
+    def vision_blockers(self) -> Tuple[Entity, ...]:
+        return self.entities.of_kind(*entity_kinds.VISION_BLOCKERS)
     
     def get_blocking_entity_at_location(
         self, location_x: int, location_y: int,
@@ -167,15 +234,20 @@ class GameMapTown:
     def is_downstairs_location(self, x: int, y: int) -> bool:
         return (x, y) in self.get_downstairs_locations()
 
+    def __setstate__(self, state):
+        _upgrade_tiles_state(state)
+        _upgrade_entities_state(state)
+        self.__dict__.update(state)
+
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
     def is_closed_door(self, x: int, y: int) -> bool:
-        return self.tiles["dark"]["ch"][x, y] == CLOSED_DOOR_CHAR
+        return bool(self.tiles.glyph_mask(CLOSED_DOOR_CHAR)[x, y])
 
     def is_open_door(self, x: int, y: int) -> bool:
-        return self.tiles["dark"]["ch"][x, y] == OPEN_DOOR_CHAR
+        return bool(self.tiles.glyph_mask(OPEN_DOOR_CHAR)[x, y])
 
     def open_door(self, x: int, y: int, actor: Optional[Actor] = None) -> bool:
         """Intentar abrir puerta; devuelve True si se abrió."""
@@ -238,13 +310,8 @@ class GameMapTown:
         return False
 
     def _get_door_entity(self, x: int, y: int):
-        for entity in self.entities:
-            if not entity:
-                continue
-            name = getattr(entity, "name", None)
-            if not name:
-                continue
-            if name.lower() == "door" and entity.x == x and entity.y == y:
+        for entity in self.doors:
+            if entity.x == x and entity.y == y:
                 return entity
         return None
 
@@ -268,49 +335,56 @@ class GameMapTown:
             return True
         return False
 
-    def render(self, console: Console) -> None:
+    def render(self, console: Console, camera: Optional[Camera] = None) -> None:
         """
         Renders the map.
 
         If a tile is in the "visible" array, then draw it with the "light" colors.
         If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
         Otherwise, the default is "SHROUD".
+
+        Sólo se compone la ventana de `camera` (sin cámara, el mapa entero).
         """
+        if camera is None:
+            camera = Camera(self.width, self.height)
+        view_x, view_y = camera.view_slices(self)
         player_blind = getattr(self.engine.player.fighter, "is_blind", False)
         light_tiles = self.tiles["light"] if not player_blind else self.tiles["dark"]
-
-        console.rgb[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[light_tiles, self.tiles["dark"]],
+        visible = self.visible[view_x, view_y]
+        console.rgb[0 : visible.shape[0], 0 : visible.shape[1]] = np.select(
+            condlist=[visible, self.explored[view_x, view_y]],
+            choicelist=[light_tiles[view_x, view_y], self.tiles["dark"][view_x, view_y]],
             default=tile_types.SHROUD,
         )
 
+        # Only print entities that are in the FOV (and inside the window)
         entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
+            (
+                entity
+                for entity in self.entities
+                if camera.in_view(entity.x, entity.y) and self.visible[entity.x, entity.y]
+            ),
+            key=lambda x: x.render_order.value,
         )
 
         player_entity = self.engine.player
         for entity in entities_sorted_for_rendering:
-            # Only print entities that are in the FOV
-            if self.visible[entity.x, entity.y]:
-                if player_blind and entity is not player_entity:
-                    continue
-                if self._is_stairs_tile(entity.x, entity.y) and entity.render_order in (
-                    RenderOrder.DECORATION,
-                    RenderOrder.CORPSE,
-                ):
-                    # Keep stairs visible; skip low-priority sprites on top of them.
-                    continue
-                console.print(
-                    x=entity.x, y=entity.y, string=entity.char, fg=entity.color
-                )
+            if player_blind and entity is not player_entity:
+                continue
+            if self._is_stairs_tile(entity.x, entity.y) and entity.render_order in (
+                RenderOrder.DECORATION,
+                RenderOrder.CORPSE,
+            ):
+                # Keep stairs visible; skip low-priority sprites on top of them.
+                continue
+            x, y = camera.map_to_screen(entity.x, entity.y)
+            console.print(x=x, y=y, string=entity.char, fg=entity.color)
 
     def get_transparency_map(self) -> np.ndarray:
         """Return transparency map adjusted for vision-blocking entities."""
         transparent = self.tiles["transparent"].copy()
-        for entity in self.entities:
-            if getattr(entity, "id_name", "").lower() == "bookshelf":
-                transparent[entity.x, entity.y] = False
+        for x, y in _vision_blocker_positions(self):
+            transparent[x, y] = False
         return transparent
 
     def add_ambient_effect(self, effect: object) -> None:
@@ -332,10 +406,10 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        self.entities = EntitySet(entities)
         self.ambient_effects: List[object] = []
         #self.tiles = np.full((width, height), fill_value=tile_types.dummy_wall, order="F")
-        self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
+        self.tiles = TileGrid((width, height), tile_types.wall)
         self.visible = np.full(
             (width, height), fill_value=False, order="F"
         )  # Tiles the player can currently see
@@ -386,7 +460,7 @@ class GameMap:
                     isinstance(entity, Obstacle)
                     and entity.is_alive
                     and entity.blocks_movement
-                    and getattr(entity, "name", "").lower() != "door"
+                    and getattr(entity, "kind", None) != entity_kinds.DOOR
                 )
             )
         )
@@ -394,6 +468,26 @@ class GameMap:
     @property
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
+
+    @property
+    def campfires(self) -> Tuple[Actor, ...]:
+        return self.entities.of_kind(entity_kinds.CAMPFIRE)
+
+    @property
+    def doors(self) -> Tuple[Obstacle, ...]:
+        return self.entities.of_kind(entity_kinds.DOOR)
+
+    @property
+    def adventurers(self) -> Tuple[Actor, ...]:
+        return self.entities.of_kind(entity_kinds.ADVENTURER)
+
+    @property
+    def light_sources(self) -> Tuple[Entity, ...]:
+        return self.entities.of_kind(*entity_kinds.LIGHT_SOURCES)
+
+    @property
+    def vision_blockers(self) -> Tuple[Entity, ...]:
+        return self.entities.of_kind(*entity_kinds.VISION_BLOCKERS)
     
     def get_blocking_entity_at_location(
         self, location_x: int, location_y: int,
@@ -455,6 +549,11 @@ class GameMap:
     def is_downstairs_location(self, x: int, y: int) -> bool:
         return (x, y) in self.get_downstairs_locations()
     
+    def __setstate__(self, state):
+        _upgrade_tiles_state(state)
+        _upgrade_entities_state(state)
+        self.__dict__.update(state)
+
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
@@ -519,10 +618,10 @@ class GameMap:
         return list(visited)
 
     def is_closed_door(self, x: int, y: int) -> bool:
-        return self.tiles["dark"]["ch"][x, y] == CLOSED_DOOR_CHAR
+        return bool(self.tiles.glyph_mask(CLOSED_DOOR_CHAR)[x, y])
 
     def is_open_door(self, x: int, y: int) -> bool:
-        return self.tiles["dark"]["ch"][x, y] == OPEN_DOOR_CHAR
+        return bool(self.tiles.glyph_mask(OPEN_DOOR_CHAR)[x, y])
 
     def open_door(self, x: int, y: int, actor: Optional[Actor] = None) -> bool:
         """Intentar abrir puerta; devuelve True si se abrió."""
@@ -582,13 +681,8 @@ class GameMap:
         return False
 
     def _get_door_entity(self, x: int, y: int):
-        for entity in self.entities:
-            if not entity:
-                continue
-            name = getattr(entity, "name", None)
-            if not name:
-                continue
-            if name.lower() == "door" and entity.x == x and entity.y == y:
+        for entity in self.doors:
+            if entity.x == x and entity.y == y:
                 return entity
         return None
 
@@ -612,47 +706,55 @@ class GameMap:
             return True
         return False
 
-    def render(self, console: Console) -> None:
+    def render(self, console: Console, camera: Optional[Camera] = None) -> None:
         """
         Renders the map.
 
         If a tile is in the "visible" array, then draw it with the "light" colors.
         If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
         Otherwise, the default is "SHROUD".
+
+        Sólo se compone la ventana de `camera` (sin cámara, el mapa entero).
         """
+        if camera is None:
+            camera = Camera(self.width, self.height)
+        view_x, view_y = camera.view_slices(self)
         player_blind = getattr(self.engine.player.fighter, "is_blind", False)
         light_tiles = self.tiles["light"] if not player_blind else self.tiles["dark"]
-        console.rgb[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[light_tiles, self.tiles["dark"]],
+        visible = self.visible[view_x, view_y]
+        console.rgb[0 : visible.shape[0], 0 : visible.shape[1]] = np.select(
+            condlist=[visible, self.explored[view_x, view_y]],
+            choicelist=[light_tiles[view_x, view_y], self.tiles["dark"][view_x, view_y]],
             default=tile_types.SHROUD,
         )
 
+        # Only print entities that are in the FOV (and inside the window)
         entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
+            (
+                entity
+                for entity in self.entities
+                if camera.in_view(entity.x, entity.y) and self.visible[entity.x, entity.y]
+            ),
+            key=lambda x: x.render_order.value,
         )
 
         player_entity = self.engine.player
         for entity in entities_sorted_for_rendering:
-            # Only print entities that are in the FOV
-            if self.visible[entity.x, entity.y]:
-                if player_blind and entity is not player_entity:
-                    continue
-                if self._is_stairs_tile(entity.x, entity.y) and entity.render_order in (
-                    RenderOrder.DECORATION,
-                    RenderOrder.CORPSE,
-                ):
-                    continue
-                console.print(
-                    x=entity.x, y=entity.y, string=entity.char, fg=entity.color
-                )
+            if player_blind and entity is not player_entity:
+                continue
+            if self._is_stairs_tile(entity.x, entity.y) and entity.render_order in (
+                RenderOrder.DECORATION,
+                RenderOrder.CORPSE,
+            ):
+                continue
+            x, y = camera.map_to_screen(entity.x, entity.y)
+            console.print(x=x, y=y, string=entity.char, fg=entity.color)
 
     def get_transparency_map(self) -> np.ndarray:
         """Return transparency map adjusted for vision-blocking entities."""
         transparent = self.tiles["transparent"].copy()
-        for entity in self.entities:
-            if getattr(entity, "id_name", "").lower() == "bookshelf":
-                transparent[entity.x, entity.y] = False
+        for x, y in _vision_blocker_positions(self):
+            transparent[x, y] = False
         return transparent
 
     def add_ambient_effect(self, effect: object) -> None:
@@ -706,6 +808,9 @@ class GameWorld:
         self._debug_key_positions: List[Tuple[str, Union[int, str], KeyLocation]] = []
         self._unique_keys_placed: Set[str] = set()
         self._room_flavour_entries = self._load_room_flavour_entries()
+        self.lazy_generation = bool(getattr(settings, "WORLD_LAZY_GENERATION", False))
+        self._world_plan: Optional[WorldPlan] = None
+        self._prefetcher: Optional[FloorPrefetcher] = None
         self._generate_world()
         self._sync_ambient_sound()
 
@@ -966,15 +1071,8 @@ class GameWorld:
             guarantee_downstairs_access(game_map, entry_point, stairs)
 
     def _generate_world(self) -> None:
-        from generators import (
-            generate_town,
-            generate_fixed_dungeon,
-            generate_cavern,
-            generate_dungeon_v3,
-            generate_the_library_map,
-            generate_three_doors_map,
-        )
-        from procgen import set_generation_floor_context, reset_unique_room_registry
+        from procgen import reset_unique_room_registry
+        from floor_generation import generate_floors
 
         self.levels = []
         self.branches = {}
@@ -987,23 +1085,17 @@ class GameWorld:
         key_positions: List[Tuple[str, Union[int, str], KeyLocation]] = []
         locked_colors_by_floor: List[Tuple[int, Set[str]]] = []
 
+        # Cada planta se genera por separado con su propia semilla (ver
+        # floor_generation); así se pueden repartir entre varios procesos.
+        jobs = self._build_floor_jobs(branch_plan)
+        if self.lazy_generation:
+            self._start_lazy_world(jobs, branch_plan)
+            return
+        maps = generate_floors(jobs, self.engine)
+
         for floor in range(1, settings.TOTAL_FLOORS + 1):
-            place_player = floor == 1
-            place_downstairs = floor < settings.TOTAL_FLOORS
-            generator, kwargs = self._select_generator(floor)
             label = f"M-{floor}"
-            set_generation_floor_context(label)
-            game_map = generator(
-                **kwargs,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-                floor_number=floor,
-                place_player=place_player,
-                place_downstairs=place_downstairs,
-                upstairs_location=None,
-            )
-            set_generation_floor_context(None)
+            game_map = maps[label]
 
             self._assign_branch_metadata(
                 game_map,
@@ -1016,7 +1108,7 @@ class GameWorld:
             self._init_downstairs_data(game_map)
             self._assign_room_flavours(game_map)
 
-            if place_player:
+            if floor == 1:
                 self.engine.game_map = game_map
                 self._update_center_rooms(game_map)
                 if getattr(game_map, "register_player_room_entry", None):
@@ -1037,7 +1129,7 @@ class GameWorld:
                 current_map.downstairs_exits[main_stairs] = next_map
                 next_map.upstairs_target = current_map
 
-        # Generar ramas secundarias.
+        # Enlazar ramas secundarias.
         for entry in branch_plan:
             branch_id = entry["id"]
             entry_floor = entry["entry_floor"]
@@ -1047,31 +1139,9 @@ class GameWorld:
             branch_maps: List[GameMap] = []
             previous_map: GameMap = entry_map
             for depth in range(1, length + 1):
-                generator = self._select_branch_generator()
                 effective_floor = entry_floor + depth
                 label = f"B{branch_id}-{depth}"
-                place_downstairs = depth < length
-
-                set_generation_floor_context(label)
-                if generator is generate_dungeon_v3:
-                    prev_lock_chance = settings.DUNGEON_V3_LOCKED_DOOR_CHANCE
-                    settings.DUNGEON_V3_LOCKED_DOOR_CHANCE = 0.0
-                else:
-                    prev_lock_chance = None
-
-                game_map = generator(
-                    map_width=self.map_width,
-                    map_height=self.map_height,
-                    engine=self.engine,
-                    floor_number=effective_floor,
-                    place_player=False,
-                    place_downstairs=place_downstairs,
-                    upstairs_location=None,
-                )
-
-                if prev_lock_chance is not None:
-                    settings.DUNGEON_V3_LOCKED_DOOR_CHANCE = prev_lock_chance
-                set_generation_floor_context(None)
+                game_map = maps[label]
 
                 self._assign_branch_metadata(
                     game_map,
@@ -1113,12 +1183,335 @@ class GameWorld:
 
         self._ensure_unique_room_keys(keys_placed, key_positions)
 
+        # Las vistas de tiles que ha cacheado la generación sólo se quedan en la planta actual.
+        for game_map in self._iter_all_maps():
+            if game_map is not self.engine.game_map:
+                game_map.tiles.release_views()
+
         self._debug_key_positions = key_positions
         self.current_floor = 1
         if settings.DEBUG_MODE:
             self.debug_print_key_locations()
             self.debug_print_branch_structure()
 
+    def _build_floor_jobs(self, branch_plan: List[Dict[str, int]]) -> List[FloorJob]:
+        from generators import generate_dungeon_v3
+        from floor_generation import FloorJob, floor_seed
+
+        world_seed = random.getrandbits(64)
+        jobs: List[FloorJob] = []
+        for floor in range(1, settings.TOTAL_FLOORS + 1):
+            generator, kwargs = self._select_generator(floor)
+            label = f"M-{floor}"
+            map_width, map_height = self._floor_size(generator)
+            jobs.append(
+                FloorJob(
+                    label=label,
+                    floor_number=floor,
+                    generator=generator,
+                    kwargs=kwargs,
+                    seed=floor_seed(world_seed, label),
+                    map_width=map_width,
+                    map_height=map_height,
+                    place_player=floor == 1,
+                    place_downstairs=floor < settings.TOTAL_FLOORS,
+                )
+            )
+        for entry in branch_plan:
+            for depth in range(1, entry["length"] + 1):
+                generator = self._select_branch_generator()
+                label = f"B{entry['id']}-{depth}"
+                map_width, map_height = self._floor_size(generator)
+                jobs.append(
+                    FloorJob(
+                        label=label,
+                        floor_number=entry["entry_floor"] + depth,
+                        generator=generator,
+                        kwargs={},
+                        seed=floor_seed(world_seed, label),
+                        map_width=map_width,
+                        map_height=map_height,
+                        place_downstairs=depth < entry["length"],
+                        # Las ramas no tienen puertas cerradas con llave.
+                        lock_chance_override=0.0 if generator is generate_dungeon_v3 else None,
+                    )
+                )
+        return jobs
+
+    def _floor_size(self, generator: Callable) -> Tuple[int, int]:
+        """Map size of a floor: caverns can be bigger than the rest (CAVERN_MAP_SIZE)."""
+        from generators import generate_cavern
+
+        size = getattr(settings, "CAVERN_MAP_SIZE", None)
+        if size and generator is generate_cavern:
+            return int(size[0]), int(size[1])
+        return self.map_width, self.map_height
+
+    # -- Mundo perezoso -------------------------------------------------------
+    # Solo la planta 1 se genera al empezar. El resto se materializa la primera
+    # vez que se resuelven sus escaleras (get_downstairs_destination); hasta
+    # entonces `downstairs_exits` guarda la etiqueta de la planta ("M-5",
+    # "B1-2") en lugar del mapa, y `levels`/`branches` tienen None en su hueco.
+
+    def _start_lazy_world(self, jobs: List[FloorJob], branch_plan: List[Dict[str, int]]) -> None:
+        from floor_generation import WorldPlan, plan_unique_rooms, plan_uniques
+        from procgen import plan_minimum_spawns
+
+        plan_unique_rooms(jobs)
+        plan_uniques(jobs)
+        plan = WorldPlan(jobs={job.label: job for job in jobs}, branch_plan=branch_plan)
+        self._plan_world_keys(plan)
+        plan.min_spawns_by_floor = plan_minimum_spawns(list(range(1, settings.TOTAL_FLOORS + 1)))
+        self._world_plan = plan
+
+        self.levels = [None] * settings.TOTAL_FLOORS
+        self._debug_key_positions = []
+        self.current_floor = 1
+        self._materialize_floor("M-1")
+        self.schedule_prefetch()
+        if settings.DEBUG_MODE:
+            self.debug_print_key_locations()
+
+    def _plan_world_keys(self, plan: WorldPlan) -> None:
+        """Decide up front which floor holds each key (see _ensure_keys_for_locked_doors)."""
+        from generators import generate_dungeon_v3
+
+        try:
+            import fixed_rooms
+            unique_rooms = getattr(fixed_rooms, "UNIQUE_ROOMS", {}) or {}
+        except Exception:
+            unique_rooms = {}
+
+        planned_rooms = set()
+        for job in plan.jobs.values():
+            planned_rooms |= job.unique_rooms
+
+        unique_key_colors: Set[str] = set()
+        for room_key in sorted(planned_rooms):
+            room_cls = unique_rooms.get(room_key)
+            key_color = getattr(room_cls, "key_color", None)
+            if not key_color:
+                continue
+            unique_key_colors.add(key_color)
+            min_floor = getattr(room_cls, "key_min_floor", None)
+            max_floor = getattr(room_cls, "key_max_floor", None)
+            labels = [
+                label
+                for label, job in plan.jobs.items()
+                if (min_floor is None or job.floor_number >= min_floor)
+                and (max_floor is None or job.floor_number <= max_floor)
+            ]
+            if labels:
+                plan.keys_by_label.setdefault(random.choice(labels), []).append((key_color, room_key))
+
+        branch_chance = max(0.0, min(1.0, getattr(settings, "KEY_BRANCH_SPAWN_CHANCE", 0.0)))
+        for color, min_floor in settings.DUNGEON_V3_LOCKED_DOOR_MIN_FLOOR.items():
+            if color in unique_key_colors:
+                continue
+            # Solo hace falta llave si alguna planta puede tener puertas de ese color.
+            if not any(
+                job.generator is generate_dungeon_v3
+                and job.lock_chance_override is None
+                and job.floor_number >= min_floor
+                for job in plan.jobs.values()
+            ):
+                continue
+            adjusted_min = max(1, min_floor - 2)
+            candidate_floors = list(range(adjusted_min, min(min_floor, settings.TOTAL_FLOORS + 1)))
+            if not candidate_floors:
+                continue
+            branch_candidates = [
+                entry for entry in plan.branch_plan if entry["entry_floor"] in candidate_floors
+            ]
+            if branch_candidates and random.random() < branch_chance:
+                entry = random.choice(branch_candidates)
+                label = f"B{entry['id']}-{random.randint(1, entry['length'])}"
+            else:
+                label = f"M-{random.choice(candidate_floors)}"
+            plan.keys_by_label.setdefault(label, []).append((color, None))
+
+    def _materialize_floor(self, label: str) -> GameMap:
+        from floor_generation import generate_planned_floor
+
+        plan = self._world_plan
+        existing = self._materialized_floor(label)
+        if existing is not None:
+            # Ya generada fuera de orden (get_main_floor) antes de bajar a ella.
+            return existing
+        game_map = self._prefetcher.take(label) if self._prefetcher else None
+        if game_map is None:
+            game_map = generate_planned_floor(plan.jobs[label], self.engine)
+
+        if label.startswith("M-"):
+            self._attach_main_floor(game_map, int(label.split("-", 1)[1]))
+        else:
+            branch_part, depth_part = label[1:].split("-", 1)
+            self._attach_branch_floor(game_map, int(branch_part), int(depth_part))
+
+        self._place_planned_keys(game_map, label)
+        if game_map.branch_id == 0:
+            floor = game_map.effective_floor
+            required = plan.min_spawns_by_floor.get(floor)
+            if required:
+                from procgen import enforce_minimum_spawns_on_floor
+
+                enforce_minimum_spawns_on_floor(game_map, floor, required)
+            for loot in plan.pending_loot_by_floor.pop(floor, []):
+                self._place_adventurer_corpse(floor, loot)
+        return game_map
+
+    def _attach_main_floor(self, game_map: GameMap, floor: int) -> None:
+        label = f"M-{floor}"
+        self._assign_branch_metadata(
+            game_map,
+            branch_id=0,
+            branch_depth=0,
+            entry_floor=floor,
+            label=label,
+            effective_floor=floor,
+        )
+        self._init_downstairs_data(game_map)
+        self._assign_room_flavours(game_map)
+        self.levels[floor - 1] = game_map
+        if floor > 1:
+            game_map.upstairs_target = self.levels[floor - 2]
+            self._link_downstairs(self.levels[floor - 2], label, game_map)
+        if floor < settings.TOTAL_FLOORS and game_map.downstairs_location:
+            next_map = self.levels[floor]
+            if next_map is None:
+                game_map.downstairs_exits[game_map.downstairs_location] = f"M-{floor + 1}"
+            else:
+                # La planta siguiente se generó antes que ésta (get_main_floor).
+                game_map.downstairs_exits[game_map.downstairs_location] = next_map
+                next_map.upstairs_target = game_map
+                save_archive.mark_dirty(self.engine, next_map)
+
+        if floor == 1:
+            self.engine.game_map = game_map
+            self._update_center_rooms(game_map)
+            if getattr(game_map, "register_player_room_entry", None):
+                game_map.register_player_room_entry(self.engine.player)
+
+        for entry in self._world_plan.branch_plan:
+            if entry["entry_floor"] != floor:
+                continue
+            branch_id = entry["id"]
+            branch_labels = [f"B{branch_id}-{depth}" for depth in range(1, entry["length"] + 1)]
+            branch_stairs = self._place_branch_downstairs(game_map)
+            if branch_stairs:
+                self.branches[branch_id] = [None] * entry["length"]
+                self.branch_entries[branch_id] = floor
+                self.branch_lengths[branch_id] = entry["length"]
+                game_map.downstairs_locations.append(branch_stairs)
+                game_map.downstairs_exits[branch_stairs] = branch_labels[0]
+                self._ensure_branch_stairs_access(game_map, branch_stairs)
+                continue
+            if settings.DEBUG_MODE:
+                print(f"DEBUG: No se pudo colocar escalera de rama en {label}.")
+            # La rama no existirá: sus llaves pasan a la planta de entrada.
+            for branch_label in branch_labels:
+                moved = self._world_plan.keys_by_label.pop(branch_label, [])
+                self._world_plan.keys_by_label.setdefault(label, []).extend(moved)
+
+    def _attach_branch_floor(self, game_map: GameMap, branch_id: int, depth: int) -> None:
+        entry_floor = self.branch_entries[branch_id]
+        length = self.branch_lengths[branch_id]
+        self._assign_branch_metadata(
+            game_map,
+            branch_id=branch_id,
+            branch_depth=depth,
+            entry_floor=entry_floor,
+            label=f"B{branch_id}-{depth}",
+            effective_floor=entry_floor + depth,
+        )
+        self._init_downstairs_data(game_map)
+        self._assign_room_flavours(game_map)
+        if depth == 1:
+            game_map.upstairs_target = self.levels[entry_floor - 1]
+        else:
+            game_map.upstairs_target = self.branches[branch_id][depth - 2]
+        if depth < length and game_map.downstairs_location:
+            game_map.downstairs_exits[game_map.downstairs_location] = f"B{branch_id}-{depth + 1}"
+        self.branches[branch_id][depth - 1] = game_map
+
+    def _materialized_floor(self, label: str) -> Optional[GameMap]:
+        if label.startswith("M-"):
+            return self.levels[int(label.split("-", 1)[1]) - 1]
+        branch_part, depth_part = label[1:].split("-", 1)
+        branch_maps = self.branches.get(int(branch_part)) or []
+        depth = int(depth_part)
+        return branch_maps[depth - 1] if depth <= len(branch_maps) else None
+
+    def _link_downstairs(self, upper_map: Optional[GameMap], label: str, game_map: GameMap) -> None:
+        """Point the stairs of `upper_map` that still lead to `label` at the generated map."""
+        if upper_map is None:
+            return
+        exits = upper_map.downstairs_exits
+        for location, target in exits.items():
+            if target == label:
+                exits[location] = game_map
+                save_archive.mark_dirty(self.engine, upper_map)
+
+    def get_main_floor(self, floor: int) -> Optional[GameMap]:
+        """Main floor `floor` (1-indexed). A lazy world generates it now if it wasn't yet."""
+        if not 1 <= floor <= len(self.levels):
+            return None
+        game_map = self.levels[floor - 1]
+        if game_map is None and getattr(self, "_world_plan", None) is not None:
+            game_map = self._materialize_floor(f"M-{floor}")
+        return game_map
+
+    def _place_planned_keys(self, game_map: GameMap, label: str) -> None:
+        for color, room_key in self._world_plan.keys_by_label.pop(label, []):
+            exclude = None
+            if room_key:
+                exclude = set(game_map.unique_room_tiles_by_type.get(room_key, set())) or None
+            pos = self._place_key_on_map(
+                game_map,
+                color,
+                exclude_tiles=exclude,
+                allow_table_bookshelf=room_key is not None,
+            )
+            if pos:
+                if room_key:
+                    self._unique_keys_placed.add(color)
+                self._debug_key_positions.append((color, label, pos))
+                if settings.DEBUG_MODE:
+                    print(f"DEBUG: Llave {color} colocada en {label}.")
+
+    def schedule_prefetch(self) -> None:
+        """Start generating, in the background, the floors reachable from the current one."""
+        if not getattr(self, "_world_plan", None):
+            return
+        from floor_generation import FloorPrefetcher
+
+        if not FloorPrefetcher.available():
+            return
+        if getattr(self, "_prefetcher", None) is None:
+            self._prefetcher = FloorPrefetcher(self.engine)
+        current_map = self.engine.game_map
+        for target in getattr(current_map, "downstairs_exits", {}).values():
+            if isinstance(target, str) and target in self._world_plan.jobs:
+                self._prefetcher.submit(self._world_plan.jobs[target])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # El proceso de pregeneración no se guarda; se vuelve a lanzar al cargar.
+        state["_prefetcher"] = None
+        if state.get("_world_plan") is not None:
+            from floor_generation import snapshot_generation_state
+
+            state["_generation_state"] = snapshot_generation_state()
+        return state
+
+    def __setstate__(self, state):
+        generation_state = state.pop("_generation_state", None)
+        self.__dict__.update(state)
+        if generation_state is not None:
+            from floor_generation import restore_generation_state
+
+            restore_generation_state(generation_state)
+
     def _ensure_unique_room_keys(
         self,
         keys_placed: Set[str],
@@ -1214,9 +1607,10 @@ class GameWorld:
         return str(floor)
 
     def _iter_all_maps(self) -> Iterator[GameMap]:
-        yield from self.levels
+        # En un mundo perezoso las plantas aún no generadas son None.
+        yield from (game_map for game_map in self.levels if game_map is not None)
         for branch_maps in self.branches.values():
-            yield from branch_maps
+            yield from (game_map for game_map in branch_maps if game_map is not None)
 
     def debug_print_key_locations(self) -> None:
         """Imprime en consola las llaves generadas y su ubicación por piso."""
@@ -1520,7 +1914,12 @@ class GameWorld:
             stairs_location = current_map.get_primary_downstairs()
         if not stairs_location:
             return None
-        return getattr(current_map, "downstairs_exits", {}).get(stairs_location)
+        exits = getattr(current_map, "downstairs_exits", {})
+        destination = exits.get(stairs_location)
+        if isinstance(destination, str):
+            destination = self._materialize_floor(destination)
+            exits[stairs_location] = destination
+        return destination
 
     def advance_floor(
         self,
@@ -1537,6 +1936,7 @@ class GameWorld:
         next_map = self.get_downstairs_destination(stairs_location)
         if not next_map:
             return False
+        left_map = self.engine.game_map
 
         if spawn_selector:
             spawn_x, spawn_y = spawn_selector(next_map)
@@ -1544,12 +1944,15 @@ class GameWorld:
             spawn_x, spawn_y = self._find_spawn_location(next_map)
         self.engine.player.place(spawn_x, spawn_y, next_map)
         self.engine.game_map = next_map
+        left_map.tiles.release_views()
+        save_archive.mark_dirty(self.engine, left_map)
         self.current_floor = getattr(next_map, "effective_floor", self.current_floor)
         self._update_center_rooms(next_map)
         self.engine.update_fov()
         self._sync_ambient_sound()
         self.engine.spawn_monsters_counter = 0
         self.engine.spawn_monsters_generated = 0
+        self.schedule_prefetch()
         return True
 
     def retreat_floor(self) -> bool:
@@ -1569,12 +1972,15 @@ class GameWorld:
         )
         self.engine.player.place(spawn_x, spawn_y, previous_map)
         self.engine.game_map = previous_map
+        current_map.tiles.release_views()
+        save_archive.mark_dirty(self.engine, current_map)
         self.current_floor = getattr(previous_map, "effective_floor", self.current_floor)
         self._update_center_rooms(previous_map)
         self.engine.update_fov()
         self._sync_ambient_sound()
         self.engine.spawn_monsters_counter = 0
         self.engine.spawn_monsters_generated = 0
+        self.schedule_prefetch()
         return True
 
     def get_room_tiles_from_certain_floor(self, floor: int, center: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -1750,7 +2156,7 @@ class GameWorld:
         if inventory is None:
             return None
 
-        key_item = copy.deepcopy(key_prototype)
+        key_item = prototypes.clone(key_prototype)
         key_item.parent = inventory
         if len(inventory.items) >= inventory.capacity:
             inventory.capacity += 1
@@ -1784,7 +2190,7 @@ class GameWorld:
             return None
 
         target_chest = random.choice(chests)
-        key_item = copy.deepcopy(key_prototype)
+        key_item = prototypes.clone(key_prototype)
         target_chest.add_item(key_item)
         return f"dentro de un cofre en ({target_chest.x}, {target_chest.y})"
 
@@ -1815,7 +2221,7 @@ class GameWorld:
             return None
 
         target = random.choice(containers)
-        key_item = copy.deepcopy(key_prototype)
+        key_item = prototypes.clone(key_prototype)
         target.add_item(key_item)
         return f"dentro de un contenedor en ({target.x}, {target.y})"
 
@@ -1842,10 +2248,15 @@ class GameWorld:
         if floor < 1 or floor > len(self.levels):
             return
         game_map = self.levels[floor - 1]
+        if game_map is None:
+            # Planta aún sin generar: el cadáver se coloca al materializarla.
+            self._world_plan.pending_loot_by_floor.setdefault(floor, []).append(loot)
+            return
         x, y = self._find_random_free_tile(game_map)
         entity_factories.adventurer_corpse.spawn(game_map, x, y)
         for item in loot:
             item.spawn(game_map, x, y)
+        save_archive.mark_dirty(self.engine, game_map)
 
     def _find_random_free_tile(self, game_map: GameMap) -> Tuple[int, int]:
         for _ in range(200):
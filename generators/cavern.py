@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple, List, TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
 import random
+import tcod
 
 import entity_factories
 import settings
 import tile_types
 from game_map import GameMap
+from tile_grid import TileGrid
 from procgen import (
     _can_place_entity,
     _select_weighted_spawn_entries,
@@ -33,30 +35,18 @@ FLOOR = True
 
 
 def generate_noise_map(width: int, height: int, fill_probability: float) -> np.ndarray:
-    rng = np.random.default_rng()
+    # Semilla tomada de `random` para que la planta sea reproducible con su semilla.
+    rng = np.random.default_rng(random.getrandbits(64))
     return rng.random((width, height)) < fill_probability
 
 
 def simulate_ca_step(map_array: np.ndarray, birth_limit: int, death_limit: int) -> np.ndarray:
-    wall_count = np.zeros_like(map_array, dtype=np.int8)
-
-    width, height = map_array.shape
-    for dx in (-1, 0, 1):
-        for dy in (-1, 0, 1):
-            if dx == 0 and dy == 0:
-                continue
-            shifted = np.roll(map_array, shift=(dx, dy), axis=(0, 1))
-
-            if dx == -1:
-                shifted[-1, :] = WALL
-            if dx == 1:
-                shifted[0, :] = WALL
-            if dy == -1:
-                shifted[:, -1] = WALL
-            if dy == 1:
-                shifted[:, 0] = WALL
-
-            wall_count += shifted == WALL
+    # Vecinos muro de cada casilla con una sola convolución 3x3 (separable: filas
+    # y luego columnas) sobre el mapa rodeado de muro; lo de fuera cuenta como muro.
+    walls = np.pad(map_array == WALL, 1, constant_values=True).astype(np.int8)
+    rows = walls[:-2] + walls[1:-1] + walls[2:]
+    wall_count = rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]
+    wall_count -= walls[1:-1, 1:-1]
 
     new_map = np.where(wall_count > death_limit, WALL, FLOOR)
     new_map = np.where(wall_count < birth_limit, FLOOR, new_map)
@@ -84,83 +74,96 @@ def generate_cavern_map(
     return noise
 
 
-def flood_fill(map_array: np.ndarray, start: Tuple[int, int]) -> List[Tuple[int, int]]:
-    width, height = map_array.shape
-    visited = np.zeros_like(map_array, dtype=bool)
-    to_visit = [start]
-    region: List[Tuple[int, int]] = []
-
-    while to_visit:
-        x, y = to_visit.pop()
-        if not (0 <= x < width and 0 <= y < height):
-            continue
-        if visited[x, y]:
-            continue
-        if map_array[x, y] == WALL:
-            continue
-
-        visited[x, y] = True
-        region.append((x, y))
-
-        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-            to_visit.append((x + dx, y + dy))
-
-    return region
+def label_regions(map_array: np.ndarray) -> np.ndarray:
+    """Label the 4-connected floor regions; walls get the label `map_array.size`.
+
+    Cada región queda etiquetada con el índice plano (x * alto + y) de su
+    primera casilla, así que ordenar por etiqueta respeta el orden de barrido.
+    Propagación del mínimo entre vecinos + salto de punteros: unas pocas
+    pasadas de NumPy en vez de un flood fill en Python por casilla.
+    """
+    floor = map_array == FLOOR
+    size = map_array.size
+    parent = np.arange(size + 1)
+    labels = np.where(floor, np.arange(size).reshape(map_array.shape), size)
+    while True:
+        lowest = labels.copy()
+        np.minimum(lowest[1:], labels[:-1], out=lowest[1:])
+        np.minimum(lowest[:-1], labels[1:], out=lowest[:-1])
+        np.minimum(lowest[:, 1:], labels[:, :-1], out=lowest[:, 1:])
+        np.minimum(lowest[:, :-1], labels[:, 1:], out=lowest[:, :-1])
+        changed = floor & (lowest < labels)
+        if not changed.any():
+            return labels
+        np.minimum.at(parent, labels[changed], lowest[changed])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        labels = np.where(floor, parent[labels], size)
+
+
+def _shortest_tunnel(main: np.ndarray, region: np.ndarray) -> Optional[np.ndarray]:
+    """Return the shortest cardinal path (N x 2) from a `main` tile to a `region` tile.
+
+    Se calcula un mapa de Dijkstra sembrado en la región dentro de una ventana
+    alrededor de ella y se busca la casilla principal más cercana. Si la mejor
+    distancia cabe en el margen de la ventana es exacta (un camino Manhattan
+    no sale del rectángulo de sus extremos); si no, se dobla el margen.
+    """
+    width, height = main.shape
+    x0, y0 = region.min(axis=0)
+    x1, y1 = region.max(axis=0) + 1
+    reach = 8
+    while True:
+        wx0, wy0 = max(0, x0 - reach), max(0, y0 - reach)
+        wx1, wy1 = min(width, x1 + reach), min(height, y1 + reach)
+        whole_map = (wx0, wy0, wx1, wy1) == (0, 0, width, height)
+        window_main = main[wx0:wx1, wy0:wy1]
+        if window_main.any():
+            shape = window_main.shape
+            dist = tcod.path.maxarray(shape, dtype=np.int32)
+            dist[region[:, 0] - wx0, region[:, 1] - wy0] = 0
+            tcod.path.dijkstra2d(dist, np.ones(shape, dtype=np.int32), 1, 0, out=dist)
+            candidates = np.where(window_main, dist, np.iinfo(np.int32).max)
+            best = np.unravel_index(np.argmin(candidates), shape)
+            if candidates[best] <= reach or whole_map:
+                path = tcod.path.hillclimb2d(dist, best, cardinal=True, diagonal=False)
+                return path + (wx0, wy0)
+        if whole_map:
+            return None
+        reach *= 2
 
 
 def connect_cavern_regions(map_array: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int], Tuple[int, int]]:
     width, height = map_array.shape
-    visited = np.zeros_like(map_array, dtype=bool)
-    regions: List[List[Tuple[int, int]]] = []
-
-    for x in range(width):
-        for y in range(height):
-            if map_array[x, y] == FLOOR and not visited[x, y]:
-                region = flood_fill(map_array, (x, y))
-                for rx, ry in region:
-                    visited[rx, ry] = True
-                if region:
-                    regions.append(region)
-
-    if not regions:
+    labels = label_regions(map_array)
+    floor_cells = np.flatnonzero(labels.ravel() < map_array.size)
+    if not floor_cells.size:
         return map_array, (width // 2, height // 2), (width // 2 + 1, height // 2 + 1)
 
-    regions.sort(key=len, reverse=True)
-    main_region = set(regions[0])
+    # Casillas agrupadas por región; de mayor a menor (empates en orden de barrido).
+    cell_labels = labels.ravel()[floor_cells]
+    order = np.argsort(cell_labels, kind="stable")
+    roots, starts, counts = np.unique(cell_labels[order], return_index=True, return_counts=True)
+    coords = np.column_stack(np.unravel_index(floor_cells[order], map_array.shape))
+    regions = [coords[start:start + count] for start, count in zip(starts, counts)]
+    regions = [regions[i] for i in np.argsort(-counts, kind="stable")]
 
-    for region in regions[1:]:
+    main = np.zeros(map_array.shape, dtype=bool)
+    main[regions[0][:, 0], regions[0][:, 1]] = True
 
-        closest_main = None
-        closest_region = None
-        best_distance = None
-
-        for x1, y1 in region:
-            for x2, y2 in main_region:
-                distance = abs(x1 - x2) + abs(y1 - y2)
-                if best_distance is None or distance < best_distance:
-                    best_distance = distance
-                    closest_main = (x2, y2)
-                    closest_region = (x1, y1)
-
-        if closest_main and closest_region:
-            x1, y1 = closest_region
-            x2, y2 = closest_main
-            cx, cy = x1, y1
-            while (cx, cy) != (x2, y2):
-                if cx < x2:
-                    cx += 1
-                elif cx > x2:
-                    cx -= 1
-                elif cy < y2:
-                    cy += 1
-                elif cy > y2:
-                    cy -= 1
-                map_array[cx, cy] = FLOOR
-                main_region.add((cx, cy))
-
-        main_region |= set(region)
-
-    floor_tiles = list(main_region)
+    for region in regions[1:]:
+        # Un túnel anterior pudo atravesar esta región: ya está conectada.
+        if not main[region[:, 0], region[:, 1]].any():
+            tunnel = _shortest_tunnel(main, region)
+            if tunnel is not None:
+                map_array[tunnel[:, 0], tunnel[:, 1]] = FLOOR
+                main[tunnel[:, 0], tunnel[:, 1]] = True
+        main[region[:, 0], region[:, 1]] = True
+
+    floor_tiles = [(int(x), int(y)) for x, y in np.argwhere(main)]
     player_start = random.choice(floor_tiles)
     stairs_location = random.choice(floor_tiles)
 
@@ -257,7 +260,7 @@ def generate_cavern(
     entities = [engine.player] if place_player else []
     dungeon = GameMap(engine, map_width, map_height, entities=entities)
     dungeon.is_cavern = True
-    dungeon.tiles = np.full((map_width, map_height), fill_value=tile_types.wall, order="F")
+    dungeon.tiles = TileGrid((map_width, map_height), tile_types.wall)
 
     fill_probability = fill_probability if fill_probability is not None else settings.CAVERN_FILL_PROBABILITY
     birth_limit = birth_limit if birth_limit is not None else settings.CAVERN_BIRTH_LIMIT
@@ -274,16 +277,8 @@ def generate_cavern(
     )
     ca_map, player_start, stairs_location = connect_cavern_regions(ca_map)
 
-    dungeon.tiles["walkable"] = ca_map
-    dungeon.tiles["transparent"] = ca_map
-
-    floor_indices = np.where(ca_map)
-    dungeon.tiles["dark"]["ch"][floor_indices] = tile_types.floor["dark"]["ch"]
-    dungeon.tiles["dark"]["fg"][floor_indices] = tile_types.floor["dark"]["fg"]
-    dungeon.tiles["dark"]["bg"][floor_indices] = tile_types.floor["dark"]["bg"]
-    dungeon.tiles["light"]["ch"][floor_indices] = tile_types.floor["light"]["ch"]
-    dungeon.tiles["light"]["fg"][floor_indices] = tile_types.floor["light"]["fg"]
-    dungeon.tiles["light"]["bg"][floor_indices] = tile_types.floor["light"]["bg"]
+    # Las celdas abiertas del autómata son suelo (transitable y transparente).
+    dungeon.tiles[ca_map] = tile_types.floor
 
     entry_point: Optional[Tuple[int, int]] = upstairs_location
     if upstairs_location:
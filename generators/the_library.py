@@ -357,11 +357,13 @@ def generate_the_library_map(
         spawn_door_entity(dungeon, x, y)
 
     for x, y in fake_walls_array:
-        dungeon.tiles[(x, y)] = tile_types.breakable_wall
-        dungeon.tiles["dark"]["fg"][x, y] = walls["dark"]["fg"]
-        dungeon.tiles["dark"]["bg"][x, y] = walls["dark"]["bg"]
-        dungeon.tiles["light"]["fg"][x, y] = walls["light"]["fg"]
-        dungeon.tiles["light"]["bg"][x, y] = walls["light"]["bg"]
+        dungeon.tiles[(x, y)] = tile_types.recolor(
+            tile_types.breakable_wall,
+            dark_fg=walls["dark"]["fg"],
+            dark_bg=walls["dark"]["bg"],
+            light_fg=walls["light"]["fg"],
+            light_bg=walls["light"]["bg"],
+        )
         entity_factories.breakable_wall.spawn(dungeon, x, y)
 
     for x, y in bookshelf_array:
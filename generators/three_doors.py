@@ -314,12 +314,14 @@ def generate_three_doors_map(
         spawn_door_entity(dungeon, x, y)
 
     for x, y in fake_walls_array:
-        dungeon.tiles[(x, y)] = tile_types.breakable_wall
         # Igualamos los colores de los muros rompibles a los muros normales para que no se distingan.
-        dungeon.tiles["dark"]["fg"][x, y] = walls["dark"]["fg"]
-        dungeon.tiles["dark"]["bg"][x, y] = walls["dark"]["bg"]
-        dungeon.tiles["light"]["fg"][x, y] = walls["light"]["fg"]
-        dungeon.tiles["light"]["bg"][x, y] = walls["light"]["bg"]
+        dungeon.tiles[(x, y)] = tile_types.recolor(
+            tile_types.breakable_wall,
+            dark_fg=walls["dark"]["fg"],
+            dark_bg=walls["dark"]["bg"],
+            light_fg=walls["light"]["fg"],
+            light_bg=walls["light"]["bg"],
+        )
         entity_factories.breakable_wall.spawn(dungeon, x, y)
 
     for x, y in snake_array:
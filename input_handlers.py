@@ -369,6 +369,11 @@ class EventHandler(BaseEventHandler):
         if action is None:
             return False
 
+        # Se graba lo que pidió el jugador; la confusión lo vuelve a alterar al reproducirlo.
+        recorder = getattr(self.engine, "recorder", None)
+        if recorder is not None:
+            recorder.record(action)
+
         action = self._maybe_scramble_player_action(action)
         actor = getattr(action, "entity", None)
         is_wait_action = isinstance(action, WaitAction)
@@ -472,6 +477,9 @@ class EventHandler(BaseEventHandler):
             profiler.end_phase("upkeep")
             profiler.end_turn(self.engine.turn)
 
+        # Autoguardado en segundo plano (cada N turnos o al cambiar de planta).
+        self.engine.maybe_autosave()
+
         return True
 
     def _maybe_scramble_player_action(self, action: Action) -> Action:
@@ -523,8 +531,19 @@ class EventHandler(BaseEventHandler):
     
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
-        if hasattr(event, "position") and self.engine.game_map.in_bounds(*event.position):
-            self.engine.mouse_location = event.position
+        position = self._map_position(event)
+        if position is not None:
+            self.engine.mouse_location = position
+
+    def _map_position(self, event: tcod.event.Event) -> Optional[Tuple[int, int]]:
+        """Map tile under the mouse (through the camera), or None outside the drawn map."""
+        if not hasattr(event, "position"):
+            return None
+        camera = self.engine.camera
+        x, y = camera.screen_to_map(int(event.position[0]), int(event.position[1]))
+        if not self.engine.game_map.in_bounds(x, y) or not camera.in_view(x, y):
+            return None
+        return x, y
 
     #def ev_quit(self, event: tcod.event.Quit) -> Optional[Action]:
     #    raise SystemExit()
@@ -678,7 +697,8 @@ class CombatControlHandler(AskUserEventHandler):
         y = min(layout["y"], max(0, console.height - height))
 
         # Place panel on the opposite side of the player for readability.
-        if self.engine.player.x <= layout["player_threshold"]:
+        player_x, _ = self.engine.camera.map_to_screen(self.engine.player.x, self.engine.player.y)
+        if player_x <= layout["player_threshold"]:
             x = min(layout["x_right"], max(0, console.width - width))
         else:
             x = max(0, min(layout["x_left"], console.width - width))
@@ -1706,7 +1726,14 @@ class SelectIndexHandler(AskUserEventHandler):
         """Highlight the tile under the cursor."""
         super().on_render(console)
         # Esto renderiza el cursor en la posición indicada
+        self._draw_cursor(console)
+
+    def _draw_cursor(self, console: tcod.Console) -> None:
+        camera = self.engine.camera
         x, y = self.engine.mouse_location
+        if not camera.in_view(x, y):
+            return
+        x, y = camera.map_to_screen(x, y)
         console.rgb["bg"][x, y] = color.white
         console.rgb["fg"][x, y] = color.black
 
@@ -1726,10 +1753,10 @@ class SelectIndexHandler(AskUserEventHandler):
             dx, dy = MOVE_KEYS[key]
             x += dx * modifier
             y += dy * modifier
-            # Clamp the cursor index to the map size.
+            # Clamp the cursor index to the map size (and to what is on screen).
             x = max(0, min(x, self.engine.game_map.width - 1))
             y = max(0, min(y, self.engine.game_map.height - 1))
-            self.engine.mouse_location = x, y
+            self.engine.mouse_location = self.engine.camera.clamp(x, y)
             return None
         elif key in CONFIRM_KEYS:
             return self._select_index(*self.engine.mouse_location)
@@ -1739,9 +1766,10 @@ class SelectIndexHandler(AskUserEventHandler):
         self, event: tcod.event.MouseButtonDown
     ) -> Optional[ActionOrHandler]:
         """Left click confirms a selection."""
-        if hasattr(event, "position") and self.engine.game_map.in_bounds(*event.position):
+        position = self._map_position(event)
+        if position is not None:
             if event.button == 1:
-                return self._select_index(*event.position)
+                return self._select_index(*position)
         return super().ev_mousebuttondown(event)
 
     def on_index_selected(self, x: int, y: int) -> Optional[ActionOrHandler]:
@@ -1797,20 +1825,19 @@ class SingleRangedAttackHandler(SelectIndexHandler):
         gamemap = self.engine.game_map
         if not gamemap.in_bounds(x, y):
             return
+        camera = self.engine.camera
         line = tcod.los.bresenham((player.x, player.y), (x, y)).tolist()
         for lx, ly in line[1:]:
             if not gamemap.in_bounds(lx, ly):
                 break
-            if not gamemap.visible[lx, ly]:
+            if not gamemap.visible[lx, ly] or not camera.in_view(lx, ly):
                 continue
-            console.rgb["bg"][lx, ly] = color.target_path
+            console.rgb["bg"][camera.map_to_screen(lx, ly)] = color.target_path
 
     def on_render(self, console: tcod.Console) -> None:
         super().on_render(console)
         self._draw_target_path(console)
-        x, y = self.engine.mouse_location
-        console.rgb["bg"][x, y] = color.white
-        console.rgb["fg"][x, y] = color.black
+        self._draw_cursor(console)
 
     def on_index_selected(self, x: int, y: int) -> Optional[Action]:
         return self.callback((x, y))
@@ -1836,21 +1863,20 @@ class AreaRangedAttackHandler(SelectIndexHandler):
         gamemap = self.engine.game_map
         if not gamemap.in_bounds(x, y):
             return
+        camera = self.engine.camera
         line = tcod.los.bresenham((player.x, player.y), (x, y)).tolist()
         for lx, ly in line[1:]:
             if not gamemap.in_bounds(lx, ly):
                 break
-            if not gamemap.visible[lx, ly]:
+            if not gamemap.visible[lx, ly] or not camera.in_view(lx, ly):
                 continue
-            console.rgb["bg"][lx, ly] = color.target_path
+            console.rgb["bg"][camera.map_to_screen(lx, ly)] = color.target_path
 
     def on_render(self, console: tcod.Console) -> None:
         """Highlight the tile under the cursor."""
         super().on_render(console)
         self._draw_target_path(console)
-        x, y = self.engine.mouse_location
-        console.rgb["bg"][x, y] = color.white
-        console.rgb["fg"][x, y] = color.black
+        self._draw_cursor(console)
 
         x, y = self.engine.mouse_location
 
@@ -1980,6 +2006,10 @@ class MainGameEventHandler(EventHandler):
                 return ranged_handler
         elif key == tcod.event.KeySym.q:
             return ToogleLightAction(player)
+        # Overlay de rendimiento
+        elif key == tcod.event.KeySym.F3:
+            self.engine.toggle_perf_overlay()
+            return None
         # Ataque con alcance (arma con alcance >= 2)
         elif key == tcod.event.KeySym.TAB:
             reach_handler = self._maybe_reach_attack(player)
@@ -2155,6 +2185,10 @@ class GameOverEventHandler(EventHandler):
 
     def on_quit(self) -> None:
         """Handle exiting out of a finished game."""
+        autosaver = getattr(self.engine, "autosaver", None)
+        if autosaver:
+            # Espera a un autoguardado en curso y borra también las copias rotadas.
+            autosaver.discard()
         if os.path.exists("savegame.sav"):
             os.remove("savegame.sav")  # Deletes the active save file.
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game.
@@ -0,0 +1,159 @@
+"""Cached light masks for campfires, adventurers and any other light source.
+
+`Engine._apply_campfire_effects` calculaba en cada turno un `compute_fov`
+desde el jugador con radio de todo el mapa, más otro por cada hoguera y por
+cada aventurero, sólo para añadir su luz a `visible`. Las hogueras no se
+mueven y el titileo sólo cambia el radio en ±1, así que casi todo ese
+trabajo se repetía igual turno tras turno.
+
+- `LightMap` (uno por planta, en `light_map(game_map)`) guarda la máscara de
+  cada fuente por radio, recortada a su caja `[x-r, x+r] x [y-r, y+r]`. Una
+  fuente quieta reutiliza sus máscaras (las tres del titileo se calculan una
+  vez); una que se mueve las recalcula al cambiar de casilla.
+- La línea de visión del jugador se cachea por posición.
+- Todo se invalida cuando cambia la geometría del mapa: `tiles.version` y
+  las entradas y salidas de entidades que tapan la vista (`VISION_BLOCKERS`).
+- `composite` suma todas las luces en un único mapa de luz con NumPy; el
+  coste por fuente y turno es una OR sobre su caja, no un FOV.
+
+Para añadir fuentes nuevas (braseros, objetos que brillan) basta con pasar
+`(entidad, radio)` a `composite`; no se guardan con la partida ni necesitan
+nada en su estado. Las cachés viven fuera del `GameMap` (en un
+`WeakKeyDictionary`) para que no se serialicen.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+import numpy as np  # type: ignore
+from tcod.map import compute_fov
+
+import entity_kinds
+import perf_counters
+import settings
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from game_map import GameMap
+
+# (x0, x1, y0, y1, máscara de la caja)
+Window = Tuple[int, int, int, int, np.ndarray]
+
+_light_maps: "weakref.WeakKeyDictionary[GameMap, LightMap]" = weakref.WeakKeyDictionary()
+
+
+def geometry_key(game_map: GameMap) -> Tuple:
+    """Changes whenever a tile or a vision-blocking entity of `game_map` changes."""
+    return (
+        getattr(game_map.tiles, "version", None),
+        game_map.entities.version_of(*entity_kinds.VISION_BLOCKERS),
+    )
+
+
+def light_map(game_map: GameMap) -> LightMap:
+    lights = _light_maps.get(game_map)
+    if lights is None:
+        lights = _light_maps[game_map] = LightMap(game_map)
+    return lights
+
+
+class LightMap:
+    """Per-floor cache of light masks and of the player's line of sight."""
+
+    def __init__(self, game_map: GameMap) -> None:
+        self._map = weakref.ref(game_map)
+        self._geometry: Optional[Tuple] = None
+        self._transparent: Optional[np.ndarray] = None
+        # {entidad: ((x, y), {radio: ventana})}
+        self._sources: Dict[Entity, Tuple[Tuple[int, int], Dict[int, Window]]] = {}
+        self._los_origin: Optional[Tuple[int, int]] = None
+        self._los: Optional[np.ndarray] = None
+        # Último mapa de luz compuesto (sin recortar por la línea de visión).
+        self.light: Optional[np.ndarray] = None
+
+    def _check_geometry(self, game_map: GameMap) -> None:
+        key = geometry_key(game_map)
+        if key != self._geometry:
+            self._geometry = key
+            self._transparent = None
+            self._sources.clear()
+            self._los_origin = self._los = None
+
+    def _transparency(self, game_map: GameMap) -> np.ndarray:
+        # Sólo se pide al recalcular alguna máscara.
+        if self._transparent is None:
+            self._transparent = game_map.get_transparency_map()
+        return self._transparent
+
+    def line_of_sight(self, game_map: GameMap, origin: Tuple[int, int]) -> np.ndarray:
+        """Tiles visible from `origin` at any distance (cached until it moves)."""
+        self._check_geometry(game_map)
+        if self._los is None or self._los_origin != origin:
+            perf_counters.fov.misses += 1
+            self._los = compute_fov(
+                self._transparency(game_map),
+                origin,
+                max(game_map.width, game_map.height),
+                algorithm=settings.FOV_ALGORITHM,
+            )
+            self._los_origin = origin
+        else:
+            perf_counters.fov.hits += 1
+        return self._los
+
+    def _window(self, game_map: GameMap, entity: Entity, radius: int) -> Window:
+        position = (entity.x, entity.y)
+        cached = self._sources.get(entity)
+        if cached is None or cached[0] != position:
+            cached = self._sources[entity] = (position, {})
+        windows = cached[1]
+        window = windows.get(radius)
+        if window is not None:
+            perf_counters.fov.hits += 1
+        else:
+            perf_counters.fov.misses += 1
+            x, y = position
+            mask = compute_fov(
+                self._transparency(game_map),
+                position,
+                radius,
+                algorithm=settings.FOV_ALGORITHM,
+            )
+            x0, y0 = max(0, x - radius), max(0, y - radius)
+            x1, y1 = x + radius + 1, y + radius + 1
+            window = windows[radius] = (x0, x1, y0, y1, mask[x0:x1, y0:y1].copy())
+        return window
+
+    def composite(self, lights: Iterable[Tuple[Entity, int]]) -> np.ndarray:
+        """Union of the masks of every `(source, radius)` as one boolean light map."""
+        game_map = self._map()
+        self._check_geometry(game_map)
+        light = np.zeros((game_map.width, game_map.height), dtype=bool, order="F")
+        seen = set()
+        for entity, radius in lights:
+            seen.add(entity)
+            x0, x1, y0, y1, mask = self._window(game_map, entity, radius)
+            light[x0:x1, y0:y1] |= mask
+        # Las fuentes que se apagaron o salieron de la planta no se guardan.
+        if len(self._sources) > len(seen):
+            for entity in [entity for entity in self._sources if entity not in seen]:
+                del self._sources[entity]
+        self.light = light
+        return light
+
+
+def illuminate(
+    game_map: GameMap,
+    viewer: Tuple[int, int],
+    lights: Iterable[Tuple[Entity, int]],
+    visible: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Add to `visible` the lit tiles in line of sight of `viewer`; return the light map."""
+    lights_of_map = light_map(game_map)
+    light = lights_of_map.composite(lights)
+    if visible is None:
+        visible = game_map.visible
+    visible |= light & lights_of_map.line_of_sight(game_map, viewer)
+    return light
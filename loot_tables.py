@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import random
-import copy
 from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 
+import prototypes
+import spawn_tables
 from entity import Item
 
 # SISTEMA DE DROPS
@@ -155,12 +156,15 @@ DEFAULT_FALLBACK_ITEM_KEY = "meat"
 
 _ITEM_REGISTRY: Dict[str, Item] = {}
 _fallback_item: Optional[Item] = None
+# Tablas de drops especiales ya compiladas (se invalidan al registrar ítems).
+_special_drop_tables: Dict[str, spawn_tables.AliasTable[str]] = {}
 
 
 def register_loot_item(key: str, item: Item, *, fallback: Optional[bool] = None) -> None:
     """Register an item prototype that can be referenced by loot tables."""
     global _fallback_item
     _ITEM_REGISTRY[key] = item
+    _special_drop_tables.clear()
     should_set_fallback = fallback
     if should_set_fallback is None:
         should_set_fallback = key == DEFAULT_FALLBACK_ITEM_KEY
@@ -177,15 +181,15 @@ def _materialize_item(proto: Item) -> List[Item]:
     """Return one or more instances of a loot prototype, honoring bundle ranges."""
     bundle = getattr(proto, "bundle_range", None)
     if not bundle:
-        return [copy.deepcopy(proto)]
+        return [prototypes.clone(proto)]
     try:
         low, high = bundle
     except Exception:
-        return [copy.deepcopy(proto)]
+        return [prototypes.clone(proto)]
     low = max(1, int(low))
     high = max(low, int(high))
     count = random.randint(low, high)
-    return [copy.deepcopy(proto) for _ in range(count)]
+    return [prototypes.clone(proto) for _ in range(count)]
 
 
 def build_monster_inventory(monster_type: str, amount: int) -> List[Item]:
@@ -215,6 +219,25 @@ def build_monster_inventory(monster_type: str, amount: int) -> List[Item]:
     return result
 
 
+def _special_drop_table(
+    monster_type: str, config: Mapping[str, object]
+) -> spawn_tables.AliasTable[str]:
+    table = _special_drop_tables.get(monster_type)
+    if table is None:
+        entries: Sequence[Tuple[str, float]] = config.get("items", ())
+        weighted_entries = [
+            (key, float(weight))
+            for key, weight in entries
+            if weight > 0 and _ITEM_REGISTRY.get(key)
+        ]
+        table = spawn_tables.AliasTable(
+            [key for key, _ in weighted_entries],
+            [weight for _, weight in weighted_entries],
+        )
+        _special_drop_tables[monster_type] = table
+    return table
+
+
 def roll_special_drop(monster_type: str) -> Optional[List[Item]]:
     """Return a list of extra loot items configured for the given creature."""
     config = SPECIAL_DROP_TABLES.get(monster_type)
@@ -224,22 +247,7 @@ def roll_special_drop(monster_type: str) -> Optional[List[Item]]:
     chance = max(0.0, min(1.0, chance))
     if chance <= 0 or random.random() > chance:
         return None
-    entries: Sequence[Tuple[str, float]] = config.get("items", ())
-    weighted_entries = [
-        (key, float(weight))
-        for key, weight in entries
-        if weight > 0 and _ITEM_REGISTRY.get(key)
-    ]
-    if not weighted_entries:
-        return None
-    total_weight = sum(weight for _, weight in weighted_entries)
-    if total_weight <= 0:
+    table = _special_drop_table(monster_type, config)
+    if not table:
         return None
-    pick = random.uniform(0, total_weight)
-    cumulative = 0.0
-    for key, weight in weighted_entries:
-        cumulative += weight
-        if pick <= cumulative:
-            item = _ITEM_REGISTRY[key]
-            return _materialize_item(item)
-    return None
+    return _materialize_item(_ITEM_REGISTRY[table.sample()])
@@ -6,6 +6,7 @@
 + Reacting to the player’s input."""
 
 #!/usr/bin/env python3
+import startup  # El primero: con STARTUP_PROFILE=1 mide los imports siguientes.
 import time
 import traceback
 import tcod
@@ -39,12 +40,14 @@ def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
 
 def main() -> None:
 
+    startup.mark("imports")
     screen_width = settings.SCREEN_WIDTH
     screen_height = settings.SCREEN_HEIGHT
 
     tileset = settings.tileset  
 
     handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
+    startup.mark("main menu")
 
     window_flags = 0
     if getattr(settings, "FULLSCREEN", False):
@@ -110,6 +113,7 @@ def main() -> None:
     ) as context:
         #root_console = tcod.Console(screen_width, screen_height, order="F")   # DEPRECATED
         root_console = tcod.console.Console(screen_width, screen_height, order="F")
+        startup.mark("window")
         try:
             while True:
                 root_console.clear()
@@ -119,8 +123,16 @@ def main() -> None:
                     engine.bind_display(context, root_console)
                     engine.play_intro_if_ready()
                     root_console.clear()
+                # El overlay de rendimiento (F3) también mide el dibujado del frame.
+                profiler = getattr(engine, "profiler", None) if engine else None
+                timing = bool(profiler and getattr(profiler, "overlay", False))
+                if timing:
+                    render_start = time.perf_counter()
                 handler.on_render(console=root_console)
+                if timing:
+                    profiler.record_frame(time.perf_counter() - render_start)
                 context.present(root_console)
+                startup.first_frame()
                 if engine:
                     engine.play_queued_animations(context, root_console)
 
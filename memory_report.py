@@ -0,0 +1,417 @@
+"""Memory accounting of a run: per floor, entity class, component and container.
+
+Una partida larga tiene residentes todas las plantas de `GameWorld.levels` y
+`branches` con sus tiles, arrays de visibilidad, entidades, diccionarios de
+salas (`room_center_by_tile` guarda una tupla por casilla) y cachés de la IA,
+y no había forma de saber qué parte pesaba más.
+
+- `measure(engine)` recorre el grafo de objetos de la partida y reparte los
+  bytes (`sys.getsizeof` de cada objeto alcanzable, contado una sola vez) por
+  planta, por clase de entidad, por tipo de componente y por contenedor:
+  tiles, visibilidad, salas, cachés de rutas, entidades, registro de
+  mensajes... Las plantas de una partida cargada en modo perezoso que aún no
+  se han tocado se cuentan por el tamaño de su blob comprimido, sin
+  materializarlas.
+- `snapshot(engine)` añade a eso, si `tracemalloc` está activo, la memoria
+  reservada por cada fichero de código; `diff(antes, después)` compara dos
+  instantáneas.
+- Desde la consola de depuración, `memory_report.debug(self.engine)` imprime
+  el informe y la diferencia con la llamada anterior (la primera activa
+  `tracemalloc`).
+- `python memory_report.py` genera una partida con `tracemalloc` activo,
+  juega unos turnos con un bot y muestra el informe y la diferencia.
+- La suite de `benchmarks` añade `measure()` de su partida a los resultados
+  y `python -m benchmarks compare` avisa también si la memoria crece.
+"""
+
+from __future__ import annotations
+
+import sys
+import tracemalloc
+import types
+import weakref
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np  # type: ignore
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+FORMAT_VERSION = 1
+TOP_ALLOCATIONS = 15
+
+# Lo que no es estado de la partida: código y referencias débiles.
+_SKIPPED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    weakref.ref,
+)
+# Contenedores de una planta, en el orden en que se les atribuye lo compartido.
+CONTAINERS = ("path caches", "tiles", "visibility", "rooms", "entities", "other")
+_VISIBILITY_ATTRIBUTES = ("visible", "explored")
+
+_slot_names: Dict[type, Tuple[str, ...]] = {}
+
+
+def _slots_of(cls: type) -> Tuple[str, ...]:
+    names = _slot_names.get(cls)
+    if names is None:
+        collected: List[str] = []
+        for klass in cls.__mro__:
+            slots = klass.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            collected.extend(name for name in slots if name not in ("__dict__", "__weakref__"))
+        names = _slot_names[cls] = tuple(collected)
+    return names
+
+
+def _referents(obj: Any) -> Iterable[Any]:
+    if isinstance(obj, dict):
+        yield from obj.keys()
+        yield from obj.values()
+        return
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        yield from obj
+        return
+    # Sin `getattr(obj, "__dict__")`: dispararía la carga de una planta perezosa.
+    try:
+        attributes = object.__getattribute__(obj, "__dict__")
+    except AttributeError:
+        attributes = None
+    if attributes:
+        yield attributes
+    for name in _slots_of(type(obj)):
+        try:
+            yield object.__getattribute__(obj, name)
+        except AttributeError:
+            pass
+
+
+def deep_size(root: Any, seen: Set[int]) -> int:
+    """Bytes of `root` and of everything it reaches that is not in `seen` (which grows)."""
+    size = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, _SKIPPED_TYPES):
+            continue
+        size += sys.getsizeof(obj, 0)
+        # `getsizeof` de un ndarray ya incluye sus datos si son suyos.
+        if isinstance(obj, (np.ndarray, str, bytes, int, float)):
+            continue
+        stack.extend(_referents(obj))
+    return size
+
+
+def _attributes(obj: Any) -> Dict[str, Any]:
+    try:
+        return dict(object.__getattribute__(obj, "__dict__"))
+    except AttributeError:
+        return {}
+
+
+def _is_component(value: Any) -> bool:
+    from components.ai import BaseAI
+    from components.base_component import BaseComponent
+
+    return isinstance(value, (BaseComponent, BaseAI))
+
+
+def _add(table: Dict[str, Dict[str, int]], key: str, size: int, count: int = 1) -> None:
+    entry = table.setdefault(key, {"count": 0, "bytes": 0})
+    entry["count"] += count
+    entry["bytes"] += size
+
+
+def _measure_entity(
+    entity: Any,
+    seen: Set[int],
+    entity_classes: Dict[str, Dict[str, int]],
+    components: Dict[str, Dict[str, int]],
+) -> int:
+    # Los componentes primero, sin volver a la entidad por su `parent`.
+    seen.add(id(entity))
+    size = sys.getsizeof(entity)
+    values = list(_referents(entity))
+    for value in values:
+        if isinstance(value, dict):
+            candidates = list(value.values())
+        else:
+            candidates = [value]
+        for candidate in candidates:
+            if _is_component(candidate) and id(candidate) not in seen:
+                component_size = deep_size(candidate, seen)
+                _add(components, type(candidate).__name__, component_size)
+                size += component_size
+    for value in values:
+        size += deep_size(value, seen)
+    _add(entity_classes, type(entity).__name__, size)
+    return size
+
+
+def _measure_floor(
+    game_map: GameMap,
+    seen: Set[int],
+    entity_classes: Dict[str, Dict[str, int]],
+    components: Dict[str, Dict[str, int]],
+) -> Dict[str, Any]:
+    import save_archive
+
+    seen.add(id(game_map))
+    if save_archive.is_pending(game_map):
+        state = save_archive._pending_state(game_map)
+        seen.update((id(state), id(state.blob)))
+        blob = state.blob
+        return {"total": len(blob.data), "pending": True, "entities": 0, "containers": {}}
+    attributes = _attributes(game_map)
+    containers = dict.fromkeys(CONTAINERS, 0)
+    entities = attributes.pop("entities", ())
+    for entity in entities:
+        ai = _attributes(entity).get("ai")
+        cache = _attributes(ai).get("_path_cache") if ai is not None else None
+        if cache is not None:
+            containers["path caches"] += deep_size(cache, seen)
+    containers["tiles"] += deep_size(attributes.pop("tiles", None), seen)
+    for name in _VISIBILITY_ATTRIBUTES:
+        containers["visibility"] += deep_size(attributes.pop(name, None), seen)
+    for name in [name for name in attributes if "room" in name]:
+        containers["rooms"] += deep_size(attributes.pop(name), seen)
+    containers["entities"] += sys.getsizeof(entities)
+    for entity in entities:
+        containers["entities"] += _measure_entity(entity, seen, entity_classes, components)
+    containers["other"] += sys.getsizeof(object.__getattribute__(game_map, "__dict__"))
+    containers["other"] += sum(deep_size(value, seen) for value in attributes.values())
+    containers["other"] += sys.getsizeof(game_map)
+    return {
+        "total": sum(containers.values()),
+        "pending": False,
+        "entities": len(entities),
+        "containers": containers,
+    }
+
+
+def measure(engine: Engine) -> Dict[str, Any]:
+    """Structural sizes of `engine` (see the module docstring); JSON-serializable."""
+    import save_archive
+
+    maps = save_archive.world_maps(engine)
+    # Nada se atribuye a una planta por llegar a ella desde otra (escaleras, `parent`...).
+    seen: Set[int] = {id(engine), id(getattr(engine, "game_world", None))}
+    seen.update(id(game_map) for game_map in maps.values())
+    entity_classes: Dict[str, Dict[str, int]] = {}
+    components: Dict[str, Dict[str, int]] = {}
+    floors: Dict[str, Dict[str, Any]] = {}
+    for label, game_map in maps.items():
+        floors[label] = _measure_floor(game_map, seen, entity_classes, components)
+
+    containers: Dict[str, int] = Counter()
+    for floor in floors.values():
+        containers.update(floor["containers"])
+        if floor["pending"]:
+            containers["pending floors"] += floor["total"]
+    engine_attributes = _attributes(engine)
+    containers["message log"] = deep_size(engine_attributes.pop("message_log", None), seen)
+    player = engine_attributes.pop("player", None)
+    if player is not None and id(player) not in seen:
+        containers["player"] = _measure_entity(player, seen, entity_classes, components)
+    world_attributes = _attributes(engine_attributes.pop("game_world", None))
+    containers["world"] = sum(deep_size(value, seen) for value in world_attributes.values())
+    containers["engine"] = sum(deep_size(value, seen) for value in engine_attributes.values())
+    return {
+        "format": FORMAT_VERSION,
+        "total": sum(containers.values()),
+        "floors": floors,
+        "containers": dict(containers),
+        "entity_classes": entity_classes,
+        "components": components,
+    }
+
+
+@dataclass
+class MemorySnapshot:
+    structure: Dict[str, Any]
+    # Sólo si tracemalloc estaba activo.
+    traced: Optional[tracemalloc.Snapshot] = None
+    traced_current: int = 0
+    traced_peak: int = 0
+
+    def as_dict(self, top: int = TOP_ALLOCATIONS) -> Dict[str, Any]:
+        data = dict(self.structure)
+        if self.traced is not None:
+            data["traced"] = {
+                "current": self.traced_current,
+                "peak": self.traced_peak,
+                "top": [
+                    {"file": stat.traceback[0].filename, "bytes": stat.size, "blocks": stat.count}
+                    for stat in self.traced.statistics("filename")[:top]
+                ],
+            }
+        return data
+
+
+def snapshot(engine: Engine) -> MemorySnapshot:
+    """Structural sizes plus, when tracing, the tracemalloc snapshot."""
+    structure = measure(engine)
+    if not tracemalloc.is_tracing():
+        return MemorySnapshot(structure)
+    current, peak = tracemalloc.get_traced_memory()
+    traced = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+    return MemorySnapshot(structure, traced, current, peak)
+
+
+def flatten(structure: Dict[str, Any]) -> Dict[str, int]:
+    """{"floor M-3": bytes, "container tiles": bytes, ...}, for diffs and `benchmarks.compare`."""
+    flat = {"total": structure["total"]}
+    for label, floor in structure["floors"].items():
+        flat[f"floor {label}"] = floor["total"]
+    for name, size in structure["containers"].items():
+        flat[f"container {name}"] = size
+    for group, prefix in (("entity_classes", "entity"), ("components", "component")):
+        for name, entry in structure[group].items():
+            flat[f"{prefix} {name}"] = entry["bytes"]
+    return flat
+
+
+def diff(before: MemorySnapshot, after: MemorySnapshot, top: int = TOP_ALLOCATIONS) -> Dict[str, Any]:
+    """Byte changes of every structural entry and, if both traced, of the top source files."""
+    old = flatten(before.structure)
+    new = flatten(after.structure)
+    changes = {
+        key: new.get(key, 0) - old.get(key, 0)
+        for key in list(old) + [key for key in new if key not in old]
+        if new.get(key, 0) != old.get(key, 0)
+    }
+    result: Dict[str, Any] = {"structure": changes}
+    if before.traced is not None and after.traced is not None:
+        result["traced"] = [
+            {"file": stat.traceback[0].filename, "bytes": stat.size_diff, "blocks": stat.count_diff}
+            for stat in after.traced.compare_to(before.traced, "filename")[:top]
+            if stat.size_diff
+        ]
+    return result
+
+
+def _kib(size: float) -> str:
+    return f"{size / 1024:9.1f} KiB"
+
+
+def report(shot: MemorySnapshot, top: int = 12) -> str:
+    structure = shot.structure
+    lines = [f"Memory report: {_kib(structure['total']).strip()} reachable from the engine"]
+    lines.append("  by container")
+    for name, size in sorted(structure["containers"].items(), key=lambda item: -item[1]):
+        lines.append(f"    {name:24} {_kib(size)}")
+    lines.append("  by floor                          entities")
+    for label, floor in structure["floors"].items():
+        note = "  (compressed, not loaded)" if floor["pending"] else ""
+        lines.append(f"    {label:24} {_kib(floor['total'])} {floor['entities']:6d}{note}")
+    for title, group in (("by entity class", "entity_classes"), ("by component", "components")):
+        lines.append(f"  {title:32}  count")
+        entries = sorted(structure[group].items(), key=lambda item: -item[1]["bytes"])[:top]
+        for name, entry in entries:
+            lines.append(f"    {name:24} {_kib(entry['bytes'])} {entry['count']:6d}")
+    if shot.traced is not None:
+        lines.append(f"  tracemalloc: {_kib(shot.traced_current).strip()} now, {_kib(shot.traced_peak).strip()} peak")
+        for stat in shot.traced.statistics("filename")[:top]:
+            lines.append(f"    {_kib(stat.size)}  {stat.traceback[0].filename}")
+    return "\n".join(lines)
+
+
+def diff_report(changes: Dict[str, Any], top: int = 20) -> str:
+    lines = ["Memory diff (after - before)"]
+    structure = sorted(changes["structure"].items(), key=lambda item: -abs(item[1]))[:top]
+    for key, delta in structure:
+        lines.append(f"    {key:40} {delta / 1024:+9.1f} KiB")
+    for entry in changes.get("traced", [])[:top]:
+        lines.append(f"    {entry['bytes'] / 1024:+9.1f} KiB  {entry['file']}")
+    return "\n".join(lines)
+
+
+_last_debug_snapshot: Optional[MemorySnapshot] = None
+
+
+def debug(engine: Engine) -> MemorySnapshot:
+    """Print the report and the diff with the previous call (for the debug console)."""
+    global _last_debug_snapshot
+    if not tracemalloc.is_tracing():
+        # Sólo ve lo reservado a partir de aquí: la diferencia con la siguiente llamada.
+        tracemalloc.start()
+    shot = snapshot(engine)
+    print(report(shot))
+    if _last_debug_snapshot is not None:
+        print(diff_report(diff(_last_debug_snapshot, shot)))
+    _last_debug_snapshot = shot
+    return shot
+
+
+def _play(engine: Engine, turns: int) -> None:
+    """Wander with a bot for `turns` turns (same bot as `replay.record_bot`)."""
+    import random
+
+    import actions
+    import input_handlers
+    import replay
+    import seeding
+
+    for name, value in replay.BOT_PLAYER.items():
+        setattr(engine.player.fighter, name, value)
+    handler = input_handlers.MainGameEventHandler(engine)
+    bot = random.Random(seeding.derive(seeding.run_seed, "bot"))
+    player = engine.player
+    target = engine.turn + turns
+    while engine.turn < target and player.is_alive:
+        dx, dy = bot.choice(input_handlers.ADJACENT_DELTAS)
+        handler.handle_action(actions.BumpAction(player, dx, dy))
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import json
+    import os
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=None, help="run seed (default: GAME_SEED)")
+    parser.add_argument("--turns", type=int, default=500, help="turns played between the two snapshots")
+    parser.add_argument("--load", help="measure this save file instead of a new run")
+    parser.add_argument("--json", help="also write both snapshots and the diff here")
+    parser.add_argument("--no-trace", action="store_true", help="structural sizes only (faster)")
+    args = parser.parse_args()
+
+    if not args.no_trace:
+        tracemalloc.start()
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import settings
+
+    settings.AUTOSAVE_ENABLED = False
+    settings.LOG_ECHO_TO_STDOUT = False
+    settings.REPLAY_RECORDING = False
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import setup_game
+
+        game = setup_game.load_game(args.load) if args.load else setup_game.new_game(seed=args.seed)
+        first = snapshot(game)
+        _play(game, args.turns)
+        second = snapshot(game)
+    changes = diff(first, second)
+    print(report(second))
+    print(diff_report(changes))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(
+                {"before": first.as_dict(), "after": second.as_dict(), "diff": changes},
+                output,
+                indent=2,
+            )
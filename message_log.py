@@ -6,9 +6,12 @@ import tcod
 
 import color
 import settings
+from slotted import Slotted
 
 
-class Message:
+class Message(Slotted):
+    __slots__ = ("plain_text", "fg", "prefix", "prefix_fg", "prefix_colors", "count")
+
     def __init__(
         self,
         text: str,
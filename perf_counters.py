@@ -0,0 +1,35 @@
+"""Hit/miss counters of the per-turn caches, shown by the performance overlay.
+
+Los contadores son enteros que se suman siempre (cuesta lo mismo que mirar
+si el overlay está activo); `TurnProfiler.end_turn` los recoge y los pone a
+cero al final de cada turno sólo mientras está midiendo.
+
+- `fov`: máscaras de luz y línea de visión de `lighting`, y el mapa de oído
+  del jugador (`Engine._hearing_map`).
+- `path`: rutas de la IA reutilizadas de `BaseAI._path_cache` frente a las
+  recalculadas (BFS o A*).
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+
+class CacheCounter:
+    __slots__ = ("hits", "misses")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def take(self) -> Tuple[int, int]:
+        """Return `(hits, misses)` since the last call and start counting again."""
+        counts = (self.hits, self.misses)
+        self.hits = self.misses = 0
+        return counts
+
+
+fov = CacheCounter()
+path = CacheCounter()
+
+CACHES = {"fov": fov, "path": path}
@@ -3,7 +3,6 @@ from typing import Any, Dict, Iterator, List, Tuple, TYPE_CHECKING, Optional, Se
 from collections import Counter, defaultdict, deque
 from dataclasses import dataclass
 import heapq
-import copy
 from game_map import GameMap, GameMapTown
 import tile_types
 import random
@@ -15,6 +14,9 @@ import uniques
 import settings
 from entity import TableContainer, BookShelfContainer
 import loot_tables
+import prototypes
+import seeding
+import spawn_tables
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -52,12 +54,29 @@ def is_unique_room_used(name: str) -> bool:
     return name in _unique_rooms_used
 
 
+def get_used_unique_rooms() -> Set[str]:
+    return set(_unique_rooms_used)
+
+
+# Plan de salas únicas para la generación en paralelo: el proceso padre decide
+# de antemano qué sala única puede salir en cada planta. None = tirada normal.
+_unique_room_plan: Optional[Set[str]] = None
+
+
+def set_unique_room_plan(names: Optional[Set[str]]) -> None:
+    global _unique_room_plan
+    _unique_room_plan = set(names) if names is not None else None
+
+
 def _get_unique_room_class(name: str):
     return getattr(fixed_rooms, "UNIQUE_ROOMS", {}).get(name)
 
 # Escombros máximos por planta
 max_debris_by_floor = settings.MAX_DEBRIS_BY_FLOOR
 
+# Tiradas al importar con la semilla del proceso (ver seeding).
+seeding.seed_module(__name__)
+
 # Items máximos por habitación
 # Nivel mazmorra | nº items
 treasure_floor = random.randint(5,9)
@@ -217,6 +236,48 @@ class GenerationTracker:
             self._procedural_totals[cat].clear()
             self._procedural_per_floor[cat].clear()
 
+    def preload_procedural_total(self, category: str, key: str, count: int) -> None:
+        """Start a procedural total at `count` without attributing it to any floor.
+
+        Se usa en los procesos de generación en paralelo para repartir los cupos
+        de max_instances: una planta sin cupo arranca con el contador en el tope.
+        """
+        if category in self._procedural_totals:
+            self._procedural_totals[category][key] = count
+
+    def export_floor_counts(self) -> Dict[str, Dict[str, Dict[Union[int, str], Dict[str, int]]]]:
+        """Return the per-floor counters in a picklable form (see merge_floor_counts)."""
+        return {
+            "all": {
+                cat: {floor: dict(counter) for floor, counter in self._per_floor[cat].items()}
+                for cat in self._categories
+            },
+            "procedural": {
+                cat: {
+                    floor: dict(counter)
+                    for floor, counter in self._procedural_per_floor[cat].items()
+                }
+                for cat in self._categories
+            },
+        }
+
+    def merge_floor_counts(
+        self, data: Dict[str, Dict[str, Dict[Union[int, str], Dict[str, int]]]]
+    ) -> None:
+        """Add counters exported by another tracker (e.g. a generation worker)."""
+        for cat, floors in data.get("all", {}).items():
+            if cat not in self._totals:
+                continue
+            for floor, counts in floors.items():
+                self._per_floor[cat][floor].update(counts)
+                self._totals[cat].update(counts)
+        for cat, floors in data.get("procedural", {}).items():
+            if cat not in self._procedural_totals:
+                continue
+            for floor, counts in floors.items():
+                self._procedural_per_floor[cat][floor].update(counts)
+                self._procedural_totals[cat].update(counts)
+
 
 generation_tracker = GenerationTracker()
 
@@ -267,6 +328,30 @@ debris_chances = _resolve_entity_table(settings.DEBRIS_CHANCES)
 cavern_monster_count_by_floor = settings.CAVERN_MONSTER_COUNT_BY_FLOOR
 cavern_item_count_by_floor = settings.CAVERN_ITEM_COUNT_BY_FLOOR
 
+def procedural_spawn_caps() -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """Return {(category, key): (max_instances, min_floor)} for every capped spawn rule."""
+    caps: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    rule_sets = (
+        ("items", item_spawn_rules),
+        ("monsters", enemy_spawn_rules),
+        ("monsters", cavern_monster_spawn_rules),
+        ("items", cavern_item_spawn_rules),
+    )
+    for category, rules in rule_sets:
+        for name, entry in rules.items():
+            max_instances = entry.get("max_instances")
+            if max_instances is None:
+                continue
+            cap = int(max_instances)
+            min_floor = int(entry.get("min_floor", 1))
+            previous = caps.get((category, name))
+            if previous:
+                cap = min(cap, previous[0])
+                min_floor = min(min_floor, previous[1])
+            caps[(category, name)] = (cap, min_floor)
+    return caps
+
+
 def _get_max_instances_for_item(key: str) -> Optional[int]:
     entry = item_spawn_rules.get(key)
     if not entry:
@@ -332,8 +417,14 @@ def _compute_target_min_instances(entry: Dict) -> Optional[int]:
     return target
 
 
-def _eligible_levels_for_rule(levels: List[GameMap], min_floor: int) -> List[Tuple[int, GameMap]]:
-    return [(idx + 1, level) for idx, level in enumerate(levels) if (idx + 1) >= min_floor]
+def _eligible_levels_for_rule(
+    levels: List[GameMap], min_floor: int, first_floor: int = 1
+) -> List[Tuple[int, GameMap]]:
+    return [
+        (idx + first_floor, level)
+        for idx, level in enumerate(levels)
+        if (idx + first_floor) >= min_floor
+    ]
 
 
 def _force_min_instances(
@@ -343,9 +434,10 @@ def _force_min_instances(
     missing: int,
     *,
     source: str,
+    first_floor: int = 1,
 ) -> None:
     min_floor = entry.get("min_floor", 1)
-    candidates = _eligible_levels_for_rule(levels, min_floor)
+    candidates = _eligible_levels_for_rule(levels, min_floor, first_floor)
     if not candidates:
         if settings.DEBUG_MODE and __debug__:
             print(f"DEBUG: Sin niveles elegibles para min_instances de {entry.get('name')}")
@@ -398,22 +490,63 @@ def enforce_minimum_spawns(levels: List[GameMap]) -> None:
             )
 
 
-def _compute_rule_weight(entry: Dict, floor: int) -> float:
-    min_floor = entry.get("min_floor", 1)
-    if floor < min_floor:
-        return 0.0
-    weight = float(entry.get("base_weight", 0))
-    progression = entry.get("weight_progression")
-    if progression:
-        for threshold, value in progression:
-            if floor >= threshold:
-                weight = float(value)
-            else:
-                break
-    else:
-        growth = float(entry.get("weight_per_floor", 0))
-        weight += growth * max(0, floor - min_floor)
-    return max(0.0, weight)
+def plan_minimum_spawns(floors: List[int]) -> Dict[int, Dict[Tuple[str, str], int]]:
+    """Spread the min_instances guarantees over `floors` ahead of time (lazy worlds).
+
+    Cada instancia garantizada se asigna a una planta al azar, como hace
+    enforce_minimum_spawns. Devuelve, por planta, el total procedural que cada
+    regla debe haber alcanzado una vez generada esa planta.
+    """
+    plan: Dict[int, Dict[Tuple[str, str], int]] = defaultdict(dict)
+    categories = [
+        ("items", item_spawn_rules),
+        ("monsters", enemy_spawn_rules),
+    ]
+    for category, rules in categories:
+        for name, entry in rules.items():
+            target = _compute_target_min_instances(entry)
+            if target is None or target <= 0:
+                continue
+            candidates = [floor for floor in floors if floor >= entry.get("min_floor", 1)]
+            if not candidates:
+                continue
+            slots = sorted(random.choice(candidates) for _ in range(target))
+            for required, floor in enumerate(slots, start=1):
+                plan[floor][(category, name)] = required
+    return dict(plan)
+
+
+def enforce_minimum_spawns_on_floor(
+    game_map: GameMap, floor: int, required: Dict[Tuple[str, str], int]
+) -> None:
+    """Top up the planned min_instances totals on a freshly generated floor."""
+    rules_by_category = {"items": item_spawn_rules, "monsters": enemy_spawn_rules}
+    for (category, name), required_total in required.items():
+        entry = rules_by_category.get(category, {}).get(name)
+        if not entry:
+            continue
+        current = generation_tracker.get_total(category, name, procedural_only=True)
+        missing = max(0, required_total - current)
+        if missing <= 0:
+            continue
+        _force_min_instances(
+            entry,
+            category,
+            [game_map],
+            missing,
+            source="min_instances_enforcer",
+            first_floor=floor,
+        )
+
+
+def _procedural_totals(category: Optional[str]):
+    if not category:
+        return None
+
+    def _total(name: str) -> int:
+        return generation_tracker.get_total(category, name, procedural_only=True)
+
+    return _total
 
 
 def _select_spawn_entries(
@@ -422,32 +555,10 @@ def _select_spawn_entries(
     floor: int,
     category: str,
 ) -> List[Dict]:
-    selections: List[Dict] = []
-    pending_counts: Counter = Counter()
-    for _ in range(number_of_entities):
-        candidates: List[Dict] = []
-        weights: List[float] = []
-        for entry in rules.values():
-            if floor < entry.get("min_floor", 1):
-                continue
-            max_instances = entry.get("max_instances")
-            current_total = generation_tracker.get_total(
-                category, entry["name"], procedural_only=True
-            )
-            current_total += pending_counts.get(entry["name"], 0)
-            if max_instances is not None and current_total >= max_instances:
-                continue
-            weight = _compute_rule_weight(entry, floor)
-            if weight <= 0:
-                continue
-            candidates.append(entry)
-            weights.append(weight)
-        if not candidates:
-            break
-        choice = random.choices(candidates, weights=weights, k=1)[0]
-        selections.append(choice)
-        pending_counts[choice["name"]] += 1
-    return selections
+    # Tabla compilada por planta; sólo se recompila al agotarse un max_instances.
+    return spawn_tables.rule_table(rules, floor).select(
+        number_of_entities, _procedural_totals(category)
+    )
 
 
 def _select_weighted_spawn_entries(
@@ -456,33 +567,9 @@ def _select_weighted_spawn_entries(
     floor: int,
     category: Optional[str] = None,
 ) -> List[Dict]:
-    selections: List[Dict] = []
-    pending_counts: Counter = Counter()
-    for _ in range(number_of_entities):
-        candidates: List[Dict] = []
-        weights: List[float] = []
-        for entry in rules.values():
-            if floor < entry.get("min_floor", 1):
-                continue
-            max_instances = entry.get("max_instances")
-            current_total = pending_counts.get(entry["name"], 0)
-            if category:
-                current_total += generation_tracker.get_total(
-                    category, entry["name"], procedural_only=True
-                )
-            if max_instances is not None and current_total >= max_instances:
-                continue
-            weight = _compute_rule_weight(entry, floor)
-            if weight <= 0:
-                continue
-            candidates.append(entry)
-            weights.append(weight)
-        if not candidates:
-            break
-        choice = random.choices(candidates, weights=weights, k=1)[0]
-        selections.append(choice)
-        pending_counts[choice["name"]] += 1
-    return selections
+    return spawn_tables.rule_table(rules, floor).select(
+        number_of_entities, _procedural_totals(category)
+    )
 
 
 def get_max_value_for_floor(
@@ -514,26 +601,8 @@ def get_entities_at_random(
     number_of_entities: int,
     floor: int,
 ) -> List[Entity]:
-    entity_weighted_chances = {}
-
-    for key, values in weighted_chances_by_floor.items():
-        if key > floor:
-            break
-        else:
-            for value in values:
-                entity = value[0]
-                weighted_chance = value[1]
-
-                entity_weighted_chances[entity] = weighted_chance
-
-    entities = list(entity_weighted_chances.keys())
-    entity_weighted_chance_values = list(entity_weighted_chances.values())
-
-    chosen_entities = random.choices(
-        entities, weights=entity_weighted_chance_values, k=number_of_entities
-    )
-
-    return chosen_entities
+    table = spawn_tables.floor_table(weighted_chances_by_floor, floor)
+    return table.sample_many(number_of_entities)
 
 
 def choose_room_shape(width: int, height: int) -> str:
@@ -998,10 +1067,9 @@ def _is_traversable_for_hot_path(
         return False
     if dungeon.tiles["walkable"][x, y]:
         return True
-    tile = dungeon.tiles[x, y]
-    if np.array_equal(tile, tile_types.closed_door):
+    if dungeon.tiles.is_tile(x, y, tile_types.closed_door):
         return True
-    if np.array_equal(tile, tile_types.breakable_wall):
+    if dungeon.tiles.is_tile(x, y, tile_types.breakable_wall):
         return True
     blocking = dungeon.get_blocking_entity_at_location(x, y)
     if blocking:
@@ -1023,10 +1091,9 @@ def _build_hot_path_cost(
 
     for x in range(dungeon.width):
         for y in range(dungeon.height):
-            tile = dungeon.tiles[x, y]
-            if np.array_equal(tile, tile_types.closed_door):
+            if dungeon.tiles.is_tile(x, y, tile_types.closed_door):
                 cost[x, y] = 2  # transitable, un poco peor que suelo
-            elif np.array_equal(tile, tile_types.breakable_wall):
+            elif dungeon.tiles.is_tile(x, y, tile_types.breakable_wall):
                 cost[x, y] = 3  # transitable potencialmente, peor aún
 
     for entity in dungeon.entities:
@@ -1107,10 +1174,9 @@ def _is_valid_hot_path_step(dungeon: GameMap, x: int, y: int) -> bool:
         return False
     if dungeon.tiles["walkable"][x, y]:
         return True
-    tile = dungeon.tiles[x, y]
-    if np.array_equal(tile, tile_types.closed_door):
+    if dungeon.tiles.is_tile(x, y, tile_types.closed_door):
         return True
-    if np.array_equal(tile, tile_types.breakable_wall):
+    if dungeon.tiles.is_tile(x, y, tile_types.breakable_wall):
         return True
     return False
 
@@ -1232,8 +1298,7 @@ def _get_door_entity_at(dungeon: GameMap, x: int, y: int):
 
 
 def _is_locked_door(dungeon: GameMap, x: int, y: int) -> bool:
-    tile = dungeon.tiles[x, y]
-    if not np.array_equal(tile, tile_types.closed_door):
+    if not dungeon.tiles.is_tile(x, y, tile_types.closed_door):
         # Si el tile no es puerta cerrada, asumimos que no bloquea por cerradura.
         return False
     ent = _get_door_entity_at(dungeon, x, y)
@@ -1255,10 +1320,9 @@ def _is_traversable_for_green_zone(dungeon: GameMap, x: int, y: int) -> bool:
         return False
     if dungeon.tiles["walkable"][x, y]:
         return True
-    tile = dungeon.tiles[x, y]
-    if np.array_equal(tile, tile_types.closed_door):
+    if dungeon.tiles.is_tile(x, y, tile_types.closed_door):
         return True
-    if np.array_equal(tile, tile_types.breakable_wall):
+    if dungeon.tiles.is_tile(x, y, tile_types.breakable_wall):
         return True
     blocking = dungeon.get_blocking_entity_at_location(x, y)
     if blocking:
@@ -1309,8 +1373,9 @@ def _draw_green_zone(
     for cx, cy in zone:
         if not dungeon.in_bounds(cx, cy):
             continue
-        dungeon.tiles["dark"]["fg"][cx, cy] = dark_color
-        dungeon.tiles["light"]["fg"][cx, cy] = light_color
+        dungeon.tiles[cx, cy] = tile_types.recolor(
+            dungeon.tiles[cx, cy], dark_fg=dark_color, light_fg=light_color
+        )
 
 # BUG: Funciona bastante bien, pero sigue incluyendo algunas casillas intransitables en el
 # camino. Esto ya pasó al intentar programar el movimiento de los adventurers. Al final lo
@@ -1341,8 +1406,9 @@ def _draw_hot_path(
             continue
         if dungeon.is_downstairs_location(x, y):
             continue
-        dungeon.tiles["dark"]["fg"][x, y] = dark_color
-        dungeon.tiles["light"]["fg"][x, y] = light_color
+        dungeon.tiles[x, y] = tile_types.recolor(
+            dungeon.tiles[x, y], dark_fg=dark_color, light_fg=light_color
+        )
 
 
 def _collect_hot_path_coords(
@@ -1786,7 +1852,7 @@ def _place_town_old_man_chest(
         prototype = getattr(entity_factories, key, None)
         if prototype is None:
             continue
-        loot_static.append(copy.deepcopy(prototype))
+        loot_static.append(prototypes.clone(prototype))
 
     loot: List[Entity] = []
     loot.extend(loot_random)
@@ -2032,9 +2098,7 @@ def _build_loot_for_floor(
     count = random.randint(min_items, max_items)
     if count <= 0:
         return []
-    keys = [entry[0] for entry in loot_entries]
-    weights = [float(entry[1]) for entry in loot_entries]
-    chosen_keys = random.choices(keys, weights=weights, k=count)
+    chosen_keys = spawn_tables.weighted_table(loot_entries).sample_many(count)
     loot: List[Entity] = []
     pending_counts: Counter = Counter()
     for key in chosen_keys:
@@ -2551,12 +2615,11 @@ def ensure_path_between(dungeon: GameMap, start: Tuple[int, int], goal: Tuple[in
             return False
         if dungeon.tiles["walkable"][x, y]:
             return True
-        tile = dungeon.tiles[x, y]
         # Consider closed doors passable since the player can open them.
-        if np.array_equal(tile, tile_types.closed_door):
+        if dungeon.tiles.is_tile(x, y, tile_types.closed_door):
             return True
         # Breakable walls can be destroyed, so they count as a viable path blocker.
-        if np.array_equal(tile, tile_types.breakable_wall):
+        if dungeon.tiles.is_tile(x, y, tile_types.breakable_wall):
             return True
         actor = dungeon.get_blocking_entity_at_location(x, y)
         if actor:
@@ -2646,10 +2709,9 @@ def is_tile_traversable_for_path(dungeon: GameMap, x: int, y: int) -> bool:
         return False
     if dungeon.tiles["walkable"][x, y]:
         return True
-    tile = dungeon.tiles[x, y]
-    if np.array_equal(tile, tile_types.closed_door):
+    if dungeon.tiles.is_tile(x, y, tile_types.closed_door):
         return True
-    if np.array_equal(tile, tile_types.breakable_wall):
+    if dungeon.tiles.is_tile(x, y, tile_types.breakable_wall):
         return True
     return False
 
@@ -2677,11 +2739,10 @@ def ensure_breakable_tiles(dungeon: GameMap) -> None:
         if getattr(entity, "name", "").lower() != "suspicious wall":
             continue
         x, y = entity.x, entity.y
-        tile = dungeon.tiles[x, y]
         if (
             dungeon.tiles["walkable"][x, y]
             or dungeon.tiles["transparent"][x, y]
-            or not np.array_equal(tile, tile_types.breakable_wall)
+            or not dungeon.tiles.is_tile(x, y, tile_types.breakable_wall)
         ):
             dungeon.tiles[x, y] = tile_types.breakable_wall
             corrected.append((x, y))
@@ -2716,8 +2777,8 @@ def spawn_door_entity(
     lock_color: Optional[str] = None,
     room_center: Optional[Tuple[int, int]] = None,
 ) -> None:
-    for entity in dungeon.entities:
-        if getattr(entity, "name", "").lower() == "door" and entity.x == x and entity.y == y:
+    for entity in dungeon.doors:
+        if entity.x == x and entity.y == y:
             fighter = getattr(entity, "fighter", None)
             if fighter:
                 if lock_color is not None and hasattr(fighter, "lock_color"):
@@ -2742,16 +2803,14 @@ def spawn_door_entity(
 def _is_wall_like(dungeon: GameMap, x: int, y: int) -> bool:
     if not dungeon.in_bounds(x, y):
         return False
-    tile = dungeon.tiles[x, y]
-    if np.array_equal(tile, tile_types.closed_door) or np.array_equal(tile, tile_types.open_door):
+    if dungeon.tiles.is_tile(x, y, tile_types.closed_door) or dungeon.tiles.is_tile(x, y, tile_types.open_door):
         return False
     return not dungeon.tiles["walkable"][x, y]
 
 
 def _remove_door_entity_at(dungeon: GameMap, x: int, y: int) -> bool:
-    for entity in list(dungeon.entities):
-        name = getattr(entity, "name", "").lower()
-        if name == "door" and entity.x == x and entity.y == y:
+    for entity in dungeon.doors:
+        if entity.x == x and entity.y == y:
             dungeon.entities.discard(entity)
             return True
     return False
@@ -2765,11 +2824,9 @@ def _remove_invalid_fixed_room_doors(
     for x, y in door_coords:
         if not dungeon.in_bounds(x, y):
             continue
-        tile = dungeon.tiles[x, y]
-        tile_is_door = np.array_equal(tile, tile_types.closed_door) or np.array_equal(tile, tile_types.open_door)
+        tile_is_door = dungeon.tiles.is_tile(x, y, tile_types.closed_door) or dungeon.tiles.is_tile(x, y, tile_types.open_door)
         door_entity_present = any(
-            getattr(entity, "name", "").lower() == "door" and entity.x == x and entity.y == y
-            for entity in dungeon.entities
+            entity.x == x and entity.y == y for entity in dungeon.doors
         )
         if not tile_is_door and not door_entity_present:
             continue
@@ -2815,9 +2872,41 @@ def _select_unique_room_template(template_candidate) -> Optional[Tuple[str, ...]
     return None
 
 
+def plan_unique_room(current_floor: int, exclude: Set[str]) -> Optional[str]:
+    """Roll the unique-room chances for a floor ahead of time (parallel generation)."""
+    candidates: List[str] = []
+    for name, rules in UNIQUE_ROOMS_CHANCES.items():
+        if name in exclude or name in _unique_rooms_used:
+            continue
+        chance = 0.0
+        for min_floor, value in rules:
+            if current_floor >= min_floor:
+                chance = value
+        if chance <= 0:
+            continue
+        if random.random() < chance:
+            room_cls = _get_unique_room_class(name)
+            if room_cls and getattr(room_cls, "template", None):
+                candidates.append(name)
+    if candidates:
+        return random.choice(candidates)
+    return None
+
+
 def get_unique_room_choice(
     current_floor: int,
 ) -> Optional[Tuple[str, Tuple[str, ...], bool]]:
+    if _unique_room_plan is not None:
+        for name in sorted(_unique_room_plan):
+            if name in _unique_rooms_used:
+                continue
+            room_cls = _get_unique_room_class(name)
+            template = _select_unique_room_template(
+                getattr(room_cls, "template", None) if room_cls else None
+            )
+            if template:
+                return (name, template, True)
+        return None
     unique_candidates: List[Tuple[str, Tuple[str, ...], bool]] = []
     for name, rules in UNIQUE_ROOMS_CHANCES.items():
         if name in _unique_rooms_used:
@@ -0,0 +1,405 @@
+"""Fast instantiation of the prototypes defined in `entity_factories`.
+
+Los prototipos se clonaban con `copy.deepcopy`, que para cada objeto del
+grafo (entidad, componentes, inventario, equipo, arma natural...) pasa por
+`__reduce_ex__`, reconstruye el estado y consulta el memo atributo a
+atributo. Aquí cada prototipo compila una sola vez su *plan de clonado*:
+qué atributos son configuración inmutable (se copian tal cual con una copia
+superficial del `__dict__`) y cuáles son estado mutable (se clonan de nuevo
+en cada instancia). El resultado es equivalente al de `deepcopy`: mismas
+clases, mismos valores, mismas referencias compartidas dentro del grafo.
+
+Las clases con `clone_immutable = True` son configuración que nunca se
+modifica (p. ej. `NaturalWeapon`) y sus instancias se comparten por
+referencia; las tuplas de átomos (colores, coordenadas) se comparten sin más.
+Las clases con `__deepcopy__` propio (p. ej. `GeneratedBook`) lo conservan.
+Las que heredan de `slotted.Slotted` no tienen `__dict__` que copiar: su plan
+lee todos los atributos de una vez con un `attrgetter` y los asigna al clon.
+Cualquier objeto que no encaje en el camino rápido (`__slots__` sin
+`Slotted`, `__getstate__`/`__reduce__` propios...) se delega en
+`copy.deepcopy` compartiendo el mismo memo.
+
+`python prototypes.py` compara el tiempo de clonado frente a `deepcopy`.
+"""
+
+from __future__ import annotations
+
+import copy
+import enum
+import gc
+import operator
+import types
+import weakref
+from itertools import repeat
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np  # type: ignore
+
+from slotted import Slotted
+
+T = TypeVar("T")
+
+Handler = Callable[[Any, Dict[int, Any]], Any]
+
+# Tipos que deepcopy devuelve sin copiar (o cuya copia es indistinguible).
+_ATOMIC_TYPES = frozenset(
+    {
+        type(None),
+        type(Ellipsis),
+        type(NotImplemented),
+        bool,
+        int,
+        float,
+        complex,
+        str,
+        bytes,
+        range,
+        type,
+        property,
+        weakref.ref,
+        types.FunctionType,
+        types.BuiltinFunctionType,
+        types.CodeType,
+    }
+)
+
+# Límite de planes cacheados; los prototipos reales son unos pocos cientos.
+_MAX_PLANS = 4096
+
+
+def _share(value: Any, memo: Dict[int, Any]) -> Any:
+    return value
+
+
+def _clone_list(value: list, memo: Dict[int, Any]) -> list:
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    new: list = []
+    memo[key] = new
+    append = new.append
+    for item in value:
+        append(_clone(item, memo))
+    return new
+
+
+def _clone_tuple(value: tuple, memo: Dict[int, Any]) -> tuple:
+    # Colores, coordenadas...: tuplas de átomos que deepcopy devuelve tal cual.
+    if all(map(_ATOMIC_TYPES.__contains__, map(type, value))):
+        return value
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    items = [_clone(item, memo) for item in value]
+    # Igual que deepcopy: si ningún elemento cambia se reutiliza la tupla.
+    for original, cloned in zip(value, items):
+        if original is not cloned:
+            break
+    else:
+        return value
+    if key in memo:
+        return memo[key]
+    new = tuple(items)
+    memo[key] = new
+    return new
+
+
+def _clone_dict(value: dict, memo: Dict[int, Any]) -> dict:
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    new: dict = {}
+    memo[key] = new
+    for k, v in value.items():
+        new[_clone(k, memo)] = _clone(v, memo)
+    return new
+
+
+def _clone_set(value: set, memo: Dict[int, Any]) -> set:
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    new = {_clone(item, memo) for item in value}
+    memo[key] = new
+    return new
+
+
+def _clone_custom(value: Any, memo: Dict[int, Any]) -> Any:
+    """Respeta el `__deepcopy__` propio de la clase, como haría deepcopy."""
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    new = value.__deepcopy__(memo)
+    if new is not value:
+        memo[key] = new
+    return new
+
+
+def _clone_fallback(value: Any, memo: Dict[int, Any]) -> Any:
+    return copy.deepcopy(value, memo)
+
+
+class _ClonePlan:
+    """Compiled clone recipe for one prototype object.
+
+    `shared` lista los atributos que la copia superficial del `__dict__` ya
+    deja bien (con el tipo que tenían al compilar, para detectar si el
+    prototipo ha cambiado); `deep` los que hay que clonar en cada instancia.
+    """
+
+    __slots__ = ("cls", "size", "shared", "shared_types", "deep", "setstate")
+
+    def __init__(self, obj: Any) -> None:
+        cls = type(obj)
+        shared = []
+        deep = []
+        for name, value in obj.__dict__.items():
+            if _handler_for(type(value)) is _share:
+                shared.append(name)
+            else:
+                deep.append(name)
+        self.cls = cls
+        self.size = len(obj.__dict__)
+        # itemgetter con un solo nombre no devuelve tupla: se repite el nombre.
+        self.shared = operator.itemgetter(*shared, shared[0]) if shared else None
+        self.shared_types = tuple(type(obj.__dict__[name]) for name in shared)
+        if shared:
+            self.shared_types += self.shared_types[:1]
+        self.deep = tuple(deep)
+        self.setstate = getattr(cls, "__setstate__", None) is not None
+
+    def matches(self, obj: Any) -> bool:
+        state = obj.__dict__
+        if type(obj) is not self.cls or len(state) != self.size:
+            return False
+        if not all(map(state.__contains__, self.deep)):
+            return False
+        if self.shared is None:
+            return True
+        try:
+            return tuple(map(type, self.shared(state))) == self.shared_types
+        except KeyError:
+            return False
+
+
+_plans: Dict[int, _ClonePlan] = {}
+
+
+def _plan_for(obj: Any) -> _ClonePlan:
+    plan = _plans.get(id(obj))
+    if plan is None or not plan.matches(obj):
+        if len(_plans) >= _MAX_PLANS:
+            _plans.clear()
+        plan = _ClonePlan(obj)
+        _plans[id(obj)] = plan
+    return plan
+
+
+def _clone_object(value: Any, memo: Dict[int, Any]) -> Any:
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    plan = _plan_for(value)
+    cls = plan.cls
+    new = cls.__new__(cls)
+    memo[key] = new
+    source = value.__dict__
+    state = source.copy()
+    for name in plan.deep:
+        state[name] = _clone(source[name], memo)
+    if plan.setstate and state:
+        new.__setstate__(state)
+    else:
+        new.__dict__.update(state)
+    return new
+
+
+class _SlotPlan:
+    """Compiled clone recipe for one `Slotted` prototype.
+
+    `names` son los atributos asignados al compilar (slots y desbordamiento),
+    `extra` el tamaño del `__dict__` de desbordamiento y `refs` cuántos
+    objetos referencia la instancia (el tipo, cada slot asignado y el
+    `__dict__`): si el `attrgetter` falla o cambia alguno de los dos números,
+    hay atributos nuevos o borrados y el plan se recompila.
+    """
+
+    __slots__ = ("cls", "names", "getter", "types", "deep", "extra", "refs")
+
+    def __init__(self, obj: Slotted) -> None:
+        cls = type(obj)
+        state = obj.__getstate__()
+        self.cls = cls
+        self.names = tuple(state)
+        # Igual que en `_ClonePlan`: se repite un nombre para obtener siempre una
+        # tupla (el valor repetido sobra al asignar, `map` se para en `names`).
+        self.getter = operator.attrgetter(*self.names, self.names[0]) if state else None
+        self.types = tuple(map(type, state.values()))
+        if state:
+            self.types += self.types[:1]
+        self.deep = tuple(
+            index
+            for index, (name, value) in enumerate(state.items())
+            if _handler_for(type(value)) is not _share
+        )
+        self.extra = len(obj.__dict__)
+        # Después de tocar `__dict__`, que lo crea si aún no existía.
+        self.refs = len(gc.get_referents(obj))
+
+    def values(self, obj: Slotted) -> Optional[Sequence[Any]]:
+        """Current attribute values of `obj`, or None if the plan no longer fits."""
+        if type(obj) is not self.cls or len(obj.__dict__) != self.extra:
+            return None
+        if len(gc.get_referents(obj)) != self.refs:
+            return None
+        if self.getter is None:
+            return ()
+        try:
+            values = self.getter(obj)
+        except AttributeError:
+            return None
+        if tuple(map(type, values)) != self.types:
+            return None
+        return list(values) if self.deep else values
+
+
+_slot_plans: Dict[int, _SlotPlan] = {}
+
+
+def _clone_slotted(value: Slotted, memo: Dict[int, Any]) -> Any:
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    plan = _slot_plans.get(key)
+    values = plan.values(value) if plan is not None else None
+    if values is None:
+        if len(_slot_plans) >= _MAX_PLANS:
+            _slot_plans.clear()
+        plan = _slot_plans[key] = _SlotPlan(value)
+        values = plan.values(value)
+    cls = plan.cls
+    new = cls.__new__(cls)
+    memo[key] = new
+    for index in plan.deep:
+        values[index] = _clone(values[index], memo)
+    # `setattr` en C sobre todos los atributos; sin `state_defaults`, que
+    # sólo hacen falta al cargar partidas antiguas.
+    for _ in map(setattr, repeat(new), plan.names, values):
+        pass
+    return new
+
+
+def _has_slotted_state(cls: type) -> bool:
+    """True si `cls` usa el estado de `Slotted` sin redefinirlo."""
+    return (
+        issubclass(cls, Slotted)
+        and cls.__getstate__ is Slotted.__getstate__
+        and cls.__setstate__ is Slotted.__setstate__
+        and cls.__reduce_ex__ is object.__reduce_ex__
+        and cls.__reduce__ is object.__reduce__
+    )
+
+
+_handlers: Dict[type, Handler] = {
+    list: _clone_list,
+    tuple: _clone_tuple,
+    dict: _clone_dict,
+    set: _clone_set,
+}
+
+
+def _has_default_reduction(cls: type) -> bool:
+    """True si deepcopy reconstruiría `cls` con `__new__` + `__dict__`."""
+    for klass in cls.__mro__[:-1]:
+        # Subclases de tipos nativos (dict, list...) o con __slots__: deepcopy.
+        if klass.__module__ == "builtins" or "__slots__" in vars(klass):
+            return False
+    if cls.__reduce_ex__ is not object.__reduce_ex__:
+        return False
+    if cls.__reduce__ is not object.__reduce__:
+        return False
+    getstate = getattr(cls, "__getstate__", None)
+    if getstate is not None and getstate is not getattr(object, "__getstate__", None):
+        return False
+    return copy._deepcopy_dispatch.get(cls) is None
+
+
+def _handler_for(cls: type) -> Handler:
+    handler = _handlers.get(cls)
+    if handler is not None:
+        return handler
+    if (
+        cls in _ATOMIC_TYPES
+        or issubclass(cls, (type, enum.Enum, np.generic))
+        or getattr(cls, "clone_immutable", False)
+    ):
+        handler = _share
+    elif getattr(cls, "__deepcopy__", None) is not None:
+        handler = _clone_custom
+    elif _has_slotted_state(cls):
+        handler = _clone_slotted
+    elif _has_default_reduction(cls):
+        handler = _clone_object
+    else:
+        handler = _clone_fallback
+    _handlers[cls] = handler
+    return handler
+
+
+def _clone(value: Any, memo: Dict[int, Any]) -> Any:
+    cls = type(value)
+    handler = _handlers.get(cls)
+    if handler is None:
+        handler = _handler_for(cls)
+    return handler(value, memo)
+
+
+def clone(prototype: T) -> T:
+    """Return an independent copy of `prototype`, equivalent to `copy.deepcopy`."""
+    return _clone(prototype, {})
+
+
+def benchmark(repeat: int = 20) -> Dict[str, Tuple[float, float]]:
+    """Time `clone` against `copy.deepcopy` over every prototype in `entity_factories`.
+
+    Devuelve {nombre: (segundos deepcopy, segundos clone)} e incluye un
+    total bajo la clave "*".
+    """
+    import time
+
+    import entity_factories
+    from entity import Entity
+
+    prototypes = {
+        name: value
+        for name, value in vars(entity_factories).items()
+        if isinstance(value, Entity)
+    }
+    results: Dict[str, Tuple[float, float]] = {}
+    total_deep = total_fast = 0.0
+    for name, prototype in prototypes.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            copy.deepcopy(prototype)
+        deep = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(repeat):
+            clone(prototype)
+        fast = time.perf_counter() - start
+        results[name] = (deep, fast)
+        total_deep += deep
+        total_fast += fast
+    results["*"] = (total_deep, total_fast)
+    return results
+
+
+if __name__ == "__main__":
+    timings = benchmark()
+    total_deep, total_fast = timings.pop("*")
+    slowest = sorted(timings.items(), key=lambda entry: entry[1][0], reverse=True)[:10]
+    for name, (deep, fast) in slowest:
+        print(f"{name:30} deepcopy {deep * 1000:8.2f} ms   clone {fast * 1000:8.2f} ms")
+    print(
+        f"{'TOTAL':30} deepcopy {total_deep * 1000:8.2f} ms   clone {total_fast * 1000:8.2f} ms"
+        f"   x{total_deep / max(total_fast, 1e-9):.1f}"
+    )
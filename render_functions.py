@@ -5,6 +5,7 @@ from typing import List, Optional, Tuple, TYPE_CHECKING
 import textwrap
 
 import color
+import settings
 from render_order import RenderOrder
 from entity import Actor
 from i18n import _
@@ -317,6 +318,95 @@ def render_dungeon_level(
     console.print(x=x, y=y, string=f"Level: {dungeon_level}")
 
 
+PERF_OVERLAY_WIDTH = 38
+# Niveles de la gráfica de turnos: dos filas con medio bloque y bloque entero
+# (están tanto en las fuentes TrueType como en los tilesets CP437).
+_SPARK_GLYPHS = (" ", "▄", "█")
+
+
+def _mean_ms(values) -> float:
+    return sum(values) * 1000.0 / len(values) if values else 0.0
+
+
+def _percent(rate: Optional[float]) -> str:
+    return f"{rate * 100:3.0f}%" if rate is not None else "  -"
+
+
+def _sparkline_columns(values: List[float], width: int) -> List[float]:
+    """Squeeze `values` into at most `width` columns keeping the worst turn of each."""
+    if len(values) <= width:
+        return values
+    step = len(values) / width
+    return [max(values[int(i * step):max(int(i * step) + 1, int((i + 1) * step))]) for i in range(width)]
+
+
+def render_perf_overlay(console: Console, engine: Engine) -> None:
+    """Draw the performance overlay (frame, render and turn times, caches, memory)."""
+    profiler = engine.profiler
+    width = min(PERF_OVERLAY_WIDTH, console.width)
+    inner = width - 2
+    budget = float(getattr(settings, "PERF_OVERLAY_BUDGET_MS", 16.0))
+
+    frame_ms = _mean_ms(profiler.frame_times)
+    fps = 1000.0 / frame_ms if frame_ms else 0.0
+    phases = profiler.last_turn
+    turn_ms = sum(phases.values()) * 1000.0
+    p95_ms = profiler._percentile(list(profiler.turn_times), 0.95) * 1000.0
+    game_map = engine.game_map
+    player = engine.player
+    actors = [actor for actor in game_map.actors if actor is not player]
+    thinking = sum(1 for actor in actors if getattr(actor, "ai", None))
+    rss = f"{profiler.rss_bytes / 2**20:.0f} MB" if profiler.rss_bytes else "-"
+
+    def phase(name: str) -> float:
+        return phases.get(name, 0.0) * 1000.0
+
+    lines = [
+        (f"frame {frame_ms:5.1f} ms ({fps:3.0f} fps)", color.white),
+        (f"render {_mean_ms(profiler.render_times):5.1f} ms", color.white),
+        (
+            f"turn {profiler.last_turn_number}: {turn_ms:5.1f} ms  p95 {p95_ms:5.1f}",
+            color.red if turn_ms > budget else color.white,
+        ),
+        (f" player {phase('player_action'):5.1f}  enemies {phase('enemy_turns'):5.1f}", color.white),
+        (f" fov    {phase('fov'):5.1f}  upkeep  {phase('upkeep'):5.1f}", color.white),
+        (f"actors {len(actors)} ({thinking} with AI)", color.white),
+        (
+            f"cache fov {_percent(profiler.cache_hit_rate('fov'))}"
+            f"  path {_percent(profiler.cache_hit_rate('path'))}",
+            color.white,
+        ),
+        (f"heap {profiler.heap_blocks / 1e6:.2f}M blocks  rss {rss}", color.white),
+    ]
+    turn_times = list(profiler.turn_times)
+    columns = _sparkline_columns(turn_times, inner)
+    peak = max(max(columns, default=0.0), 0.001)
+    height = len(lines) + 5
+    x = console.width - width
+    console.draw_frame(
+        x=x,
+        y=0,
+        width=width,
+        height=height,
+        title="Performance (F3)",
+        clear=True,
+        fg=color.white,
+        bg=color.black,
+    )
+    for row, (text, fg) in enumerate(lines, start=1):
+        console.print(x=x + 1, y=row, string=text[:inner], fg=fg, bg=color.black)
+
+    # Gráfica: cuatro medios bloques por columna, escalada al peor turno.
+    top = len(lines) + 1
+    for column, seconds in enumerate(columns):
+        level = max(1, round(seconds / peak * 4)) if seconds > 0 else 0
+        fg = color.red if seconds * 1000.0 > budget else color.green
+        console.print(x=x + 1 + column, y=top, string=_SPARK_GLYPHS[max(0, level - 2)], fg=fg, bg=color.black)
+        console.print(x=x + 1 + column, y=top + 1, string=_SPARK_GLYPHS[min(2, level)], fg=fg, bg=color.black)
+    caption = f"last {len(turn_times)} turns, max {peak * 1000.0:.1f} ms"
+    console.print(x=x + 1, y=top + 2, string=caption[:inner], fg=color.white, bg=color.black)
+
+
 def render_names_at_mouse_location(
     console: Console, x: int, y: int, engine: Engine
 ) -> int:
@@ -385,7 +475,8 @@ def render_names_at_mouse_location_alt(
     #console.print(x=x, y=y, string=names_at_mouse_location)
     
     TITLE = "Examine information"
-    if engine.player.x <= 30:
+    player_x, _ = engine.camera.map_to_screen(engine.player.x, engine.player.y)
+    if player_x <= 30:
         x = 40
     else:
         x = 0
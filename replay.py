@@ -0,0 +1,413 @@
+"""Recording of the player's actions and headless replay of a run.
+
+Con las semillas de `seeding`, una partida nueva queda determinada por
+`(launch_seed, run_seed)` y por las acciones que el jugador manda a
+`EventHandler.handle_action`. Con `REPLAY_RECORDING = True` en `settings`,
+`new_game` engancha un `Recorder` al motor que guarda esas acciones en un
+fichero `.replay.gz` de `REPLAY_DIRECTORY`:
+
+- La primera línea es la cabecera: versión, semillas, los ajustes que
+  cambian la generación (`RECORDED_SETTINGS`) y los atributos del jugador
+  que se cambiaron al empezar (sólo los usa el bot).
+- Cada acción es una línea JSON `["módulo.Clase", {atributo: valor}]`. Las
+  entidades se guardan por su número de creación (`{"e": n}`), que coincide
+  entre ejecuciones con las mismas semillas; las tuplas como `{"t": [...]}`.
+- Cada `CHECK_INTERVAL` acciones, y al cerrar, se añade una comprobación
+  `{"check": resumen, "turn": n}` con un resumen del estado (turno, jugador
+  y entidades de la planta).
+- Las líneas se escriben por bloques, cada uno como un miembro gzip más, así
+  que el fichero vale aunque la partida acabe de golpe.
+
+`python replay.py play FICHERO` reproduce la partida sin ventana ni audio:
+rehace el mundo con las mismas semillas, ejecuta las acciones con
+`handle_action` y compara cada comprobación (una distinta es una
+desincronización y dice el turno). Imprime el tiempo por turno, así que una
+partida grabada sirve también de benchmark repetible.
+
+`python replay.py record FICHERO --turns 2000` graba una partida jugada por
+un bot sencillo (camina al azar, ataca lo que encuentra y descansa con poca
+vida), renderizando cada turno como el juego. Para que llegue vivo a los
+turnos pedidos empieza con la vida y la saciedad de `GOD_MODE` (salvo con
+`--mortal`).
+
+Limitaciones: sólo se reproducen partidas empezadas con `new_game` (las
+cargadas no guardan el estado de los generadores aleatorios), y las
+partidas que no son la primera del proceso pueden arrastrar estado de las
+anteriores (los únicos ya generados de `uniques`).
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import hashlib
+import importlib
+import json
+import numbers
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+import seeding
+
+if TYPE_CHECKING:
+    from actions import Action
+    from engine import Engine
+    from entity import Entity
+
+FORMAT_VERSION = 1
+# Atributos del jugador del bot (los de GOD_MODE en entity_factories).
+BOT_PLAYER = {"max_hp": 999, "hp": 999, "max_satiety": 999, "satiety": 999}
+# Acciones entre comprobaciones del estado.
+CHECK_INTERVAL = 50
+# Líneas que se acumulan antes de escribir un bloque.
+FLUSH_EVERY = 64
+# Ajustes que cambian el mundo generado; la reproducción usa los grabados.
+RECORDED_SETTINGS = (
+    "MAP_WIDTH",
+    "MAP_HEIGHT",
+    "CAVERN_MAP_SIZE",
+    "WORLD_LAZY_GENERATION",
+    "WORLD_GENERATION_PARALLEL",
+    "WORLD_GENERATION_WORKERS",
+)
+
+
+class Desync(Exception):
+    """The replayed run no longer matches the recording."""
+
+
+def state_digest(engine: Engine) -> str:
+    """Short hash of the turn, the player and the entities of the current floor."""
+    digest = hashlib.blake2b(digest_size=8)
+    player = engine.player
+    fighter = getattr(player, "fighter", None)
+    inventory = getattr(player, "inventory", None)
+    digest.update(repr((
+        engine.turn,
+        getattr(engine.game_world, "current_floor", None),
+        player.x,
+        player.y,
+        getattr(fighter, "hp", None),
+        len(getattr(inventory, "items", ())),
+    )).encode())
+    for entity in sorted(engine.game_map.entities, key=hash):
+        fighter = getattr(entity, "fighter", None)
+        digest.update(repr((hash(entity), entity.name, entity.x, entity.y, getattr(fighter, "hp", None))).encode())
+    return digest.hexdigest()
+
+
+# --- Codificación de acciones -----------------------------------------------
+
+def _encode(value: Any) -> Any:
+    from entity import Entity
+
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if isinstance(value, Entity):
+        return {"e": hash(value)}
+    if isinstance(value, tuple):
+        return {"t": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    raise TypeError(f"cannot record a {type(value).__name__}")
+
+
+def encode_action(action: Action) -> List[Any]:
+    cls = type(action)
+    fields = {name: _encode(value) for name, value in vars(action).items()}
+    return [f"{cls.__module__}.{cls.__qualname__}", fields]
+
+
+def _walk(entity: Entity) -> Iterator[Entity]:
+    """`entity` and everything it carries (inventories inside inventories)."""
+    yield entity
+    inventory = getattr(entity, "inventory", None)
+    for item in getattr(inventory, "items", ()):
+        yield from _walk(item)
+
+
+class _EntityIndex:
+    """Finds the entities an action refers to by their creation number."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._index: Optional[Dict[int, Entity]] = None
+
+    def __getitem__(self, serial: int) -> Entity:
+        player = self.engine.player
+        if hash(player) == serial:
+            return player
+        if self._index is None:
+            index = {}
+            for entity in (player, *self.engine.game_map.entities):
+                for found in _walk(entity):
+                    index[hash(found)] = found
+            self._index = index
+        try:
+            return self._index[serial]
+        except KeyError:
+            raise Desync(f"entity #{serial} does not exist") from None
+
+
+def _decode(value: Any, entities: _EntityIndex) -> Any:
+    if isinstance(value, list):
+        return [_decode(item, entities) for item in value]
+    if isinstance(value, dict):
+        if "e" in value:
+            return entities[value["e"]]
+        return tuple(_decode(item, entities) for item in value["t"])
+    return value
+
+
+def decode_action(record: List[Any], engine: Engine) -> Action:
+    path, fields = record
+    module_name, _, class_name = path.rpartition(".")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    # Sin pasar por `__init__`: se restauran los atributos tal cual se grabaron.
+    action = cls.__new__(cls)
+    entities = _EntityIndex(engine)
+    for name, value in fields.items():
+        setattr(action, name, _decode(value, entities))
+    return action
+
+
+# --- Grabación --------------------------------------------------------------
+
+def _dumps(record: Any) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+class Recorder:
+    """Appends the actions the player sends to `handle_action` to a replay file."""
+
+    def __init__(self, engine: Engine, filename: str, *, player: Optional[Dict[str, Any]] = None) -> None:
+        import settings
+
+        self.engine = engine
+        self.filename = filename
+        self.actions = 0
+        self._pending: List[str] = []
+        header = {
+            "version": FORMAT_VERSION,
+            "launch_seed": seeding.launch_seed,
+            "run_seed": seeding.run_seed,
+            "run": seeding.runs_started - 1,
+            "settings": {name: getattr(settings, name, None) for name in RECORDED_SETTINGS},
+            "player": dict(player or {}),
+        }
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with gzip.open(filename, "wt", encoding="utf-8") as replay_file:
+            replay_file.write(_dumps(header))
+        atexit.register(self.close)
+
+    @classmethod
+    def for_run(cls, engine: Engine) -> Recorder:
+        """Recorder writing to a new file in `settings.REPLAY_DIRECTORY`."""
+        import settings
+
+        directory = getattr(settings, "REPLAY_DIRECTORY", "replays")
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return cls(engine, os.path.join(directory, f"run-{seeding.run_seed}-{stamp}.replay.gz"))
+
+    def record(self, action: Action) -> None:
+        try:
+            line = _dumps(encode_action(action))
+        except TypeError as exc:
+            # Acción con un atributo que no sabemos guardar: se deja de grabar
+            # aquí; lo grabado hasta ahora se puede reproducir.
+            print(f"[replay] Recording stopped at {type(action).__name__}: {exc}")
+            self.close()
+            self.engine.recorder = None
+            return
+        if self.actions and self.actions % CHECK_INTERVAL == 0:
+            self._checkpoint()
+        self._pending.append(line)
+        self.actions += 1
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def _checkpoint(self) -> None:
+        self._pending.append(_dumps({"check": state_digest(self.engine), "turn": self.engine.turn}))
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with gzip.open(self.filename, "at", encoding="utf-8") as replay_file:
+            replay_file.write("".join(self._pending))
+        self._pending.clear()
+
+    def close(self) -> None:
+        """Write the final check and flush (also run at exit)."""
+        if self.engine is None:
+            return
+        try:
+            self._checkpoint()
+        except Exception:
+            pass  # Motor a medio destruir al salir; basta con lo grabado.
+        self.flush()
+        self.engine = None
+        atexit.unregister(self.close)
+
+
+# --- Reproducción -----------------------------------------------------------
+
+def read(filename: str) -> Tuple[Dict[str, Any], List[Any]]:
+    """Header and records (actions and checks) of a replay file."""
+    with gzip.open(filename, "rt", encoding="utf-8") as replay_file:
+        header = json.loads(replay_file.readline())
+        records = [json.loads(line) for line in replay_file if line.strip()]
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{filename}: unsupported replay version {header.get('version')}")
+    return header, records
+
+
+def _prepare(header: Dict[str, Any]) -> None:
+    """Use the recorded seeds and settings; must run before the game is imported."""
+    if "entity_factories" in sys.modules and seeding.launch_seed != header["launch_seed"]:
+        raise RuntimeError("replay.play must run before the game modules are imported")
+    seeding.set_launch_seed(header["launch_seed"])
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import settings
+
+    for name, value in header.get("settings", {}).items():
+        setattr(settings, name, value)
+    # Nada de escribir partidas guardadas ni eco del log mientras se reproduce.
+    settings.AUTOSAVE_ENABLED = False
+    settings.LOG_ECHO_TO_STDOUT = False
+
+
+def _apply_player(engine: Engine, attributes: Dict[str, Any]) -> None:
+    """Set fighter attributes of the player, in order (the maximums before the values)."""
+    for name, value in attributes.items():
+        setattr(engine.player.fighter, name, value)
+
+
+def play(filename: str, *, check: bool = True) -> Dict[str, Any]:
+    """Replay `filename` headless; raise `Desync` when a check does not match."""
+    header, records = read(filename)
+    _prepare(header)
+    import contextlib
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import input_handlers
+        import setup_game
+
+        start = time.perf_counter()
+        engine = setup_game.new_game(seed=header["run_seed"])
+        generated = time.perf_counter() - start
+        _apply_player(engine, header.get("player", {}))
+        handler = input_handlers.MainGameEventHandler(engine)
+        first_turn = engine.turn
+        actions = checks = 0
+        start = time.perf_counter()
+        for record in records:
+            if isinstance(record, dict):
+                if check:
+                    found = state_digest(engine)
+                    if found != record["check"]:
+                        raise Desync(
+                            f"turn {engine.turn} (recorded {record['turn']}): state {found} != {record['check']}"
+                        )
+                    checks += 1
+                continue
+            handler.handle_action(decode_action(record, engine))
+            # Lo que el juego hace al renderizar cada frame.
+            engine.flush_sound_effects()
+            actions += 1
+        elapsed = time.perf_counter() - start
+    turns = engine.turn - first_turn
+    return {
+        "actions": actions,
+        "turns": turns,
+        "checks": checks,
+        "generation_s": generated,
+        "replay_s": elapsed,
+        "ms_per_turn": elapsed * 1e3 / max(1, turns),
+    }
+
+
+def record_bot(filename: str, turns: int, seed: Optional[int] = None, mortal: bool = False) -> Dict[str, Any]:
+    """Record `turns` turns played by a wandering bot (for benchmarks and desync tests)."""
+    import contextlib
+    import random
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import settings
+
+    settings.AUTOSAVE_ENABLED = False
+    settings.LOG_ECHO_TO_STDOUT = False
+    settings.REPLAY_RECORDING = False
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import tcod
+
+        import actions
+        import input_handlers
+        import setup_game
+
+        engine = setup_game.new_game(seed=seed)
+        player_attributes = {} if mortal else BOT_PLAYER
+        _apply_player(engine, player_attributes)
+        engine.recorder = Recorder(engine, filename, player=player_attributes)
+        handler = input_handlers.MainGameEventHandler(engine)
+        console = tcod.console.Console(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT, order="F")
+        # El bot tiene su propio generador: no gasta de los flujos del juego.
+        bot = random.Random(seeding.derive(seeding.run_seed, "bot"))
+        player = engine.player
+        start = time.perf_counter()
+        while engine.turn < turns and player.is_alive:
+            fighter = player.fighter
+            if fighter.hp * 5 < fighter.max_hp * 2:
+                action = actions.WaitAction(player)
+            else:
+                dx, dy = bot.choice(input_handlers.ADJACENT_DELTAS)
+                action = actions.BumpAction(player, dx, dy)
+            handler.handle_action(action)
+            console.clear()
+            engine.render(console)
+        elapsed = time.perf_counter() - start
+        engine.recorder.close()
+    return {"turns": engine.turn, "actions": engine.recorder.actions, "alive": player.is_alive, "seconds": elapsed}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    play_parser = commands.add_parser("play", help="replay a recording headless")
+    play_parser.add_argument("file")
+    play_parser.add_argument("--no-check", action="store_true", help="skip the state checks")
+    record_parser = commands.add_parser("record", help="record a run played by a bot")
+    record_parser.add_argument("file")
+    record_parser.add_argument("--turns", type=int, default=2000)
+    record_parser.add_argument("--seed", type=int, default=None, help="run seed (default: GAME_SEED)")
+    record_parser.add_argument("--mortal", action="store_true", help="keep the normal hp and satiety of the player")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        stats = record_bot(args.file, args.turns, args.seed, args.mortal)
+        print(
+            f"{args.file}: {stats['actions']} actions, turn {stats['turns']}"
+            f"{'' if stats['alive'] else ' (player died)'}, {stats['seconds']:.1f} s"
+        )
+    else:
+        try:
+            stats = play(args.file, check=not args.no_check)
+        except Desync as exc:
+            print(f"DESYNC: {exc}")
+            raise SystemExit(1)
+        print(
+            f"{args.file}: {stats['actions']} actions, {stats['turns']} turns, {stats['checks']} checks ok"
+        )
+        print(
+            f"  generation {stats['generation_s'] * 1e3:.0f} ms, replay {stats['replay_s']:.2f} s,"
+            f" {stats['ms_per_turn']:.2f} ms/turn"
+        )
@@ -0,0 +1,867 @@
+"""Chunked save files: one compressed blob per floor plus a small engine header.
+
+`Engine.save_as` comprimía con lzma un único pickle de todo el grafo (todas
+las plantas, ramas, entidades, registro de mensajes...). Aquí la partida se
+guarda en un zip sin compresión propia con:
+
+- `manifest.json`: versión del formato y, por planta, su clase, el resumen
+  (digest) de su pickle y las referencias externas que contiene.
+- `engine.pickle.xz`: el `Engine` (con `GameWorld`, jugador, registro de
+  mensajes...) y la tabla de objetos compartidos.
+- `floors/<etiqueta>.pickle.xz`: el estado de cada `GameMap` ("M-3", "B1-2"...).
+
+Cada blob se serializa por separado. Las referencias que cruzan de un blob a
+otro se sustituyen por identificadores persistentes: el engine, el mundo y
+cada planta por su etiqueta, y cualquier entidad o componente que pertenezca
+a otro blob por un uid. Esos objetos compartidos (el jugador, el objetivo de
+una IA en otra planta...) se "elevan" a la cabecera para que al cargar
+exista una sola copia.
+
+Sólo se serializan la planta actual y las plantas sucias: la caché recuerda
+qué plantas (`SaveCache.clean`) siguen igual que su último blob, y una
+planta deja de estar limpia cuando es la actual o cuando algo la modifica
+desde fuera (`mark_dirty`: al salir de ella por unas escaleras, al generar
+fuera de orden la de debajo, al dejar un objeto en un contenedor de otra
+planta...). Las limpias reutilizan su blob sin volver a serializarse, de
+modo que tras cambiar de planta sólo se escriben la planta actual, la que
+se ha dejado y la cabecera. Una planta serializada cuyo pickle no ha
+cambiado (mismo digest) reutiliza además byte a byte el blob comprimido.
+`prepare` permite serializar por adelantado las plantas sucias que no son la
+actual (`dirty_floors`), una a una, para que el guardado siguiente sólo pague
+la planta actual y la cabecera; `estimate_snapshot` calcula lo que costará
+con la velocidad medida en los pickles anteriores.
+
+Al cargar (`SAVE_LAZY_LOAD`) sólo se deserializan la cabecera y la planta
+actual; las demás quedan como blobs comprimidos dentro de su propio objeto
+`GameMap` (ver `_PendingFloor`) hasta que algo las consulta.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import importlib
+import io
+import json
+import lzma
+import os
+import pickle
+import threading
+import time
+import weakref
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from components.base_component import BaseComponent
+from entity import Entity
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+FORMAT_NAME = "myrogue-save"
+FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+HEADER_NAME = "engine.pickle.xz"
+FLOOR_PREFIX = "floors/"
+FLOOR_SUFFIX = ".pickle.xz"
+
+# Etiqueta reservada para la cabecera en las tablas de pertenencia.
+HEADER_LABEL = ""
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+# Pasadas máximas para estabilizar el conjunto de objetos elevados.
+_MAX_PASSES = 8
+
+_SHAREABLE = (Entity, BaseComponent)
+
+
+@dataclass
+class FloorBlob:
+    """Compressed pickle of one floor, as last written to (or read from) disk."""
+
+    cls_path: str
+    digest: str
+    data: bytes
+    refs: Tuple[int, ...] = ()
+
+
+@dataclass
+class SaveStats:
+    floors_written: List[str] = field(default_factory=list)
+    floors_reused: List[str] = field(default_factory=list)
+    header_bytes: int = 0
+    total_bytes: int = 0
+
+
+class SaveCache:
+    """Per-engine state that lets consecutive saves reuse unchanged floors.
+
+    Vive en `engine._save_cache` y no se guarda dentro de la partida.
+    """
+
+    def __init__(self) -> None:
+        self.blobs: Dict[str, FloorBlob] = {}
+        self.hoisted: Set[int] = set()
+        # {etiqueta: planta} de las plantas cuyo estado es el de su blob en `blobs`.
+        self.clean: Dict[str, Any] = {}
+        # {etiqueta: (planta, pickle, refs, uids elevados al serializarla)}
+        # serializadas por `prepare` para el próximo guardado.
+        self.prepared: Dict[str, Tuple[Any, bytes, Set[int], FrozenSet[int]]] = {}
+        self._uids: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self._objects: "weakref.WeakValueDictionary[int, Any]" = weakref.WeakValueDictionary()
+        self._next_uid = 1
+        self.last_stats: Optional[SaveStats] = None
+        # Tamaño del último pickle de cada blob y segundos por byte (media
+        # móvil) para estimar lo que costará la próxima instantánea.
+        self.pickle_sizes: Dict[str, int] = {}
+        self.pickle_rate: Optional[float] = None
+
+    def note_pickle(self, label: str, size: int, seconds: float) -> None:
+        self.pickle_sizes[label] = size
+        if size > 0:
+            rate = seconds / size
+            self.pickle_rate = rate if self.pickle_rate is None else 0.7 * self.pickle_rate + 0.3 * rate
+
+    def uid_of(self, obj: Any) -> int:
+        uid = self._uids.get(obj)
+        if uid is None:
+            uid = self._next_uid
+            self._next_uid += 1
+            self._uids[obj] = uid
+            self._objects[uid] = obj
+        return uid
+
+    def object_for(self, uid: int) -> Any:
+        return self._objects.get(uid)
+
+    def adopt(self, uid: int, obj: Any) -> None:
+        """Register an object restored from disk under its saved uid."""
+        self._uids[obj] = uid
+        self._objects[uid] = obj
+        self._next_uid = max(self._next_uid, uid + 1)
+
+
+def get_cache(engine: Engine) -> SaveCache:
+    cache = getattr(engine, "_save_cache", None)
+    if cache is None:
+        cache = SaveCache()
+        engine._save_cache = cache
+    return cache
+
+
+def mark_dirty(engine: Engine, *maps: Any) -> None:
+    """Note that `maps` changed while they were not the current floor.
+
+    La planta actual siempre se vuelve a serializar; esto es para los cambios
+    en otras plantas, que si no se guardarían con su blob anterior.
+    """
+    cache = getattr(engine, "_save_cache", None)
+    if cache is None or not (cache.clean or cache.prepared):
+        return
+    targets = {id(game_map) for game_map in maps if game_map is not None}
+    for label, game_map in list(cache.clean.items()):
+        if id(game_map) in targets:
+            del cache.clean[label]
+    for label, (game_map, *_) in list(cache.prepared.items()):
+        if id(game_map) in targets:
+            del cache.prepared[label]
+
+
+def world_maps(engine: Engine) -> Dict[str, GameMap]:
+    """Return {label: GameMap} for every generated floor of the engine's world."""
+    game_world = getattr(engine, "game_world", None)
+    if game_world is None:
+        return {}
+    maps: Dict[str, GameMap] = {}
+    for index, game_map in enumerate(getattr(game_world, "levels", [])):
+        if game_map is not None:
+            maps[f"M-{index + 1}"] = game_map
+    for branch_id, branch_maps in getattr(game_world, "branches", {}).items():
+        for index, game_map in enumerate(branch_maps):
+            if game_map is not None:
+                maps[f"B{branch_id}-{index + 1}"] = game_map
+    return maps
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _resolve_class(path: str) -> type:
+    module_name, _, qualname = path.partition(":")
+    obj: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _get_state(obj: Any) -> Any:
+    getstate = getattr(type(obj), "__getstate__", None)
+    if getstate is not None and getstate is not getattr(object, "__getstate__", None):
+        return obj.__getstate__()
+    return obj.__dict__
+
+
+def _apply_state(shell: Any, state: Any) -> None:
+    setstate = getattr(shell, "__setstate__", None)
+    if setstate is not None:
+        setstate(state)
+    else:
+        shell.__dict__.update(state)
+
+
+# Clave reservada en el `__dict__` de una planta aún sin deserializar.
+_PENDING_KEY = "__pending_floor__"
+
+
+@dataclass
+class _PendingFloorState:
+    cls: type
+    blob: FloorBlob
+    loader: "_ArchiveLoader"
+
+
+class _PendingFloor:
+    """Mixin for floor shells whose state is still a compressed blob.
+
+    Al cargar en modo perezoso cada planta que no es la actual es una
+    instancia vacía de una subclase `Pending<Clase>` de su clase real, y
+    todas las referencias (`levels`, `branches`, `downstairs_exits`,
+    `upstairs_target`, el `parent` de las entidades...) apuntan ya a ese
+    mismo objeto. El primer acceso a cualquier atributo deserializa el blob
+    dentro de la propia instancia y le devuelve su clase real, así que las
+    comparaciones por identidad (`target is current_map`) siguen valiendo.
+    """
+
+    def __getattribute__(self, name: str) -> Any:
+        if name == "__class__":
+            return object.__getattribute__(self, name)
+        materialize(self)
+        return getattr(self, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        materialize(self)
+        setattr(self, name, value)
+
+    def __delattr__(self, name: str) -> None:
+        materialize(self)
+        delattr(self, name)
+
+
+_pending_classes: Dict[type, type] = {}
+
+
+def _pending_class(cls: type) -> type:
+    pending_cls = _pending_classes.get(cls)
+    if pending_cls is None:
+        pending_cls = type(f"Pending{cls.__name__}", (_PendingFloor, cls), {})
+        _pending_classes[cls] = pending_cls
+    return pending_cls
+
+
+def is_pending(game_map: Any) -> bool:
+    """True if `game_map` was lazily loaded and has not been touched yet."""
+    return isinstance(game_map, _PendingFloor)
+
+
+def _pending_state(game_map: Any) -> _PendingFloorState:
+    return object.__getattribute__(game_map, "__dict__")[_PENDING_KEY]
+
+
+def materialize(game_map: Any) -> Any:
+    """Deserialize a lazily loaded floor in place (no-op for loaded floors)."""
+    if not isinstance(game_map, _PendingFloor):
+        return game_map
+    pending = object.__getattribute__(game_map, "__dict__").pop(_PENDING_KEY)
+    object.__setattr__(game_map, "__class__", pending.cls)
+    pending.loader.fill(game_map, pending.blob)
+    return game_map
+
+
+class _SaveSession:
+    """Ownership bookkeeping for one save (one or more pickling passes)."""
+
+    def __init__(self, engine: Engine, cache: SaveCache, maps: Dict[str, GameMap]) -> None:
+        self.engine = engine
+        self.cache = cache
+        self.maps = maps
+        self.map_labels = {id(game_map): label for label, game_map in maps.items()}
+        self.hoisted: Dict[int, Any] = {}
+        self._hoisted_ids: Set[int] = set()
+        self._owners: Dict[int, str] = {}
+
+    def hoist(self, obj: Any) -> int:
+        uid = self.cache.uid_of(obj)
+        if uid not in self.hoisted:
+            self.hoisted[uid] = obj
+            # Sus componentes ya viajan dentro de él: no se elevan uno a uno.
+            self._hoisted_ids.add(id(obj))
+            self._owners.clear()
+        return uid
+
+    def owner(self, obj: Any) -> str:
+        """Label of the blob that pickles `obj` inline (HEADER_LABEL for the header)."""
+        chain: List[int] = []
+        current = obj
+        label = HEADER_LABEL
+        for _ in range(32):
+            key = id(current)
+            cached = self._owners.get(key)
+            if cached is not None:
+                label = cached
+                break
+            if key in self._hoisted_ids:
+                break
+            map_label = self.map_labels.get(key)
+            if map_label is not None:
+                label = map_label
+                break
+            chain.append(key)
+            current = getattr(current, "parent", None)
+            if current is None:
+                break
+        for key in chain:
+            self._owners[key] = label
+        return label
+
+    def home(self, obj: Any) -> str:
+        """Label of the floor `obj` belongs to, hoisted or not (HEADER_LABEL if none)."""
+        current = obj
+        for _ in range(32):
+            label = self.map_labels.get(id(current))
+            if label is not None:
+                return label
+            current = getattr(current, "parent", None)
+            if current is None:
+                break
+        return HEADER_LABEL
+
+
+class _BlobPickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO, session: _SaveSession, label: str) -> None:
+        super().__init__(file, protocol=PICKLE_PROTOCOL)
+        self.session = session
+        self.label = label
+        self.refs: Set[int] = set()
+        fixed: Dict[int, Tuple] = {
+            id(game_map): ("map", map_label) for map_label, game_map in session.maps.items()
+        }
+        if label != HEADER_LABEL:
+            fixed[id(session.engine)] = ("engine",)
+            game_world = getattr(session.engine, "game_world", None)
+            if game_world is not None:
+                fixed[id(game_world)] = ("world",)
+        self._fixed = fixed
+
+    def reducer_override(self, obj: Any) -> Any:
+        # Con `persistent_id` el pickler llamaba a Python por cada objeto
+        # (enteros y cadenas incluidos); `reducer_override` no se llama para
+        # los tipos básicos y cuesta varias veces menos.
+        pid = self._fixed.get(id(obj))
+        if pid is None and isinstance(obj, _SHAREABLE):
+            owner = self.session.owner(obj)
+            if owner != self.label:
+                uid = self.session.hoist(obj)
+                self.refs.add(uid)
+                if self.label != HEADER_LABEL:
+                    pid = ("ref", uid)
+        if pid is None:
+            return NotImplemented
+        return _persistent, pid
+
+
+# Resolución de referencias de la deserialización en curso (ver `_persistent`).
+_resolvers = threading.local()
+
+
+def _persistent(*pid: Any) -> Any:
+    """Stand-in for a reference to another blob, resolved while unpickling."""
+    return _resolvers.current(pid)
+
+
+class _BlobUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, resolver) -> None:
+        super().__init__(file)
+        self._resolver = resolver
+
+    def load(self) -> Any:
+        previous = getattr(_resolvers, "current", None)
+        _resolvers.current = self._resolver
+        try:
+            return super().load()
+        finally:
+            _resolvers.current = previous
+
+    def persistent_load(self, pid: Tuple) -> Any:
+        # Partidas del formato 1, que guardaban las referencias como persistent ids.
+        return self._resolver(pid)
+
+
+def _dump(obj: Any, session: _SaveSession, label: str) -> Tuple[bytes, Set[int]]:
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    pickler = _BlobPickler(buffer, session, label)
+    pickler.dump(obj)
+    data = buffer.getvalue()
+    session.cache.note_pickle(label, len(data), time.perf_counter() - started)
+    return data, pickler.refs
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class SaveSnapshot:
+    """Pickled (still uncompressed) state of every blob, taken in one go.
+
+    Es la parte del guardado que necesita el grafo de objetos quieto; la
+    compresión y la escritura (`write`) sólo trabajan con bytes y pueden
+    hacerse en otro hilo mientras la partida sigue.
+    """
+
+    cache: SaveCache
+    header: bytes
+    floors: Dict[str, Tuple[str, bytes, Set[int]]]
+    player_uid: Optional[int] = None
+    # Objetos de las plantas que la propia cabecera referencia.
+    header_refs: Set[int] = field(default_factory=set)
+    # Plantas limpias (o cargadas en modo perezoso y sin tocar): su blob se
+    # vuelve a escribir tal cual.
+    untouched: Dict[str, FloorBlob] = field(default_factory=dict)
+
+
+def _reusable_blobs(engine: Engine, cache: SaveCache, maps: Dict[str, GameMap]) -> Dict[str, FloorBlob]:
+    """Blobs of the floors that do not need to be pickled again."""
+    current = getattr(engine, "game_map", None)
+    reusable: Dict[str, FloorBlob] = {}
+    for label, game_map in maps.items():
+        if is_pending(game_map):
+            reusable[label] = _pending_state(game_map).blob
+            continue
+        blob = cache.blobs.get(label)
+        if game_map is current or blob is None or cache.clean.get(label) is not game_map:
+            continue
+        # Los objetos que el blob referencia tienen que seguir vivos para elevarlos.
+        if all(cache.object_for(uid) is not None for uid in blob.refs):
+            reusable[label] = blob
+    return reusable
+
+
+def _hoist_known(session: _SaveSession, engine: Engine, cache: SaveCache) -> None:
+    """Hoist the player and every object the cached blobs reference by uid."""
+    player = getattr(engine, "player", None)
+    if player is not None:
+        session.hoist(player)
+    for uid in cache.hoisted:
+        obj = cache.object_for(uid)
+        if obj is not None:
+            session.hoist(obj)
+
+
+def dirty_floors(engine: Engine) -> List[GameMap]:
+    """Floors, other than the current one, that the next `snapshot` would pickle."""
+    cache = get_cache(engine)
+    current = getattr(engine, "game_map", None)
+    dirty = []
+    for label, game_map in world_maps(engine).items():
+        if game_map is current or is_pending(game_map):
+            continue
+        if cache.clean.get(label) is game_map and label in cache.blobs:
+            continue
+        entry = cache.prepared.get(label)
+        if entry is not None and entry[0] is game_map:
+            continue
+        dirty.append(game_map)
+    return dirty
+
+
+def estimate_snapshot(engine: Engine) -> Optional[float]:
+    """Rough seconds the next `snapshot` will pause for (None before the first pickle).
+
+    Se estima con el tamaño del último pickle de cada blob que habrá que
+    serializar (la media si aún no tiene) y la velocidad medida hasta ahora.
+    """
+    cache = get_cache(engine)
+    rate = cache.pickle_rate
+    if rate is None:
+        return None
+    floor_sizes = [size for label, size in cache.pickle_sizes.items() if label != HEADER_LABEL]
+    default = sum(floor_sizes) / len(floor_sizes) if floor_sizes else 0
+    current = getattr(engine, "game_map", None)
+    dirty = {id(game_map) for game_map in dirty_floors(engine)}
+    total = cache.pickle_sizes.get(HEADER_LABEL, 0)
+    for label, game_map in world_maps(engine).items():
+        if game_map is current or id(game_map) in dirty:
+            total += cache.pickle_sizes.get(label, default)
+    return total * rate
+
+
+def prepare(engine: Engine, game_map: GameMap) -> bool:
+    """Pickle a floor that is no longer current ahead of the next save.
+
+    El guardado siguiente usa ese pickle en lugar de serializar la planta,
+    salvo que algo la haya ensuciado (`mark_dirty`) entretanto. Devuelve
+    False si no hacía falta (planta limpia, actual o aún sin cargar).
+    """
+    cache = get_cache(engine)
+    maps = world_maps(engine)
+    label = next((label for label, floor in maps.items() if floor is game_map), None)
+    if (
+        label is None
+        or game_map is getattr(engine, "game_map", None)
+        or is_pending(game_map)
+        or cache.clean.get(label) is game_map
+    ):
+        return False
+    session = _SaveSession(engine, cache, maps)
+    _hoist_known(session, engine, cache)
+    known = frozenset(session.hoisted)
+    data, refs = _dump(_get_state(game_map), session, label)
+    cache.prepared[label] = (game_map, data, refs, known)
+    return True
+
+
+def snapshot(engine: Engine) -> SaveSnapshot:
+    """Pickle the header, the current floor and the dirty floors without compressing them."""
+    cache = get_cache(engine)
+    maps = world_maps(engine)
+    session = _SaveSession(engine, cache, maps)
+    untouched = _reusable_blobs(engine, cache, maps)
+    current = getattr(engine, "game_map", None)
+    prepared = {
+        label: (data, refs, known)
+        for label, (game_map, data, refs, known) in cache.prepared.items()
+        if label not in untouched and maps.get(label) is game_map and game_map is not current
+    }
+    cache.prepared = {}
+
+    _hoist_known(session, engine, cache)
+    # Los uids que usan los blobs reutilizados tienen que seguir en la cabecera.
+    for label, blob in untouched.items():
+        if is_pending(maps[label]):
+            hoisted = _pending_state(maps[label]).loader.hoisted
+            for uid in blob.refs:
+                session.hoist(hoisted[uid])
+        else:
+            for uid in blob.refs:
+                session.hoist(cache.object_for(uid))
+    # Igual con los pickles preparados; si alguno ya no existe, se serializa de nuevo.
+    for label, (_, refs, _) in list(prepared.items()):
+        objects = [cache.object_for(uid) for uid in refs]
+        if any(obj is None for obj in objects):
+            del prepared[label]
+            continue
+        for obj in objects:
+            session.hoist(obj)
+
+    floor_pickles: Dict[str, Tuple[bytes, Set[int]]] = {}
+    header_pickle = b""
+    header_refs: Set[int] = set()
+    # Cuántos objetos había elevados al empezar cada pickle: los que se
+    # elevan después no los conoce. La cabecera va primero para que las
+    # plantas ya vean lo que ella eleve (monstruos a los que apunta el motor).
+    header_at = -1
+    dumped_at: Dict[str, int] = {}
+    stale = {label for label in maps if label not in untouched}
+    for _ in range(_MAX_PASSES):
+        if header_at < len(session.hoisted):
+            header_at = len(session.hoisted)
+            header_pickle, header_refs = _dump(
+                {"engine": engine, "hoisted": dict(session.hoisted)}, session, HEADER_LABEL
+            )
+        for label in stale:
+            if label in prepared:
+                floor_pickles[label] = prepared[label][:2]
+            else:
+                dumped_at[label] = len(session.hoisted)
+                floor_pickles[label] = _dump(_get_state(maps[label]), session, label)
+        # Un objeto que una planta guardaba dentro de su blob (o de su pickle)
+        # y que ahora se eleva a la cabecera quedaría duplicado: esa planta se
+        # vuelve a serializar. Las demás no lo contienen y se quedan como están.
+        stale = set()
+        for index, (uid, obj) in enumerate(session.hoisted.items()):
+            label = session.home(obj)
+            if label in untouched:
+                if uid not in cache.hoisted and not is_pending(maps[label]):
+                    del untouched[label]
+                    stale.add(label)
+            elif label in prepared:
+                if uid not in prepared[label][2]:
+                    del prepared[label]
+                    stale.add(label)
+            elif index >= dumped_at.get(label, len(session.hoisted)):
+                stale.add(label)
+        if not stale and header_at == len(session.hoisted):
+            break
+    else:
+        raise RuntimeError("No se pudo estabilizar el reparto de objetos entre blobs.")
+
+    # Lo que se acaba de serializar queda limpio en cuanto se escriba (si falla
+    # la escritura, `write` lo olvida); la planta actual nunca lo está.
+    cache.clean = {label: game_map for label, game_map in maps.items() if game_map is not current}
+
+    player = getattr(engine, "player", None)
+    return SaveSnapshot(
+        cache=cache,
+        header=header_pickle,
+        floors={
+            label: (_class_path(type(maps[label])), data, refs)
+            for label, (data, refs) in floor_pickles.items()
+        },
+        player_uid=cache.uid_of(player) if player is not None else None,
+        header_refs=header_refs,
+        untouched=untouched,
+    )
+
+
+def backup_names(filename: str, backups: int) -> List[str]:
+    """Names of the rotated copies of `filename` ("x.sav.1" is the newest)."""
+    return [f"{filename}.{index}" for index in range(1, backups + 1)]
+
+
+def _rotate(filename: str, backups: int) -> None:
+    if backups <= 0 or not os.path.exists(filename):
+        return
+    names = [filename] + backup_names(filename, backups)
+    for newer, older in reversed(list(zip(names, names[1:]))):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+
+
+class SaveCancelled(RuntimeError):
+    """A background write was abandoned before replacing the save file."""
+
+
+def temp_names(filename: str) -> List[str]:
+    """Temporary files that interrupted writes of `filename` may have left behind."""
+    return glob.glob(f"{glob.escape(filename)}.*.tmp")
+
+
+def write(
+    snapshot: SaveSnapshot,
+    filename: str,
+    *,
+    backups: int = 0,
+    cancel: Optional[threading.Event] = None,
+) -> SaveStats:
+    """Compress `snapshot` and write it atomically to `filename`.
+
+    Con `backups` > 0 la partida anterior se conserva como `filename.1`
+    (y así sucesivamente) en lugar de sobrescribirse. Si `cancel` se activa
+    antes de sustituir el fichero se lanza `SaveCancelled` y no se toca.
+    """
+    cache = snapshot.cache
+    try:
+        return _write(snapshot, filename, backups, cancel)
+    except BaseException:
+        # Las plantas que se daban por guardadas no llegaron al disco ni a la caché.
+        cache.clean = {}
+        raise
+
+
+def _write(
+    snapshot: SaveSnapshot, filename: str, backups: int, cancel: Optional[threading.Event]
+) -> SaveStats:
+    cache = snapshot.cache
+    stats = SaveStats()
+    previous_blobs = cache.blobs
+    blobs: Dict[str, FloorBlob] = dict(snapshot.untouched)
+    stats.floors_reused.extend(snapshot.untouched)
+    for label, (cls_path, data, refs) in snapshot.floors.items():
+        digest = _digest(data)
+        previous = previous_blobs.get(label)
+        if previous is not None and previous.digest == digest:
+            blobs[label] = previous
+            stats.floors_reused.append(label)
+            continue
+        blobs[label] = FloorBlob(
+            cls_path=cls_path,
+            digest=digest,
+            data=lzma.compress(data),
+            refs=tuple(sorted(refs)),
+        )
+        stats.floors_written.append(label)
+    header_data = lzma.compress(snapshot.header)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "floors": {
+            label: {"class": blob.cls_path, "digest": blob.digest, "refs": list(blob.refs)}
+            for label, blob in blobs.items()
+        },
+    }
+    # Un nombre por escritor: un autoguardado abandonado no pisa al guardado final.
+    temp_name = f"{filename}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with zipfile.ZipFile(temp_name, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=1, sort_keys=True))
+        archive.writestr(HEADER_NAME, header_data)
+        for label, blob in blobs.items():
+            archive.writestr(f"{FLOOR_PREFIX}{label}{FLOOR_SUFFIX}", blob.data)
+    if cancel is not None and cancel.is_set():
+        os.remove(temp_name)
+        raise SaveCancelled(filename)
+    _rotate(filename, backups)
+    os.replace(temp_name, filename)
+
+    # Sólo siguen elevados los objetos que algún blob referencia de verdad.
+    referenced = {uid for blob in blobs.values() for uid in blob.refs}
+    if snapshot.player_uid is not None:
+        referenced.add(snapshot.player_uid)
+    # Los que eleva la cabecera siguen elevados: así el guardado siguiente no
+    # tiene que volver a serializar la planta que los contiene.
+    referenced |= snapshot.header_refs
+    cache.blobs = blobs
+    cache.hoisted = referenced
+    stats.header_bytes = len(header_data)
+    stats.total_bytes = os.path.getsize(filename)
+    cache.last_stats = stats
+    return stats
+
+
+def save(engine: Engine, filename: str, *, backups: int = 0) -> SaveStats:
+    """Write `engine` to `filename` as a chunked archive, reusing unchanged floors."""
+    return write(snapshot(engine), filename, backups=backups)
+
+
+def _read_blobs(archive: zipfile.ZipFile, manifest: Dict[str, Any]) -> Dict[str, FloorBlob]:
+    return {
+        label: FloorBlob(
+            cls_path=info["class"],
+            digest=info["digest"],
+            data=archive.read(f"{FLOOR_PREFIX}{label}{FLOOR_SUFFIX}"),
+            refs=tuple(info.get("refs", ())),
+        )
+        for label, info in manifest["floors"].items()
+    }
+
+
+def _read_manifest(archive: zipfile.ZipFile, filename: str) -> Dict[str, Any]:
+    manifest = json.loads(archive.read(MANIFEST_NAME))
+    if manifest.get("format") != FORMAT_NAME:
+        raise ValueError(f"{filename} no es una partida guardada válida.")
+    if int(manifest.get("version", 0)) > FORMAT_VERSION:
+        raise ValueError(f"{filename} usa un formato de guardado más reciente.")
+    return manifest
+
+
+def adopt_blobs(engine: Engine, filename: str) -> None:
+    """Take the floor blobs of an archive written by another process as the reuse cache.
+
+    Lo usa el autoguardado con 'fork': el hijo escribe la partida, pero la
+    caché de blobs comprimidos vive en el padre.
+    """
+    cache = get_cache(engine)
+    with zipfile.ZipFile(filename, "r") as archive:
+        blobs = _read_blobs(archive, _read_manifest(archive, filename))
+    # Un blob que el hijo volvió a escribir puede usar uids que este proceso no
+    # conoce: su planta se vuelve a serializar aquí la próxima vez.
+    for label, blob in blobs.items():
+        previous = cache.blobs.get(label)
+        if previous is None or previous.digest != blob.digest:
+            cache.clean.pop(label, None)
+    cache.blobs = blobs
+
+
+def is_archive(filename: str) -> bool:
+    return zipfile.is_zipfile(filename)
+
+
+class _ArchiveLoader:
+    """Resolves persistent ids while the floors of one archive are unpickled.
+
+    Con la carga perezosa sigue vivo (referenciado desde las plantas
+    pendientes) hasta que se deserializa la última.
+    """
+
+    def __init__(self, shells: Dict[str, Any]) -> None:
+        self.shells = shells
+        self.engine: Any = None
+        self.hoisted: Dict[int, Any] = {}
+
+    def resolve(self, pid: Tuple) -> Any:
+        kind = pid[0]
+        if kind == "map":
+            return self.shells[pid[1]]
+        if kind == "ref":
+            return self.hoisted[pid[1]]
+        if kind == "engine":
+            return self.engine
+        if kind == "world":
+            return self.engine.game_world
+        raise pickle.UnpicklingError(f"Referencia persistente desconocida: {pid!r}")
+
+    def read_header(self, data: bytes) -> None:
+        header = _BlobUnpickler(io.BytesIO(lzma.decompress(data)), self.resolve).load()
+        self.engine = header["engine"]
+        self.hoisted = header["hoisted"]
+
+    def fill(self, shell: Any, blob: FloorBlob) -> None:
+        state = _BlobUnpickler(io.BytesIO(lzma.decompress(blob.data)), self.resolve).load()
+        _apply_state(shell, state)
+
+
+def _current_label(engine: Engine, shells: Dict[str, Any]) -> Optional[str]:
+    current = getattr(engine, "game_map", None)
+    for label, shell in shells.items():
+        if shell is current:
+            return label
+    return None
+
+
+def load(filename: str, *, lazy: Optional[bool] = None) -> Engine:
+    """Restore an engine saved with `save`.
+
+    Con `lazy` (por defecto `SAVE_LAZY_LOAD`) sólo se deserializan la
+    cabecera y la planta actual; el resto se queda comprimido hasta que
+    algo lo toque (ver `_PendingFloor`), de modo que el tiempo hasta el
+    primer fotograma no depende del tamaño del mundo.
+    """
+    if lazy is None:
+        import settings
+
+        lazy = bool(getattr(settings, "SAVE_LAZY_LOAD", True))
+    with zipfile.ZipFile(filename, "r") as archive:
+        manifest = _read_manifest(archive, filename)
+        header_data = archive.read(HEADER_NAME)
+        blobs = _read_blobs(archive, manifest)
+
+    shells: Dict[str, Any] = {}
+    for label, blob in blobs.items():
+        cls = _resolve_class(blob.cls_path)
+        shells[label] = cls.__new__(cls)
+
+    loader = _ArchiveLoader(shells)
+    loader.read_header(header_data)
+    engine = loader.engine
+
+    if lazy:
+        current = _current_label(engine, shells)
+        for label, shell in shells.items():
+            if label == current:
+                continue
+            cls = type(shell)
+            object.__setattr__(shell, "__class__", _pending_class(cls))
+            object.__getattribute__(shell, "__dict__")[_PENDING_KEY] = _PendingFloorState(
+                cls=cls, blob=blobs[label], loader=loader
+            )
+        if current is not None:
+            loader.fill(shells[current], blobs[current])
+    else:
+        for label, blob in blobs.items():
+            loader.fill(shells[label], blob)
+
+    cache = get_cache(engine)
+    for uid, obj in loader.hoisted.items():
+        cache.adopt(uid, obj)
+    cache.hoisted = set(loader.hoisted)
+    cache.blobs = blobs
+    cache.clean = dict(shells)
+    current = getattr(engine, "game_map", None)
+    for label, shell in shells.items():
+        if shell is current:
+            del cache.clean[label]
+    return engine
@@ -0,0 +1,98 @@
+"""World seed and the random streams derived from it.
+
+Todo el azar salía del `random` global sin semilla, las tiradas que se hacen
+al importar (`settings.BRANCH_FLOORS`, las plantas de `uniques` y `procgen`,
+los nombres de pociones y pergaminos de `entity_factories`) dependían del
+orden de import, y los `set` de entidades se recorrían en el orden de sus
+direcciones de memoria. Ninguna partida se podía repetir.
+
+- `launch_seed` es la semilla del proceso: la variable de entorno `GAME_SEED`
+  o una aleatoria. Los módulos que tiran al importarse llaman antes a
+  `seed_module(__name__)`, que siembra `random` con un flujo propio de ese
+  módulo, así que no dependen del orden de import ni del hilo que los importe.
+- `begin_run(seed)` (lo llama `setup_game.new_game`) fija la semilla de la
+  partida (`run_seed`) y deriva de ella tres flujos:
+  - el `random` global: generación y reglas (combate, objetos, titileo de
+    luces...). Cada planta ya deriva su propia semilla de él
+    (`floor_generation.floor_seed`);
+  - `ai`: las tiradas de `components.ai`;
+  - `cosmetic`: lo que sólo se ve u oye (pistas de audio, partículas). Se
+    consume al ritmo de los frames y no de los turnos, así que va aparte
+    para que reproducir una partida sin ventana ni audio no la desincronice.
+- Las entidades se numeran al crearse (`next_serial`) y usan ese número como
+  hash: los `set` de entidades se recorren igual en cada ejecución.
+
+Con esto una partida nueva queda determinada por `(launch_seed, run_seed)` y
+las acciones del jugador, que es lo que graba `replay`.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from itertools import count
+from typing import Optional
+
+# Las entidades de una partida se numeran a partir de aquí (por debajo quedan
+# los prototipos creados al importar `entity_factories`).
+_RUN_SERIAL_BASE = 1 << 32
+
+
+def derive(seed: int, label: str) -> int:
+    """64-bit seed of the `label` sub-stream of `seed`."""
+    return random.Random(f"{seed}:{label}").getrandbits(64)
+
+
+def _seed_from_environment() -> int:
+    value = os.environ.get("GAME_SEED", "").strip()
+    if value:
+        try:
+            return int(value, 0)
+        except ValueError:
+            # Semillas con texto ("benchmark", "desync-1"...).
+            return derive(0, value)
+    return random.SystemRandom().getrandbits(32)
+
+
+launch_seed: int = _seed_from_environment()
+run_seed: Optional[int] = None
+# Partidas empezadas en este proceso.
+runs_started = 0
+
+ai = random.Random()
+cosmetic = random.Random()
+
+_serials = count()
+
+
+def set_launch_seed(seed: int) -> None:
+    """Replace the launch seed; only meaningful before the game modules are imported."""
+    global launch_seed
+    launch_seed = seed
+
+
+def seed_module(name: str) -> None:
+    """Seed `random` for the rolls `name` makes while it is imported."""
+    random.seed(derive(launch_seed, f"import:{name}"))
+
+
+def begin_run(seed: Optional[int] = None) -> int:
+    """Seed every stream for a new run and return its seed.
+
+    Sin semilla, la primera partida del proceso usa `launch_seed` y las
+    siguientes una derivada de ella.
+    """
+    global run_seed, runs_started, _serials
+    if seed is None:
+        seed = launch_seed if runs_started == 0 else derive(launch_seed, f"run:{runs_started}")
+    run_seed = seed
+    runs_started += 1
+    random.seed(derive(seed, "generation"))
+    ai.seed(derive(seed, "ai"))
+    cosmetic.seed(derive(seed, "cosmetic"))
+    _serials = count(_RUN_SERIAL_BASE)
+    return seed
+
+
+def next_serial() -> int:
+    return next(_serials)
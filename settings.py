@@ -1,6 +1,12 @@
 import tcod
 from random import randint
 
+import font_cache
+import seeding
+
+# Tiradas al importar (BRANCH_FLOORS...) con la semilla del proceso (ver seeding).
+seeding.seed_module(__name__)
+
 LANGUAGE = "es"  # Idioma activo de la interfaz. Opciones: en, es.
 FALLBACK_LANGUAGE = "en"  # Idioma al que se recurre si falta una cadena.
 
@@ -125,8 +131,13 @@ def _compute_screen_config(mode: str) -> dict:
 SCREEN_CONFIG = _compute_screen_config(SCREEN_MODE)
 SCREEN_WIDTH = SCREEN_CONFIG["screen_width"]
 SCREEN_HEIGHT = SCREEN_CONFIG["screen_height"]
-MAP_WIDTH = SCREEN_CONFIG["map_width"]
-MAP_HEIGHT = SCREEN_CONFIG["map_height"]
+# Zona de la pantalla en la que se dibuja el mapa (ver camera.Camera).
+VIEWPORT_WIDTH = SCREEN_CONFIG["map_width"]
+VIEWPORT_HEIGHT = SCREEN_CONFIG["map_height"]
+# Tamaño de las plantas. Puede ser mayor que el viewport: la cámara sigue al
+# jugador y sólo se dibuja la parte que cabe en pantalla.
+MAP_WIDTH = VIEWPORT_WIDTH
+MAP_HEIGHT = VIEWPORT_HEIGHT
 HUD_LAYOUT = SCREEN_CONFIG["hud"]
 
 # -- GRAPHICS ------------------------------------------------
@@ -149,7 +160,10 @@ if GRAPHIC_MODE == "ascii":
     tileset_cod = "ascii"
 
     # STANDARD
-    tileset = tcod.tileset.load_truetype_font("data/graphics/PxPlus_IBM_CGAthin.ttf", 128, 128)
+    # Los glifos rasterizados se cachean en data/cache (ver font_cache).
+    FONT_PATH = "data/graphics/PxPlus_IBM_CGAthin.ttf"
+    FONT_TILE_SIZE = (128, 128)
+    tileset = font_cache.load_truetype_font(FONT_PATH, *FONT_TILE_SIZE)
     #tileset = tcod.tileset.load_truetype_font("data/graphics/PxPlus_IBM_CGAthin.ttf", 112, 128)
     
 
@@ -275,8 +289,48 @@ STEALTH_DISABLED = True
 # Telemetría ligera de rendimiento por turno (se muestra cada N turnos).
 PERF_PROFILER_ENABLED = False
 PERF_PROFILER_REPORT_INTERVAL = 20
+# Overlay de rendimiento (F3 durante la partida): tiempos de frame, render y
+# turno, cachés y memoria. Sólo mide mientras se ve.
+PERF_OVERLAY_HISTORY = 120  # turnos de la gráfica
+PERF_OVERLAY_BUDGET_MS = 16.0  # los turnos más lentos se pintan en rojo
 # Si está activo, cada mensaje del log también se imprime en stdout.
 LOG_ECHO_TO_STDOUT = True
+# Generar las plantas del mundo en varios procesos al empezar una partida nueva
+# (solo en sistemas con 'fork'; si no, se generan en serie como siempre).
+WORLD_GENERATION_PARALLEL = True
+# Número de procesos para la generación del mundo (None = núcleos disponibles).
+WORLD_GENERATION_WORKERS = None
+# Segundos que se espera a una planta generada en otro proceso; si no llega,
+# se matan los procesos y se genera en serie.
+WORLD_GENERATION_TIMEOUT = 30.0
+# Generar cada planta la primera vez que se baja a ella (y pregenerar la
+# siguiente en segundo plano) en vez de crear todo el mundo al empezar.
+WORLD_LAZY_GENERATION = True
+# Grabar las acciones de cada partida nueva en REPLAY_DIRECTORY para
+# reproducirlas con `python replay.py play FICHERO` (ver replay y seeding;
+# la semilla se fija con la variable de entorno GAME_SEED).
+REPLAY_RECORDING = False
+REPLAY_DIRECTORY = "replays"
+# Al cargar partida, deserializar sólo la planta actual; el resto se carga
+# la primera vez que se visita (o que algo la consulta).
+SAVE_LAZY_LOAD = True
+# Autoguardado en segundo plano cada N turnos (0 = nunca) y al cambiar de planta.
+AUTOSAVE_ENABLED = True
+AUTOSAVE_FILENAME = "savegame.sav"
+AUTOSAVE_INTERVAL_TURNS = 200
+AUTOSAVE_ON_STAIRS = True
+# Copias anteriores que se conservan al autoguardar (savegame.sav.1, .2...).
+AUTOSAVE_BACKUPS = 2
+# Guardar desde un proceso hijo con 'fork' (copy-on-write); si no, la
+# compresión y la escritura van en un hilo.
+AUTOSAVE_USE_FORK = True
+# Pausa máxima en primer plano que se considera aceptable (un fotograma).
+AUTOSAVE_FRAME_BUDGET = 1 / 60
+# Sin 'fork', turnos que se aplaza un autoguardado cuya instantánea no cabe en
+# AUTOSAVE_FRAME_BUDGET antes de tomarla de todos modos.
+AUTOSAVE_MAX_DEFERRED_TURNS = 50
+# Segundos que guardar al salir espera a un autoguardado en curso antes de abandonarlo.
+AUTOSAVE_WAIT_TIMEOUT = 10.0
 
 # Número de turnos que se mantiene una ruta de IA antes de recalcularla si no hay bloqueos.
 AI_PATH_RECALC_INTERVAL = 4
@@ -895,6 +949,8 @@ CAVERN_BIRTH_LIMIT = 4
 CAVERN_DEATH_LIMIT = 3
 # Iteraciones del autómata celular; más pasos producen cavernas más suaves y con menos ruido.
 CAVERN_SMOOTHING_STEPS = 5
+# Tamaño (ancho, alto) de las plantas de cavernas, p. ej. (200, 200); None = MAP_WIDTH x MAP_HEIGHT.
+CAVERN_MAP_SIZE = None
 
 # -- Cavern monster population ------------------------------------------------
 # Min/max creatures spawned per cavern level (list of tuples: floor threshold, (min, max)).
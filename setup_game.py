@@ -2,7 +2,6 @@
 from __future__ import annotations
 from tcod import libtcodpy
 
-import copy
 import lzma
 import pickle
 import traceback
@@ -15,23 +14,24 @@ from i18n import _
 import numpy as np
 
 import color
-from engine import Engine
-import entity_factories
 from equipment_types import EquipmentType
 import input_handlers
-from game_map import GameWorld
-from audio import ambient_sound
+from audio import ambient_sound, start_audio_warmup
 import settings
 from settings import (
     INTRO_MESSAGE,
     PLAYER_STARTING_EQUIP_LIMITS,
     PLAYER_STARTING_INVENTORY,
 )
-import procgen
+import seeding
+import startup
 
 from typing import TYPE_CHECKING
 
+# El motor, los prototipos y los generadores no hacen falta para el menú: se
+# importan en new_game/load_game (o en segundo plano, ver `startup`).
 if TYPE_CHECKING:
+    from engine import Engine
     from entity import Actor, Item
     import uniques
 
@@ -100,6 +100,8 @@ def _slot_name_for_item(item: "Item") -> str:
 
 
 def _resolve_factory_item(item_name: str):
+    import entity_factories
+
     try:
         return getattr(entity_factories, item_name)
     except AttributeError as exc:  # pragma: no cover - configuration-time error
@@ -110,6 +112,8 @@ def _resolve_factory_item(item_name: str):
 
 def _add_starting_items(player: "Actor") -> None:
     """Populate the player's inventory and equip requested items."""
+    import prototypes
+
     items_to_equip: Dict[str, List["Item"]] = {}
 
     for raw_entry in PLAYER_STARTING_INVENTORY:
@@ -126,7 +130,7 @@ def _add_starting_items(player: "Actor") -> None:
         prototype = _resolve_factory_item(item_name)
 
         for idx in range(quantity):
-            item = copy.deepcopy(prototype)
+            item = prototypes.clone(prototype)
             item.parent = player.inventory
             player.inventory.items.append(item)
 
@@ -151,9 +155,21 @@ def _add_starting_items(player: "Actor") -> None:
             player.equipment.toggle_equip(item, add_message=False)
 
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
-    
+def new_game(seed: Optional[int] = None) -> Engine:
+    """Return a brand new game session as an Engine instance.
+
+    `seed` fija la semilla de la partida (ver seeding); sin ella se deriva de
+    la del proceso.
+    """
+    startup.wait_for_warm_up()
+    import entity_factories
+    import procgen
+    import prototypes
+    from engine import Engine
+    from game_map import GameWorld
+
+    seeding.begin_run(seed)
+
     map_width = settings.MAP_WIDTH
     map_height = settings.MAP_HEIGHT
 
@@ -183,9 +199,9 @@ def new_game() -> Engine:
     room_min_size = 4
     max_rooms = random.randint(10, 30)
 
-    # Con 'deepcopy' se crea/recupera la entidad 'player' con 
+    # Clonando el prototipo se crea/recupera la entidad 'player' con
     # sus atributos (y valores de esos atributos) originales (e.e. más primitivos)
-    player = copy.deepcopy(entity_factories.player)
+    player = prototypes.clone(entity_factories.player)
 
     engine = Engine(player=player, debug=True)
 
@@ -203,7 +219,9 @@ def new_game() -> Engine:
     )
 
     # Tras generar todos los mapas, garantizar mínimos configurados por min_instances.
-    procgen.enforce_minimum_spawns(engine.game_world.levels)
+    # (En un mundo perezoso los mínimos se reparten por plantas en su plan.)
+    if not engine.game_world.lazy_generation:
+        procgen.enforce_minimum_spawns(engine.game_world.levels)
 
     # El primer piso ya se ha generado y el jugador ha sido colocado.
     engine.update_fov()
@@ -220,17 +238,31 @@ def new_game() -> Engine:
     if getattr(settings, "INTRO_ENABLED", False):
         engine.schedule_intro(getattr(settings, "INTRO_SLIDES", []))
 
+    if getattr(settings, "REPLAY_RECORDING", False):
+        import replay
+
+        engine.recorder = replay.Recorder.for_run(engine)
+
     return engine
 
 
 def load_game(filename: str) -> Engine:
     """Load an Engine instance from a file."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    startup.wait_for_warm_up()
+    import save_archive
+    from engine import Engine
+
+    if save_archive.is_archive(filename):
+        engine = save_archive.load(filename)
+    else:
+        # Partidas antiguas: un único pickle comprimido con lzma.
+        with open(filename, "rb") as f:
+            engine = pickle.loads(lzma.decompress(f.read()))
     assert isinstance(engine, Engine)
     game_world = getattr(engine, "game_world", None)
     if game_world:
         ambient_sound.play_for_floor(game_world.current_floor)
+        game_world.schedule_prefetch()
     return engine
 
 #def load_floor(filename: str) -> Engine:
@@ -247,6 +279,10 @@ class MainMenu(input_handlers.BaseEventHandler):
     def __init__(self) -> None:
         super().__init__()
         ambient_sound.play_menu_track()
+        # Mientras el jugador está en el menú se importa el resto del juego y
+        # se decodifican los efectos de sonido, ambos en segundo plano.
+        startup.warm_up_modules()
+        start_audio_warmup()
 
     def on_render(self, console: tcod.Console) -> None:
         """Render the main menu on a background image."""
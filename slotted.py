@@ -0,0 +1,191 @@
+"""Compact `__slots__` storage for entities, components and log messages.
+
+Las entidades (`Entity`, `Actor`, `Item`...), sus componentes (`Fighter`,
+`Equipment`, `Inventory`, `Equippable`, `Level`...) y los `Message` del log
+guardaban su estado en un `__dict__` por instancia; un mundo de 16 plantas
+tiene miles de ellos y, además, `prototypes.clone` y la carga de partidas
+materializaban ese diccionario en todos. Con `Slotted` cada clase declara
+en `__slots__` los atributos que usa y la instancia los guarda en su propia
+estructura, sin diccionario.
+
+- Cualquier atributo no declarado (los que se añaden al vuelo desde `procgen`,
+  mods, partidas antiguas...) sigue funcionando: va a un `__dict__` de
+  desbordamiento que sólo se crea si hace falta.
+- `__getstate__` devuelve un único diccionario `{atributo: valor}`, el mismo
+  formato que tenía el estado de las clases con `__dict__`, así que las
+  partidas antiguas se cargan sin conversión y las nuevas siguen siendo
+  legibles por `save_archive`.
+- `__setstate__` acepta ese diccionario (o la tupla `(dict, slots)` del
+  protocolo por defecto de pickle) y rellena con `state_defaults` los
+  atributos que falten en partidas guardadas antes de que existieran.
+- Los slots listados en `transient` (cachés) no forman parte del estado: ni
+  se guardan ni los copia `prototypes.clone`.
+- `state_renames` traduce atributos de partidas antiguas que ahora se guardan
+  con otro nombre (p. ej. un atributo convertido en propiedad), para que al
+  cargar no se ejecuten los setters.
+- `state_factories` calcula los atributos ausentes cuyo valor depende del
+  resto del estado (p. ej. el `kind` de una entidad a partir de su nombre).
+  Las subclases no deben redefinir `__setstate__`: `prototypes.clone` sólo
+  usa su camino rápido con las clases que conservan el de `Slotted`.
+
+`python slotted.py` compara los bytes por entidad de cada prototipo de
+`entity_factories` con slots frente a la disposición anterior con `__dict__`.
+"""
+
+from __future__ import annotations
+
+import copyreg
+import sys
+from itertools import repeat
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, Iterator, Mapping, Tuple
+
+_object_getstate = getattr(object, "__getstate__", None)
+
+
+class Slotted:
+    """Mixin for classes that keep their attributes in `__slots__`.
+
+    Las subclases declaran `__slots__` con sus atributos propios; el
+    `__dict__` de desbordamiento y `__weakref__` (necesario para la caché de
+    uids de `save_archive`) ya los aporta este mixin.
+    """
+
+    __slots__ = ("__dict__", "__weakref__")
+
+    # Valores para atributos ausentes en partidas guardadas con versiones anteriores.
+    state_defaults: ClassVar[Mapping[str, Any]] = {}
+    # Slots de caché que se recalculan y no se guardan.
+    transient: ClassVar[FrozenSet[str]] = frozenset()
+    # {nombre antiguo: nombre actual} para partidas guardadas con versiones anteriores.
+    state_renames: ClassVar[Mapping[str, str]] = {}
+    # {atributo: función(objeto) -> valor} para atributos ausentes que se derivan del estado.
+    state_factories: ClassVar[Mapping[str, Callable[[Any], Any]]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if _object_getstate is not None:
+            # No materializa el `__dict__` de desbordamiento si está vacío.
+            state = _object_getstate(self)
+        else:  # Python < 3.11
+            slots = {
+                name: getattr(self, name)
+                for name in copyreg._slotnames(type(self))
+                if hasattr(self, name)
+            }
+            state = (self.__dict__ or None, slots)
+        if isinstance(state, tuple):
+            extra, slots = state
+            if extra:
+                slots.update(extra)
+        else:
+            slots = dict(state) if state else {}
+        for name in self.transient:
+            slots.pop(name, None)
+        return slots
+
+    def __setstate__(self, state: Any) -> None:
+        if isinstance(state, tuple):
+            extra, slots = state
+            state = dict(slots or {})
+            if extra:
+                state.update(extra)
+        renames = self.state_renames
+        if renames and not renames.keys().isdisjoint(state):
+            state = dict(state)
+            for old, new in renames.items():
+                if old in state:
+                    state[new] = state.pop(old)
+        defaults = self.state_defaults
+        if defaults:
+            state = {**defaults, **state}
+        # `setattr` en C para no pagar un bucle Python por atributo.
+        for _ in map(setattr, repeat(self, len(state)), state.keys(), state.values()):
+            pass
+        for name, factory in self.state_factories.items():
+            if name not in state:
+                setattr(self, name, factory(self))
+
+
+def _owned_objects(root: Slotted) -> Iterator[Slotted]:
+    """`root` and the slotted objects it owns (components, inventory contents...)."""
+    seen = {id(root)}
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        yield obj
+        for name, value in obj.__getstate__().items():
+            if name == "parent":
+                continue
+            values = value if isinstance(value, (list, tuple)) else (value,)
+            for item in values:
+                if isinstance(item, Slotted) and id(item) not in seen:
+                    seen.add(id(item))
+                    stack.append(item)
+
+
+_dict_twins: Dict[type, type] = {}
+
+
+def _dict_backed_size(obj: Slotted) -> int:
+    """Bytes the same object took as a plain `__dict__` instance.
+
+    Se construye un gemelo sin slots y se le vuelca el estado con
+    `__dict__.update`, igual que hacían `prototypes.clone` y pickle.
+    """
+    cls = type(obj)
+    twin_cls = _dict_twins.get(cls)
+    if twin_cls is None:
+        twin_cls = _dict_twins[cls] = type(cls.__name__, (object,), {})
+    twin = twin_cls()
+    twin.__dict__.update(obj.__getstate__())
+    return sys.getsizeof(twin) + sys.getsizeof(twin.__dict__)
+
+
+def _slotted_size(obj: Slotted) -> int:
+    size = sys.getsizeof(obj)
+    if _object_getstate is not None:
+        extra = _object_getstate(obj)
+        extra = extra[0] if isinstance(extra, tuple) else extra
+        if extra:
+            size += sys.getsizeof(extra)
+    return size
+
+
+def memory_benchmark() -> Dict[str, Tuple[int, int]]:
+    """Bytes per spawned entity of every prototype in `entity_factories`.
+
+    Devuelve {nombre: (bytes con __dict__, bytes con slots)} contando la
+    entidad y los objetos que posee (componentes, objetos del inventario),
+    no los valores compartidos, e incluye la media bajo la clave "*".
+    """
+    import entity_factories
+    import prototypes
+    from entity import Entity
+
+    results: Dict[str, Tuple[int, int]] = {}
+    total_before = total_after = 0
+    for name, prototype in vars(entity_factories).items():
+        if not isinstance(prototype, Entity):
+            continue
+        clone = prototypes.clone(prototype)
+        before = after = 0
+        for obj in _owned_objects(clone):
+            before += _dict_backed_size(obj)
+            after += _slotted_size(obj)
+        results[name] = (before, after)
+        total_before += before
+        total_after += after
+    count = max(1, len(results))
+    results["*"] = (total_before // count, total_after // count)
+    return results
+
+
+if __name__ == "__main__":
+    sizes = memory_benchmark()
+    mean_before, mean_after = sizes.pop("*")
+    largest = sorted(sizes.items(), key=lambda entry: entry[1][0], reverse=True)[:10]
+    for name, (before, after) in largest:
+        print(f"{name:30} __dict__ {before:7d} B   slots {after:7d} B")
+    print(
+        f"{'MEAN':30} __dict__ {mean_before:7d} B   slots {mean_after:7d} B"
+        f"   -{100 * (1 - mean_after / max(mean_before, 1)):.0f}%"
+    )
@@ -0,0 +1,247 @@
+"""Precompiled spawn tables with O(1) alias-method sampling.
+
+Antes, cada entidad elegida en `procgen` reconstruía la lista de candidatos
+y pesos recorriendo todas las reglas (progresiones de peso incluidas) y
+preguntando al `generation_tracker` por cada una; las tablas de escombros,
+de botín de contenedores y de drops especiales rehacían también sus pesos
+acumulados en cada llamada.
+
+Aquí cada tabla se compila una sola vez por planta (candidatos elegibles y
+sus pesos) en una `AliasTable` (método de Vose), que devuelve una muestra
+con una única llamada a `random.random()`. Los topes `max_instances` sólo
+obligan a recompilar la tabla afectada, y sólo cuando alguna regla con tope
+se agota (o vuelve a estar disponible tras reiniciar el tracker).
+
+Se usa siempre el generador global de `random`, de modo que las semillas por
+planta de `floor_generation` siguen haciendo la generación reproducible.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Variantes compiladas que se conservan por tabla de reglas.
+_MAX_VARIANTS = 64
+
+# Devuelve el total procedural ya generado de una regla (por nombre).
+TotalGetter = Callable[[str], int]
+
+
+class AliasTable(Generic[T]):
+    """Weighted sampler with O(1) draws (Vose's alias method).
+
+    Las entradas con peso <= 0 se descartan; una tabla vacía es falsa y
+    `sample` no debe llamarse sobre ella.
+    """
+
+    __slots__ = ("items", "_prob", "_alias", "_size")
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]) -> None:
+        pairs = [(item, float(weight)) for item, weight in zip(items, weights) if weight > 0]
+        self.items: List[T] = [item for item, _ in pairs]
+        self._size = size = len(pairs)
+        self._prob: List[float] = [1.0] * size
+        self._alias: List[int] = list(range(size))
+        if not size:
+            return
+        total = sum(weight for _, weight in pairs)
+        scaled = [weight * size / total for _, weight in pairs]
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            self._prob[low] = scaled[low]
+            self._alias[low] = high
+            scaled[high] = (scaled[high] + scaled[low]) - 1.0
+            if scaled[high] < 1.0:
+                small.append(high)
+            else:
+                large.append(high)
+        # Lo que quede (por redondeo) tiene probabilidad 1 de quedarse.
+        for index in small + large:
+            self._prob[index] = 1.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def sample(self) -> T:
+        """Draw one item with a single call to `random.random()`."""
+        value = random.random() * self._size
+        index = int(value)
+        if value - index >= self._prob[index]:
+            index = self._alias[index]
+        return self.items[index]
+
+    def sample_many(self, count: int) -> List[T]:
+        if not self._size:
+            return []
+        return [self.sample() for _ in range(count)]
+
+
+def rule_weight(entry: Dict, floor: int) -> float:
+    """Spawn weight of a rule entry on `floor` (0 if not eligible)."""
+    min_floor = entry.get("min_floor", 1)
+    if floor < min_floor:
+        return 0.0
+    weight = float(entry.get("base_weight", 0))
+    progression = entry.get("weight_progression")
+    if progression:
+        for threshold, value in progression:
+            if floor >= threshold:
+                weight = float(value)
+            else:
+                break
+    else:
+        growth = float(entry.get("weight_per_floor", 0))
+        weight += growth * max(0, floor - min_floor)
+    return max(0.0, weight)
+
+
+class SpawnRuleTable:
+    """Spawn rules eligible on one floor, compiled into an alias table.
+
+    `select` reproduce la semántica de los antiguos `_select_*_spawn_entries`:
+    una regla con `max_instances` deja de ser candidata cuando el total
+    procedural más lo ya elegido en la llamada alcanza el tope.
+    """
+
+    def __init__(self, rules: Dict[str, Dict], floor: int) -> None:
+        self.rules = rules
+        self.floor = floor
+        self._entries: List[Tuple[Dict, float]] = []
+        self._caps: Dict[str, int] = {}
+        for entry in rules.values():
+            weight = rule_weight(entry, floor)
+            if weight <= 0:
+                continue
+            self._entries.append((entry, weight))
+            max_instances = entry.get("max_instances")
+            if max_instances is not None:
+                self._caps[entry["name"]] = max_instances
+        # Variantes ya compiladas por conjunto de reglas agotadas: los topes
+        # que sólo se alcanzan dentro de una llamada vuelven a la tabla previa.
+        self._compiled: Dict[FrozenSet[str], AliasTable[Dict]] = {}
+        self.rebuilds = 0
+        self._excluded: FrozenSet[str] = frozenset()
+        self._table: AliasTable[Dict] = self._compile(self._excluded)
+
+    def _compile(self, excluded: FrozenSet[str]) -> AliasTable[Dict]:
+        table = self._compiled.get(excluded)
+        if table is None:
+            if len(self._compiled) >= _MAX_VARIANTS:
+                self._compiled.clear()
+            entries = [
+                (entry, weight) for entry, weight in self._entries if entry["name"] not in excluded
+            ]
+            table = AliasTable([entry for entry, _ in entries], [weight for _, weight in entries])
+            self._compiled[excluded] = table
+            self.rebuilds += 1
+        return table
+
+    def _exclude(self, excluded: FrozenSet[str]) -> None:
+        if excluded != self._excluded:
+            self._excluded = excluded
+            self._table = self._compile(excluded)
+
+    def select(self, number: int, totals: Optional[TotalGetter] = None) -> List[Dict]:
+        pending: Counter = Counter()
+
+        def _used(name: str) -> int:
+            current = pending[name]
+            if totals is not None:
+                current += totals(name)
+            return current
+
+        if totals is not None:
+            self._exclude(
+                frozenset(name for name, cap in self._caps.items() if totals(name) >= cap)
+            )
+        else:
+            self._exclude(frozenset())
+        selections: List[Dict] = []
+        for _ in range(number):
+            if not self._table:
+                break
+            choice = self._table.sample()
+            selections.append(choice)
+            name = choice["name"]
+            pending[name] += 1
+            cap = self._caps.get(name)
+            if cap is not None and _used(name) >= cap:
+                self._exclude(self._excluded | {name})
+        return selections
+
+
+def _floor_weighted_chances(
+    weighted_chances_by_floor: Dict[int, List[Tuple[Any, float]]], floor: int
+) -> Dict[Any, float]:
+    chances: Dict[Any, float] = {}
+    for key, values in weighted_chances_by_floor.items():
+        if key > floor:
+            break
+        for item, weight in values:
+            chances[item] = weight
+    return chances
+
+
+_rule_tables: Dict[Tuple[int, int], SpawnRuleTable] = {}
+_floor_tables: Dict[Tuple[int, int], Tuple[Dict, AliasTable]] = {}
+_weighted_tables: Dict[int, Tuple[Sequence, AliasTable]] = {}
+
+
+def rule_table(rules: Dict[str, Dict], floor: int) -> SpawnRuleTable:
+    """Return the compiled table for `rules` on `floor` (cached)."""
+    key = (id(rules), floor)
+    table = _rule_tables.get(key)
+    if table is None or table.rules is not rules:
+        table = SpawnRuleTable(rules, floor)
+        _rule_tables[key] = table
+    return table
+
+
+def floor_table(
+    weighted_chances_by_floor: Dict[int, List[Tuple[T, float]]], floor: int
+) -> AliasTable[T]:
+    """Compile a `{min_floor: [(item, weight)]}` table (later floors override weights)."""
+    key = (id(weighted_chances_by_floor), floor)
+    cached = _floor_tables.get(key)
+    if cached is None or cached[0] is not weighted_chances_by_floor:
+        chances = _floor_weighted_chances(weighted_chances_by_floor, floor)
+        cached = (weighted_chances_by_floor, AliasTable(list(chances), list(chances.values())))
+        _floor_tables[key] = cached
+    return cached[1]
+
+
+def weighted_table(entries: Sequence[Tuple[T, float]]) -> AliasTable[T]:
+    """Compile a flat `[(item, weight)]` list (cached by identity)."""
+    cached = _weighted_tables.get(id(entries))
+    if cached is None or cached[0] is not entries:
+        cached = (entries, AliasTable([item for item, _ in entries], [weight for _, weight in entries]))
+        _weighted_tables[id(entries)] = cached
+    return cached[1]
+
+
+def clear_cache() -> None:
+    """Forget every compiled table (e.g. after editing the spawn settings at runtime)."""
+    _rule_tables.clear()
+    _floor_tables.clear()
+    _weighted_tables.clear()
@@ -0,0 +1,186 @@
+"""Startup instrumentation and background import of the modules the main menu doesn't need.
+
+Hasta que aparecía el menú principal se importaba todo el juego: los
+prototipos de `entity_factories`, los generadores, `procgen`, el motor y
+pygame (que además inicializaba el mixer y precargaba audio). Nada de eso
+hace falta para dibujar el menú.
+
+- El menú se dibuja con `main`, `setup_game`, `input_handlers` y `settings`.
+  `setup_game` importa el motor, los prototipos y los generadores dentro de
+  `new_game`/`load_game`, y `audio` importa pygame al inicializar el mixer.
+- Mientras se muestra el menú, `warm_up_modules()` importa esos módulos en
+  un hilo en segundo plano (y `audio.start_audio_warmup()` hace lo mismo con
+  pygame y los efectos). `new_game`/`load_game` esperan a que termine con
+  `wait_for_warm_up()` antes de importarlos ellos, para no competir por los
+  mismos módulos desde dos hilos.
+
+Con `STARTUP_PROFILE=1 python main.py` se mide el arranque: tiempo de import
+de cada módulo (propio y acumulado, como `python -X importtime`) y de cada
+fase hasta el primer frame del menú; el informe se imprime al presentarse
+ese frame. `python startup.py` hace lo mismo sin abrir ventana.
+"""
+
+from __future__ import annotations
+
+import builtins
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Módulos que el menú no necesita, en el orden en que los pide `new_game`.
+DEFERRED_MODULES: Tuple[str, ...] = (
+    "entity_factories",
+    "prototypes",
+    "engine",
+    "game_map",
+    "procgen",
+    "generators",
+    "save_archive",
+)
+
+ENABLED = os.environ.get("STARTUP_PROFILE", "").strip() not in ("", "0")
+
+_t0 = time.perf_counter()
+_original_import = builtins.__import__
+_local = threading.local()
+# (módulo, hilo, tiempo propio, tiempo acumulado, profundidad)
+_imports: List[Tuple[str, str, float, float, int]] = []
+# (fase, segundos desde la fase anterior, segundos desde el arranque)
+_phases: List[Tuple[str, float, float]] = []
+_last_mark = _t0
+_reported = False
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def _timed_import(name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+    # Sólo cuenta la primera importación; las demás son una búsqueda en sys.modules.
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        _imports.append(
+            (name, threading.current_thread().name, elapsed - children, elapsed, len(stack))
+        )
+
+
+def install() -> None:
+    """Start timing imports (done automatically on import when STARTUP_PROFILE is set)."""
+    global ENABLED
+    ENABLED = True
+    if builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+def uninstall() -> None:
+    if builtins.__import__ is _timed_import:
+        builtins.__import__ = _original_import
+
+
+def mark(phase: str) -> None:
+    """Record the end of a startup phase (time since the previous mark)."""
+    global _last_mark
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    _phases.append((phase, now - _last_mark, now - _t0))
+    _last_mark = now
+
+
+def first_frame() -> None:
+    """Call after presenting a frame; the first call closes the profile and prints it."""
+    global _reported
+    if _reported or not ENABLED:
+        return
+    _reported = True
+    mark("first frame")
+    print(report())
+
+
+def _warm_up(names: Iterable[str]) -> None:
+    for name in names:
+        try:
+            __import__(name)
+        except Exception as exc:  # pragma: no cover - se reintentará al usarlo
+            print(f"[startup] Unable to preload '{name}': {exc}")
+
+
+def warm_up_modules(names: Iterable[str] = DEFERRED_MODULES) -> Optional[threading.Thread]:
+    """Import `names` in a background thread (only the first call starts one)."""
+    global _warm_up_thread
+    if _warm_up_thread is not None:
+        return _warm_up_thread
+    pending = [name for name in names if name not in sys.modules]
+    if not pending:
+        return None
+    _warm_up_thread = threading.Thread(
+        target=_warm_up, args=(pending,), name="module-warmup", daemon=True
+    )
+    _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def wait_for_warm_up(timeout: Optional[float] = None) -> None:
+    """Block until the background imports finish (no-op if none are running)."""
+    thread = _warm_up_thread
+    if thread is not None and thread is not threading.current_thread():
+        thread.join(timeout)
+
+
+def import_times() -> Dict[str, Tuple[float, float]]:
+    """{module: (self seconds, cumulative seconds)} of every timed import."""
+    return {name: (own, total) for name, _, own, total, _ in _imports}
+
+
+def report(top: int = 25) -> str:
+    lines = ["Startup profile", "  phase                        +ms    at ms"]
+    for phase, delta, at in _phases:
+        lines.append(f"  {phase:24} {delta * 1e3:8.1f} {at * 1e3:8.1f}")
+    threads: Dict[str, List[Tuple[str, str, float, float, int]]] = {}
+    for record in _imports:
+        threads.setdefault(record[1], []).append(record)
+    for thread_name, records in threads.items():
+        top_level = sum(total for _, _, _, total, depth in records if depth == 0)
+        lines.append(f"  imports in {thread_name}: {len(records)} modules, {top_level * 1e3:.1f} ms")
+        lines.append("      self ms   total ms  module")
+        slowest = sorted(records, key=lambda record: record[3], reverse=True)[:top]
+        for name, _, own, total, depth in slowest:
+            lines.append(f"    {own * 1e3:9.1f} {total * 1e3:10.1f}  {'  ' * depth}{name}")
+    return "\n".join(lines)
+
+
+if ENABLED:
+    install()
+
+
+if __name__ == "__main__":
+    # Arranque hasta el menú sin ventana: imports, creación del menú y warm-up.
+    # Se usa el módulo `startup` importable (el mismo que ve `main`), no este `__main__`.
+    os.environ["STARTUP_PROFILE"] = "1"
+    import startup as profile
+
+    import main  # noqa: F401
+    profile.mark("imports")
+    import setup_game
+
+    setup_game.MainMenu()
+    profile.mark("main menu")
+    profile.wait_for_warm_up()
+    import audio
+
+    audio_thread = audio.start_audio_warmup()
+    if audio_thread is not None:
+        audio_thread.join()
+    profile.mark("background warm-up")
+    print(profile.report())
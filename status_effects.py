@@ -0,0 +1,190 @@
+"""Registry of actors with active status effects and the timer wheel of temporal effects.
+
+El mantenimiento de cada turno (`autohealmonsters`, `update_poison`,
+`update_fire`) construía un conjunto nuevo con todos los actores (o todas las
+entidades) de la planta para tocar sólo a los pocos que estaban heridos,
+envenenados o ardiendo, y `update_temporal_effects` recorría la lista entera
+de efectos temporales para descontar un turno a cada uno.
+
+- `StatusRegistry` (en `engine.status_effects`) guarda qué entidades de la
+  planta actual arden (`BURNING`), están envenenadas (`POISONED`) o les falta
+  vida y pueden regenerarla (`RECOVERING`). Los componentes de combate se
+  apuntan al cambiar `is_burning`, `is_poisoned` o `hp`; las entidades salen
+  al acabarse el efecto, al morir o al dejar la planta.
+- El registro no se guarda con la partida: al cambiar de planta (o tras
+  cargar) se reconstruye recorriendo una vez las entidades de la nueva planta.
+- `TimerWheel` (en `engine.temporal_effects`) agrupa los efectos temporales
+  por el turno de mantenimiento en el que caducan, así que cada turno sólo se
+  mira el cubo que vence. Sí se guarda con la partida.
+
+Con esto el coste del mantenimiento depende de los efectos activos, no de la
+población de la planta.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+import entity_kinds
+from entity import Actor, Obstacle
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from game_map import GameMap
+
+BURNING = "burning"
+POISONED = "poisoned"
+RECOVERING = "recovering"
+EFFECTS = (BURNING, POISONED, RECOVERING)
+
+
+def is_active_actor(entity: Entity) -> bool:
+    """Same membership test as `GameMap.actors` (living actors and blocking obstacles)."""
+    if isinstance(entity, Actor):
+        return entity.is_alive
+    return (
+        isinstance(entity, Obstacle)
+        and entity.is_alive
+        and entity.blocks_movement
+        and getattr(entity, "kind", None) != entity_kinds.DOOR
+    )
+
+
+def needs_recovery(fighter: Any) -> bool:
+    hp = getattr(fighter, "hp", None)
+    max_hp = getattr(fighter, "max_hp", None)
+    return hp is not None and max_hp is not None and hp < max_hp
+
+
+def notify(component: Any, effect: str, active: bool) -> None:
+    """Tell the engine's registry that `component`'s entity gained or lost `effect`.
+
+    Se llama desde los setters de los componentes; si la entidad todavía no
+    está en un mapa (prototipos, clones a medio construir) no hace nada y el
+    registro la encontrará al reconstruirse.
+    """
+    entity = getattr(component, "parent", None)
+    game_map = getattr(entity, "parent", None)
+    engine = getattr(game_map, "engine", None)
+    registry = getattr(engine, "status_effects", None)
+    if registry is not None:
+        registry.set_active(effect, entity, active)
+
+
+class StatusRegistry:
+    """Entities of the current floor with an active status effect.
+
+    Vive en `engine.status_effects` y no se guarda con la partida.
+    """
+
+    def __init__(self) -> None:
+        self._map: Optional[GameMap] = None
+        # {efecto: {entidad: None}} (dict para conservar el orden de alta).
+        self._active: Dict[str, Dict[Entity, None]] = {effect: {} for effect in EFFECTS}
+
+    def sync(self, game_map: Optional[GameMap]) -> None:
+        """Rebuild the registry if the current floor changed since the last call."""
+        if game_map is self._map:
+            return
+        self._map = game_map
+        for registry in self._active.values():
+            registry.clear()
+        if game_map is None:
+            return
+        burning = self._active[BURNING]
+        poisoned = self._active[POISONED]
+        recovering = self._active[RECOVERING]
+        for entity in game_map.entities:
+            fighter = getattr(entity, "fighter", None)
+            if fighter is None:
+                continue
+            if getattr(fighter, "is_burning", False):
+                burning[entity] = None
+            if not is_active_actor(entity):
+                continue
+            if getattr(fighter, "is_poisoned", False):
+                poisoned[entity] = None
+            if needs_recovery(fighter):
+                recovering[entity] = None
+
+    def set_active(self, effect: str, entity: Entity, active: bool) -> None:
+        # Las entidades de otras plantas se recogen al reconstruir el registro.
+        if self._map is None or getattr(entity, "parent", None) is not self._map:
+            return
+        if active:
+            self._active[effect][entity] = None
+        else:
+            self._active[effect].pop(entity, None)
+
+    def discard(self, effect: str, entity: Entity) -> None:
+        self._active[effect].pop(entity, None)
+
+    def forget(self, entity: Entity) -> None:
+        """Drop `entity` from every registry (it died or left the floor)."""
+        for registry in self._active.values():
+            registry.pop(entity, None)
+
+    def affected(self, effect: str, game_map: Optional[GameMap]) -> List[Entity]:
+        """Snapshot of the entities of `game_map` with `effect` active."""
+        self.sync(game_map)
+        return list(self._active[effect])
+
+    def count(self, effect: str) -> int:
+        return len(self._active[effect])
+
+
+class TimerWheel:
+    """Temporal effects bucketed by the upkeep tick on which they expire.
+
+    Cada efecto es el mismo diccionario de siempre (`actor`, `turns`,
+    `amount`, `attribute`, `message_down`) más la clave `expires`. Un efecto
+    de N turnos caduca en el (N + 1)-ésimo `advance`, igual que cuando se
+    descontaba un turno en cada pasada. Se puede recorrer, preguntar si está
+    vacía y quitarle efectos (`remove`) como a la lista que sustituye.
+    """
+
+    def __init__(self, effects: Iterable[Dict[str, Any]] = ()) -> None:
+        self.now = 0
+        self.buckets: Dict[int, List[Dict[str, Any]]] = {}
+        for effect in effects:
+            self.append(effect)
+
+    def schedule(self, effect: Dict[str, Any], turns: int) -> None:
+        due = self.now + max(0, int(turns)) + 1
+        effect["expires"] = due
+        self.buckets.setdefault(due, []).append(effect)
+
+    def append(self, effect: Dict[str, Any]) -> None:
+        self.schedule(effect, effect.get("turns", 0))
+
+    def advance(self) -> List[Dict[str, Any]]:
+        """Move to the next upkeep tick and return the effects that expire on it."""
+        self.now += 1
+        return self.buckets.pop(self.now, [])
+
+    def remaining(self, effect: Dict[str, Any]) -> int:
+        return max(0, effect.get("expires", self.now) - self.now - 1)
+
+    def remove(self, effect: Dict[str, Any]) -> None:
+        bucket = self.buckets.get(effect.get("expires"))
+        if bucket is not None:
+            for index, scheduled in enumerate(bucket):
+                if scheduled is effect:
+                    del bucket[index]
+                    if not bucket:
+                        del self.buckets[effect["expires"]]
+                    return
+        raise ValueError("effect is not scheduled")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for due in sorted(self.buckets):
+            yield from self.buckets[due]
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.buckets)
+
+    def __repr__(self) -> str:
+        return f"TimerWheel(now={self.now}, effects={list(self)!r})"
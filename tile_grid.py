@@ -0,0 +1,218 @@
+"""Palette-indexed storage for `GameMap.tiles`.
+
+Cada casilla guardaba un registro `tile_dt` completo (transitable,
+transparente y dos `graphic_dt` con glifo y colores: 18 bytes) aunque un
+mapa sólo usa unas decenas de tiles distintos, y esos registros se repetían
+en cada partida guardada. Aquí un mapa guarda un array de índices (uint8,
+o uint16 si la paleta crece mucho) en una paleta compartida, sembrada con
+los tiles de `tile_types`, a la que se añaden al vuelo las variantes (muros
+recoloreados, caminos pintados...).
+
+`TileGrid` imita la parte de la API de un ndarray estructurado que usa el
+juego:
+
+- `tiles["walkable"]`, `tiles["transparent"]`, `tiles["dark"]` y
+  `tiles["light"]` devuelven vistas `paleta[ids]` cacheadas y de sólo
+  lectura, que se actualizan en el sitio cuando cambia una casilla.
+- `tiles[x, y]` devuelve el registro del tile (también de sólo lectura) y
+  `tiles[x, y] = tile_types.floor` (o con slices/máscaras) lo asigna.
+- `is_tile`, `mask_of` y `glyph_mask` comparan por índice en vez de
+  comparar registros casilla a casilla.
+- `version` cambia con cada asignación de casillas (es única en todo el
+  proceso), así que sirve de clave para cachés que dependen de la geometría
+  del mapa, como los mapas de luz de `lighting`.
+
+Al serializarse cada mapa guarda sus índices con una paleta local (sólo los
+tiles que usa), así que los mapas generados en otros procesos o cargados de
+disco se reindexan contra la paleta de este proceso.
+"""
+
+from __future__ import annotations
+
+from itertools import count
+from typing import Any, Dict, Hashable, Tuple, Union
+
+import numpy as np  # type: ignore
+
+import tile_types
+
+# Campos de primer nivel de `tile_dt` que se pueden pedir como vista.
+FIELDS = ("walkable", "transparent", "dark", "light")
+
+ViewKey = Hashable
+
+_versions = count(1)
+
+
+class TilePalette:
+    """Shared table of distinct tiles; maps only store indices into it."""
+
+    def __init__(self) -> None:
+        self._records = np.zeros(64, dtype=tile_types.tile_dt)
+        self._size = 0
+        self._ids: Dict[bytes, int] = {}
+        self._luts: Dict[ViewKey, np.ndarray] = {}
+
+    @classmethod
+    def from_module(cls, module: Any) -> "TilePalette":
+        """Seed a palette with every tile defined at module level (sorted by name)."""
+        palette = cls()
+        for name in sorted(vars(module)):
+            value = getattr(module, name)
+            if isinstance(value, np.ndarray) and value.dtype == tile_types.tile_dt and value.ndim == 0:
+                palette.intern(value)
+        return palette
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def records(self) -> np.ndarray:
+        """Read-only array with one `tile_dt` record per palette id."""
+        records = self._records[: self._size]
+        records.flags.writeable = False
+        return records
+
+    def intern(self, tile: Any) -> int:
+        """Return the id of `tile`, adding it to the palette if it is new."""
+        record = np.asarray(tile, dtype=tile_types.tile_dt)
+        key = record.tobytes()
+        tile_id = self._ids.get(key)
+        if tile_id is None:
+            tile_id = self._size
+            if tile_id >= len(self._records):
+                grown = np.zeros(len(self._records) * 2, dtype=tile_types.tile_dt)
+                grown[:tile_id] = self._records[:tile_id]
+                self._records = grown
+            self._records[tile_id] = record
+            self._size += 1
+            self._ids[key] = tile_id
+            self._luts.clear()
+        return tile_id
+
+    def lut(self, key: ViewKey) -> np.ndarray:
+        """Per-id lookup table for a view key (a field name or a glyph test)."""
+        lut = self._luts.get(key)
+        if lut is None:
+            records = self._records[: self._size]
+            if isinstance(key, tuple):
+                _, layer, char = key
+                lut = records[layer]["ch"] == char
+            else:
+                lut = np.ascontiguousarray(records[key])
+            self._luts[key] = lut
+        return lut
+
+
+PALETTE = TilePalette.from_module(tile_types)
+
+
+def tile_id(tile: Any) -> int:
+    return PALETTE.intern(tile)
+
+
+def _id_dtype(count: int) -> np.dtype:
+    return np.dtype(np.uint8) if count <= 256 else np.dtype(np.uint16)
+
+
+class TileGrid:
+    """A map's tiles as palette ids, with cached per-field views."""
+
+    def __init__(self, shape: Tuple[int, int], fill: Any = None) -> None:
+        fill_id = tile_id(fill if fill is not None else tile_types.wall)
+        self.ids = np.full(shape, fill_id, dtype=_id_dtype(len(PALETTE)), order="F")
+        self._views: Dict[ViewKey, np.ndarray] = {}
+        self.version = next(_versions)
+
+    @classmethod
+    def from_array(cls, records: np.ndarray) -> "TileGrid":
+        """Build a grid from a plain `tile_dt` array (e.g. an old save)."""
+        grid = cls(records.shape)
+        grid[...] = records
+        return grid
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.ids.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes
+
+    def view(self, key: ViewKey) -> np.ndarray:
+        view = self._views.get(key)
+        if view is None:
+            view = PALETTE.lut(key)[self.ids]
+            view.flags.writeable = False
+            self._views[key] = view
+        return view
+
+    def release_views(self) -> None:
+        """Forget the cached views (they are rebuilt on the next access)."""
+        self._views.clear()
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            if key not in FIELDS:
+                raise KeyError(key)
+            return self.view(key)
+        ids = self.ids[key]
+        if np.ndim(ids) == 0:
+            return PALETTE.records[int(ids)]
+        return PALETTE.records[ids]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if isinstance(key, str):
+            # tiles["walkable"] = máscara: se recalculan los registros enteros.
+            records = np.array(self[...])
+            records[key] = value
+            self[...] = records
+            return
+        value = np.asarray(value, dtype=tile_types.tile_dt)
+        if value.ndim == 0:
+            new_ids: Union[int, np.ndarray] = tile_id(value)
+            self._reserve(new_ids)
+        else:
+            flat = np.ascontiguousarray(value).reshape(-1)
+            keys = flat.view(np.dtype((np.void, flat.dtype.itemsize)))
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            palette_ids = np.array([tile_id(flat[index]) for index in first], dtype=np.intp)
+            self._reserve(int(palette_ids.max()))
+            new_ids = palette_ids[inverse.reshape(-1)].reshape(value.shape)
+        self.ids[key] = new_ids
+        self.version = next(_versions)
+        for view_key, view in self._views.items():
+            view.flags.writeable = True
+            view[key] = PALETTE.lut(view_key)[self.ids[key]]
+            view.flags.writeable = False
+
+    def _reserve(self, max_id: int) -> None:
+        if max_id > np.iinfo(self.ids.dtype).max:
+            self.ids = self.ids.astype(np.uint16, order="F")
+
+    def is_tile(self, x: int, y: int, tile: Any) -> bool:
+        """True if the tile at (x, y) is exactly `tile`."""
+        return int(self.ids[x, y]) == tile_id(tile)
+
+    def mask_of(self, tile: Any) -> np.ndarray:
+        """Boolean array of the tiles that are exactly `tile`."""
+        return self.ids == tile_id(tile)
+
+    def glyph_mask(self, char: int, layer: str = "dark") -> np.ndarray:
+        """Cached boolean array of the tiles drawn with `char` on `layer`."""
+        return self.view(("glyph", layer, int(char)))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        used, inverse = np.unique(self.ids, return_inverse=True)
+        local_ids = inverse.reshape(self.ids.shape).astype(_id_dtype(len(used)))
+        return {
+            "ids": np.asfortranarray(local_ids),
+            "tiles": np.array(PALETTE.records[used]),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        mapping = np.array([tile_id(record) for record in state["tiles"]], dtype=np.intp)
+        dtype = _id_dtype(int(mapping.max()) + 1 if len(mapping) else 0)
+        self.ids = np.asfortranarray(mapping[state["ids"]].astype(dtype))
+        self._views = {}
+        self.version = next(_versions)
@@ -34,6 +34,26 @@ def new_tile(
     """Helper function for defining individual tile types """
     return np.array((walkable, transparent, dark, light), dtype=tile_dt)
 
+def recolor(
+    tile: np.ndarray,
+    *,
+    dark_fg=None,
+    dark_bg=None,
+    light_fg=None,
+    light_bg=None,
+) -> np.ndarray:
+    """Return a copy of `tile` with the given colors replaced."""
+    new = np.array(tile, dtype=tile_dt)
+    for layer, part, value in (
+        ("dark", "fg", dark_fg),
+        ("dark", "bg", dark_bg),
+        ("light", "fg", light_fg),
+        ("light", "bg", light_bg),
+    ):
+        if value is not None:
+            new[layer][part] = value
+    return new
+
 # SHROUD represents unexplored, unseen tiles
 SHROUD = np.array((ord(" "), (255, 255, 255), (0, 0, 0)), dtype=graphic_dt)
 
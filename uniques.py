@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Optional, Tuple
 
 import entity_factories
 import random
+import seeding
 from settings import TOTAL_FLOORS
 
 if TYPE_CHECKING:
@@ -20,7 +21,8 @@ artifact_location: Optional[Tuple[int, Tuple[int, int]]] = None
 campfire_counter = 0
 campfire_exist = False
 
-# Asignamos nivel en que generar el artefacto
+# Asignamos nivel en que generar el artefacto (con la semilla del proceso, ver seeding)
+seeding.seed_module(__name__)
 grial_floor = random.randint(10, 16)
 goblin_amulet_floor = random.randint(6,14)
 the_artifact_floor = TOTAL_FLOORS
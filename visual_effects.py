@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-import random
-from typing import List, Sequence, Tuple, Protocol, TYPE_CHECKING
+from typing import List, Optional, Sequence, Tuple, Protocol, TYPE_CHECKING
+
+import seeding
+
+# Sólo efectos visuales: flujo cosmético (ver seeding).
+rng = seeding.cosmetic
 
 if TYPE_CHECKING:
     from tcod.console import Console
 
+    from camera import Camera
+
 
 class VisualEffect(Protocol):
     """Simple interface for visual effects that can update independently of turns."""
@@ -13,7 +19,8 @@ class VisualEffect(Protocol):
     def update(self, dt: float) -> None:
         ...
 
-    def render(self, console: "Console", game_map: object) -> None:
+    def render(self, console: "Console", game_map: object, camera: Optional["Camera"] = None) -> None:
+        """Draw on `console`; map coordinates go through `camera` if there is one."""
         ...
 
 
@@ -49,15 +56,15 @@ class WindEffect:
         for _ in range(target_count):
             self.particles.append(
                 {
-                    "x": random.uniform(0, self.width),
-                    "y": random.uniform(0, self.height),
+                    "x": rng.uniform(0, self.width),
+                    "y": rng.uniform(0, self.height),
                     "vx": self._random_speed(),
-                    "vy": random.uniform(-0.25, 0.25),
+                    "vy": rng.uniform(-0.25, 0.25),
                 }
             )
 
     def _random_speed(self) -> float:
-        speed = random.uniform(self.speed_min, self.speed_max)
+        speed = rng.uniform(self.speed_min, self.speed_max)
         return speed * self.direction
 
     def update(self, dt: float) -> None:
@@ -68,20 +75,24 @@ class WindEffect:
             particle["x"] = (particle["x"] + particle["vx"] * dt) % self.width
             particle["y"] = (particle["y"] + particle["vy"] * dt) % self.height
             # Small vertical jitter to keep the motion organic.
-            particle["vy"] += random.uniform(-0.05, 0.05)
+            particle["vy"] += rng.uniform(-0.05, 0.05)
             particle["vy"] = max(-0.35, min(0.35, particle["vy"]))
 
-    def render(self, console: "Console", game_map: object) -> None:
+    def render(self, console: "Console", game_map: object, camera: Optional["Camera"] = None) -> None:
         visible = getattr(game_map, "visible", None)
         for particle in self.particles:
             x = int(particle["x"]) % self.width
             y = int(particle["y"]) % self.height
+            if camera is not None and not camera.in_view(x, y):
+                continue
             if visible is not None:
                 try:
                     if not visible[x, y]:
                         continue
                 except Exception:
                     pass
+            if camera is not None:
+                x, y = camera.map_to_screen(x, y)
             console.print(x=x, y=y, string=self.char, fg=self.color)
 
 